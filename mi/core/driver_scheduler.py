@@ -5,8 +5,10 @@
 @file mi/core/driver_scheduler.py
 @author Bill French
 @brief Provides task/event scheduling for drivers
-uses the PolledScheduler and provides a common, simplified interface
-for instrument and platform drivers.
+uses the TimerWheelScheduler (or optionally the apscheduler based
+PolledScheduler) and provides a common, simplified interface for
+instrument and platform drivers.  All TimerWheelSchedulers in a process
+share one timer thread.
 
 The scheduler is configured by passing a configuration dictionary
 to the constructor or my calling add_config.  Calling add_config
@@ -128,6 +130,7 @@ from mi.core.log import get_logger; log = get_logger()
 
 from mi.core.common import BaseEnum
 from mi.core.scheduler import PolledScheduler
+from mi.core.timer_wheel import TimerWheelScheduler
 from mi.core.exceptions import SchedulerException
 
 class TriggerType(BaseEnum):
@@ -176,7 +179,7 @@ class DriverScheduler(object):
     jobs.
     """
 
-    def __init__(self, config = None):
+    def __init__(self, config = None, timer_wheel = True):
         """
         config structure:
         {
@@ -186,8 +189,13 @@ class DriverScheduler(object):
             }
         }
         @param config: job configuration structure.
+        @param timer_wheel: if True schedule on the shared timer wheel,
+                            otherwise use a PolledScheduler with its own thread.
         """
-        self._scheduler = PolledScheduler()
+        if(timer_wheel):
+            self._scheduler = TimerWheelScheduler()
+        else:
+            self._scheduler = PolledScheduler()
         if(config):
             self.add_config(config)
 
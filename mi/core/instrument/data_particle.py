@@ -48,6 +48,8 @@ class DataParticleKey(BaseEnum):
     VALUE = "value"
     BINARY = "binary"
     NEW_SEQUENCE = "new_sequence"
+    SEQUENCE_ID = "sequence_id"
+    SEQUENCE_INDEX = "sequence_index"
 
 class DataParticleValue(BaseEnum):
     JSON_DATA = "JSON_Data"
@@ -150,6 +152,30 @@ class DataParticle(object):
 
         self.contents[DataParticleKey.INTERNAL_TIMESTAMP] = float(timestamp)
 
+    def set_driver_timestamp(self, timestamp):
+        """
+        Set the driver timestamp.  Used when a batch of particles is
+        published together so they all share a single driver timestamp.
+        @param timestamp: NTP timestamp to set
+        """
+        self.contents[DataParticleKey.DRIVER_TIMESTAMP] = float(timestamp)
+
+    def set_sequence(self, sequence_id, sequence_index, new_sequence=None):
+        """
+        Attach record sequence information to the particle
+        @param sequence_id: sequence identifier from a Sequencer
+        @param sequence_index: index of this record in the sequence
+        @param new_sequence: True if this record starts a new sequence
+        @raise TypeError if new_sequence is not a bool
+        """
+        if new_sequence is not None and not isinstance(new_sequence, bool):
+            raise TypeError("new_sequence is not a bool")
+
+        self.contents[DataParticleKey.SEQUENCE_ID] = sequence_id
+        self.contents[DataParticleKey.SEQUENCE_INDEX] = sequence_index
+        if new_sequence is not None:
+            self.contents[DataParticleKey.NEW_SEQUENCE] = new_sequence
+
     def set_value(self, id, value):
         """
         Set a content value, restricted as necessary
@@ -17,6 +17,10 @@ from mi.core.exceptions import InstrumentStateException
 from mi.core.log import get_logger,LoggerManager
 log = get_logger()
 
+# Capability cache key of the events handled in all states.  None can't be
+# used, it is the current state before the FSM is started.
+ALL_STATES = object()
+
 class InstrumentFSM(object):
     """
     Simple state mahcine for driver and agent classes.
@@ -40,6 +44,16 @@ class InstrumentFSM(object):
         self.enter_event = enter_event
         self.exit_event = exit_event
 
+        # Enum membership tests scan the enum class, so keep sets for the
+        # event path.
+        self._state_set = set(states.list())
+        self._event_set = set(events.list())
+
+        # Per-state dispatch table {state: {event: handler}} and cached
+        # capability lists keyed by state (None for all states).
+        self._dispatch = {}
+        self._capabilities = {}
+
     def get_current_state(self):
         """
         Return current state.
@@ -56,13 +70,15 @@ class InstrumentFSM(object):
         @retval True if successful, False otherwise.
         """
 
-        if not self.states.has(state):
+        if state not in self._state_set:
             return False
         
-        if not self.events.has(event):
+        if event not in self._event_set:
             return False
 
         self.state_handlers[(state,event)] = handler
+        self._dispatch.setdefault(state, {})[event] = handler
+        self._capabilities = {}
         return True
         
     def start(self, state, *args, **kwargs):
@@ -76,11 +92,11 @@ class InstrumentFSM(object):
         @raises Any exception raised by the enter handler.
         """
 
-        if not self.states.has(state):
+        if state not in self._state_set:
             return False
                 
         self.current_state = state
-        handler = self.state_handlers.get((state, self.enter_event), None)
+        handler = self._get_state_handler(state, self.enter_event)
         if handler:
             handler(*args, **kwargs)
         return True
@@ -97,24 +113,40 @@ class InstrumentFSM(object):
         @raises Any exception raised by the handlers.
         """
 
-        next_state = None
-        result = None
+        handler = self._get_event_handler(self.current_state, event)
+        (next_state, result) = handler(*args, **kwargs)
 
-        if self.events.has(event):
-            handler = self.state_handlers.get((self.current_state, event), None)
-            if handler:
-                (next_state, result) = handler(*args, **kwargs)
-            else:
-                raise InstrumentStateException('Command (%s) not handled in current state (%s).' % (event, self.current_state))
-        else:
-            raise InstrumentStateException(str(event) + " was not handled by InstrumentFSM.on_event()")
-
-        if self.states.has(next_state):
+        if next_state in self._state_set:
             self._on_transition(next_state, *args, **kwargs)
         else:
-            log.debug("No next state'" + repr(next_state) + "', remaining in current_state.")
+            log.debug("No next state '%r', remaining in current_state.", next_state)
                 
         return result
+
+    def _get_state_handler(self, state, event):
+        """
+        Look up the handler for a state/event pair in the dispatch table.
+        @retval the handler or None if the pair isn't handled.
+        """
+        handlers = self._dispatch.get(state)
+        if handlers:
+            return handlers.get(event)
+        return None
+
+    def _get_event_handler(self, state, event):
+        """
+        Look up the handler for an event raised in the given state.
+        @raises InstrumentStateException if no handler for the event exists in
+        the state or the event is unknown.
+        """
+        handler = self._get_state_handler(state, event)
+        if handler:
+            return handler
+
+        if event in self._event_set:
+            raise InstrumentStateException('Command (%s) not handled in current state (%s).' % (event, state))
+        else:
+            raise InstrumentStateException(str(event) + " was not handled by InstrumentFSM.on_event()")
             
     def _on_transition(self, next_state, *args, **kwargs):
         """
@@ -126,12 +158,12 @@ class InstrumentFSM(object):
         @raises Any exception raised by the handlers.
         """
 
-        handler = self.state_handlers.get((self.current_state, self.exit_event), None)
+        handler = self._get_state_handler(self.current_state, self.exit_event)
         if handler:
             handler(*args, **kwargs)
         self.previous_state = self.current_state
         self.current_state = next_state
-        handler = self.state_handlers.get((self.current_state, self.enter_event), None)
+        handler = self._get_state_handler(self.current_state, self.enter_event)
         if handler:
             handler(*args, **kwargs)
 
@@ -141,52 +173,70 @@ class InstrumentFSM(object):
         @param current_state if true, return events handled in the current state only.
         @retval list of events handled.
         """
-        events = []
-        for (key, handler) in self.state_handlers.iteritems():
-            state = key[0]
-            event = key[1]
-            if not ((event == self.enter_event) or (event == self.exit_event)):
-                if current_state:
-                    if (self.current_state==state):
-                        if event not in events:
-                            events.append(event)
-                else:
-                    if event not in events:
+        key = self.current_state if current_state else ALL_STATES
+        events = self._capabilities.get(key)
+        if events is None:
+            events = []
+            for ((state, event), handler) in self.state_handlers.iteritems():
+                if not ((event == self.enter_event) or (event == self.exit_event)):
+                    if (not current_state or key == state) and event not in events:
                         events.append(event)
-        return events
+            self._capabilities[key] = events
+
+        return list(events)
 
 
 class ThreadSafeFSM(InstrumentFSM):
     """
     A FSM class that provides thread locking in on_event to
     prevent simultaneous thread reentry.
+
+    By default the lock is held for the whole event, including the handler.
+    With serialize_handlers=False only state transitions are serialized, so
+    a long running handler doesn't block other events.  A transition whose
+    handler started in a state the FSM has since left is dropped.
     """
     
-    def __init__(self, states, events, enter_event, exit_event):
+    def __init__(self, states, events, enter_event, exit_event,
+                 serialize_handlers=True):
         """
+        @param serialize_handlers if False only hold the lock for state
+        transitions instead of the whole event.
         """
         super(ThreadSafeFSM, self).__init__(states, events, enter_event,
                                             exit_event)
         self._lock = RLock()
+        self._serialize_handlers = serialize_handlers
     
     def on_event(self, event, *args, **kwargs):
         """
+        Handle an event while holding the FSM lock.
+        @see InstrumentFSM.on_event
         """
-        
-        self._lock.acquire(True)
-        ex = None
-        
-        try:
-            result = super(ThreadSafeFSM, self).on_event(event, *args, **kwargs)
-        
-        except Exception as ex:
-            pass
-        
-        finally:
-            self._lock.release()
-        
-        if ex:
-            raise ex
-        
+        if self._serialize_handlers:
+            with self._lock:
+                return super(ThreadSafeFSM, self).on_event(event, *args, **kwargs)
+
+        state = self.current_state
+        handler = self._get_event_handler(state, event)
+        (next_state, result) = handler(*args, **kwargs)
+
+        if next_state in self._state_set:
+            with self._lock:
+                if self.current_state == state:
+                    self._on_transition(next_state, *args, **kwargs)
+                else:
+                    log.warning("State changed from %s to %s while handling %s, dropping transition to %s",
+                                state, self.current_state, event, next_state)
+        else:
+            log.debug("No next state '%r', remaining in current_state.", next_state)
+
         return result
-    
+
+    def start(self, state, *args, **kwargs):
+        """
+        Start the state machine while holding the FSM lock.
+        @see InstrumentFSM.start
+        """
+        with self._lock:
+            return super(ThreadSafeFSM, self).start(state, *args, **kwargs)
@@ -16,9 +16,12 @@ __license__ = 'Apache 2.0'
 import re
 import time
 import json
+import ntplib
 from functools import partial
 
 from mi.core.log import get_logger ; log = get_logger()
+from mi.core.log import get_hot_path_logger ; hot_log = get_hot_path_logger(__name__)
+from mi.core.log import lazy_repr
 
 from threading import Thread
 
@@ -28,6 +31,7 @@ from mi.core.instrument.data_particle import RawDataParticle
 from mi.core.instrument.instrument_driver import DriverConfigKey
 from mi.core.driver_scheduler import DriverScheduler
 from mi.core.driver_scheduler import DriverSchedulerConfigKey
+from mi.core.sequencer import Sequencer
 
 from mi.core.instrument.instrument_driver import DriverAsyncEvent
 from mi.core.instrument.instrument_driver import DriverProtocolState
@@ -46,6 +50,7 @@ from mi.core.exceptions import InstrumentParameterExpirationException
 
 DEFAULT_CMD_TIMEOUT=20
 DEFAULT_WRITE_DELAY=0
+LOG_BUFFER_LENGTH=256
 RE_PATTERN = type(re.compile(""))
 
 class InterfaceType(BaseEnum):
@@ -99,21 +104,25 @@ class InstrumentProtocol(object):
         # are applied at the first opertunity.
         self._init_type = InitializationType.STARTUP
 
+        # Record sequence information attached to particles published
+        # in batches.
+        self._sequencer = Sequencer()
+
     ########################################################################
     # Common handlers
     ########################################################################
     def _handler_get(self, *args, **kwargs):
         """
         Get device parameters from the parameter dict.  First we set a baseline timestamp
-        that all data expirations will be calculated against.  Then we try to get parameter
-        value.  If we catch an expired parameter then we will update all parameters and get
-        values using the original baseline time that we set at the beginning of this method.
-        Assuming our _update_params is updating all parameter values properly then we can
-        ensure that all data will be fresh.  Nobody likes stale data!
+        that all data expirations will be calculated against.  Then values are read
+        through the parameter cache: fresh values are returned directly, stale values
+        are returned and queued for _revalidate_params, and expired values are refreshed
+        with at most one instrument round trip per refresh command before returning.
+        Parameters without a refresh command fall back on a full _update_params.
         @param args[0] list of parameters to retrieve, or DriverParameter.ALL.
         @raise InstrumentParameterException if missing or invalid parameter.
         @raise InstrumentParameterExpirationException If we fail to update a parameter
-        on the second pass this exception will be raised on expired data
+        on the refresh this exception will be raised on expired data
         """
         log.debug("%%% IN base _handler_get")
 
@@ -127,21 +136,7 @@ class InstrumentProtocol(object):
         # build a list of parameters we need to get
         param_list = self._get_param_list(*args, **kwargs)
 
-        try:
-            # Take a first pass at getting parameters.  If they are
-            # expired an exception will be raised.
-            result = self._get_param_result(param_list, expire_time)
-        except InstrumentParameterExpirationException as e:
-            # In the second pass we need to update parameters, it is assumed
-            # that _update_params does everything required to refresh all
-            # parameters or at least those that would expire.
-            log.debug("Parameter expired, refreshing, %s", e)
-            self._update_params()
-
-            # Take a second pass at getting values, this time is should
-            # have all fresh values.
-            log.debug("Fetching parameters for the second time")
-            result = self._get_param_result(param_list, expire_time)
+        result = self._param_dict.get_cached(param_list, self._refresh_params, expire_time)
 
         return (next_state, result)
 
@@ -181,21 +176,28 @@ class InstrumentProtocol(object):
         log.error("base got_data.  Who called me?")
         pass
 
-    def _get_param_result(self,param_list, expire_time):
+    def _refresh_params(self, command, params):
         """
-        return a dictionary of the parameters and values
-        @param expire_time: baseline time for expiration calculation
-        @return: dictionary of values
-        @raise InstrumentParameterException if missing or invalid parameter
-        @raise InstrumentParameterExpirationException if value is expired.
+        Refresh callback for the parameter cache.  Issue the instrument command
+        that returns the given parameters.  Without a refresh command all
+        parameters are updated.  Command-response protocols issue the command.
+        @param command: refresh command from the parameter dict, or None
+        @param params: list of parameter names being refreshed
+        @raise NotImplementedException if a refresh command can not be issued
         """
-        result = {}
-
-        for param in param_list:
-            val = self._param_dict.get(param, expire_time)
-            result[param] = val
+        if command == None:
+            self._update_params()
+        else:
+            raise NotImplementedException("Refresh command %s not supported by this protocol" % command)
 
-        return result
+    def _revalidate_params(self):
+        """
+        Refresh parameters that were served stale from the parameter cache.
+        Call this from a handler while the protocol is idle, i.e. on entering
+        command state, so the refresh round trip doesn't delay a get.
+        @return: list of refresh commands issued
+        """
+        return self._param_dict.refresh_pending(self._refresh_params)
 
     def _verify_not_readonly(self, params_to_set, startup=False):
         """
@@ -260,6 +262,45 @@ class InstrumentProtocol(object):
 
         return sample
 
+    def _publish_samples(self, particles, new_sequence=False, publish=True):
+        """
+        Generate a batch of particles and publish them in the order given,
+        one sample event per particle.  All particles in the batch share one
+        driver timestamp and are tagged with the protocol sequence id and
+        consecutive sequence indexes.  Every particle is generated before
+        any is published, so a bad particle doesn't publish half a batch.
+
+        @param particles list of data particles to publish
+        @param new_sequence True if the batch starts a new sequence, i.e.
+            after a data gap.  The first particle is flagged as the start
+            of the new sequence.
+        @param publish boolean to publish samples (default True)
+        @retval list of generated JSON particles
+        @raise SampleException if a particle can not be generated
+        """
+        if not particles:
+            return []
+
+        if new_sequence:
+            self._sequencer.reset_sequence_id()
+
+        driver_timestamp = ntplib.system_to_ntp_time(time.time())
+        sequence_id = self._sequencer.get_sequence_id()
+
+        samples = []
+        for particle in particles:
+            sequence_index = self._sequencer.increment_sequence_index()
+            particle.set_driver_timestamp(driver_timestamp)
+            particle.set_sequence(sequence_id, sequence_index,
+                                  True if new_sequence and not samples else None)
+            samples.append(particle.generate())
+
+        if publish and self._driver_event:
+            for sample in samples:
+                self._driver_event(DriverAsyncEvent.SAMPLE, sample)
+
+        return samples
+
     def get_current_state(self):
         """
         Return current state of the protocol FSM.
@@ -1012,6 +1053,19 @@ class CommandResponseInstrumentProtocol(InstrumentProtocol):
 
         return resp_result
             
+    def _refresh_params(self, command, params):
+        """
+        Refresh callback for the parameter cache.  Send the refresh command and
+        let its response handler update the parameter dict.  Without a refresh
+        command all parameters are updated.
+        @param command: refresh command from the parameter dict, or None
+        @param params: list of parameter names being refreshed
+        """
+        if command == None:
+            self._update_params()
+        else:
+            self._do_cmd_resp(command)
+
     def _do_cmd_no_resp(self, cmd, *args, **kwargs):
         """
         Issue a command to the instrument after a wake up and clearing of
@@ -1078,8 +1132,8 @@ class CommandResponseInstrumentProtocol(InstrumentProtocol):
         data = port_agent_packet.get_data()
         timestamp = port_agent_packet.get_timestamp()
 
-        log.debug("Got Data: %s" % data)
-        log.debug("Add Port Agent Timestamp: %s" % timestamp)
+        hot_log.debug("Got Data: %s", data)
+        hot_log.debug("Add Port Agent Timestamp: %s", timestamp)
 
         if data_length > 0:
             if self.get_current_state() == DriverProtocolState.DIRECT_ACCESS:
@@ -1124,8 +1178,8 @@ class CommandResponseInstrumentProtocol(InstrumentProtocol):
         self._promptbuf += data
         self._last_data_timestamp = time.time()
 
-        log.debug("LINE BUF: %s", self._linebuf)
-        log.debug("PROMPT BUF: %s", self._promptbuf)
+        hot_log.trace("LINE BUF: %s", lazy_repr(self._linebuf, LOG_BUFFER_LENGTH))
+        hot_log.trace("PROMPT BUF: %s", lazy_repr(self._promptbuf, LOG_BUFFER_LENGTH))
 
     ########################################################################
     # Wakeup helpers.
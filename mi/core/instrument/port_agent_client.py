@@ -23,10 +23,14 @@ import ctypes
 import subprocess
 
 from mi.core.log import get_logger ; log = get_logger()
+from mi.core.log import get_hot_path_logger ; hot_log = get_hot_path_logger(__name__)
+from mi.core.log import TRACE
 from mi.core.exceptions import InstrumentConnectionException
 
 HEADER_SIZE = 16 # BBBBHHLL = 1 + 1 + 1 + 1 + 2 + 2 + 4 + 4 = 16
 
+RECV_LOG_SAMPLE_RATE = 100 # log one in this many socket reads at trace level
+
 
 OFFSET_P_CHECKSUM_LOW = 6
 OFFSET_P_CHECKSUM_HIGH = 7
@@ -470,7 +474,7 @@ class PortAgentClient(object):
         Send a configuration parameter to the port agent
         """
         command = parameter + value
-        log.debug("Sending config parameter: %s" % (command))
+        log.debug("Sending config parameter: %s", command)
         self._command_port_agent(command)
 
     def send_break(self, duration):
@@ -764,7 +768,7 @@ class Listener(threading.Thread):
             Got a heartbeat; reset the timer and re-init 
             heartbeat_missed_count.
             """
-            log.debug("HEARTBEAT Packet Received")
+            hot_log.debug("HEARTBEAT Packet Received")
             if 0 < self.heartbeat:
                 self.start_heartbeat_timer()
                 
@@ -786,15 +790,15 @@ class Listener(threading.Thread):
 
         while not self._done:
             try:
-                log.debug('RX NEW PACKET')
+                hot_log.trace('RX NEW PACKET')
                 header = bytearray(HEADER_SIZE)
                 headerview = memoryview(header)
                 bytes_left = HEADER_SIZE
                 while bytes_left and not self._done:
                     try:
                         bytesrx = self.sock.recv_into(headerview[HEADER_SIZE - bytes_left:], bytes_left)
-                        log.debug('RX HEADER BYTES %d LEFT %d SOCK %r' % (
-                                                    bytesrx, bytes_left, self.sock,))
+                        hot_log.sampled(TRACE, RECV_LOG_SAMPLE_RATE, 'RX HEADER BYTES %d LEFT %d SOCK %r',
+                                        bytesrx, bytes_left, self.sock)
                         if bytesrx <= 0:
                             raise SocketClosed()
                         bytes_left -= bytesrx
@@ -815,13 +819,13 @@ class Listener(threading.Thread):
                     bytes_left = data_size
                     data = bytearray(data_size)
                     dataview = memoryview(data)
-                    log.debug('Expecting DATA BYTES %d' % data_size)
+                    hot_log.trace('Expecting DATA BYTES %d', data_size)
                     
                 while bytes_left and not self._done:
                     try:
                         bytesrx = self.sock.recv_into(dataview[data_size - bytes_left:], bytes_left)
-                        log.debug('RX DATA BYTES %d LEFT %d SOCK %r' % (
-                                                    bytesrx, bytes_left, self.sock,))
+                        hot_log.sampled(TRACE, RECV_LOG_SAMPLE_RATE, 'RX DATA BYTES %d LEFT %d SOCK %r',
+                                        bytesrx, bytes_left, self.sock)
                         if bytesrx <= 0:
                             raise SocketClosed()
                         bytes_left -= bytesrx
@@ -836,7 +840,7 @@ class Listener(threading.Thread):
                     Should have complete port agent packet.
                     """
                     paPacket.attach_data(str(data))
-                    log.debug("HANDLE PACKET")
+                    hot_log.trace("HANDLE PACKET")
                     self.handle_packet(paPacket)
 
             except SocketClosed:
@@ -60,6 +60,17 @@ class ParameterDictKey(BaseEnum):
     UNITS = "units"
     PARAMETERS = "parameters"
     VALUE_DESCRIPTION = "value_description"
+
+class ParameterCacheState(BaseEnum):
+    """
+    Freshness of a cached parameter value relative to a baseline time.
+    FRESH values can be served as is, STALE values are past their expiration
+    but inside the stale window so they are served while a refresh is
+    queued, EXPIRED values must be refreshed before they are served.
+    """
+    FRESH = "FRESH"
+    STALE = "STALE"
+    EXPIRED = "EXPIRED"
     
 class ParameterDescription(object):
     """
@@ -84,7 +95,8 @@ class ParameterDescription(object):
                  description=None,
                  type=None,
                  units=None,
-                 value_description=None):
+                 value_description=None,
+                 refresh_command=None):
         self.name = name
         self.visibility = visibility
         self.direct_access = direct_access
@@ -106,16 +118,19 @@ class ParameterDescription(object):
             raise InstrumentParameterException("Invalid type specified!")
         self.units = units
         self.value_description = value_description
+        self.refresh_command = refresh_command
 
 class ParameterValue(object):
     """
     A parameter's actual value and the information required for updating it
     """
-    def __init__(self, name, f_format, value=None, expiration=None):
+    def __init__(self, name, f_format, value=None, expiration=None,
+                 stale_window=None):
         self.name = name
         self.value = value
         self.f_format = f_format
         self.expiration = expiration
+        self.stale_window = stale_window
         self.timestamp = ntplib.system_to_ntp_time(time.time())
                 
     def set_value(self, new_val):
@@ -140,6 +155,28 @@ class ParameterValue(object):
             raise InstrumentParameterExpirationException("Value for %s expired!" % self.name, self.value)
         else:
             return self.value
+
+    def get_cache_state(self, baseline_timestamp=None):
+        """
+        Classify the stored value for read-through cache lookups.
+        @param baseline_timestamp use this time for expiration calculation,
+        default to current time
+        @retval A ParameterCacheState value. Values without an expiration are
+        always FRESH, values without a stale window go straight from FRESH to
+        EXPIRED.
+        """
+        if self.expiration == None:
+            return ParameterCacheState.FRESH
+
+        if baseline_timestamp == None:
+            baseline_timestamp = ntplib.system_to_ntp_time(time.time())
+
+        age = baseline_timestamp - self.timestamp
+        if age <= self.expiration:
+            return ParameterCacheState.FRESH
+        if self.stale_window != None and age <= self.expiration + self.stale_window:
+            return ParameterCacheState.STALE
+        return ParameterCacheState.EXPIRED
         
         
 class Parameter(object):
@@ -164,7 +201,9 @@ class Parameter(object):
                  description=None,
                  type=None,
                  units=None,
-                 value_description=None):
+                 value_description=None,
+                 refresh_command=None,
+                 stale_window=None):
         """
         Parameter value constructor.
         @param name The parameter name.
@@ -174,6 +213,10 @@ class Parameter(object):
         @param menu_path The path of menu options required to get to the parameter
         value display when presented in a menu-based instrument
         @param value The parameter value (initializes to None).
+        @param refresh_command The instrument command whose response updates
+        this parameter, used to group cache refreshes.
+        @param stale_window Seconds past expiration during which the value is
+        still served while a refresh is queued.
         """
         self.description = ParameterDescription(name,
                                                 menu_path_read=menu_path_read,
@@ -192,10 +235,12 @@ class Parameter(object):
                                                 description=description,
                                                 type=type,
                                                 units=units,
-                                                value_description=value_description)
+                                                value_description=value_description,
+                                                refresh_command=refresh_command)
         
         self.value = ParameterValue(name, f_format, value=value,
-                                    expiration=expiration)
+                                    expiration=expiration,
+                                    stale_window=stale_window)
         self.name = name
 
     def update(self, input):
@@ -239,7 +284,9 @@ class RegexParameter(Parameter):
                  description=None,
                  type=None,
                  units=None,
-                 value_description=None):
+                 value_description=None,
+                 refresh_command=None,
+                 stale_window=None):
         """
         Parameter value constructor.
         @param name The parameter name.
@@ -277,7 +324,9 @@ class RegexParameter(Parameter):
                            description=description,
                            type=type,
                            units=units,
-                           value_description=value_description)
+                           value_description=value_description,
+                           refresh_command=refresh_command,
+                           stale_window=stale_window)
 
         self.pattern = pattern
         if regex_flags == None:
@@ -324,7 +373,9 @@ class FunctionParameter(Parameter):
                  description=None,
                  type=None,
                  units=None,
-                 value_description=None):
+                 value_description=None,
+                 refresh_command=None,
+                 stale_window=None):
         """
         Parameter value constructor.
         @param name The parameter name.
@@ -359,7 +410,9 @@ class FunctionParameter(Parameter):
                            description=description,
                            type=type,
                            units=units,
-                           value_description=value_description)
+                           value_description=value_description,
+                           refresh_command=refresh_command,
+                           stale_window=stale_window)
 
         self.f_getval = f_getval
 
@@ -394,6 +447,10 @@ class ProtocolParameterDict(InstrumentDict):
         Constructor.        
         """
         self._param_dict = {}
+
+        # Names of stale parameters served from the cache that are waiting
+        # for a refresh.
+        self._pending_refresh = set()
         
     def add(self,
             name,
@@ -419,7 +476,9 @@ class ProtocolParameterDict(InstrumentDict):
             units=None,
             regex_flags=None,
             value_description=None,
-            expiration=None):
+            expiration=None,
+            refresh_command=None,
+            stale_window=None):
         """
         Add a parameter object to the dictionary using a regex for extraction.
         @param name The parameter name.
@@ -456,6 +515,12 @@ class ProtocolParameterDict(InstrumentDict):
         @param expiration The amount of time in seconds before the value
         expires and should not be used. If set to None, the value is always
         valid. If set to 0, the value is never valid from the store.
+        @param refresh_command The instrument command whose response refreshes
+        this parameter. Expired parameters sharing a refresh command are
+        refreshed with a single round trip. If None, a full refresh is used.
+        @param stale_window The amount of time in seconds past expiration
+        during which get_cached still serves the value and queues a refresh
+        instead of refreshing before returning.
         """
         val = RegexParameter(name, pattern, f_getval, f_format,
                              value=value,
@@ -477,7 +542,9 @@ class ProtocolParameterDict(InstrumentDict):
                              type=type,
                              regex_flags=regex_flags,
                              units=units,
-                             value_description=value_description)
+                             value_description=value_description,
+                             refresh_command=refresh_command,
+                             stale_window=stale_window)
 
         self._param_dict[name] = val
 
@@ -504,6 +571,128 @@ class ProtocolParameterDict(InstrumentDict):
         """
         return self._param_dict[name].get_value(timestamp)
 
+    def get_cached(self, param_list, refresh_callback, baseline_timestamp=None):
+        """
+        Read-through lookup for a list of parameters. Fresh values are
+        returned directly. Stale values (inside their stale window) are
+        returned and queued for revalidation. Expired values are refreshed
+        before returning, with one call to refresh_callback per refresh
+        command.
+        @param param_list list of parameter names to retrieve
+        @param refresh_callback function(command, names) that issues the
+        instrument command and updates the dictionary. command is None when
+        a full refresh is needed.
+        @param baseline_timestamp Timestamp to use for expiration calculation
+        @retval name : value dict
+        @raises KeyError if a name is invalid.
+        @raises InstrumentParameterExpirationException if a value is still
+        expired after the refresh.
+        """
+        if baseline_timestamp == None:
+            baseline_timestamp = self.get_current_timestamp()
+
+        expired = []
+        for name in param_list:
+            state = self._param_dict[name].value.get_cache_state(baseline_timestamp)
+            if state == ParameterCacheState.EXPIRED:
+                expired.append(name)
+            elif state == ParameterCacheState.STALE:
+                self._pending_refresh.add(name)
+            else:
+                self._pending_refresh.discard(name)
+
+        if expired:
+            log.debug("Parameters expired, refreshing: %s", expired)
+            self.refresh(expired, refresh_callback)
+
+        result = {}
+        for name in param_list:
+            if name in self._pending_refresh:
+                result[name] = self._param_dict[name].value.value
+            else:
+                result[name] = self._param_dict[name].get_value(baseline_timestamp)
+
+        return result
+
+    def refresh(self, param_list, refresh_callback):
+        """
+        Refresh a list of parameters grouped by their refresh command. If any
+        parameter has no refresh command a single full refresh is done
+        instead. Pending revalidations covered by the refresh are cleared.
+        @param param_list list of parameter names to refresh
+        @param refresh_callback function(command, names) that issues the
+        instrument command and updates the dictionary.
+        @retval list of refresh commands issued, None for a full refresh
+        @raises KeyError if a name is invalid.
+        """
+        groups = self._group_by_refresh_command(param_list)
+
+        if None in groups:
+            log.debug("Full parameter refresh for %s", param_list)
+            refresh_callback(None, list(param_list))
+            self._pending_refresh.clear()
+            return [None]
+
+        commands = []
+        for (command, names) in groups.iteritems():
+            log.debug("Refreshing %s with command %s", names, command)
+            refresh_callback(command, names)
+            commands.append(command)
+
+        for name in list(self._pending_refresh):
+            if self._param_dict[name].description.refresh_command in groups:
+                self._pending_refresh.discard(name)
+
+        return commands
+
+    def refresh_pending(self, refresh_callback, baseline_timestamp=None):
+        """
+        Revalidate parameters that were served stale by get_cached. Values
+        refreshed since then are skipped.
+        @param refresh_callback function(command, names) that issues the
+        instrument command and updates the dictionary.
+        @param baseline_timestamp Timestamp to use for expiration calculation
+        @retval list of refresh commands issued
+        """
+        names = [name for name in self._pending_refresh
+                 if self._param_dict[name].value.get_cache_state(baseline_timestamp) !=
+                    ParameterCacheState.FRESH]
+        self._pending_refresh.clear()
+
+        if not names:
+            return []
+
+        return self.refresh(names, refresh_callback)
+
+    def get_pending_refresh(self):
+        """
+        Return the names of stale parameters waiting for revalidation.
+        """
+        return list(self._pending_refresh)
+
+    def get_refresh_command(self, name):
+        """
+        Get the command used to refresh a parameter.
+        @param name Name of the parameter.
+        @raises KeyError if the name is invalid.
+        @raises InstrumentParameterException if the description is missing
+        """
+        if not self._param_dict[name].description:
+            raise InstrumentParameterException("No description present!")
+
+        return self._param_dict[name].description.refresh_command
+
+    def _group_by_refresh_command(self, param_list):
+        """
+        Group parameter names by refresh command.
+        @retval dict of command : [names]
+        """
+        groups = {}
+        for name in param_list:
+            command = self.get_refresh_command(name)
+            groups.setdefault(command, []).append(name)
+        return groups
+
     def get_current_timestamp(self, offset=0):
         """
         Get the current time in a format suitable for parameter expiration calculation.
@@ -746,13 +935,15 @@ class ProtocolParameterDict(InstrumentDict):
 
     def get_config(self):
         """
-        Retrive the configuration (all settable key values).
+        Retrive the configuration (all settable key values).  Values past
+        their expiration are included, the configuration is the last known
+        value of each parameter.
         @retval name : value configuration dict.
         """
         config = {}
         for (key, val) in self._param_dict.iteritems():
             if(self.is_settable_param(key)):
-               config[key] = val.get_value()
+               config[key] = val.value.value
         return config
 
     def format(self, name, val=None):
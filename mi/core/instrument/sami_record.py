@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+
+"""
+@package mi.core.instrument.sami_record SAMI record codec
+@file mi/core/instrument/sami_record.py
+@brief Decode the ASCII hex data records of the Sunburst SAMI instruments,
+    shared by the SAMI instrument drivers and dataset parsers.  A record is
+    converted from hex once and its fields are read from the bytes with a
+    numpy record type.
+"""
+
+__license__ = 'Apache 2.0'
+
+import binascii
+import numpy as np
+
+from mi.core.exceptions import SampleException
+
+# SAMI2-PH sample record, record type 0A
+PH_SAMPLE_DTYPE = np.dtype([
+    ('unique_id', 'u1'),
+    ('record_length', 'u1'),
+    ('record_type', 'u1'),
+    ('record_time', '>u4'),                         # seconds since 1904
+    ('thermistor_start', '>u2'),
+    ('reference_light_measurements', '>u2', (16,)),
+    ('light_measurements', '>u2', (92,)),           # 23 sets of 4 measurements
+    ('unused', '>u2'),
+    ('voltage_battery', '>u2'),
+    ('thermistor_end', '>u2'),
+    ('checksum', 'u1')])
+
+# SAMI2-PCO2 sample record, record type 04 or 05 for a blank
+PCO2_SAMPLE_DTYPE = np.dtype([
+    ('unique_id', 'u1'),
+    ('record_length', 'u1'),
+    ('record_type', 'u1'),
+    ('record_time', '>u4'),                         # seconds since 1904
+    ('light_measurements', '>u2', (14,)),
+    ('voltage_battery', '>u2'),
+    ('thermistor_raw', '>u2'),
+    ('checksum', 'u1')])
+
+def unhexlify(hex_data):
+    """
+    Convert ASCII hex to bytes
+    @param hex_data ASCII hex string
+    @retval string of bytes
+    @throws SampleException if the data isn't ASCII hex
+    """
+    try:
+        return binascii.unhexlify(hex_data)
+    except TypeError as e:
+        raise SampleException("Error (%s) converting ASCII hex data: [%s]" % (e, hex_data))
+
+def calc_checksum(data):
+    """
+    Calculate a SAMI checksum, the sum of the bytes as an unsigned char
+    @param data string of bytes
+    @retval The checksum
+    """
+    return sum(bytearray(data)) & 0xFF
+
+def decode_record(hex_record, record_dtype):
+    """
+    Decode a SAMI data record.  The record checksum covers the bytes from
+    the record length up to the checksum.
+    @param hex_record The record ASCII hex, from the unique id to the checksum
+    @param record_dtype numpy record type of the record
+    @retval (dict of field values by record type field name, calculated checksum)
+    @throws SampleException if the record isn't ASCII hex or has the wrong length
+    """
+    data = unhexlify(hex_record)
+    if len(data) != record_dtype.itemsize:
+        raise SampleException("SAMI record is %d bytes, expected %d: [%s]" %
+                              (len(data), record_dtype.itemsize, hex_record))
+
+    record = np.frombuffer(data, record_dtype)[0]
+    values = {}
+    for name in record_dtype.names:
+        value = record[name]
+        if value.ndim:
+            values[name] = value.tolist()
+        else:
+            values[name] = int(value)
+    return (values, calc_checksum(data[1:-1]))
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+
+"""
+@package mi.core.instrument.test.test_instrument_fsm
+@file mi/core/instrument/test/test_instrument_fsm.py
+@brief Test cases and dispatch microbenchmarks for the instrument FSM
+"""
+
+__license__ = 'Apache 2.0'
+
+import time
+import threading
+
+from nose.plugins.attrib import attr
+
+from mi.core.log import get_logger ; log = get_logger()
+
+from mi.core.common import BaseEnum
+from mi.core.unit_test import MiUnitTest
+from mi.core.exceptions import InstrumentStateException
+from mi.core.instrument.instrument_fsm import InstrumentFSM
+from mi.core.instrument.instrument_fsm import ThreadSafeFSM
+
+BENCHMARK_EVENTS = 10000
+
+class State(BaseEnum):
+    COMMAND = 'STATE_COMMAND'
+    AUTOSAMPLE = 'STATE_AUTOSAMPLE'
+
+class Event(BaseEnum):
+    ENTER = 'EVENT_ENTER'
+    EXIT = 'EVENT_EXIT'
+    GET = 'EVENT_GET'
+    START = 'EVENT_START'
+    STOP = 'EVENT_STOP'
+    SLOW = 'EVENT_SLOW'
+
+@attr('UNIT', group='mi')
+class TestInstrumentFSM(MiUnitTest):
+    def setUp(self):
+        self.entered = []
+
+    def _build_fsm(self, fsm_class=InstrumentFSM, **kwargs):
+        fsm = fsm_class(State, Event, Event.ENTER, Event.EXIT, **kwargs)
+        fsm.add_handler(State.COMMAND, Event.ENTER, lambda *args: self.entered.append(State.COMMAND))
+        fsm.add_handler(State.COMMAND, Event.GET, lambda *args: (None, 'value'))
+        fsm.add_handler(State.COMMAND, Event.START, lambda *args: (State.AUTOSAMPLE, None))
+        fsm.add_handler(State.AUTOSAMPLE, Event.ENTER, lambda *args: self.entered.append(State.AUTOSAMPLE))
+        fsm.add_handler(State.AUTOSAMPLE, Event.STOP, lambda *args: (State.COMMAND, None))
+        fsm.start(State.COMMAND)
+        return fsm
+
+    def test_on_event(self):
+        """
+        Test event dispatch and transitions
+        """
+        fsm = self._build_fsm()
+        self.assertFalse(fsm.add_handler('BAD_STATE', Event.GET, None))
+        self.assertFalse(fsm.add_handler(State.COMMAND, 'BAD_EVENT', None))
+
+        self.assertEqual(fsm.on_event(Event.GET), 'value')
+        self.assertEqual(fsm.get_current_state(), State.COMMAND)
+
+        fsm.on_event(Event.START)
+        self.assertEqual(fsm.get_current_state(), State.AUTOSAMPLE)
+        self.assertEqual(fsm.previous_state, State.COMMAND)
+        self.assertEqual(self.entered, [State.COMMAND, State.AUTOSAMPLE])
+
+        with self.assertRaises(InstrumentStateException):
+            fsm.on_event(Event.GET)
+        with self.assertRaises(InstrumentStateException):
+            fsm.on_event('BAD_EVENT')
+
+    def test_get_events(self):
+        """
+        Test capability lists are cached per state and refreshed when a
+        handler is added
+        """
+        fsm = self._build_fsm()
+        self.assertEqual(sorted(fsm.get_events()), sorted([Event.GET, Event.START]))
+        self.assertEqual(sorted(fsm.get_events(False)), sorted([Event.GET, Event.START, Event.STOP]))
+
+        # Callers may filter the returned list
+        fsm.get_events().remove(Event.GET)
+        self.assertIn(Event.GET, fsm.get_events())
+
+        fsm.add_handler(State.COMMAND, Event.STOP, lambda *args: (None, None))
+        self.assertIn(Event.STOP, fsm.get_events())
+
+        fsm.on_event(Event.START)
+        self.assertEqual(fsm.get_events(), [Event.STOP])
+
+    def test_get_events_before_start(self):
+        """
+        Test the current state events before start don't replace the events
+        of all states
+        """
+        fsm = InstrumentFSM(State, Event, Event.ENTER, Event.EXIT)
+        fsm.add_handler(State.COMMAND, Event.GET, lambda *args: (None, None))
+        self.assertEqual(fsm.get_events(), [])
+        self.assertEqual(fsm.get_events(False), [Event.GET])
+
+    def test_thread_safe_transition_only(self):
+        """
+        Test a long running handler doesn't block other events when only
+        transitions are serialized
+        """
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_get(*args):
+            started.set()
+            release.wait(5)
+            return (None, 'slow')
+
+        fsm = self._build_fsm(ThreadSafeFSM, serialize_handlers=False)
+        fsm.add_handler(State.COMMAND, Event.SLOW, slow_get)
+
+        thread = threading.Thread(target=fsm.on_event, args=[Event.SLOW])
+        thread.start()
+        started.wait(5)
+
+        # Not blocked behind the slow handler
+        self.assertEqual(fsm.on_event(Event.GET), 'value')
+        self.assertEqual(sorted(fsm.get_events()), sorted([Event.GET, Event.START, Event.SLOW]))
+        fsm.on_event(Event.START)
+        self.assertEqual(fsm.get_current_state(), State.AUTOSAMPLE)
+
+        release.set()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+    def test_thread_safe_transition_dropped(self):
+        """
+        Test a transition from a state the FSM already left is dropped
+        """
+        def start_then_stop(*args):
+            fsm.on_event(Event.START)
+            return (State.AUTOSAMPLE, None)
+
+        fsm = self._build_fsm(ThreadSafeFSM, serialize_handlers=False)
+        fsm.add_handler(State.COMMAND, Event.SLOW, start_then_stop)
+        fsm.on_event(Event.SLOW)
+        self.assertEqual(fsm.get_current_state(), State.AUTOSAMPLE)
+        self.assertEqual(self.entered, [State.COMMAND, State.AUTOSAMPLE])
+
+@attr('BENCHMARK', group='mi')
+class TestInstrumentFSMBenchmark(MiUnitTest):
+    """
+    FSM dispatch microbenchmarks.  Timings are logged, not asserted.  They
+    aren't part of the unit suite, run them with
+        $ nosetests -a BENCHMARK mi/core/instrument/test/test_instrument_fsm.py
+    """
+    def _build_fsm(self, fsm_class, **kwargs):
+        fsm = fsm_class(State, Event, Event.ENTER, Event.EXIT, **kwargs)
+        fsm.add_handler(State.COMMAND, Event.GET, lambda *args: (None, None))
+        fsm.add_handler(State.COMMAND, Event.START, lambda *args: (State.AUTOSAMPLE, None))
+        fsm.add_handler(State.AUTOSAMPLE, Event.STOP, lambda *args: (State.COMMAND, None))
+        fsm.start(State.COMMAND)
+        return fsm
+
+    def _time(self, name, func):
+        start = time.time()
+        for i in xrange(BENCHMARK_EVENTS):
+            func()
+        elapsed = time.time() - start
+        log.info("%s: %d calls in %.3fs (%.2f us/call)", name, BENCHMARK_EVENTS,
+                 elapsed, elapsed / BENCHMARK_EVENTS * 1e6)
+        return elapsed
+
+    def test_benchmark_on_event(self):
+        for (name, fsm) in [('InstrumentFSM', self._build_fsm(InstrumentFSM)),
+                            ('ThreadSafeFSM', self._build_fsm(ThreadSafeFSM)),
+                            ('ThreadSafeFSM transition only',
+                             self._build_fsm(ThreadSafeFSM, serialize_handlers=False))]:
+            self._time('%s on_event' % name, lambda: fsm.on_event(Event.GET))
+
+    def test_benchmark_transition(self):
+        fsm = self._build_fsm(ThreadSafeFSM)
+        def toggle():
+            fsm.on_event(Event.START)
+            fsm.on_event(Event.STOP)
+        self._time('ThreadSafeFSM transition', toggle)
+
+    def test_benchmark_get_events(self):
+        fsm = self._build_fsm(InstrumentFSM)
+        self._time('InstrumentFSM get_events', fsm.get_events)
@@ -12,6 +12,7 @@ __license__ = 'Apache 2.0'
 
 import re
 import time
+import json
 import ntplib
 import datetime
 from mock import Mock
@@ -19,6 +20,8 @@ from nose.plugins.attrib import attr
 from mi.core.log import get_logger ; log = get_logger()
 from mi.core.instrument.instrument_fsm import ThreadSafeFSM
 from mi.core.instrument.instrument_driver import DriverParameter
+from mi.core.instrument.instrument_driver import DriverAsyncEvent
+from mi.core.instrument.data_particle import DataParticleKey
 from mi.core.instrument.instrument_protocol import InstrumentProtocol
 from mi.core.instrument.instrument_protocol import MenuInstrumentProtocol
 from mi.core.instrument.instrument_protocol import CommandResponseInstrumentProtocol
@@ -114,6 +117,37 @@ class TestUnitInstrumentProtocol(MiUnitTestCase):
         # Test the format of the result in the individual driver tests. Here,
         # just tests that the result is there.
 
+    def test_publish_samples(self):
+        """
+        Test a batch of particles is published one event per particle with
+        shared driver timestamp and sequence information
+        """
+        events = []
+        self.protocol = InstrumentProtocol(lambda event, value=None: events.append((event, value)))
+        sample_line = "SATPAR0229,10.01,2206748544,234\r\n"
+        ntptime = ntplib.system_to_ntp_time(time.time())
+        particles = [SatlanticPARDataParticle(sample_line, port_timestamp=ntptime) for i in range(3)]
+
+        self.assertEqual(self.protocol._publish_samples([]), [])
+        self.assertEqual(events, [])
+
+        samples = self.protocol._publish_samples(particles, new_sequence=True)
+        self.assertEqual(events, [(DriverAsyncEvent.SAMPLE, sample) for sample in samples])
+
+        parsed = [json.loads(sample) for sample in samples]
+        self.assertEqual([p[DataParticleKey.SEQUENCE_INDEX] for p in parsed], [0, 1, 2])
+        self.assertEqual(len(set([p[DataParticleKey.SEQUENCE_ID] for p in parsed])), 1)
+        self.assertEqual(len(set([p[DataParticleKey.DRIVER_TIMESTAMP] for p in parsed])), 1)
+        self.assertTrue(parsed[0][DataParticleKey.NEW_SEQUENCE])
+        self.assertNotIn(DataParticleKey.NEW_SEQUENCE, parsed[1])
+
+        # The next batch continues the sequence
+        samples = self.protocol._publish_samples(particles[:1], publish=False)
+        self.assertEqual(len(events), 3)
+        sample = json.loads(samples[0])
+        self.assertEqual(sample[DataParticleKey.SEQUENCE_ID], parsed[0][DataParticleKey.SEQUENCE_ID])
+        self.assertEqual(sample[DataParticleKey.SEQUENCE_INDEX], 3)
+
     def test_get_param_list(self):
         """
         verify get_param_list returns correct parameter lists.
@@ -571,6 +605,42 @@ class TestUnitCommandInstrumentProtocol(MiUnitTestCase):
                           self.protocol._do_cmd_resp,
                           self.TestEvent.TEST, expected_prompt=">", response_regex=regex1)
 
+    def test_refresh_params(self):
+        """
+        Expired parameters are refreshed with their refresh command before a
+        get returns, stale ones are returned and refreshed on revalidation
+        """
+        responses = []
+        def parse_refresh_response(resp, prompt):
+            responses.append(resp)
+            self.protocol._param_dict.update('expired = %d' % len(responses))
+            self.protocol._param_dict.update('stale = %d' % len(responses))
+        self.protocol._add_response_handler(self.TestEvent.TEST, parse_refresh_response)
+
+        param_dict = self.protocol._param_dict
+        param_dict.add('expired', r'expired = (\d+)', lambda match: int(match.group(1)), str,
+                       expiration=0, refresh_command=self.TestEvent.TEST)
+        param_dict.add('stale', r'stale = (\d+)', lambda match: int(match.group(1)), str,
+                       expiration=0, stale_window=60, refresh_command=self.TestEvent.TEST)
+        param_dict.set_value('expired', 0)
+        param_dict.set_value('stale', 0)
+        time.sleep(0.01)
+
+        (next_state, result) = self.protocol._handler_get(['expired'])
+        self.assertEqual(result, {'expired': 1})
+        self.assertEqual(len(responses), 1)
+
+        (next_state, result) = self.protocol._handler_get(['stale'])
+        self.assertEqual(result, {'stale': 1})
+        self.assertEqual(len(responses), 1)
+        self.assertEqual(param_dict.get_pending_refresh(), ['stale'])
+
+        time.sleep(0.01)
+        self.assertEqual(self.protocol._revalidate_params(), [self.TestEvent.TEST])
+        self.assertEqual(len(responses), 2)
+        self.assertEqual(param_dict.get_pending_refresh(), [])
+        self.assertEqual(param_dict.get('stale', 0), 2)
+
 
 @attr('UNIT', group='mi')
 class TestUnitMenuInstrumentProtocol(MiUnitTestCase):
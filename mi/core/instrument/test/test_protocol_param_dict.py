@@ -587,6 +587,65 @@ bar=200, baz=300
         with self.assertRaises(InstrumentParameterExpirationException):
             pd.get('lateexp', futuretime)
     
+    def test_get_cached(self):
+        """
+        test read-through cache lookups with grouped refreshes and
+        stale-while-revalidate
+        """
+        pd = ProtocolParameterDict()
+        pd.add('noexp', r'', None, None)
+        pd.add('ds1', r'', None, None, expiration=2, refresh_command='DS')
+        pd.add('ds2', r'', None, None, expiration=2, refresh_command='DS')
+        pd.add('dc1', r'', None, None, expiration=2, refresh_command='DC')
+        pd.add('stale', r'', None, None, expiration=2, stale_window=10,
+               refresh_command='DC')
+
+        refreshes = []
+        def refresh(command, names):
+            refreshes.append(command)
+            for name in pd.get_keys():
+                if pd.get_refresh_command(name) == command:
+                    pd.set_value(name, command)
+
+        def age(seconds):
+            for name in pd.get_keys():
+                pd.set_value(name, 0)
+                pd._param_dict[name].value.timestamp -= seconds
+
+        # Nothing expired, no round trips
+        age(0)
+        self.assertEqual(pd.get_cached(pd.get_keys(), refresh),
+                         {'noexp': 0, 'ds1': 0, 'ds2': 0, 'dc1': 0, 'stale': 0})
+        self.assertEqual(refreshes, [])
+
+        # Expired values are refreshed once per command, stale values are
+        # served and queued
+        age(3)
+        result = pd.get_cached(['ds1', 'ds2', 'stale'], refresh)
+        self.assertEqual(refreshes, ['DS'])
+        self.assertEqual(result, {'ds1': 'DS', 'ds2': 'DS', 'stale': 0})
+        self.assertEqual(pd.get_pending_refresh(), ['stale'])
+
+        self.assertEqual(pd.refresh_pending(refresh), ['DC'])
+        self.assertEqual(pd.get_pending_refresh(), [])
+        self.assertEqual(pd.get('stale'), 'DC')
+        self.assertEqual(pd.get('dc1'), 'DC')
+
+        # Beyond the stale window the value is refreshed before returning
+        refreshes = []
+        age(20)
+        self.assertEqual(pd.get_cached(['stale'], refresh), {'stale': 'DC'})
+        self.assertEqual(refreshes, ['DC'])
+
+        # The config has the last known values, expired or not
+        age(20)
+        self.assertEqual(pd.get_config()['ds1'], 0)
+
+        # A refresh that doesn't update the value raises
+        age(3)
+        with self.assertRaises(InstrumentParameterExpirationException):
+            pd.get_cached(['ds1'], lambda command, names: None)
+
     def test_regex_flags(self):
         pdv = RegexParameter("foo",
                              r'.+foo=(\d+).+',
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+
+"""
+@package mi.core.instrument.test.test_sami_record
+@file mi/core/instrument/test/test_sami_record.py
+@brief Test cases for the SAMI record codec
+"""
+
+__license__ = 'Apache 2.0'
+
+from nose.plugins.attrib import attr
+from mi.core.unit_test import MiUnitTestCase
+
+from mi.core.exceptions import SampleException
+from mi.core.instrument.sami_record import unhexlify
+from mi.core.instrument.sami_record import calc_checksum
+from mi.core.instrument.sami_record import decode_record
+from mi.core.instrument.sami_record import PCO2_SAMPLE_DTYPE
+
+@attr('UNIT', group='mi')
+class UnitTestSamiRecord(MiUnitTestCase):
+    # SAMI2-PCO2 blank sample, from the unique id to the checksum
+    PCO2_SAMPLE = '542705CEE91CC800400019096206800730074C2CE042' + \
+                  '74003B0018096106800732074E0D82066124'
+
+    def test_checksum(self):
+        self.assertEqual(calc_checksum(unhexlify('27FF02')), 0x28)
+        self.assertRaises(SampleException, unhexlify, '27F')
+        self.assertRaises(SampleException, unhexlify, '27FG')
+
+    def test_decode_record(self):
+        (values, checksum) = decode_record(self.PCO2_SAMPLE, PCO2_SAMPLE_DTYPE)
+        self.assertEqual(values['unique_id'], 0x54)
+        self.assertEqual(values['record_length'], 0x27)
+        self.assertEqual(values['record_type'], 0x05)
+        self.assertEqual(values['record_time'], 0xCEE91CC8)
+        self.assertEqual(values['light_measurements'],
+                         [0x0040, 0x0019, 0x0962, 0x0680, 0x0730, 0x074C, 0x2CE0,
+                          0x4274, 0x003B, 0x0018, 0x0961, 0x0680, 0x0732, 0x074E])
+        self.assertEqual(values['voltage_battery'], 0x0D82)
+        self.assertEqual(values['thermistor_raw'], 0x0661)
+        self.assertEqual(values['checksum'], 0x24)
+        self.assertEqual(checksum, 0x24)
+
+        self.assertRaises(SampleException, decode_record, self.PCO2_SAMPLE[:-2], PCO2_SAMPLE_DTYPE)
@@ -22,10 +22,28 @@ to create a logger automatically scoped with the calling package and ready to us
 
     from ooi.logging import log    # no longer need get_logger at all
 
+for per-packet or per-record logging on a data path use a hot path logger.  Level
+checks are cached so a disabled message costs a dictionary lookup, arguments are
+only formatted when the message is emitted, and very chatty messages can be rate
+limited or sampled:
+
+    from mi.core.log import get_hot_path_logger, lazy_repr, TRACE
+    hot_log = get_hot_path_logger(__name__)
+
+    hot_log.debug("Got Data: %s", lazy_repr(data, 200))
+    hot_log.sampled(TRACE, 100, "RX DATA BYTES %d", count)
+
 """
+# Needed because we import the time module below.  With out this '.' is search first
+# and we import mi.core.time.
+from __future__ import absolute_import
+
 import os
 import sys
+import time
 import yaml
+import logging
+import threading
 import pkg_resources
 
 from mi.core.common import Singleton
@@ -72,7 +90,180 @@ class LoggerManager(Singleton):
             if debug:
                 print >> sys.stderr, str(os.getpid()) + ' supplemented logging from ' + LOGGING_CONTAINER_OVERRIDE
 
+        refresh_log_guards()
+
 def get_logger():
     return log
 
+# Level used by ooi.logging for log.trace
+TRACE = 5
+
+# Bumped whenever logging is reconfigured so cached level checks are dropped
+_guard_generation = 0
+
+_hot_path_loggers = {}
+_hot_path_lock = threading.Lock()
+
+def refresh_log_guards():
+    """
+    Invalidate the cached level checks of all hot path loggers.  Called after
+    logging is configured, call it after changing log levels at runtime.
+    """
+    global _guard_generation
+    _guard_generation += 1
+
+def get_hot_path_logger(name):
+    """
+    Return the hot path logger for a logger name, usually __name__ of the
+    calling module.  One instance is shared per name.
+    @param name logger name
+    @retval HotPathLogger
+    """
+    hot_log = _hot_path_loggers.get(name)
+    if hot_log is None:
+        with _hot_path_lock:
+            hot_log = _hot_path_loggers.get(name)
+            if hot_log is None:
+                hot_log = HotPathLogger(name)
+                _hot_path_loggers[name] = hot_log
+    return hot_log
+
+class LazyFormat(object):
+    """
+    Defer building an expensive log argument until the record is formatted.
+    Pass an instance as a log argument in place of the computed string.
+    """
+    __slots__ = ('_func', '_args')
+
+    def __init__(self, func, *args):
+        self._func = func
+        self._args = args
+
+    def __str__(self):
+        return str(self._func(*self._args))
+
+    __repr__ = __str__
+
+def _truncated_repr(value, max_length):
+    result = repr(value)
+    if max_length is not None and len(result) > max_length:
+        result = '%s...(%d chars)' % (result[:max_length], len(result))
+    return result
+
+def lazy_repr(value, max_length=None):
+    """
+    Lazily repr a value, truncating the result to max_length characters.
+    @param value object to repr when the record is formatted
+    @param max_length maximum length of the repr, None for no limit
+    @retval LazyFormat
+    """
+    return LazyFormat(_truncated_repr, value, max_length)
+
+class HotPathLogger(object):
+    """
+    Logger wrapper for code that runs per packet or per record.  The result
+    of isEnabledFor is cached per level, so messages below the configured
+    level return without touching the logging framework.  Rate limited and
+    sampled variants keep chatty debug and trace messages from flooding the
+    logs when they are enabled.
+    """
+    def __init__(self, name):
+        self._logger = logging.getLogger(name)
+        self._enabled = {}
+        self._generation = None
+
+        # message -> [last emitted time, suppressed count]
+        self._rate_limits = {}
+        # message -> call count
+        self._samples = {}
+
+    def isEnabledFor(self, level):
+        """
+        Cached equivalent of logging.Logger.isEnabledFor
+        @param level logging level
+        @retval True if a message at level would be emitted
+        """
+        if self._generation != _guard_generation:
+            self._enabled = {}
+            self._generation = _guard_generation
+
+        enabled = self._enabled.get(level)
+        if enabled is None:
+            enabled = self._logger.isEnabledFor(level)
+            self._enabled[level] = enabled
+        return enabled
+
+    def log(self, level, msg, *args, **kwargs):
+        if self.isEnabledFor(level):
+            self._logger.log(level, msg, *args, **kwargs)
+
+    def trace(self, msg, *args, **kwargs):
+        if self.isEnabledFor(TRACE):
+            self._logger.log(TRACE, msg, *args, **kwargs)
+
+    def debug(self, msg, *args, **kwargs):
+        if self.isEnabledFor(logging.DEBUG):
+            self._logger.debug(msg, *args, **kwargs)
+
+    def info(self, msg, *args, **kwargs):
+        if self.isEnabledFor(logging.INFO):
+            self._logger.info(msg, *args, **kwargs)
+
+    def warn(self, msg, *args, **kwargs):
+        if self.isEnabledFor(logging.WARNING):
+            self._logger.warning(msg, *args, **kwargs)
+
+    warning = warn
+
+    def error(self, msg, *args, **kwargs):
+        if self.isEnabledFor(logging.ERROR):
+            self._logger.error(msg, *args, **kwargs)
+
+    def rate_limited(self, level, interval, msg, *args):
+        """
+        Log a message at most once per interval.  The message format string
+        identifies the message; the number of suppressed messages is
+        appended when it is next emitted.
+        @param level logging level
+        @param interval minimum seconds between emitted messages
+        @param msg message format string
+        @param args message arguments
+        """
+        if not self.isEnabledFor(level):
+            return
+
+        now = time.time()
+        state = self._rate_limits.get(msg)
+        if state is None:
+            state = self._rate_limits.setdefault(msg, [0, 0])
+
+        if now - state[0] < interval:
+            state[1] += 1
+            return
+
+        suppressed = state[1]
+        state[0] = now
+        state[1] = 0
+        if suppressed:
+            self._logger.log(level, msg + ' (%d similar messages suppressed)', *(args + (suppressed,)))
+        else:
+            self._logger.log(level, msg, *args)
+
+    def sampled(self, level, rate, msg, *args):
+        """
+        Log one of every rate calls with this message.  The first call is
+        always logged.
+        @param level logging level
+        @param rate sample one message in this many
+        @param msg message format string
+        @param args message arguments
+        """
+        if not self.isEnabledFor(level):
+            return
+
+        count = self._samples.get(msg, 0)
+        self._samples[msg] = count + 1
+        if count % rate == 0:
+            self._logger.log(level, msg + ' (sampled 1/%d)', *(args + (rate,)))
+
 
@@ -392,31 +392,14 @@ class TestDriverScheduler(MiUnitTest):
             self._scheduler.run_job('who_are_you')
 
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+@attr('UNIT', group='mi')
+class TestDriverSchedulerPolled(TestDriverScheduler):
+    """
+    Run the driver scheduler tests against the apscheduler backend
+    """
+    def setUp(self):
+        """
+        Setup the test case
+        """
+        self._scheduler = DriverScheduler(timer_wheel=False)
+        self._triggered = []
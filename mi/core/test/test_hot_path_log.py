@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+
+"""
+@package mi.core.test.test_hot_path_log
+@file mi/core/test/test_hot_path_log.py
+@brief Unit tests for the hot path logger
+"""
+
+__license__ = 'Apache 2.0'
+
+import logging
+
+from nose.plugins.attrib import attr
+
+from mi.core.unit_test import MiUnitTest
+from mi.core.log import TRACE
+from mi.core.log import lazy_repr
+from mi.core.log import LazyFormat
+from mi.core.log import get_hot_path_logger
+from mi.core.log import refresh_log_guards
+
+class RecordHandler(logging.Handler):
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record.getMessage())
+
+@attr('UNIT', group='mi')
+class TestHotPathLogger(MiUnitTest):
+    def setUp(self):
+        self.logger = logging.getLogger('mi.core.test.hot_path')
+        self.logger.propagate = False
+        self.handler = RecordHandler()
+        self.logger.addHandler(self.handler)
+        self.logger.setLevel(logging.INFO)
+        refresh_log_guards()
+        self.hot_log = get_hot_path_logger('mi.core.test.hot_path')
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+        self.logger.propagate = True
+        self.logger.setLevel(logging.NOTSET)
+        refresh_log_guards()
+
+    def test_shared(self):
+        self.assertIs(self.hot_log, get_hot_path_logger('mi.core.test.hot_path'))
+
+    def test_guard(self):
+        """
+        Disabled messages don't format their arguments and level checks
+        are refreshed after refresh_log_guards
+        """
+        formatted = []
+        arg = LazyFormat(lambda: formatted.append(True) or 'value')
+
+        self.hot_log.debug("debug %s", arg)
+        self.hot_log.trace("trace %s", arg)
+        self.hot_log.info("info %s", arg)
+        self.assertEqual(self.handler.records, ['info value'])
+        self.assertEqual(len(formatted), 1)
+
+        # Cached until refreshed
+        self.logger.setLevel(logging.DEBUG)
+        self.hot_log.debug("debug")
+        self.assertEqual(len(self.handler.records), 1)
+
+        refresh_log_guards()
+        self.hot_log.debug("debug")
+        self.assertEqual(self.handler.records[-1], 'debug')
+
+    def test_lazy_repr(self):
+        self.assertEqual(str(lazy_repr('abc')), "'abc'")
+        self.assertEqual(str(lazy_repr('x' * 20, 5)), "'xxxx...(22 chars)")
+
+    def test_sampled(self):
+        self.logger.setLevel(TRACE)
+        refresh_log_guards()
+        for i in range(25):
+            self.hot_log.sampled(TRACE, 10, "packet %d", i)
+        self.assertEqual(self.handler.records, ['packet 0 (sampled 1/10)',
+                                                'packet 10 (sampled 1/10)',
+                                                'packet 20 (sampled 1/10)'])
+
+    def test_rate_limited(self):
+        for i in range(5):
+            self.hot_log.rate_limited(logging.INFO, 60, "packet %d", i)
+        self.assertEqual(self.handler.records, ['packet 0'])
+
+        # Suppressed count is reported with the next emitted message
+        self.hot_log._rate_limits["packet %d"][0] -= 60
+        self.hot_log.rate_limited(logging.INFO, 60, "packet %d", 5)
+        self.assertEqual(self.handler.records[-1], 'packet 5 (4 similar messages suppressed)')
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+
+"""
+@package mi.core.test.test_timer_wheel Timer wheel tests
+@file mi/core/test/test_timer_wheel.py
+@brief Unit tests for the timer wheel and timer wheel scheduler
+"""
+
+__license__ = 'Apache 2.0'
+
+import time
+import datetime
+
+from mi.core.log import get_logger ; log = get_logger()
+
+from nose.plugins.attrib import attr
+
+from mi.core.unit_test import MiUnitTest
+from mi.core.timer_wheel import TimerWheel
+from mi.core.timer_wheel import TimerWheelScheduler
+from mi.core.timer_wheel import get_shared_timer_wheel
+
+@attr('UNIT', group='mi')
+class TestTimerWheel(MiUnitTest):
+    """
+    Test the timer wheel with a small geometry so cascades happen quickly
+    """
+    def setUp(self):
+        self._wheel = TimerWheel(tick=0.01, slots=8, levels=3)
+        self._wheel.start()
+        self._fired = []
+
+    def tearDown(self):
+        self._wheel.shutdown()
+
+    def _callback(self, name):
+        return lambda: self._fired.append((name, time.time()))
+
+    def _wait_for(self, count, timeout=5):
+        endtime = time.time() + timeout
+        while len(self._fired) < count and time.time() < endtime:
+            time.sleep(0.01)
+
+    def test_fire_order(self):
+        """
+        Timers across all levels fire in order and not early
+        """
+        start = time.time()
+        delays = [0.35, 0.01, 0.7, 0.05, 0.2]
+        for delay in delays:
+            self._wheel.add(delay, self._callback(delay))
+        self.assertEqual(self._wheel.pending(), len(delays))
+
+        self._wait_for(len(delays))
+        self.assertEqual([name for (name, fired) in self._fired], sorted(delays))
+        for (delay, fired) in self._fired:
+            self.assertGreaterEqual(fired - start, delay)
+        self.assertEqual(self._wheel.pending(), 0)
+
+    def test_cancel(self):
+        """
+        Cancelled timers don't fire
+        """
+        timer = self._wheel.add(0.1, self._callback('cancelled'))
+        self._wheel.add(0.2, self._callback('kept'))
+        self.assertTrue(self._wheel.cancel(timer))
+        self.assertFalse(self._wheel.cancel(timer))
+
+        self._wait_for(1)
+        time.sleep(0.1)
+        self.assertEqual([name for (name, fired) in self._fired], ['kept'])
+
+    def test_shared_wheel(self):
+        """
+        All schedulers use the same wheel
+        """
+        self.assertIs(get_shared_timer_wheel(), get_shared_timer_wheel())
+
+@attr('UNIT', group='mi')
+class TestTimerWheelScheduler(MiUnitTest):
+    """
+    Test the scheduler interface on top of a private wheel
+    """
+    def setUp(self):
+        self._wheel = TimerWheel(tick=0.01)
+        self._scheduler = TimerWheelScheduler(self._wheel)
+        self._triggered = []
+
+    def tearDown(self):
+        self._scheduler.shutdown()
+        self._wheel.shutdown()
+
+    def _callback(self):
+        self._triggered.append(datetime.datetime.now())
+
+    def _wait_for(self, count, timeout=5):
+        endtime = time.time() + timeout
+        while len(self._triggered) < count and time.time() < endtime:
+            time.sleep(0.01)
+
+    def test_pending_jobs(self):
+        """
+        Jobs added before start are scheduled when started
+        """
+        self._scheduler.add_interval_job(self._callback, seconds=0.1)
+        time.sleep(0.2)
+        self.assertEqual(len(self._triggered), 0)
+
+        self._scheduler.start()
+        self._wait_for(2)
+        self.assertGreaterEqual(len(self._triggered), 2)
+
+    def test_date_job(self):
+        """
+        A date job runs once and is removed
+        """
+        self._scheduler.start()
+        self._scheduler.add_date_job(self._callback, datetime.datetime.now() + datetime.timedelta(seconds=0.1))
+        self._wait_for(1)
+        time.sleep(0.1)
+        self.assertEqual(len(self._triggered), 1)
+        self.assertEqual(self._scheduler.get_jobs(), [])
+
+    def test_unschedule(self):
+        self._scheduler.start()
+        self._scheduler.add_interval_job(self._callback, seconds=0.1)
+        self._scheduler.unschedule_func(self._callback)
+        self.assertEqual(self._wheel.pending(), 0)
+
+        with self.assertRaises(KeyError):
+            self._scheduler.unschedule_func(self._callback)
+
+    def test_polled_job(self):
+        """
+        Polled jobs run when polled after the minimum interval and
+        automatically after the maximum interval
+        """
+        self._scheduler.start()
+        self._scheduler.add_polled_job(self._callback, 'polled',
+                                       TimerWheelScheduler.interval(seconds=1),
+                                       TimerWheelScheduler.interval(seconds=2))
+
+        self.assertTrue(self._scheduler.run_polled_job('polled'))
+        self.assertFalse(self._scheduler.run_polled_job('polled'))
+        self._wait_for(1)
+        self.assertEqual(len(self._triggered), 1)
+
+        # The poll pushed out the automatic run
+        self._wait_for(2, timeout=3)
+        self.assertEqual(len(self._triggered), 2)
+        self.assertEqual(self._wheel.pending(), 1)
+
+        with self.assertRaises(ValueError):
+            self._scheduler.add_polled_job(self._callback, 'polled',
+                                           TimerWheelScheduler.interval(seconds=1))
+        with self.assertRaises(LookupError):
+            self._scheduler.run_polled_job('who_are_you')
@@ -0,0 +1,482 @@
+#!/usr/bin/env python
+
+"""
+@package mi.core.timer_wheel Timer wheel scheduler for MI drivers
+@file mi/core/timer_wheel.py
+@brief Lightweight replacement for the apscheduler based PolledScheduler.
+
+Every PolledScheduler owns a scheduler thread and scans all of its jobs on
+each wakeup.  When many drivers run in one process that adds up to a lot of
+idle threads and wakeups.  The TimerWheelScheduler keeps the same job
+interface, but all instances in a process share one TimerWheel and one
+timer thread.  The wheel is hierarchical so inserting and cancelling a
+timer is O(1), and the thread only wakes up for the next occupied slot or
+to cascade timers down from a coarser level.
+
+Job run times are still computed by the apscheduler triggers (and our
+PolledIntervalTrigger), so absolute, interval, cron and polled interval
+jobs behave the same as with the PolledScheduler.  Each firing runs on a
+short lived daemon thread so a slow callback doesn't delay other timers.
+
+Usage:
+
+scheduler = TimerWheelScheduler()
+scheduler.start()
+scheduler.add_interval_job(self._callback, seconds=3)
+scheduler.add_polled_job(self._callback, 'job_name', min_interval, max_interval)
+scheduler.run_polled_job('job_name')
+"""
+# Needed because we import the time module below.  With out this '.' is search first
+# and we import mi.core.time.
+from __future__ import absolute_import
+
+__license__ = 'Apache 2.0'
+
+import time
+from datetime import datetime
+from datetime import timedelta
+from threading import Condition, Lock, Thread
+
+from apscheduler.triggers import SimpleTrigger, IntervalTrigger, CronTrigger
+from apscheduler.util import convert_to_datetime, timedelta_seconds
+
+from mi.core.scheduler import PolledScheduler
+from mi.core.scheduler import PolledIntervalTrigger
+
+from mi.core.log import get_logger; log = get_logger()
+
+# Tick length in seconds and wheel geometry.  With 256 slots per level and
+# 4 levels the wheel covers about 13 years at 0.1s resolution.
+DEFAULT_TICK = 0.1
+DEFAULT_SLOTS = 256
+DEFAULT_LEVELS = 4
+
+class WheelTimer(object):
+    """
+    A timer stored in the wheel.  Holds its slot location so it can be
+    cancelled without searching.
+    """
+    __slots__ = ('expiry', 'callback', 'level', 'slot')
+
+    def __init__(self, expiry, callback):
+        self.expiry = expiry
+        self.callback = callback
+        self.level = None
+        self.slot = None
+
+class TimerWheel(object):
+    """
+    Hierarchical timing wheel driven by a single daemon thread.  Level 0
+    has one slot per tick, each slot in level n spans slots^n ticks.
+    Timers in coarser levels are cascaded down as the wheel turns.
+    """
+    def __init__(self, tick=DEFAULT_TICK, slots=DEFAULT_SLOTS, levels=DEFAULT_LEVELS):
+        self._tick = tick
+        self._slots = slots
+        self._levels = levels
+        self._wheels = [[set() for i in xrange(slots)] for l in xrange(levels)]
+        self._max_delta = slots ** levels - 1
+
+        self._start_time = time.time()
+        self._current_tick = 0
+        self._count = 0
+
+        self._cond = Condition(Lock())
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        """
+        Start the timer thread if it isn't already running.
+        """
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._thread = Thread(target=self._run, name='TimerWheel')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def shutdown(self):
+        """
+        Stop the timer thread.  Pending timers are kept.
+        """
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+
+    def add(self, delay, callback):
+        """
+        Schedule a callback.
+        @param delay seconds from now
+        @param callback function with no arguments, called on the timer thread
+        @return timer handle used to cancel
+        """
+        with self._cond:
+            if not self._count:
+                # Nothing on the wheel, skip the idle ticks
+                self._current_tick = max(self._current_tick, self._now_tick())
+
+            # Round up so the timer never fires before the delay has passed
+            target = (time.time() + delay - self._start_time) / self._tick
+            expiry = max(int(-(-target // 1)), self._current_tick + 1)
+            timer = WheelTimer(expiry, callback)
+            self._insert(timer)
+            self._count += 1
+            self._cond.notify()
+            return timer
+
+    def cancel(self, timer):
+        """
+        Cancel a timer.
+        @return True if the timer was pending, False if already fired or
+        cancelled
+        """
+        with self._cond:
+            if timer.level is None:
+                return False
+            self._wheels[timer.level][timer.slot].discard(timer)
+            timer.level = timer.slot = None
+            self._count -= 1
+            return True
+
+    def pending(self):
+        """
+        Number of timers waiting to fire.
+        """
+        return self._count
+
+    def _now_tick(self):
+        return int((time.time() - self._start_time) / self._tick)
+
+    def _insert(self, timer):
+        """
+        Put a timer in the slot for its expiry.  Called with the lock held.
+        """
+        delta = min(max(timer.expiry - self._current_tick, 0), self._max_delta)
+        level = 0
+        span = self._slots
+        while delta >= span and level < self._levels - 1:
+            level += 1
+            span *= self._slots
+
+        shift = self._slots ** level
+        slot = (min(timer.expiry, self._current_tick + self._max_delta) // shift) % self._slots
+        timer.level = level
+        timer.slot = slot
+        self._wheels[level][slot].add(timer)
+
+    def _advance(self):
+        """
+        Move the wheel one tick, cascading coarser levels when level 0
+        wraps.  Called with the lock held.
+        @return list of expired timers
+        """
+        self._current_tick += 1
+        tick = self._current_tick
+
+        shift = 1
+        for level in xrange(1, self._levels):
+            shift *= self._slots
+            if tick % shift:
+                break
+            slot = self._wheels[level][(tick // shift) % self._slots]
+            timers = list(slot)
+            slot.clear()
+            for timer in timers:
+                self._insert(timer)
+
+        slot = self._wheels[0][tick % self._slots]
+        if not slot:
+            return []
+
+        expired = []
+        for timer in list(slot):
+            if timer.expiry <= tick:
+                slot.discard(timer)
+                timer.level = timer.slot = None
+                self._count -= 1
+                expired.append(timer)
+        return expired
+
+    def _next_wakeup(self):
+        """
+        Ticks until the next occupied level 0 slot or the next cascade,
+        whichever comes first.  Called with the lock held.
+        """
+        if not self._count:
+            return None
+
+        tick = self._current_tick
+        boundary = self._slots - (tick % self._slots)
+        for offset in xrange(1, boundary):
+            if self._wheels[0][(tick + offset) % self._slots]:
+                return offset
+        return boundary
+
+    def _run(self):
+        while True:
+            expired = []
+            with self._cond:
+                if not self._running:
+                    return
+
+                now_tick = self._now_tick()
+                if not self._count:
+                    self._current_tick = max(self._current_tick, now_tick)
+                while self._current_tick < now_tick:
+                    expired.extend(self._advance())
+
+                if not expired:
+                    wakeup = self._next_wakeup()
+                    if wakeup is None:
+                        self._cond.wait()
+                    else:
+                        target = self._start_time + (self._current_tick + wakeup) * self._tick
+                        self._cond.wait(max(target - time.time(), 0))
+                    continue
+
+            for timer in expired:
+                try:
+                    timer.callback()
+                except Exception as e:
+                    log.error("Timer callback %s failed: %s", timer.callback, e)
+
+_shared_wheel = None
+_shared_wheel_lock = Lock()
+
+def get_shared_timer_wheel():
+    """
+    Return the process wide timer wheel, creating and starting it on first
+    use.
+    """
+    global _shared_wheel
+    with _shared_wheel_lock:
+        if _shared_wheel is None:
+            _shared_wheel = TimerWheel()
+            _shared_wheel.start()
+        return _shared_wheel
+
+class WheelJob(object):
+    """
+    A scheduled job.  The trigger computes run times, the wheel only holds
+    the timer for the next one.
+    """
+    def __init__(self, trigger, func, args, kwargs, name=None):
+        self.trigger = trigger
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.name = name
+        self.runs = 0
+        self.next_run_time = None
+        self.timer = None
+
+    def compute_next_run_time(self, now):
+        self.next_run_time = self.trigger.get_next_fire_time(now)
+        return self.next_run_time
+
+    def __repr__(self):
+        return '<%s (name=%s, trigger=%s, next_run_time=%s)>' % (
+            self.__class__.__name__, self.name, repr(self.trigger), self.next_run_time)
+
+class TimerWheelScheduler(object):
+    """
+    Scheduler with the PolledScheduler job interface backed by the shared
+    timer wheel.
+    """
+    interval = staticmethod(PolledScheduler.interval)
+
+    def __init__(self, wheel=None):
+        """
+        @param wheel TimerWheel to use, defaults to the process wide wheel.
+        """
+        self._wheel = wheel
+        self._jobs = []
+        self._polled_jobs = {}
+        self._lock = Lock()
+        self.running = False
+
+    def start(self):
+        """
+        Start scheduling.  Jobs added before start are scheduled now.
+        """
+        if self._wheel is None:
+            self._wheel = get_shared_timer_wheel()
+        else:
+            self._wheel.start()
+
+        with self._lock:
+            self.running = True
+            for job in self._jobs:
+                self._schedule(job, datetime.now())
+
+    def shutdown(self, wait=True):
+        """
+        Cancel all jobs.  The shared wheel keeps running for other
+        schedulers.
+        """
+        with self._lock:
+            self.running = False
+            for job in self._jobs:
+                self._cancel(job)
+
+    def get_jobs(self):
+        with self._lock:
+            return list(self._jobs)
+
+    def add_date_job(self, func, date, args=None, kwargs=None):
+        """
+        Schedule a job to run once at a date.
+        """
+        return self._add_job(SimpleTrigger(convert_to_datetime(date)), func, args, kwargs)
+
+    def add_interval_job(self, func, weeks=0, days=0, hours=0, minutes=0,
+                         seconds=0, start_date=None, args=None, kwargs=None):
+        """
+        Schedule a job to run on an interval.
+        """
+        interval = timedelta(weeks=weeks, days=days, hours=hours,
+                             minutes=minutes, seconds=seconds)
+        return self._add_job(IntervalTrigger(interval, start_date), func, args, kwargs)
+
+    def add_cron_job(self, func, year=None, month=None, day=None, week=None,
+                     day_of_week=None, hour=None, minute=None, second=None,
+                     start_date=None, args=None, kwargs=None):
+        """
+        Schedule a job using cron style fields.
+        """
+        fields = dict(year=year, month=month, day=day, week=week,
+                      day_of_week=day_of_week, hour=hour, minute=minute,
+                      second=second, start_date=start_date)
+        fields = dict((k, v) for (k, v) in fields.items() if v is not None)
+        return self._add_job(CronTrigger(**fields), func, args, kwargs)
+
+    def add_polled_job(self, func, name, min_interval, max_interval=None,
+                       start_date=None, args=None, kwargs=None):
+        """
+        Schedule a polled interval job.
+        @see PolledScheduler.add_polled_job
+        @raise ValueError if a polled job with the name already exists
+        """
+        if name in self._polled_jobs:
+            raise ValueError("Not adding job since a job named '%s' already exists" % name)
+
+        trigger = PolledIntervalTrigger(min_interval, max_interval, start_date)
+        job = self._add_job(trigger, func, args, kwargs, name=name, polled=True)
+        self._polled_jobs[name] = job
+        return job
+
+    def run_polled_job(self, name):
+        """
+        Run a polled job if its minimum interval has passed.
+        @see PolledScheduler.run_polled_job
+        @return True if the job is run, false otherwise
+        @raise LookupError if no polled job has the name
+        """
+        with self._lock:
+            job = self._polled_jobs.get(name)
+            if not job:
+                raise LookupError("no PolledIntervalJob found named '%s'" % name)
+
+            if not job.trigger.pull_trigger():
+                log.debug("Job '%s' is *NOT* ready to run", name)
+                return False
+
+            log.debug("Job '%s' is ready to run", name)
+            self._cancel(job)
+            if self.running:
+                self._schedule(job, datetime.now())
+
+        self._run_job(job)
+        return True
+
+    def unschedule_func(self, func):
+        """
+        Remove all jobs that run the given function.
+        @raise KeyError if the function is not scheduled
+        """
+        with self._lock:
+            found = [job for job in self._jobs if job.func == func]
+            if not found:
+                raise KeyError('The given function is not scheduled in this scheduler')
+            for job in found:
+                self._remove(job)
+
+    def _add_job(self, trigger, func, args, kwargs, name=None, polled=False):
+        job = WheelJob(trigger, func, args or [], kwargs or {}, name=name)
+        now = datetime.now()
+        if not job.compute_next_run_time(now) and not polled:
+            raise ValueError('Not adding job since it would never be run')
+
+        with self._lock:
+            self._jobs.append(job)
+            if self.running:
+                self._schedule(job, now)
+
+        log.info('Added job "%s"', job)
+        return job
+
+    def _remove(self, job):
+        """
+        Drop a job.  Called with the lock held.
+        """
+        self._cancel(job)
+        self._jobs.remove(job)
+        if job.name is not None and self._polled_jobs.get(job.name) is job:
+            del self._polled_jobs[job.name]
+
+    def _cancel(self, job):
+        """
+        Cancel the pending timer of a job.  Called with the lock held.
+        """
+        if job.timer is not None:
+            self._wheel.cancel(job.timer)
+            job.timer = None
+
+    def _schedule(self, job, now):
+        """
+        Put the next run of a job on the wheel.  Called with the lock held.
+        """
+        run_time = job.compute_next_run_time(now)
+        if run_time is None:
+            job.timer = None
+            return
+
+        delay = timedelta_seconds(run_time - datetime.now())
+        job.timer = self._wheel.add(delay, lambda: self._fire(job))
+
+    def _fire(self, job):
+        """
+        Timer callback on the wheel thread.  Reschedule, then run the job
+        on its own thread.
+        """
+        with self._lock:
+            if job not in self._jobs:
+                return
+
+            job.timer = None
+            now = datetime.now()
+            if isinstance(job.trigger, PolledIntervalTrigger):
+                job.trigger.pull_trigger()
+                self._schedule(job, now)
+            else:
+                if job.next_run_time and job.next_run_time > now:
+                    now = job.next_run_time
+                self._schedule(job, now + timedelta(microseconds=1))
+                if job.next_run_time is None:
+                    self._remove(job)
+
+        self._run_job(job)
+
+    def _run_job(self, job):
+        job.runs += 1
+        thread = Thread(target=self._call_job, args=[job])
+        thread.daemon = True
+        thread.start()
+
+    def _call_job(self, job):
+        try:
+            job.func(*job.args, **job.kwargs)
+        except Exception as e:
+            log.exception('Job "%s" raised an exception: %s', job, e)
@@ -16,8 +16,10 @@ import shutil
 import hashlib
 import copy
 import traceback
+from collections import deque
 
 from mi.core.log import get_logger ; log = get_logger()
+from mi.core.exceptions import InstrumentException
 from mi.core.exceptions import InstrumentParameterException
 from mi.core.exceptions import DataSourceLocationException
 from mi.core.exceptions import ConfigurationException
@@ -35,6 +37,9 @@ from mi.core.instrument.driver_dict import DriverDict
 from mi.core.instrument.protocol_param_dict import ParameterDictType
 from mi.core.instrument.protocol_param_dict import Parameter
 from mi.core.common import BaseEnum
+from mi.dataset.dataset_publisher import ParticlePublisher
+from mi.dataset.dataset_state import StatePersister
+from mi.dataset.ingest_worker import IngestWorker
 
 class DataSourceConfigKey(BaseEnum):
     HARVESTER = 'harvester'
@@ -58,6 +63,7 @@ class DriverParameter(BaseEnum):
     RECORDS_PER_SECOND = 'records_per_second'
     PUBLISHER_POLLING_INTERVAL = 'publisher_polling_interval'
     BATCHED_PARTICLE_COUNT = 'batched_particle_count'
+    INGEST_WORKERS = 'ingest_workers'
 
 class DataSourceLocation(object):
     """
@@ -104,6 +110,7 @@ class DataSetDriverConfigKeys(BaseEnum):
     PATTERN = "pattern"
     FREQUENCY = "frequency"
     FILE_MOD_WAIT_TIME = "file_mod_wait_time"
+    FILE_INDEX = "file_index"
     HARVESTER = "harvester"
     PARSER = "parser"
     MODULE = "module"
@@ -145,12 +152,19 @@ class DataSetDriver(object):
     """
     def __init__(self, config, memento, data_callback, state_callback, event_callback, exception_callback):
         self._config = copy.deepcopy(config)
-        self._data_callback = data_callback
+        # parsers publish through the particle publisher, which calls the
+        # agent's data callback
+        self._agent_data_callback = data_callback
+        self._data_callback = self._publish_particles
         self._state_callback = state_callback
+        # driver state updates are coalesced before they are written
+        self._state_persister = StatePersister(state_callback, lambda: self._driver_state)
         self._event_callback = event_callback
         self._exception_callback = exception_callback
         self._memento = memento
         self._publisher_thread = None
+        self._publisher_shutdown = False
+        self._particle_publisher = None
 
         self._verify_config()
 
@@ -158,6 +172,8 @@ class DataSetDriver(object):
         self._polling_interval = None
         self._generate_particle_count = None
         self._particle_count_per_second = None
+        self._ingest_workers = None
+        self._ingest_pool = None
         self._resource_id = None
 
         self._param_dict = ProtocolParameterDict()
@@ -273,13 +289,16 @@ class DataSetDriver(object):
 
         log.trace("set_resource: iterate through params: %s", params)
         for (key, val) in params.iteritems():
-            if key in [DriverParameter.BATCHED_PARTICLE_COUNT, DriverParameter.RECORDS_PER_SECOND]:
+            if key in [DriverParameter.BATCHED_PARTICLE_COUNT, DriverParameter.RECORDS_PER_SECOND,
+                       DriverParameter.INGEST_WORKERS]:
                 if not isinstance(val, int): raise InstrumentParameterException("%s must be an integer" % key)
             if key in [DriverParameter.PUBLISHER_POLLING_INTERVAL]:
                 if not isinstance(val, (int, float)): raise InstrumentParameterException("%s must be an float" % key)
 
             if val <= 0:
                 raise InstrumentParameterException("%s must be > 0" % key)
+            if key == DriverParameter.INGEST_WORKERS and val > 1 and not self._supports_ingest_workers():
+                raise InstrumentParameterException("%s does not support ingest workers" % self.__class__.__name__)
 
             self._param_dict.set_value(key, val)
 
@@ -287,9 +306,11 @@ class DataSetDriver(object):
         self._generate_particle_count = self._param_dict.get(DriverParameter.BATCHED_PARTICLE_COUNT)
         self._particle_count_per_second = self._param_dict.get(DriverParameter.RECORDS_PER_SECOND)
         self._polling_interval = self._param_dict.get(DriverParameter.PUBLISHER_POLLING_INTERVAL)
-        log.trace("Driver Parameters: %s, %s, %s", self._polling_interval, self._particle_count_per_second,
-                  self._generate_particle_count)
-
+        self._ingest_workers = self._param_dict.get(DriverParameter.INGEST_WORKERS)
+        log.trace("Driver Parameters: %s, %s, %s, %s", self._polling_interval, self._particle_count_per_second,
+                  self._generate_particle_count, self._ingest_workers)
+        if self._particle_publisher:
+            self._particle_publisher.set_rate(self._particle_count_per_second, self._generate_particle_count)
 
     def get_resource(self, *args, **kwargs):
         """
@@ -398,11 +419,23 @@ class DataSetDriver(object):
                 description="Number of particles to batch before sending to the agent")
         )
 
+        self._param_dict.add_parameter(
+            Parameter(
+                DriverParameter.INGEST_WORKERS,
+                int,
+                value=1,
+                type=ParameterDictType.INT,
+                visibility=ParameterDictVisibility.IMMUTABLE,
+                display_name="Ingest Workers",
+                description="Number of worker processes parsing files, 1 parses files in the driver")
+        )
+
         config = self._config.get(DataSourceConfigKey.DRIVER, {})
         log.debug("set_resource on startup with: %s", config)
         self.set_resource(config)
 
     def _start_publisher_thread(self):
+        self._start_particle_publisher()
         self._publisher_thread = gevent.spawn(self._publisher_loop)
         self._publisher_shutdown = False
 
@@ -411,8 +444,120 @@ class DataSetDriver(object):
         self._publisher_shutdown = True
         if self._publisher_thread:
             self._publisher_thread.kill(block=False)
+        self._stop_ingest_pool()
+        self._stop_particle_publisher()
+        self._state_persister.stop()
         log.debug("shutdown complete")
 
+    def _start_particle_publisher(self):
+        """
+        Start publishing particles at the configured records per second.
+        Parsers run ahead of publishing until the publish queue is full.
+        """
+        self._particle_publisher = ParticlePublisher(self._agent_data_callback,
+                                                     self._particle_count_per_second,
+                                                     self._generate_particle_count,
+                                                     exception_callback=self._exception_callback)
+        self._particle_publisher.start()
+
+    def _stop_particle_publisher(self):
+        if self._particle_publisher:
+            log.debug("Stopping particle publisher, metrics: %s", self._particle_publisher.get_metrics())
+            self._particle_publisher.stop()
+            self._particle_publisher = None
+
+    def _publish_particles(self, particles):
+        """
+        Data callback given to parsers.  Queue the particles to publish,
+        blocking while the publish queue is full.
+        @param particles: list of particles
+        """
+        if self._particle_publisher:
+            self._particle_publisher.publish(particles, self._publish_key())
+        else:
+            self._agent_data_callback(particles)
+
+    def _publish_key(self):
+        """
+        @retval key the particles being parsed are published with, the name
+            of the file they come from, None if there isn't one
+        """
+        return None
+
+    def _after_publish(self, callback, *args):
+        """
+        Call the callback once the particles queued before it are published,
+        so driver state is never saved ahead of the data it covers.
+        """
+        if self._particle_publisher:
+            self._particle_publisher.call(callback, *args)
+        else:
+            callback(*args)
+
+    def _restart_publish(self, key):
+        """
+        Save state after publishing again for a key whose publishing failed,
+        once the particles queued before this are published.  Called when a
+        file is parsed again from its saved state.
+        """
+        if self._particle_publisher:
+            self._particle_publisher.restart(key)
+
+    def _save_driver_state(self, key=None, flush=False):
+        """
+        Save the driver state, coalesced with other updates unless flushed
+        @param key: top level driver state key that changed, None if the whole state changed
+        @param flush: True to write the state now, i.e. when a file is finished
+        """
+        self._state_persister.update(key, flush)
+
+    def set_state_delta_callback(self, delta_callback):
+        """
+        Persist driver state by sending only the changed entries to this
+        callback instead of sending the whole state to the state callback.
+        Entries are keyed by file name for directory harvesters.
+        @param delta_callback: callback taking a dict of changed driver state entries
+        """
+        self._state_persister.set_delta_callback(delta_callback)
+
+    def get_publisher_metrics(self):
+        """
+        @retval dict of PublisherMetric values, None if not publishing
+        """
+        if self._particle_publisher:
+            return self._particle_publisher.get_metrics()
+        return None
+
+    def _supports_ingest_workers(self):
+        """
+        @retval True if the driver can parse files in ingest workers
+        """
+        return False
+
+    def _get_ingest_pool(self):
+        """
+        Get the ingest worker processes, starting them if needed.  Workers
+        are new python processes, they don't share anything with the driver.
+        """
+        if self._ingest_pool is None:
+            log.debug("Starting %d ingest workers, resource id: %s", self._ingest_workers, self._resource_id)
+            self._ingest_pool = [IngestWorker() for index in range(self._ingest_workers)]
+        return self._ingest_pool
+
+    def _stop_ingest_pool(self):
+        if self._ingest_pool is not None:
+            log.debug("Stopping ingest workers")
+            for worker in self._ingest_pool:
+                worker.stop()
+            self._ingest_pool = None
+
+    def _shutdown_requested(self, data_key=None):
+        """
+        @param data_key: data key of the publisher thread
+        @retval True if the publisher thread has been told to stop
+        """
+        return self._publisher_shutdown
+
     def _publisher_loop(self):
         """
         Main loop to listen for new files to parse.  Parse them and move on.
@@ -474,6 +619,7 @@ class SimpleDataSetDriver(DataSetDriver):
         super(SimpleDataSetDriver, self).__init__(config, memento, data_callback, state_callback, event_callback, exception_callback)
         self._harvester = None
         self._driver_state = None
+        self._file_in_process = None
 
         self._init_state(memento)
 
@@ -554,7 +700,118 @@ class SimpleDataSetDriver(DataSetDriver):
         log.trace("Checking for new files in queue, count: %d", count)
         if(count > 0):
             log.debug("New file detected, resource_id: %s, array addr: %s", self._resource_id, id(self._new_file_queue))
-            self._got_file(self._new_file_queue.pop(0))
+            if self._ingest_workers > 1:
+                self._ingest_queue(self._new_file_queue,
+                                   self._harvester_config.get(DataSetDriverConfigKeys.DIRECTORY))
+            else:
+                self._got_file(self._new_file_queue.pop(0))
+
+    def _ingest_queue(self, file_queue, directory, data_key=None):
+        """
+        Parse the files in the queue in the ingest worker processes and
+        publish them in queue order.  A file is taken off the queue before
+        its particles are published, and its parser state is saved as they
+        are published.  Once we are told to stop, files that have not been
+        published are put back on the queue and the workers are stopped.
+        @param file_queue: list of file names to ingest
+        @param directory: directory containing the files
+        @param data_key: data key of the harvester that found the files
+        """
+        pool = self._get_ingest_pool()
+        pending = deque()
+
+        try:
+            while (file_queue or pending) and not self._shutdown_requested(data_key):
+                # keep the workers busy while the oldest file is published
+                while file_queue and len(pending) < self._ingest_workers * 2:
+                    file_name = file_queue[0]
+                    path = os.path.join(directory, file_name)
+                    parser_state = self._driver_state[file_name][DriverStateKey.PARSER_STATE]
+                    (parser_class, config, parser_args) = self._ingest_parser(file_name, path, data_key)
+                    worker = min(pool, key=lambda candidate: candidate.pending)
+                    log.debug("Queue file for ingest workers: %s", path)
+                    worker.parse(parser_class, config, path, parser_state, parser_args)
+                    pending.append((file_queue.pop(0), path, worker))
+
+                (file_name, path, worker) = pending.popleft()
+                self._publish_ingest_result(file_name, path, worker.get_result())
+        except:
+            # a worker may have been left part way through a result
+            self._stop_ingest_pool()
+            raise
+        finally:
+            if pending:
+                # the results of these files are abandoned with the workers
+                file_queue[0:0] = [file_name for (file_name, path, worker) in pending]
+                self._stop_ingest_pool()
+
+    def _publish_ingest_result(self, file_name, path, ingest_result):
+        """
+        Publish the particles an ingest worker parsed from a file, saving
+        each parser state once the particles parsed before it are published.
+        @param file_name: name of the parsed file
+        @param path: path of the parsed file
+        @param ingest_result: FileIngestResult returned by the worker
+        """
+        self._raise_new_file_event(path)
+        self._restart_publish(file_name)
+
+        particles = ingest_result.particles
+        parser_state = self._driver_state[file_name][DriverStateKey.PARSER_STATE]
+        published = 0
+        for (parsed, parser_state, file_ingested) in ingest_result.states:
+            self._publish_batched(particles[published:parsed], file_name)
+            published = parsed
+            self._store_after_publish(file_name, parser_state, file_ingested)
+        # particles parsed after the last state, before an exception
+        self._publish_batched(particles[published:], file_name)
+
+        for exception in ingest_result.get_exceptions():
+            self._sample_exception_callback(exception)
+
+        error = ingest_result.get_error()
+        if error is not None and not isinstance(error, SampleException):
+            raise error
+
+        if error is not None:
+            # need to mark a bad file as ingested so we don't re-ingest it
+            self._store_after_publish(file_name, parser_state, True)
+            self._sample_exception_callback(error)
+
+    def _publish_batched(self, particles, file_name):
+        """
+        Publish particles in batches of the batched particle count
+        @param particles: list of particles
+        @param file_name: name of the file the particles were parsed from
+        """
+        count = 1
+        if self._generate_particle_count:
+            count = self._generate_particle_count
+
+        for index in xrange(0, len(particles), count):
+            if self._particle_publisher:
+                self._particle_publisher.publish(particles[index:index + count], file_name)
+            else:
+                self._agent_data_callback(particles[index:index + count])
+
+    def _supports_ingest_workers(self):
+        """
+        @retval True if the driver builds its parsers for ingest workers
+        """
+        return self._ingest_parser.im_func is not SimpleDataSetDriver._ingest_parser.im_func
+
+    def _ingest_parser(self, file_name, path, data_key):
+        """
+        The parser an ingest worker builds for a file.  The worker builds it
+        with the config, parser state, file handle, state callback, data
+        callback and exception callback, followed by the extra arguments.
+        @param file_name: name of the file to parse
+        @param path: path of the file to parse
+        @param data_key: data key of the harvester that found the file
+        @retval tuple of parser class, parser config and tuple of extra arguments
+        @raise NotImplementedException if the driver can't parse in ingest workers
+        """
+        raise NotImplementedException("%s does not support ingest workers" % self.__class__.__name__)
 
     def _stage_input_file(self, path):
         """
@@ -616,14 +873,11 @@ class SimpleDataSetDriver(DataSetDriver):
             #self._stage_input_file(os.path.join(directory, file_name))
 
             count = 1
-            delay = None
-
             if self._generate_particle_count:
-                # Calculate the delay between grabbing records to publish.
-                delay = float(1) / float(self._particle_count_per_second) * float(self._generate_particle_count)
                 count = self._generate_particle_count
 
             self._file_in_process = file_name
+            self._restart_publish(file_name)
 
             # Open the copied file in the storage directory so we know the file won't be
             # changed while we are reading it
@@ -636,12 +890,11 @@ class SimpleDataSetDriver(DataSetDriver):
             # the file directory is initialized in the harvester, so it will exist by this point
             parser = self._build_parser(self._driver_state[file_name][DriverStateKey.PARSER_STATE], handle)
 
+            # the particle publisher paces publishing, parse until it is full
             while(True):
                 result = parser.get_records(count)
                 if result:
-                    log.trace("Record parsed: %r delay: %f", result, delay)
-                    if delay:
-                        gevent.sleep(delay)
+                    log.trace("Record parsed: %r", result)
                 else:
                     break
 
@@ -655,26 +908,58 @@ class SimpleDataSetDriver(DataSetDriver):
 
     def _save_parser_state(self, state, file_ingested):
         """
-        Callback to store the parser state in the driver object.
+        Callback to store the parser state in the driver object, once the
+        particles parsed before it are published.
         @param state: Object used by the parser to indicate position
         """
+        self._store_after_publish(self._file_in_process, state, file_ingested)
+
+    def _publish_key(self):
+        """
+        Particles are published with the name of the file being parsed
+        """
+        return self._file_in_process
+
+    def _store_after_publish(self, file_name, state, file_ingested):
+        """
+        Store the parser state of a file once the particles parsed before it
+        are published.  If publishing the file's particles fails, the file's
+        parser state isn't stored again until it is parsed again.
+        """
+        if self._particle_publisher:
+            self._particle_publisher.call_for(file_name, self._store_parser_state, file_name, state, file_ingested)
+        else:
+            self._store_parser_state(file_name, state, file_ingested)
+
+    def _store_parser_state(self, file_name, state, file_ingested):
+        """
+        Store the parser state of a file in the driver state and save it
+        @param file_name: name of the file being parsed
+        @param state: Object used by the parser to indicate position, None to keep the current
+        @param file_ingested: True if the file has been completely parsed
+        """
         log.trace("saving parser state: %r", state)
         # this is for the directory harvester which uses file name keys
-        self._driver_state[self._file_in_process][DriverStateKey.PARSER_STATE] = state
+        if state is not None:
+            self._driver_state[file_name][DriverStateKey.PARSER_STATE] = state
         # check if file has been completely parsed by comparing the parsed position and file size
         if file_ingested:
-            log.debug("File %s fully parsed", self._file_in_process)
-            self._driver_state[self._file_in_process][DriverStateKey.INGESTED] = True
-        self._state_callback(self._driver_state)
+            log.debug("File %s fully parsed", file_name)
+            self._driver_state[file_name][DriverStateKey.INGESTED] = True
+        self._save_driver_state(file_name, flush=file_ingested)
+
+        if file_ingested and hasattr(self._driver_state, 'prune'):
+            # the ingested file's state has been written, move it to the file index
+            self._driver_state.prune(file_name)
+            # the memento no longer holds the file, save it as deleted
+            self._save_driver_state(file_name)
 
     def _save_parser_state_after_error(self):
         """
         If a file has a sample exception that has made it to the driver, this file is done,
         mark it as ingested and save the state
         """
-        log.debug("File %s fully parsed", self._file_in_process)
-        self._driver_state[self._file_in_process][DriverStateKey.INGESTED] = True
-        self._state_callback(self._driver_state)
+        self._store_after_publish(self._file_in_process, None, True)
 
     def _init_state(self, memento):
         """
@@ -691,8 +976,22 @@ class SimpleDataSetDriver(DataSetDriver):
         else:
             # initialize the state since none was specified
             self._driver_state = {DriverStateKey.VERSION: 0.1}
+
+        index_path = self._file_index_path()
+        if index_path:
+            # imported here, the file index module needs the driver state keys from this module
+            from mi.dataset.file_index import IngestedFileIndex, IndexedDriverState
+            # ingested files in a dict memento are moved to the index
+            self._driver_state = IndexedDriverState(self._driver_state, IngestedFileIndex(index_path))
         log.debug('initial driver state %s', self._driver_state)
 
+    def _file_index_path(self):
+        """
+        @retval path of the ingested file index from the harvester config,
+            None if the driver keeps ingested files in the memento
+        """
+        return self._harvester_config.get(DataSetDriverConfigKeys.FILE_INDEX)
+
     def _new_file_callback(self, file_name):
         """
         Callback used by the single directory harvester called when a new file is detected.  Store the
@@ -708,15 +1007,17 @@ class SimpleDataSetDriver(DataSetDriver):
             count = len(self._new_file_queue)
             log.trace("Current new file queue length: %d", count)
         # the harvester updates the driver state, make sure we save the newly found file state info
-        self._state_callback(self._driver_state)
+        self._save_driver_state(file_name)
 
-    def _modified_file_callback(self):
+    def _modified_file_callback(self, file_names):
         """
         Callback for the single directory harvester when an ingested file has been modified.
         Update the modified state for these ingested files.
+        @param file_names: names of the modified files
         """
         log.debug('got modified file callback, driver state %s', self._driver_state)
-        self._state_callback(self._driver_state)
+        for file_name in file_names:
+            self._save_driver_state(file_name)
 
 class SingleFileDataSetDriver(SimpleDataSetDriver):
     """
@@ -753,6 +1054,12 @@ class SingleFileDataSetDriver(SimpleDataSetDriver):
         self._in_process_state = None
         self._next_driver_state = None
 
+    def _supports_ingest_workers(self):
+        """
+        A single file is always parsed in the driver
+        """
+        return False
+
     def _got_file(self):
         """
         We have a file that we want to parse.  Stand up the parser and do some work.
@@ -768,11 +1075,7 @@ class SingleFileDataSetDriver(SimpleDataSetDriver):
         #log.info("Copied file %s from %s to %s" % (self._filename, directory, storage_directory))
 
         count = 1
-        delay = None
-
         if self._generate_particle_count:
-            # Calculate the delay between grabbing records to publish.
-            delay = float(1) / float(self._particle_count_per_second) * float(self._generate_particle_count)
             count = self._generate_particle_count
 
         # Open the copied file in the storage directory so we know the file won't be
@@ -785,12 +1088,11 @@ class SingleFileDataSetDriver(SimpleDataSetDriver):
         # the file directory is initialized in the harvester, so it will exist by this point
         parser = self._build_parser(self._driver_state[DriverStateKey.PARSER_STATE], handle)
 
+        # the particle publisher paces publishing, parse until it is full
         while(True):
             result = parser.get_records(count)
             if result:
-                log.trace("Record parsed: %r delay: %f", result, delay)
-                if delay:
-                    gevent.sleep(delay)
+                log.trace("Record parsed: %r", result)
             else:
                 break
 
@@ -816,13 +1118,17 @@ class SingleFileDataSetDriver(SimpleDataSetDriver):
 
     def _save_parser_state(self, state):
         """
-        Callback to store the parser state in the driver object.
+        Callback to store the parser state in the driver object, once the
+        particles parsed before it are published.
         @param state: Object used by the parser to indicate position
         """
+        self._after_publish(self._store_parser_state, state)
+
+    def _store_parser_state(self, state):
         log.trace("saving parser state: %r", state)
         # this is for the single file harvester, which does not use file name keys
         self._driver_state[DriverStateKey.PARSER_STATE] = state
-        self._state_callback(self._driver_state)
+        self._save_driver_state()
 
     def _file_changed_callback(self, new_state):
         """
@@ -837,6 +1143,9 @@ class SingleFileDataSetDriver(SimpleDataSetDriver):
         """
         After the file has been ingested, update the file parameters to those that have been found in the 'next driver state'
         """
+        self._after_publish(self._store_ingested_file_state)
+
+    def _store_ingested_file_state(self):
         if self._in_process_state != None:
             self._driver_state[DriverStateKey.FILE_SIZE] = self._in_process_state[DriverStateKey.FILE_SIZE]
             self._driver_state[DriverStateKey.FILE_CHECKSUM] = self._in_process_state[DriverStateKey.FILE_CHECKSUM]
@@ -847,7 +1156,7 @@ class SingleFileDataSetDriver(SimpleDataSetDriver):
                 log.debug('clearing next driver state')
             self._in_process_state = None
         log.debug('saving driver state %s', self._driver_state)
-        self._state_callback(self._driver_state)
+        self._save_driver_state(flush=True)
 
     def _driver_and_next_state_equal(self):
         if self._next_driver_state == None and self._driver_state == None:
@@ -867,6 +1176,9 @@ class MultipleHarvesterDataSetDriver(SimpleDataSetDriver):
 
         super(MultipleHarvesterDataSetDriver, self).__init__(config, memento, data_callback, state_callback, event_callback,
                                                              exception_callback)
+        self._publisher_shutdown = {}
+        # publisher threads parse files at the same time, the file each is parsing
+        self._files_in_process = {}
         self._init_queues()
 
     def _init_queues(self):
@@ -876,8 +1188,10 @@ class MultipleHarvesterDataSetDriver(SimpleDataSetDriver):
 
     def _start_publisher_thread(self):
         """
-        Start however many publisher threads are needed, one for each data key
+        Start however many publisher threads are needed, one for each data key.
+        They share one particle publisher.
         """
+        self._start_particle_publisher()
         self._publisher_thread = {}
         self._publisher_shutdown = {}
         for key in self._data_keys:
@@ -890,6 +1204,9 @@ class MultipleHarvesterDataSetDriver(SimpleDataSetDriver):
             self._publisher_shutdown[key] = True
             if self._publisher_thread[key]:
                 self._publisher_thread[key].kill(block=False)
+        self._stop_ingest_pool()
+        self._stop_particle_publisher()
+        self._state_persister.stop()
         log.debug("shutdown complete")
 
     def _publisher_loop(self, data_key):
@@ -918,7 +1235,18 @@ class MultipleHarvesterDataSetDriver(SimpleDataSetDriver):
         if(count > 0):
             log.debug("New file detected, resource_id: %s, array addr: %s", self._resource_id,
                       id(self._new_file_queue[data_key]))
-            self._got_file(self._new_file_queue[data_key].pop(0), data_key)
+            if self._ingest_workers > 1:
+                self._ingest_queue(self._new_file_queue[data_key],
+                                   self._harvester_config[data_key].get(DataSetDriverConfigKeys.DIRECTORY),
+                                   data_key)
+            else:
+                self._got_file(self._new_file_queue[data_key].pop(0), data_key)
+
+    def _shutdown_requested(self, data_key=None):
+        """
+        Each data key has its own publisher thread
+        """
+        return self._publisher_shutdown.get(data_key, False)
 
     def _start_sampling(self):
         # just a little nap before we start working.  Giving the agent time
@@ -950,16 +1278,15 @@ class MultipleHarvesterDataSetDriver(SimpleDataSetDriver):
         try:
             log.debug('got file, resource_id: %s, driver state %s', self._resource_id, self._driver_state)
 
-            count = 1
-            delay = None
-
             directory = self._harvester_config[data_key].get(DataSetDriverConfigKeys.DIRECTORY)
 
+            count = 1
             if self._generate_particle_count:
-                # Calculate the delay between grabbing records to publish.
-                delay = float(1) / float(self._particle_count_per_second) * float(self._generate_particle_count)
                 count = self._generate_particle_count
 
+            self._files_in_process[gevent.getcurrent()] = file_name
+            self._restart_publish(file_name)
+
             # Open the copied file in the storage directory so we know the file won't be
             # changed while we are reading it
             path = os.path.join(directory, file_name)
@@ -971,37 +1298,35 @@ class MultipleHarvesterDataSetDriver(SimpleDataSetDriver):
             # the file directory is initialized in the harvester, so it will exist by this point
             parser = self._build_parser(self._driver_state[file_name][DriverStateKey.PARSER_STATE], handle, file_name, data_key)
 
+            # the particle publisher paces publishing, parse until it is full
             while(True):
                 result = parser.get_records(count)
                 if result:
-                    log.trace("Record parsed: %r delay: %f", result, delay)
-                    if delay:
-                        gevent.sleep(delay)
+                    log.trace("Record parsed: %r", result)
                 else:
                     break
         except SampleException as e:
             # need to mark the bad file as ingested so we don't re-ingest it
-            log.debug("File %s fully parsed", file_name)
-            self._driver_state[file_name][DriverStateKey.INGESTED] = True
-            self._state_callback(self._driver_state)
+            self._store_after_publish(file_name, None, True)
             self._sample_exception_callback(e)
 
         finally:
-            self._file_in_process = None
+            self._files_in_process.pop(gevent.getcurrent(), None)
 
     def _save_parser_state(self, state, file_ingested, file_name):
         """
-        Callback to store the parser state in the driver object.
+        Callback to store the parser state in the driver object, once the
+        particles parsed before it are published.
         @param state: Object used by the parser to indicate position
         """
-        log.trace("saving parser state: %r", state)
-        # this is for the directory harvester which uses file name keys
-        self._driver_state[file_name][DriverStateKey.PARSER_STATE] = state
-        # check if file has been completely parsed by comparing the parsed position and file size
-        if file_ingested:
-            log.debug("File %s fully parsed", file_name)
-            self._driver_state[file_name][DriverStateKey.INGESTED] = True
-        self._state_callback(self._driver_state)
+        self._store_after_publish(file_name, state, file_ingested)
+
+    def _publish_key(self):
+        """
+        Particles are published with the name of the file the current
+        publisher thread is parsing
+        """
+        return self._files_in_process.get(gevent.getcurrent())
 
     def _new_file_callback(self, file_name, data_key):
         """
@@ -1020,7 +1345,7 @@ class MultipleHarvesterDataSetDriver(SimpleDataSetDriver):
             count = len(self._new_file_queue[data_key])
             log.trace("Current new file queue length: %d", count)
         # the harvester updates the driver state, make sure we save the newly found file state info
-        self._state_callback(self._driver_state)
+        self._save_driver_state(file_name)
 
     def _verify_config(self):
         """
@@ -1049,3 +1374,26 @@ class MultipleHarvesterDataSetDriver(SimpleDataSetDriver):
             raise ConfigurationException("driver configuration errors: %r", errors)
 
         self._parser_config = self._config.get(DataSourceConfigKey.PARSER)
+
+    def _file_index_path(self):
+        """
+        The file index is set in the harvester config of a data key.  The
+        files of all the data keys share one driver state, so the keys that
+        set an index must all set the same one.
+        @retval path of the ingested file index, None if no data key sets one
+        @raise ConfigurationException if the index is set outside the data key
+            configs or the data keys set different indexes
+        """
+        if DataSetDriverConfigKeys.FILE_INDEX in self._harvester_config:
+            raise ConfigurationException("harvester %s must be set in a data key config"
+                                         % DataSetDriverConfigKeys.FILE_INDEX)
+
+        paths = set([self._harvester_config[key].get(DataSetDriverConfigKeys.FILE_INDEX)
+                     for key in self._data_keys])
+        paths.discard(None)
+        if len(paths) > 1:
+            raise ConfigurationException("data keys share one driver state but set different %s: %s"
+                                         % (DataSetDriverConfigKeys.FILE_INDEX, sorted(paths)))
+        if paths:
+            return paths.pop()
+        return None
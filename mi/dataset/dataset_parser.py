@@ -11,11 +11,42 @@ out of files and feed them into the system.
 __author__ = 'Steve Foley'
 __license__ = 'Apache 2.0'
 
+import mmap
+from collections import deque
+
 from mi.core.log import get_logger ; log = get_logger()
 from mi.core.instrument.chunker import StringChunker
 from mi.core.instrument.data_particle import DataParticleKey
 from mi.core.exceptions import SampleException, RecoverableSampleException, SampleEncodingException, NotImplementedException
 
+# Bounds on the size of a block read from the file.  Blocks start small and
+# are sized to hold RECORDS_PER_BLOCK of the parser's typical records.
+MIN_BLOCK_SIZE = 1024
+MAX_BLOCK_SIZE = 1048576
+RECORDS_PER_BLOCK = 32
+
+def map_file(stream_handle):
+    """
+    Map the whole file behind a stream handle read only, for parsers that
+    find records by position instead of reading blocks.  Streams that can't
+    be mapped, like StringIO or an empty file, are read instead.
+    @param stream_handle An already open file-like filehandle
+    @retval An mmap, or a string, holding the whole file. Close it with
+       unmap_file once the records have been parsed.
+    """
+    try:
+        return mmap.mmap(stream_handle.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, ValueError, EnvironmentError):
+        stream_handle.seek(0)
+        return stream_handle.read()
+
+def unmap_file(data):
+    """
+    Release the file data returned by map_file
+    """
+    if isinstance(data, mmap.mmap):
+        data.close()
+
 class Parser(object):
     """ abstract class to show API needed for plugin poller objects """
 
@@ -95,7 +126,7 @@ class Parser(object):
         else:
             self._publish_callback([samples])
         
-    def _extract_sample(self, particle_class, regex, raw_data, timestamp):
+    def _extract_sample(self, particle_class, regex, raw_data, timestamp, **kwargs):
         """
         Extract sample from a response line if present and publish
         parsed particle
@@ -106,6 +137,8 @@ class Parser(object):
         @param regex The regular expression that matches a data sample if regex
                      is none then process every line
         @param raw_data data to input into this particle.
+        @param kwargs Extra keyword arguments for the particle class, i.e.
+            values the parser has already decoded
         @retval return a raw particle if a sample was found, else None
         """
         particle = None
@@ -113,7 +146,8 @@ class Parser(object):
         try:
             if regex is None or regex.match(raw_data):
                 particle = particle_class(raw_data, internal_timestamp=timestamp,
-                                          preferred_timestamp=DataParticleKey.INTERNAL_TIMESTAMP, new_sequence=self._new_sequence)
+                                          preferred_timestamp=DataParticleKey.INTERNAL_TIMESTAMP, new_sequence=self._new_sequence,
+                                          **kwargs)
                 if self._new_sequence:
                     self._new_sequence = False
 
@@ -138,6 +172,10 @@ class BufferLoadingParser(Parser):
     to operate this way, but it can keep memory in check and smooth out
     stream inputs if they dont all come at once.
     """
+    # Updated by _adapt_block_size as records are parsed
+    _block_size = MIN_BLOCK_SIZE
+    _bytes_parsed = 0
+    _records_parsed = 0
 
     def __init__(self, config, stream_handle, state, sieve_fn,
                  state_callback, publish_callback, exception_callback = None):
@@ -184,6 +222,17 @@ class BufferLoadingParser(Parser):
             pass            
         return self._yank_particles(num_records)
 
+    def _get_record_buffer(self):
+        return self._records
+
+    def _set_record_buffer(self, records):
+        # Parsers reset the buffer by assigning a list, keep it a deque so
+        # records can be popped off the front in constant time
+        self._records = deque(records)
+
+    _record_buffer = property(_get_record_buffer, _set_record_buffer,
+                              doc="Buffer of (particle, state) tuples waiting to be published")
+
     def _yank_particles(self, num_records):
         """
         Get particles out of the buffer and publish them. Update the state
@@ -201,41 +250,84 @@ class BufferLoadingParser(Parser):
                   num_to_fetch,
                   num_records)
 
-        return_list = []
-        records_to_return = self._record_buffer[:num_to_fetch]
-        self._record_buffer = self._record_buffer[num_to_fetch:]
-        if len(records_to_return) > 0:
-            self._state = records_to_return[-1][1] # state side of tuple of last entry
-            # strip the state info off of them now that we have what we need
-            for item in records_to_return:
-                log.debug("Record to return: %s", item)
-                return_list.append(item[0])
+        return_list = self._pop_records(num_to_fetch)
+        if len(return_list) > 0:
             self._publish_sample(return_list)
             log.trace("Sending parser state [%s] to driver", self._state)
-            file_ingested = False
-            if self.file_complete and len(self._record_buffer) == 0:
-                # file has been read completely and all records pulled out of the record buffer
-                file_ingested = True
-            self._state_callback(self._state, file_ingested) # push new state to driver
+            self._state_callback(self._state, self._file_ingested()) # push new state to driver
+
+        return return_list
+
+    def _pop_records(self, num_to_fetch):
+        """
+        Pop records off the front of the record buffer and update the parser
+        state to the state of the last record popped.
+        @param num_to_fetch The number of records to pop, no more than are
+           in the buffer
+        @retval A list of the particles popped, with their state stripped
+        """
+        return_list = []
+        record = None
+        for i in xrange(num_to_fetch):
+            record = self._record_buffer.popleft()
+            log.trace("Record to return: %s", record)
+            # strip the state info off of them now that we have what we need
+            return_list.append(record[0])
+
+        if record is not None:
+            self._state = record[1] # state side of tuple of last entry
 
         return return_list
 
+    def _file_ingested(self):
+        """
+        @retval True if the file has been read completely and all records
+           pulled out of the record buffer
+        """
+        return self.file_complete and len(self._record_buffer) == 0
+
     def _load_particle_buffer(self):
         """
         Load up the internal record buffer with some particles based on a
         gather from the get_block method.
         """
-        while self.get_block():
+        bytes_read = self.get_block()
+        while bytes_read:
             result = self.parse_chunks()
             self._record_buffer.extend(result)
+            self._adapt_block_size(bytes_read, len(result))
+            bytes_read = self.get_block()
+
+    def _adapt_block_size(self, bytes_read, records_parsed):
+        """
+        Size the next block to hold RECORDS_PER_BLOCK records of the average
+        size seen so far, doubling it when a block didn't finish a record.
+        Bigger blocks mean fewer reads and parse passes, but the chunker
+        cost of pulling each record out grows with the block so they are
+        kept to a few dozen records.
+        @param bytes_read The number of bytes in the last block
+        @param records_parsed The number of records parsed from the last block
+        """
+        self._bytes_parsed += bytes_read
+        if records_parsed:
+            self._records_parsed += records_parsed
+            block_size = self._bytes_parsed / self._records_parsed * RECORDS_PER_BLOCK
+        else:
+            block_size = self._block_size * 2
+
+        self._block_size = max(MIN_BLOCK_SIZE, min(block_size, MAX_BLOCK_SIZE))
 
-    def get_block(self, size=1024):
+    def get_block(self, size=None):
         """
         Get a block of characters for processing
-        @param size The size of the block to try to read
+        @param size The size of the block to try to read, defaults to the
+           current adaptive block size
         @retval The length of data retreived
         @throws EOFError when the end of the file is reached
         """
+        if size is None:
+            size = self._block_size
+
         # read in some more data
         data = self._stream_handle.read(size)
         if data:
@@ -276,9 +368,6 @@ class BufferLoadingFilenameParser(BufferLoadingParser):
            ultimately from the agent) where we send our error events to
            be published into ION
         """
-        self._record_buffer = []
-        self._timestamp = 0.0
-        self.file_complete = False
         self._file_name = file_name
 
         super(BufferLoadingFilenameParser, self).__init__(config, stream_handle, state,
@@ -303,21 +392,10 @@ class BufferLoadingFilenameParser(BufferLoadingParser):
                   num_to_fetch,
                   num_records)
 
-        return_list = []
-        records_to_return = self._record_buffer[:num_to_fetch]
-        self._record_buffer = self._record_buffer[num_to_fetch:]
-        if len(records_to_return) > 0:
-            self._state = records_to_return[-1][1] # state side of tuple of last entry
-            # strip the state info off of them now that we have what we need
-            for item in records_to_return:
-                log.debug("Record to return: %s", item)
-                return_list.append(item[0])
+        return_list = self._pop_records(num_to_fetch)
+        if len(return_list) > 0:
             self._publish_sample(return_list)
             log.trace("Sending parser state [%s] to driver", self._state)
-            file_ingested = False
-            if self.file_complete and len(self._record_buffer) == 0:
-                # file has been read completely and all records pulled out of the record buffer
-                file_ingested = True
-            self._state_callback(self._state, file_ingested, self._file_name) # push new state to driver
+            self._state_callback(self._state, self._file_ingested(), self._file_name) # push new state to driver
 
-        return return_list
\ No newline at end of file
+        return return_list
@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+
+"""
+@package mi.dataset.dataset_publisher Rate limited particle publishing
+@file mi/dataset/dataset_publisher.py
+@brief Publish particles from dataset drivers through a bounded queue and a
+token bucket rate limiter.  Parsers run ahead of publishing until the queue
+is full, and the publish rate adapts to how fast the consumer accepts
+particles.
+"""
+
+__license__ = 'Apache 2.0'
+
+import time
+import gevent
+from gevent.queue import JoinableQueue
+
+from mi.core.log import get_logger ; log = get_logger()
+from mi.core.common import BaseEnum
+
+# Number of batches the publish queue holds before parsers block
+PUBLISH_QUEUE_SIZE = 64
+# Lowest rate, in records per second, the publisher backs off to
+MIN_RATE = 1.0
+# Factor the rate is raised by while there is a backlog the consumer can take
+RATE_INCREASE = 1.25
+# Fraction of the consumer's measured rate to back off to when it falls behind
+RATE_DECREASE = 0.9
+# Weight of the latest batch in the consumer latency average
+LATENCY_WEIGHT = 0.2
+# Seconds between achieved rate updates
+METRICS_INTERVAL = 10.0
+
+class PublisherMetric(BaseEnum):
+    QUEUE_DEPTH = 'queue_depth'
+    MAX_QUEUE_DEPTH = 'max_queue_depth'
+    RECORDS_PUBLISHED = 'records_published'
+    TARGET_RATE = 'target_rate'
+    ACHIEVED_RATE = 'achieved_rate'
+    CONSUMER_LATENCY = 'consumer_latency'
+
+class TokenBucket(object):
+    """
+    Token bucket rate limiter.  Tokens accumulate at rate per second up to
+    capacity.  Taking more tokens than are available puts the bucket in
+    debt, and the caller waits for the debt to be paid off.
+    """
+    def __init__(self, rate, capacity):
+        """
+        @param rate Tokens added per second
+        @param capacity Most tokens the bucket holds, the largest burst
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._last = time.time()
+
+    def set_rate(self, rate):
+        self._refill()
+        self.rate = float(rate)
+
+    def consume(self, tokens):
+        """
+        Take tokens from the bucket
+        @param tokens Number of tokens to take
+        @retval Seconds to wait before using the tokens, 0 if available now
+        """
+        self._refill()
+        self._tokens -= tokens
+        if self._tokens >= 0:
+            return 0
+        return -self._tokens / self.rate
+
+    def _refill(self):
+        now = time.time()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+class ParticlePublisher(object):
+    """
+    Publish particle batches from a greenlet reading a bounded queue.  A
+    token bucket limits the records published per second.  The rate starts
+    at the configured records per second, rises while there is a backlog
+    and the consumer keeps up, and falls back to the rate the consumer
+    sustains when it is slower.
+
+    Callbacks that must follow the particles published before them, like
+    saving parser state, are queued with call().  Particles and callbacks
+    can be given a key, i.e. the file they come from.  Once publishing
+    particles with a key fails, callbacks with that key are dropped until
+    the key is restarted, so a file's state never covers particles that
+    weren't published.
+    """
+    def __init__(self, data_callback, rate, batch_size=1, queue_size=PUBLISH_QUEUE_SIZE,
+                 max_rate=None, exception_callback=None):
+        """
+        @param data_callback Callback taking a list of particles to publish
+        @param rate Initial records published per second
+        @param batch_size Records per batch, the largest burst
+        @param queue_size Batches queued before publish() blocks
+        @param max_rate Highest records per second, None for no limit
+        @param exception_callback Callback for exceptions raised publishing
+        """
+        self._data_callback = data_callback
+        self._exception_callback = exception_callback
+        self._queue = JoinableQueue(queue_size)
+        self._bucket = TokenBucket(rate, batch_size)
+        self._max_rate = max_rate
+        self._greenlet = None
+        self._busy = False
+        self._failed_keys = set()
+
+        self._latency = None
+        self._max_queue_depth = 0
+        self._records_published = 0
+        self._achieved_rate = 0.0
+        self._window_start = time.time()
+        self._window_records = 0
+
+    def start(self):
+        if self._greenlet is None:
+            self._greenlet = gevent.spawn(self._publish_loop)
+
+    def stop(self):
+        """
+        Stop publishing.  Anything still queued is dropped.
+        """
+        if self._greenlet is not None:
+            self._greenlet.kill(block=False)
+            self._greenlet = None
+        while not self._queue.empty():
+            self._queue.get_nowait()
+            self._queue.task_done()
+
+    def is_running(self):
+        return self._greenlet is not None
+
+    def set_rate(self, rate, batch_size=None):
+        """
+        Reset the publish rate, i.e. when the driver parameters change
+        """
+        self._bucket.set_rate(rate)
+        if batch_size is not None:
+            self._bucket.capacity = float(batch_size)
+
+    def publish(self, particles, key=None):
+        """
+        Queue particles to publish, blocking while the queue is full
+        @param particles List of particles
+        @param key Key of the particles, None for none
+        """
+        self._put((particles, None, None, key))
+
+    def call(self, callback, *args):
+        """
+        Call the callback once everything queued before it is published
+        """
+        self.call_for(None, callback, *args)
+
+    def call_for(self, key, callback, *args):
+        """
+        Call the callback once everything queued before it is published,
+        unless publishing particles with the same key has failed
+        @param key Key of the particles the callback follows
+        """
+        if self._queue.empty() and not self._busy:
+            self._call(key, callback, args)
+        else:
+            self._put((None, callback, args, key))
+
+    def restart(self, key):
+        """
+        Call callbacks with the key again once everything queued before this
+        is published, i.e. when a file is parsed again from its saved state
+        @param key Key of the particles
+        """
+        self.call(self._failed_keys.discard, key)
+
+    def flush(self, timeout=None):
+        """
+        Wait until everything queued has been published
+        """
+        self._queue.join(timeout)
+
+    def get_metrics(self):
+        """
+        @retval dict of PublisherMetric values
+        """
+        return {
+            PublisherMetric.QUEUE_DEPTH: self._queue.qsize(),
+            PublisherMetric.MAX_QUEUE_DEPTH: self._max_queue_depth,
+            PublisherMetric.RECORDS_PUBLISHED: self._records_published,
+            PublisherMetric.TARGET_RATE: self._bucket.rate,
+            PublisherMetric.ACHIEVED_RATE: self._achieved_rate,
+            PublisherMetric.CONSUMER_LATENCY: self._latency
+        }
+
+    def _put(self, item):
+        self._queue.put(item)
+        self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+
+    def _publish_loop(self):
+        while True:
+            (particles, callback, args, key) = self._queue.get()
+            self._busy = True
+            try:
+                if particles is not None:
+                    self._publish(particles, key)
+                else:
+                    self._call(key, callback, args)
+            except Exception as e:
+                log.error("Exception publishing particles: %s", e, exc_info=True)
+                if self._exception_callback:
+                    self._exception_callback(e)
+            finally:
+                self._busy = False
+                self._queue.task_done()
+
+    def _call(self, key, callback, args):
+        if key is not None and key in self._failed_keys:
+            log.debug("Publishing %s failed, dropping callback %s", key, callback)
+            return
+        callback(*args)
+
+    def _publish(self, particles, key):
+        count = len(particles)
+        delay = self._bucket.consume(count)
+        if delay:
+            gevent.sleep(delay)
+
+        start = time.time()
+        try:
+            self._data_callback(particles)
+        except Exception:
+            if key is not None:
+                self._failed_keys.add(key)
+            raise
+        latency = time.time() - start
+
+        self._update_metrics(count)
+        self._adapt_rate(count, latency)
+
+    def _adapt_rate(self, count, latency):
+        """
+        Adjust the publish rate from the consumer latency of the last batch
+        @param count Records in the batch
+        @param latency Seconds the data callback took
+        """
+        if count == 0:
+            return
+
+        latency /= count
+        if self._latency is None:
+            self._latency = latency
+        else:
+            self._latency += (latency - self._latency) * LATENCY_WEIGHT
+
+        rate = self._bucket.rate
+        if self._latency > 0 and 1 / self._latency < rate:
+            # the consumer is falling behind, back off to what it sustains
+            rate = max(MIN_RATE, RATE_DECREASE / self._latency)
+        elif not self._queue.empty():
+            # there is a backlog and the consumer is keeping up
+            rate *= RATE_INCREASE
+            if self._latency > 0:
+                rate = min(rate, 1 / self._latency)
+
+        if self._max_rate:
+            rate = min(rate, self._max_rate)
+
+        if rate != self._bucket.rate:
+            log.trace("Publish rate changed from %.1f to %.1f records/s", self._bucket.rate, rate)
+            self._bucket.set_rate(rate)
+
+    def _update_metrics(self, count):
+        self._records_published += count
+        self._window_records += count
+
+        now = time.time()
+        elapsed = now - self._window_start
+        if elapsed >= METRICS_INTERVAL:
+            self._achieved_rate = self._window_records / elapsed
+            self._window_start = now
+            self._window_records = 0
+            log.debug("Publisher metrics: %s", self.get_metrics())
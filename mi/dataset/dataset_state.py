@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+
+"""
+@package mi.dataset.dataset_state Debounced driver state persistence
+@file mi/dataset/dataset_state.py
+@brief Coalesce dataset driver state updates.  Changed entries are tracked
+and written together after a number of updates or an interval, or right
+away when a file is finished or the driver stops.  Writes can send only
+the changed and deleted entries instead of the whole memento.
+"""
+
+__license__ = 'Apache 2.0'
+
+import time
+import gevent
+
+from mi.core.log import get_logger ; log = get_logger()
+
+# Seconds a state update waits to be written with later updates
+STATE_FLUSH_INTERVAL = 1.0
+# State updates coalesced before they are written
+STATE_FLUSH_COUNT = 50
+# State delta key holding the list of top level keys deleted from the state
+DELETED_KEYS = '_deleted'
+
+def apply_state_delta(memento, delta):
+    """
+    Apply a state delta to the memento it was taken from
+    @param memento Driver state dict to update
+    @param delta Changed driver state entries, with the deleted keys
+    @retval The updated memento
+    """
+    delta = dict(delta)
+    for key in delta.pop(DELETED_KEYS, []):
+        memento.pop(key, None)
+    memento.update(delta)
+    return memento
+
+class StatePersister(object):
+    """
+    Write driver state through the state callback, coalescing updates.
+    Entries are marked dirty by their top level key, a file name for the
+    directory harvesters.  Marking None dirties the whole state.  A dirty
+    key no longer in the state, i.e. a file moved to the ingested file
+    index, is sent as deleted in the delta.
+    """
+    def __init__(self, state_callback, get_state, flush_interval=STATE_FLUSH_INTERVAL,
+                 flush_count=STATE_FLUSH_COUNT):
+        """
+        @param state_callback Callback taking the whole driver state
+        @param get_state Function returning the current driver state dict
+        @param flush_interval Seconds an update waits before it is written
+        @param flush_count Updates coalesced before they are written
+        """
+        self._state_callback = state_callback
+        self._delta_callback = None
+        self._get_state = get_state
+        self._flush_interval = flush_interval
+        self._flush_count = flush_count
+
+        self._dirty = set()
+        self._all_dirty = False
+        self._updates = 0
+        # the first update after a quiet spell is written right away
+        self._last_write = 0
+        self._timer = None
+
+    def set_delta_callback(self, delta_callback):
+        """
+        Write only the changed entries with this callback instead of
+        writing the whole state with the state callback
+        @param delta_callback Callback taking a dict of changed entries
+           and the DELETED_KEYS list, None to go back to writing the whole state
+        """
+        self._delta_callback = delta_callback
+
+    def update(self, key=None, flush=False):
+        """
+        Mark a state entry changed and write it if it is due
+        @param key Top level key of the changed entry, None for the whole state
+        @param flush True to write now, i.e. when a file is finished
+        """
+        if key is None:
+            self._all_dirty = True
+        else:
+            self._dirty.add(key)
+        self._updates += 1
+
+        if flush or self._updates >= self._flush_count or \
+           time.time() - self._last_write >= self._flush_interval:
+            self.flush()
+        elif self._timer is None:
+            self._timer = gevent.spawn_later(self._flush_interval, self._timed_flush)
+
+    def flush(self):
+        """
+        Write the changed state entries, if there are any
+        """
+        self._cancel_timer()
+        if not self._updates:
+            return
+
+        state = self._get_state()
+        if self._delta_callback is None:
+            self._state_callback(state)
+        else:
+            # indexed driver state finds deleted entries in the file index,
+            # only the entries in the dict are persisted
+            if self._all_dirty:
+                delta = dict(state)
+            else:
+                delta = dict((key, dict.__getitem__(state, key)) for key in self._dirty
+                             if dict.__contains__(state, key))
+            deleted = [key for key in self._dirty if not dict.__contains__(state, key)]
+            if deleted:
+                delta[DELETED_KEYS] = deleted
+            self._delta_callback(delta)
+
+        log.trace("Wrote %d state updates, %d entries changed", self._updates,
+                  len(state) if self._all_dirty else len(self._dirty))
+        self._dirty.clear()
+        self._all_dirty = False
+        self._updates = 0
+        self._last_write = time.time()
+
+    def stop(self):
+        """
+        Write anything pending and stop the flush timer
+        """
+        self.flush()
+
+    def _timed_flush(self):
+        self._timer = None
+        self.flush()
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.kill(block=False)
+            self._timer = None
@@ -12,7 +12,6 @@ __author__ = 'Emily Hahn'
 __license__ = 'Apache 2.0'
 
 import os
-import gevent
 import string
 
 from mi.core.log import get_logger ; log = get_logger()
@@ -35,12 +34,7 @@ class MopakOStcDataSetDriver(SimpleDataSetDriver):
         """
         Build and return the parser
         """
-        config = self._parser_config
-        config.update({
-            'particle_module': 'mi.dataset.parser.mopak_o_stc',
-            'particle_class': ['MopakOStcAccelParserDataParticle',
-                               'MopakOStcRateParserDataParticle']
-        })
+        config = self._particle_parser_config()
         log.debug("My Config: %s", config)
         self._parser = MopakOStcParser(
             config,
@@ -66,6 +60,24 @@ class MopakOStcDataSetDriver(SimpleDataSetDriver):
         )     
         return self._harvester
 
+    def _particle_parser_config(self):
+        """
+        @retval the parser config with the particle classes
+        """
+        config = self._parser_config
+        config.update({
+            'particle_module': 'mi.dataset.parser.mopak_o_stc',
+            'particle_class': ['MopakOStcAccelParserDataParticle',
+                               'MopakOStcRateParserDataParticle']
+        })
+        return config
+
+    def _ingest_parser(self, file_name, path, data_key):
+        """
+        Ingest workers build the parser with the file name
+        """
+        return (MopakOStcParser, self._particle_parser_config(), (file_name,))
+
     def _got_file(self, file_name):
         """
         We have a file that we want to parse.  Stand up the parser and do some work.
@@ -87,14 +99,11 @@ class MopakOStcDataSetDriver(SimpleDataSetDriver):
             #self._stage_input_file(os.path.join(directory, file_name))
 
             count = 1
-            delay = None
-
             if self._generate_particle_count:
-                # Calculate the delay between grabbing records to publish.
-                delay = float(1) / float(self._particle_count_per_second) * float(self._generate_particle_count)
                 count = self._generate_particle_count
 
             self._file_in_process = file_name
+            self._restart_publish(file_name)
 
             # Open the copied file in the storage directory so we know the file won't be
             # changed while we are reading it
@@ -107,12 +116,11 @@ class MopakOStcDataSetDriver(SimpleDataSetDriver):
             # the file directory is initialized in the harvester, so it will exist by this point
             parser = self._build_parser(self._driver_state[file_name][DriverStateKey.PARSER_STATE], handle, file_name)
 
+            # the particle publisher paces publishing, parse until it is full
             while(True):
                 result = parser.get_records(count)
                 if result:
-                    log.trace("Record parsed: %r delay: %f", result, delay)
-                    if delay:
-                        gevent.sleep(delay)
+                    log.trace("Record parsed: %r", result)
                 else:
                     break
 
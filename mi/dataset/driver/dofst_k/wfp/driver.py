@@ -13,7 +13,6 @@ __license__ = 'Apache 2.0'
 
 import os
 import string
-import gevent
 
 from mi.core.log import get_logger ; log = get_logger()
 from mi.core.exceptions import SampleException
@@ -34,12 +33,7 @@ class DofstKWfpDataSetDriver(SimpleDataSetDriver):
         """
         Build and return the parser
         """
-        config = self._parser_config
-        config.update({
-            'particle_module': 'mi.dataset.parser.dofst_k_wfp',
-            'particle_class': ['DofstKWfpMetadataParserDataParticle',
-                               'DofstKWfpParserDataParticle']
-        })
+        config = self._particle_parser_config()
         log.debug("My Config: %s", config)
         self._parser = DofstKWfpParser(
             config,
@@ -65,6 +59,24 @@ class DofstKWfpDataSetDriver(SimpleDataSetDriver):
         )  
         return self._harvester
 
+    def _particle_parser_config(self):
+        """
+        @retval the parser config with the particle classes
+        """
+        config = self._parser_config
+        config.update({
+            'particle_module': 'mi.dataset.parser.dofst_k_wfp',
+            'particle_class': ['DofstKWfpMetadataParserDataParticle',
+                               'DofstKWfpParserDataParticle']
+        })
+        return config
+
+    def _ingest_parser(self, file_name, path, data_key):
+        """
+        Ingest workers build the parser with the file size
+        """
+        return (DofstKWfpParser, self._particle_parser_config(), (os.path.getsize(path),))
+
     def _got_file(self, file_name):
         """
         We have a file that we want to parse.  Stand up the parser and do some work.
@@ -86,14 +98,11 @@ class DofstKWfpDataSetDriver(SimpleDataSetDriver):
             #self._stage_input_file(os.path.join(directory, file_name))
 
             count = 1
-            delay = None
-
             if self._generate_particle_count:
-                # Calculate the delay between grabbing records to publish.
-                delay = float(1) / float(self._particle_count_per_second) * float(self._generate_particle_count)
                 count = self._generate_particle_count
 
             self._file_in_process = file_name
+            self._restart_publish(file_name)
 
             # Open the copied file in the storage directory so we know the file won't be
             # changed while we are reading it
@@ -107,12 +116,11 @@ class DofstKWfpDataSetDriver(SimpleDataSetDriver):
             # the file directory is initialized in the harvester, so it will exist by this point
             parser = self._build_parser(self._driver_state[file_name][DriverStateKey.PARSER_STATE], handle, filesize)
 
+            # the particle publisher paces publishing, parse until it is full
             while(True):
                 result = parser.get_records(count)
                 if result:
-                    log.trace("Record parsed: %r delay: %f", result, delay)
-                    if delay:
-                        gevent.sleep(delay)
+                    log.trace("Record parsed: %r", result)
                 else:
                     break
 
@@ -12,7 +12,6 @@ __author__ = 'Emily Hahn'
 __license__ = 'Apache 2.0'
 
 import hashlib
-import gevent
 import shutil
 import os
 
@@ -61,11 +60,7 @@ class MflmDataSetDriver(SingleFileDataSetDriver):
         #shutil.copy2(os.path.join(directory, self._filename), storage_directory)
         #log.info("Copied file %s from %s to %s" % (self._filename, directory, storage_directory))
         count = 1
-        delay = None
-
-        # Calulate the delay between grabbing records to publish.
         if self._generate_particle_count:
-            delay = float(1) / float(self._particle_count_per_second) * float(self._generate_particle_count)
             count = self._generate_particle_count
 
         # Open the copied file in the storage directory so we know the file won't be
@@ -102,12 +97,11 @@ class MflmDataSetDriver(SingleFileDataSetDriver):
         log.debug('Making parser with state %s', parser_state)
         parser = self._build_parser(parser_state, handle)
 
+        # the particle publisher paces publishing, parse until it is full
         while(True):
             result = parser.get_records(count)
             if result:
-                log.trace("Record parsed: %r delay: %f", result, delay)
-                if delay:
-                    gevent.sleep(delay)
+                log.trace("Record parsed: %r", result)
             else:
                 break
 
@@ -26,11 +26,7 @@ class DOSTADataSetDriver(SimpleDataSetDriver):
         return [GgldrDostaDelayedDataParticle.type()]
 
     def _build_parser(self, parser_state, infile):
-        config = self._parser_config
-        config.update({
-            'particle_module': 'mi.dataset.parser.glider',
-            'particle_class': 'GgldrDostaDelayedDataParticle'
-        })
+        config = self._particle_parser_config()
         log.debug("MYCONFIG: %s", config)
         self._parser = GliderParser(
             config,
@@ -56,3 +52,20 @@ class DOSTADataSetDriver(SimpleDataSetDriver):
         )
         return self._harvester
 
+    def _particle_parser_config(self):
+        """
+        @retval the parser config with the particle class
+        """
+        config = self._parser_config
+        config.update({
+            'particle_module': 'mi.dataset.parser.glider',
+            'particle_class': 'GgldrDostaDelayedDataParticle'
+        })
+        return config
+
+    def _ingest_parser(self, file_name, path, data_key):
+        """
+        Ingest workers build the parser without extra arguments
+        """
+        return (GliderParser, self._particle_parser_config(), ())
+
@@ -26,11 +26,7 @@ class WfpCTDPFKDataSetDriver(SimpleDataSetDriver):
         return [CtdpfkParserDataParticle.type()]
 
     def _build_parser(self, parser_state, infile):
-        config = self._parser_config
-        config.update({
-            'particle_module': 'mi.dataset.parser.ctdpfk',
-            'particle_class': 'CtdpfkParserDataParticle'
-        })
+        config = self._particle_parser_config()
 
         self._parser = CtdpfkParser(
             config,
@@ -55,6 +51,23 @@ class WfpCTDPFKDataSetDriver(SimpleDataSetDriver):
         )
         return self._harvester
 
+    def _particle_parser_config(self):
+        """
+        @retval the parser config with the particle class
+        """
+        config = self._parser_config
+        config.update({
+            'particle_module': 'mi.dataset.parser.ctdpfk',
+            'particle_class': 'CtdpfkParserDataParticle'
+        })
+        return config
+
+    def _ingest_parser(self, file_name, path, data_key):
+        """
+        Ingest workers build the parser without extra arguments
+        """
+        return (CtdpfkParser, self._particle_parser_config(), ())
+
     def _file_preprocessing_callback(self, raw_file_name):
         """
         Take an open file handle, read its contents and create a new file 
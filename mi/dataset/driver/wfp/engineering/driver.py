@@ -25,11 +25,7 @@ class WfpEngineeringDataSetDriver(SimpleDataSetDriver):
         return [WfpEngineeringDataParticle.type()]
 
     def _build_parser(self, parser_state, infile):
-        config = self._parser_config
-        config.update({
-            'particle_module': 'mi.dataset.parser.wfp_parser',
-            'particle_class': 'WfpEngineeringDataParticle'
-        })
+        config = self._particle_parser_config()
 
         log.debug("MYCONFIG: %s", config)
 
@@ -56,3 +52,20 @@ class WfpEngineeringDataSetDriver(SimpleDataSetDriver):
         )
         return self._harvester
 
+    def _particle_parser_config(self):
+        """
+        @retval the parser config with the particle class
+        """
+        config = self._parser_config
+        config.update({
+            'particle_module': 'mi.dataset.parser.wfp_parser',
+            'particle_class': 'WfpEngineeringDataParticle'
+        })
+        return config
+
+    def _ingest_parser(self, file_name, path, data_key):
+        """
+        Ingest workers build the parser without extra arguments
+        """
+        return (EngineeringParser, self._particle_parser_config(), ())
+
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+
+"""
+@package mi.dataset.file_index Persistent index of ingested files
+@file mi/dataset/file_index.py
+@brief Keep the driver state of fully ingested files in a sqlite file
+instead of the driver state memento.  The memento only holds files that
+are still being ingested, so it stays small however many files a
+deployment has produced.
+"""
+
+__license__ = 'Apache 2.0'
+
+import json
+import sqlite3
+
+from mi.core.log import get_logger ; log = get_logger()
+from mi.dataset.dataset_driver import DriverStateKey
+
+class IngestedFileIndex(object):
+    """
+    Index of ingested file driver state stored in sqlite.  File sizes and
+    modification dates are also kept in memory so the harvester can check
+    a file hasn't changed without reading the index.
+    """
+    def __init__(self, path):
+        """
+        @param path Path of the sqlite file, created if it doesn't exist
+        """
+        self._path = path
+        # the harvester reads the index from its polling thread
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS ingested_file "
+                                 "(name TEXT PRIMARY KEY, size INTEGER, mod_date REAL, state TEXT)")
+        self._connection.commit()
+
+        self._stats = {}
+        for (name, size, mod_date) in self._connection.execute(
+                "SELECT name, size, mod_date FROM ingested_file"):
+            self._stats[name] = (size, mod_date)
+        log.debug("Opened ingested file index %s with %d files", path, len(self._stats))
+
+    def __contains__(self, name):
+        return name in self._stats
+
+    def __len__(self):
+        return len(self._stats)
+
+    def add(self, entries):
+        """
+        Add or replace file entries in the index
+        @param entries dict of driver state entries by file name
+        """
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO ingested_file (name, size, mod_date, state) VALUES (?, ?, ?, ?)",
+            [(name, entry.get(DriverStateKey.FILE_SIZE), entry.get(DriverStateKey.FILE_MOD_DATE),
+              json.dumps(entry)) for (name, entry) in entries.iteritems()])
+        self._connection.commit()
+
+        for (name, entry) in entries.iteritems():
+            self._stats[name] = (entry.get(DriverStateKey.FILE_SIZE), entry.get(DriverStateKey.FILE_MOD_DATE))
+
+    def get(self, name):
+        """
+        Get the driver state entry of an indexed file.  The size, date and
+        ingested flag are available without reading the index, the rest of
+        the entry is read the first time it is used.
+        @param name File name
+        @retval IndexedFileEntry, None if the file isn't indexed
+        """
+        if name not in self._stats:
+            return None
+        (size, mod_date) = self._stats[name]
+        return IndexedFileEntry(self, name, {DriverStateKey.FILE_SIZE: size,
+                                             DriverStateKey.FILE_MOD_DATE: mod_date,
+                                             DriverStateKey.INGESTED: True})
+
+    def read(self, name):
+        """
+        Read the whole driver state entry of an indexed file
+        @param name File name
+        @retval dict driver state entry
+        """
+        row = self._connection.execute("SELECT state FROM ingested_file WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0])
+
+    def close(self):
+        self._connection.close()
+
+class IndexedFileEntry(dict):
+    """
+    Driver state entry of an indexed file, read from the index the first
+    time a value other than the size, date or ingested flag is used.
+    """
+    def __init__(self, index, name, stats):
+        dict.__init__(self, stats)
+        self._index = index
+        self._name = name
+        self._loaded = False
+
+    def __missing__(self, key):
+        self._load()
+        return dict.__getitem__(self, key)
+
+    def __contains__(self, key):
+        if not dict.__contains__(self, key):
+            self._load()
+        return dict.__contains__(self, key)
+
+    def _load(self):
+        if not self._loaded:
+            self.update(self._index.read(self._name))
+            self._loaded = True
+
+class IndexedDriverState(dict):
+    """
+    Driver state of a directory harvester with ingested files moved to an
+    IngestedFileIndex.  Indexed files are still found with 'in' and
+    indexing, but aren't iterated, counted or persisted with the memento.
+    Store a changed entry back with state[name] = entry to keep it in the
+    memento.
+    """
+    def __init__(self, memento, index):
+        """
+        Migrate the ingested files of a dict memento to the index
+        @param memento dict driver state
+        @param index IngestedFileIndex
+        """
+        dict.__init__(self, memento)
+        self._index = index
+        self.prune()
+
+    def __contains__(self, name):
+        return dict.__contains__(self, name) or name in self._index
+
+    def __missing__(self, name):
+        entry = self._index.get(name)
+        if entry is None:
+            raise KeyError(name)
+        return entry
+
+    def __setitem__(self, name, entry):
+        if isinstance(entry, IndexedFileEntry):
+            entry._load()
+            entry = dict(entry)
+        dict.__setitem__(self, name, entry)
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def prune(self, name=None):
+        """
+        Move fully ingested, unmodified files from the memento to the index
+        @param name File name to prune, None to prune every file
+        """
+        names = [name] if name is not None else self.keys()
+        entries = {}
+        for file_name in names:
+            entry = dict.get(self, file_name)
+            if isinstance(entry, dict) and entry.get(DriverStateKey.INGESTED) and \
+               DriverStateKey.MODIFIED_STATE not in entry:
+                entries[file_name] = entry
+
+        if entries:
+            self._index.add(entries)
+            for file_name in entries:
+                del self[file_name]
+            log.debug("Moved %d ingested files to the file index", len(entries))
+
+    def __reduce__(self):
+        # persist and copy as a plain dict memento
+        return (dict, (dict(self),))
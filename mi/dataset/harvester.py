@@ -17,6 +17,7 @@ import glob
 import hashlib
 import time
 import re
+import bisect
 
 from threading import Thread
 from gevent.event import Event
@@ -81,6 +82,9 @@ class SingleDirectoryPoller(ConditionPoller):
         # restarts, the queue is emptied so all files that have not been ingested can be added and sent again,
         # but this keeps the harvester from sending the same files over and over to not be put in the driver queue
         self.sent_to_driver_queue = []
+        # natural sort keys of the files found so far, by file name, and the keys in sorted order
+        self._sort_keys = {}
+        self._sorted_keys = []
         super(SingleDirectoryPoller,self).__init__(self._check_for_files, callback,
                                                    exception_callback, interval)
 
@@ -101,7 +105,7 @@ class SingleDirectoryPoller(ConditionPoller):
                 filenames.sort()
 
         new_files = []
-        modified_files = False
+        modified_files = []
         # loop over all files in the directory and compare their state to that in the harvester state dictionary
         for i_file in filenames:
             mod_time = os.path.getmtime(i_file)
@@ -111,39 +115,42 @@ class SingleDirectoryPoller(ConditionPoller):
                 # find if this file already exists in the found files
                 if file_name in self._driver_state and self._driver_state[file_name][DriverStateKey.INGESTED]:
                     # this file has been ingested (file size and date will only be available for ingested files)
+                    file_state = self._driver_state[file_name]
                     file_size = os.path.getsize(i_file)
-                    if self._driver_state[file_name][DriverStateKey.FILE_SIZE] != file_size or \
-                    self._driver_state[file_name][DriverStateKey.FILE_MOD_DATE] != mod_time:
+                    if file_state[DriverStateKey.FILE_SIZE] != file_size or \
+                    file_state[DriverStateKey.FILE_MOD_DATE] != mod_time:
                        # this file has been ingested, but the file size and times don't match, confirm that
                        # the checksum is different
                         with open(i_file, 'rb') as filehandle:
                             md5_checksum = hashlib.md5(filehandle.read()).hexdigest()
-                        if self._driver_state[file_name][DriverStateKey.FILE_CHECKSUM] != md5_checksum:
+                        if file_state[DriverStateKey.FILE_CHECKSUM] != md5_checksum:
                             # ingested file has been modified!
-                            if DriverStateKey.MODIFIED_STATE in self._driver_state[file_name]:
+                            if DriverStateKey.MODIFIED_STATE in file_state:
                                 # this file has been modified before
-                                old_state = self._driver_state[file_name][DriverStateKey.MODIFIED_STATE]
+                                old_state = file_state[DriverStateKey.MODIFIED_STATE]
                                 if old_state[DriverStateKey.FILE_SIZE] != file_size or \
                                 old_state[DriverStateKey.FILE_MOD_DATE] != mod_time or \
                                 old_state[DriverStateKey.FILE_CHECKSUM] != md5_checksum:
                                     # this file has changed since its previous modification, update the
                                     # modified state
-                                    self._driver_state[file_name][DriverStateKey.MODIFIED_STATE] = {
+                                    file_state[DriverStateKey.MODIFIED_STATE] = {
                                         DriverStateKey.FILE_SIZE: file_size,
                                         DriverStateKey.FILE_MOD_DATE: mod_time,
                                         DriverStateKey.FILE_CHECKSUM: md5_checksum,
                                         }
-                                    # set the flag for the callback that we need to store the driver state
-                                    modified_files = True
+                                    # the callback needs to store the driver state of this file
+                                    modified_files.append(file_name)
                             else:
                                 # this is the first time this file has been modified
-                                self._driver_state[file_name][DriverStateKey.MODIFIED_STATE] = {
+                                file_state[DriverStateKey.MODIFIED_STATE] = {
                                     DriverStateKey.FILE_SIZE: file_size,
                                     DriverStateKey.FILE_MOD_DATE: mod_time,
                                     DriverStateKey.FILE_CHECKSUM: md5_checksum,
                                     }
-                                # set the flag for the callback that we need to store the driver state
-                                modified_files = True
+                                # the callback needs to store the driver state of this file
+                                modified_files.append(file_name)
+                            # store the entry back, an entry from the ingested file index is a copy
+                            self._driver_state[file_name] = file_state
                 else:
                     # send all files that have not been ingested yet, but keep track in a queue so
                     # duplicates are not sent
@@ -173,29 +180,36 @@ class SingleDirectoryPoller(ConditionPoller):
         """
         Sorts files which have multiple indices separated by underscores in a file name.
         Ascii sorting will sort '16' less than '6', so separate by underscores, turn into
-        integers, then sort
+        integers, then sort.  Sort keys are kept between polls in a sorted list, only files
+        that are new or gone since the last poll are inserted or removed.
         """
         # no sorting needed if 0 or 1 files
         if not filenames or len(filenames) < 2:
             return filenames
 
-        # this assumes all files have the same extension
-        file_extension = filenames[0].split('.')
-        split_names = ()
+        current = set(filenames)
+        for fn in [fn for fn in self._sort_keys if fn not in current]:
+            # this file is gone, remove it from the sorted keys
+            key = self._sort_keys.pop(fn)
+            del self._sorted_keys[bisect.bisect_left(self._sorted_keys, key)]
+
+        new_keys = []
         for fn in filenames:
-            split_name = self.ascii_to_int_list(fn)
-            # append this split up name as a tuple
-            split_names = split_names + (split_name, ) 
-        # now sort all the int formatted names
-        sorted_tuple = sorted(split_names)
-        # put the filenames back to string format
-        sorted_filenames = []
-        
-        for fn in sorted_tuple:
-            # Retrieve original name from end of sorted component list
-            sorted_filenames.append(fn[len(fn) - 1])
+            if fn not in self._sort_keys:
+                key = self.ascii_to_int_list(fn)
+                self._sort_keys[fn] = key
+                new_keys.append(key)
+
+        if len(new_keys) > len(self._sorted_keys) / 16:
+            # many new files, i.e. the first poll, sorting them all is cheaper than inserting each
+            self._sorted_keys.extend(new_keys)
+            self._sorted_keys.sort()
+        else:
+            for key in new_keys:
+                bisect.insort(self._sorted_keys, key)
 
-        return sorted_filenames
+        # Retrieve original name from end of sorted component list
+        return [key[-1] for key in self._sorted_keys]
 
     @staticmethod
     def ascii_to_int_list(filename):
@@ -221,7 +235,7 @@ class SingleDirectoryHarvester(SingleDirectoryPoller, Harvester):
     @param file_mod_wait - integer time to wait after files have been modified
     @param memento - previous harvester state dictionary
     @param file_callback - function to callback when a not ingested file has been found
-    @param modified_callback - function to callback when a modified ingested file has been found
+    @param modified_callback - function to callback with the names of modified ingested files that have been found
     @param exception_callback - function to callback when an exception occurs
     """
     def __init__(self, config, memento, file_callback, modified_callback, exception_callback):
@@ -250,7 +264,7 @@ class SingleDirectoryHarvester(SingleDirectoryPoller, Harvester):
         (new_files, modified_files) = file_tuple
         if modified_files:
             # if there are modified files, need to update the driver state
-            self.modified_callback()
+            self.modified_callback(modified_files)
         # update the new files    
         for this_file in new_files:
             self.callback(this_file)
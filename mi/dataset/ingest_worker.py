@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+
+"""
+@package mi.dataset.ingest_worker Worker processes parsing dataset files
+@file mi/dataset/ingest_worker.py
+@brief Parse whole files in separate python processes.  A worker is started
+clean, it doesn't share the driver's greenlets or connections, and is only
+sent the parser class, parser config and path of each file.  Requests and
+results are pickled over the worker's stdin and stdout; the driver waits
+for results without blocking its other greenlets.
+"""
+
+__license__ = 'Apache 2.0'
+
+import os
+import sys
+import struct
+import cPickle as pickle
+from subprocess import Popen
+from subprocess import PIPE
+
+from gevent.socket import wait_read
+
+from mi.core.log import get_logger ; log = get_logger()
+from mi.core.exceptions import InstrumentException
+from mi.core.exceptions import DatasetParserException
+
+# Records requested from the parser per get_records call in an ingest worker
+INGEST_RECORDS_PER_CALL = 1000
+
+# Python run by a worker process
+WORKER_COMMAND = 'from mi.dataset.ingest_worker import run_worker; run_worker()'
+
+# Each message on a worker pipe is a pickle preceded by its length
+LENGTH_FORMAT = '>I'
+LENGTH_SIZE = struct.calcsize(LENGTH_FORMAT)
+
+# Bytes read from a worker pipe at a time
+READ_SIZE = 65536
+
+class FileIngestResult(object):
+    """
+    The particles, parser states and exceptions from parsing a file in an
+    ingest worker.  The parser callbacks collect into this object, which is
+    returned to the driver to publish.
+    """
+    def __init__(self):
+        self.particles = []
+        self.states = []
+        self._exceptions = []
+        self._error = None
+
+    def publish(self, particles):
+        """
+        Data callback, collect the particles
+        """
+        self.particles.extend(particles)
+
+    def save_state(self, state, file_ingested, *args):
+        """
+        Parser state callback, keep the state with the number of particles
+        parsed before it
+        """
+        self.states.append((len(self.particles), state, file_ingested))
+
+    def add_exception(self, exception):
+        """
+        Sample exception callback, collect the exception
+        """
+        self._exceptions.append(self._pack_exception(exception))
+
+    def set_error(self, exception):
+        """
+        Record the exception that stopped the file being parsed
+        """
+        self._error = self._pack_exception(exception)
+
+    def get_exceptions(self):
+        return [self._unpack_exception(exception) for exception in self._exceptions]
+
+    def get_error(self):
+        if self._error is None:
+            return None
+        return self._unpack_exception(self._error)
+
+    @staticmethod
+    def _pack_exception(exception):
+        # MI exceptions set args to (error_code, msg) which don't unpickle
+        # through their constructors, so send the class and message
+        if isinstance(exception, InstrumentException):
+            return (exception.__class__, (exception.msg,))
+        return (exception.__class__, exception.args)
+
+    @staticmethod
+    def _unpack_exception(packed):
+        (exception_class, args) = packed
+        return exception_class(*args)
+
+def parse_file(parser_class, config, path, parser_state, parser_args):
+    """
+    Parse a whole file.  The parser is built the way the dataset drivers
+    build their parsers, with the extra arguments after the callbacks.
+    @param parser_class Parser class
+    @param config Parser config
+    @param path Path of the file to parse
+    @param parser_state Parser state to start from
+    @param parser_args Extra parser constructor arguments
+    @retval FileIngestResult with what was parsed
+    """
+    ingest_result = FileIngestResult()
+    try:
+        with open(path) as handle:
+            parser = parser_class(config, parser_state, handle,
+                                  ingest_result.save_state,
+                                  ingest_result.publish,
+                                  ingest_result.add_exception,
+                                  *parser_args)
+            while parser.get_records(INGEST_RECORDS_PER_CALL):
+                pass
+    except Exception as e:
+        log.debug("Exception parsing %s: %s", path, e, exc_info=True)
+        ingest_result.set_error(e)
+
+    return ingest_result
+
+def write_message(stream, message):
+    """
+    Write a message to a worker pipe
+    """
+    data = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+    stream.write(struct.pack(LENGTH_FORMAT, len(data)) + data)
+    stream.flush()
+
+def read_message(stream):
+    """
+    Read a message from a worker pipe, blocking
+    @retval the message, None at the end of the stream
+    """
+    header = stream.read(LENGTH_SIZE)
+    if len(header) < LENGTH_SIZE:
+        return None
+    (length,) = struct.unpack(LENGTH_FORMAT, header)
+    return pickle.loads(stream.read(length))
+
+def run_worker():
+    """
+    Worker process main loop.  Parse the files requested on stdin and write
+    the results to stdout until stdin is closed.
+    """
+    # anything a parser prints would corrupt the results, send it to stderr
+    results = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    while True:
+        request = read_message(sys.stdin)
+        if request is None:
+            break
+        write_message(results, parse_file(*request))
+
+class IngestWorker(object):
+    """
+    Driver side of an ingest worker process.  Files are parsed in the order
+    they are sent and their results are read back in the same order.
+    """
+    def __init__(self):
+        # the worker imports the parser classes from the driver's path
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(sys.path)
+        self._process = Popen([sys.executable, '-c', WORKER_COMMAND],
+                              stdin=PIPE, stdout=PIPE, close_fds=True, env=env)
+        self._buffer = ''
+        self.pending = 0
+
+    def parse(self, parser_class, config, path, parser_state, parser_args):
+        """
+        Send a file to the worker to parse
+        @param parser_class Parser class, importable by the worker
+        @param config Parser config
+        @param path Path of the file to parse
+        @param parser_state Parser state to start from
+        @param parser_args Extra parser constructor arguments
+        """
+        write_message(self._process.stdin, (parser_class, config, path, parser_state, parser_args))
+        self.pending += 1
+
+    def get_result(self):
+        """
+        Wait for the result of the oldest file sent, yielding to other
+        greenlets while the worker parses
+        @retval FileIngestResult of the file
+        @raise DatasetParserException if the worker process exits
+        """
+        header = self._read(LENGTH_SIZE)
+        (length,) = struct.unpack(LENGTH_FORMAT, header)
+        result = pickle.loads(self._read(length))
+        self.pending -= 1
+        return result
+
+    def stop(self):
+        """
+        Stop the worker process, abandoning any files it is parsing
+        """
+        if self._process.poll() is None:
+            self._process.kill()
+        self._process.wait()
+        self._process.stdin.close()
+        self._process.stdout.close()
+
+    def _read(self, size):
+        fileno = self._process.stdout.fileno()
+        while len(self._buffer) < size:
+            wait_read(fileno)
+            data = os.read(fileno, READ_SIZE)
+            if not data:
+                raise DatasetParserException("ingest worker exited with status %s" % self._process.wait())
+            self._buffer += data
+
+        data = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return data
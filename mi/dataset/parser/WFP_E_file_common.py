@@ -13,14 +13,15 @@ import re
 import time
 import ntplib
 import struct
+import numpy as np
 
 from functools import partial
 
 from mi.core.log import get_logger; log = get_logger()
-from mi.core.exceptions import SampleException
+from mi.core.exceptions import SampleException, DatasetParserException, NotImplementedException
 from mi.core.common import BaseEnum
 from mi.core.instrument.chunker import BinaryChunker
-from mi.dataset.dataset_parser import BufferLoadingParser
+from mi.dataset.dataset_parser import BufferLoadingParser, map_file, unmap_file
 
 HEADER_REGEX = b'(\x00\x01\x00{7,7}\x01\x00\x01\x00{4,4})([\x00-\xff]{8,8})'
 HEADER_MATCHER = re.compile(HEADER_REGEX)
@@ -35,6 +36,9 @@ HEADER_BYTES = 24
 SAMPLE_BYTES = 26
 STATUS_BYTES = 16
 
+# data samples start with a big endian unix timestamp
+SAMPLE_DTYPE = np.dtype([('timestamp', '>u4'), ('data', 'V%d' % (SAMPLE_BYTES - 4))])
+
 
 class StateKey(BaseEnum):
     POSITION = "position"
@@ -132,49 +136,108 @@ class WfpEFileParser(BufferLoadingParser):
         # update the state to show we have read the header
         self._increment_state(HEADER_BYTES)
 
-    def parse_record(self, record):
-        """
-        determine if this is a engineering or data record and parse
-        FLORT and PARAD can copy paste this and insert their own data particle class
-        needs extending for WFP_ENG
-        """
-        result_particle = []
-        if DATA_SAMPLE_MATCHER.match(record):
-            # pull out the timestamp for this record
-            match = DATA_SAMPLE_MATCHER.match(record)
-            fields = struct.unpack('<I', match.group(0)[:4])
-            timestamp = int(fields[0])
-            self._timestamp = ntplib.system_to_ntp_time(timestamp)
-            log.debug("Converting record timestamp %f to ntp timestamp %f", timestamp, self._timestamp)
-            # INSERT YOUR DATA PARTICLE CLASS HERE
-            sample = self._extract_sample(data_particle_class, DATA_SAMPLE_MATCHER, record, self._timestamp)
-            if sample:
-                # create particle
-                log.trace("Extracting sample %s with read_state: %s", sample, self._read_state)
-                self._increment_state(SAMPLE_BYTES)
-                result_particle = (sample, copy.copy(self._read_state))
-
-        return result_particle
+    def _load_particle_buffer(self):
+        """
+        Records are found by their position in the file, so parse the whole
+        rest of the file at once instead of reading it in blocks
+        """
+        self._record_buffer.extend(self.parse_chunks())
+        self.file_complete = True
+        raise EOFError
+
+    def _find_records(self, data, position):
+        """
+        Find the runs of data samples and the status records after a
+        position.  Records are fixed length, so the candidate sample starts
+        are checked for a status record all at once and only the status
+        records break up the stride.  A partial record at the end of the
+        data is left unparsed.
+        @param data The file data
+        @param position The file position to start from
+        @retval list of (start, count) tuples, a count of None is a status record
+        """
+        records = []
+        raw = np.frombuffer(data, np.uint8)
+        data_len = len(raw)
+        while data_len - position >= STATUS_BYTES:
+            # starts of every sample that fits if there are no status records
+            starts = np.arange(position, data_len - SAMPLE_BYTES + 1, SAMPLE_BYTES)
+            if len(starts) == 0:
+                starts = np.array([position])
+            status = (raw[starts] == 0xff) & (raw[starts + 1] == 0xff) & \
+                     (raw[starts + 2] == 0xff) & (raw[starts + 3] >= 0xfa)
+            status_index = np.flatnonzero(status)
+            count = status_index[0] if len(status_index) else len(starts)
+            if data_len - position < SAMPLE_BYTES:
+                # only room left for a status record
+                count = 0
+
+            if count:
+                records.append((position, count))
+                position += count * SAMPLE_BYTES
+            elif not len(status_index):
+                break
+
+            if len(status_index):
+                records.append((position, None))
+                position += STATUS_BYTES
+        return records
+
+    def _sample_timestamps(self, data, start, count):
+        """
+        Decode the timestamps of a run of data samples together
+        @param data The file data
+        @param start File position of the first sample
+        @param count Number of samples
+        @retval list of floating point NTP64 timestamps
+        """
+        samples = np.frombuffer(data, SAMPLE_DTYPE, count, start)
+        timestamps = ntplib.system_to_ntp_time(samples['timestamp'].astype(np.float64))
+        return timestamps.tolist()
+
+    def parse_record(self, record, timestamp):
+        """
+        Parse a data sample record into this parser's data particle
+        @param record The data sample bytes
+        @param timestamp The NTP64 timestamp of the sample
+        @retval (particle, state) tuple, or an empty list if no particle was made
+        """
+        raise NotImplementedException("parse_record must be overridden")
+
+    def parse_status(self, record):
+        """
+        Parse a status record.  Parsers that don't publish the status skip it.
+        @param record The status record bytes
+        @retval (particle, state) tuple, or an empty list if no particle was made
+        """
+        self._increment_state(STATUS_BYTES)
+        return []
 
     def parse_chunks(self):
         """
-        Parse out any pending data chunks in the chunker. If
-        it is a valid data piece, build a particle, update the position and
-        timestamp. Go until the chunker has no more valid data.
+        Parse the records after the read position straight from the file,
+        decoding the timestamps of each run of data samples together.
         @retval a list of tuples with sample particles encountered in this
             parsing, plus the state. An empty list of nothing was parsed.
         """
         result_particles = []
-        (timestamp, chunk, start, end) = self._chunker.get_next_data_with_index()
-        non_data = None
-
-        while (chunk != None):
-            result_particle = self.parse_record(chunk)
-            if result_particle:
-                result_particles.append(result_particle)
-
-            (timestamp, chunk, start, end) = self._chunker.get_next_data_with_index()
-            (nd_timestamp, non_data) = self._chunker.get_next_non_data(clean=True)
+        data = map_file(self._stream_handle)
+        try:
+            for (start, count) in self._find_records(data, self._read_state[StateKey.POSITION]):
+                if count is None:
+                    result_particle = self.parse_status(data[start:start + STATUS_BYTES])
+                    if result_particle:
+                        result_particles.append(result_particle)
+                    continue
+
+                timestamps = self._sample_timestamps(data, start, count)
+                for index in xrange(count):
+                    offset = start + index * SAMPLE_BYTES
+                    result_particle = self.parse_record(data[offset:offset + SAMPLE_BYTES],
+                                                        timestamps[index])
+                    if result_particle:
+                        result_particles.append(result_particle)
+        finally:
+            unmap_file(data)
 
         return result_particles
-
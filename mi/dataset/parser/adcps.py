@@ -15,13 +15,14 @@ import struct
 import ntplib
 import time
 import datetime
+import numpy as np
 from dateutil import parser
 
 from mi.core.log import get_logger; log = get_logger()
 from mi.dataset.parser.mflm import MflmParser, SIO_HEADER_MATCHER
 from mi.core.common import BaseEnum
 from mi.core.exceptions import SampleException, DatasetParserException
-from mi.core.instrument.data_particle import DataParticle, DataParticleKey
+from mi.core.instrument.data_particle import DataParticle, DataParticleKey, DataParticleValue
 from mi.core.time import string_to_ntp_date_time
 
 class DataParticleType(BaseEnum):
@@ -59,6 +60,25 @@ DATA_WRAPPER_MATCHER = re.compile(DATA_WRAPPER_REGEX)
 DATA_REGEX = b'\x6e\x7f[\x00-\xFF]{32}([\x00-\xFF]+)([\x00-\xFF]{2})'
 DATA_MATCHER = re.compile(DATA_REGEX)
 
+# fixed fields at the start of the ensemble, up to the number of bins
+HEADER_STRUCT = struct.Struct('<HHIBBBdHhhhIbBB')
+HEADER_BYTES = HEADER_STRUCT.size
+DATE_STRUCT = struct.Struct('HBBBBBB')
+DATE_OFFSET = 11
+# velocity bins are big endian, unlike the rest of the ensemble
+VELOCITY_DTYPE = np.dtype('>i2')
+CHECKSUM_STRUCT = struct.Struct('<h')
+
+def calc_checksum(data, length):
+    """
+    Calculate the ensemble checksum, the sum of the bytes before it as an
+    unsigned short
+    @param data The ensemble
+    @param length Number of bytes before the checksum
+    @retval The calculated checksum
+    """
+    return int(np.frombuffer(data, np.uint8, length).sum(dtype=np.uint32)) & 0xFFFF
+
 class AdcpsParserDataParticle(DataParticle):
     """
     Class for parsing data from the ADCPS instrument on a MSFM platform node
@@ -66,54 +86,60 @@ class AdcpsParserDataParticle(DataParticle):
     
     _data_particle_type = DataParticleType.SAMPLE
     
+    def __init__(self, raw_data, *args, **kwargs):
+        """
+        @param raw_data The binary ensemble
+        @param matched True if the parser has already matched the raw data
+           with DATA_MATCHER, otherwise it is matched here
+        """
+        self._matched = kwargs.pop('matched', False)
+        super(AdcpsParserDataParticle, self).__init__(raw_data, *args, **kwargs)
+
     def _build_parsed_values(self):
         """
         Take something in the binary data values and turn it into a
         particle with the appropriate tag.
         throws SampleException If there is a problem with sample creation
         """
+        if self._matched:
+            data = self.raw_data
+        else:
+            # match the data inside the wrapper
+            match = DATA_MATCHER.match(self.raw_data)
+            if not match:
+                raise SampleException("AdcpsParserDataParticle: No regex match of \
+                                      parsed sample data [%s]", self.raw_data)
+            data = match.group(0)
 
-        # match the data inside the wrapper
-        match = DATA_MATCHER.match(self.raw_data)
-        if not match:
-            raise SampleException("AdcpsParserDataParticle: No regex match of \
-                                  parsed sample data [%s]", self.raw_data)
         try:
-            fields = struct.unpack('<HHIBBBdHhhhIbBB', match.group(0)[0:34])
+            fields = HEADER_STRUCT.unpack_from(data)
             packet_id = fields[0]
             num_bytes = fields[1]
-            if len(match.group(0)) - 2 != num_bytes:
+            if len(data) - 2 != num_bytes:
                 raise ValueError('num bytes %d does not match data length %d'
-                          % (num_bytes, len(match.group(0))))
+                          % (num_bytes, len(data)))
             log.debug('unpacked fields %s', fields)
             nbins = fields[14]
-            if len(match.group(0)) < (36+(nbins*8)):
+            if len(data) < (HEADER_BYTES + 2 + (nbins*8)):
                 raise ValueError('Number of bins %d does not fit in data length %d'%(nbins,
-                                                                                     len(match.group(0))))
-            date_fields = struct.unpack('HBBBBBB', match.group(0)[11:19])
-            date_str = self.unpack_date(match.group(0)[11:19])
+                                                                                     len(data)))
+            date_fields = DATE_STRUCT.unpack_from(data, DATE_OFFSET)
+            date_str = self.unpack_date(data[DATE_OFFSET:DATE_OFFSET + DATE_STRUCT.size])
 
             log.debug('unpacked date string %s', date_str)
             sec_since_1900 = string_to_ntp_date_time(date_str)
 
-            # get seconds from 1990 to 1970
-            #elapse_1900 = float(parser.parse("1900-01-01T00:00:00.00Z").strftime("%s.%f"))
-            #elapse_date = float(parser.parse(date_str).strftime("%s.%f"))
-            # subtract seconds from 1900 to 1970 to convert to seconds since 1900
-            #sec_since_1900 = round((elapse_date - elapse_1900)*100)/100
-
-            # create a string with the right number of shorts to unpack
-            struct_format = '>'
-            for i in range(0,nbins):
-                struct_format = struct_format + 'h'
-
-            bin_len = nbins*2
-            vel_east = struct.unpack(struct_format, match.group(0)[34:(34+bin_len)])
-            vel_north = struct.unpack(struct_format, match.group(0)[(34+bin_len):(34+(bin_len*2))])
-            vel_up = struct.unpack(struct_format, match.group(0)[(34+(bin_len*2)):(34+(bin_len*3))])
-            vel_err = struct.unpack(struct_format, match.group(0)[(34+(bin_len*3)):(34+(bin_len*4))])
+            # the east, north, up and error velocity bins follow each other
+            (vel_east, vel_north, vel_up, vel_err) = np.frombuffer(
+                data, VELOCITY_DTYPE, nbins*4, HEADER_BYTES).reshape(4, nbins).tolist()
 
-            checksum = struct.unpack('<h', match.group(0)[(34+(bin_len*4)):(36+(bin_len*4))])
+            checksum_offset = HEADER_BYTES + (nbins*8)
+            checksum = CHECKSUM_STRUCT.unpack_from(data, checksum_offset)
+            calculated_checksum = calc_checksum(data, checksum_offset)
+            if checksum[0] & 0xFFFF != calculated_checksum:
+                log.warn("Calculated checksum: %s did not match packet checksum: %s",
+                         calculated_checksum, checksum[0] & 0xFFFF)
+                self.contents[DataParticleKey.QUALITY_FLAG] = DataParticleValue.CHECKSUM_FAILED
 
             # heading/pitch/roll/temp units of cdegrees (= .01 deg)
             heading = fields[7]
@@ -125,7 +151,7 @@ class AdcpsParserDataParticle(DataParticle):
 
         except (ValueError, TypeError, IndexError) as ex:
             raise SampleException("Error (%s) while decoding parameters in data: [%s]"
-                                  % (ex, match.group(0)))
+                                  % (ex, data))
 
         result = [{DataParticleKey.VALUE_ID: AdcpsParserDataParticleKey.PD12_PACKET_ID,
                    DataParticleKey.VALUE: packet_id},
@@ -208,7 +234,7 @@ class AdcpsParserDataParticle(DataParticle):
 
     @staticmethod
     def unpack_date(data):
-        fields = struct.unpack('HBBBBBB', data)
+        fields = DATE_STRUCT.unpack(data)
         log.debug('Unpacked data into date fields %s', fields)
         zulu_ts = "%04d-%02d-%02dT%02d:%02d:%02d.%02dZ" % (
             fields[0], fields[1], fields[2], fields[3],
@@ -289,7 +315,8 @@ class AdcpsParser(MflmParser):
                     if data_match:
                         log.debug('Found data match in chunk %s', processed_match[1:32])
                         # pull out the date string from the data
-                        date_str = AdcpsParserDataParticle.unpack_date(data_match.group(0)[11:19])
+                        date_str = AdcpsParserDataParticle.unpack_date(
+                            data_match.group(0)[DATE_OFFSET:DATE_OFFSET + DATE_STRUCT.size])
                         # convert to ntp
                         converted_time = float(parser.parse(date_str).strftime("%s.%f"))
                         adjusted_time = converted_time - time.timezone
@@ -299,9 +326,10 @@ class AdcpsParser(MflmParser):
                         log.debug("Converted time \"%s\" (unix: %10.9f) into %10.9f", date_str, adjusted_time, self._timestamp)
                         # particle-ize the data block received, return the record
                         sample = self._extract_sample(AdcpsParserDataParticle,
-                                                      DATA_MATCHER,
+                                                      None,
                                                       data_match.group(0),
-                                                      self._timestamp)
+                                                      self._timestamp,
+                                                      matched=True)
                         if sample:
                             # create particle
                             result_particles.append(sample)
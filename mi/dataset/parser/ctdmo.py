@@ -15,7 +15,9 @@ import array
 import string
 import re
 import time
+import struct
 import ntplib
+import numpy as np
 from dateutil import parser
 from mi.core.log import get_logger ; log = get_logger()
 
@@ -41,12 +43,57 @@ class CtdmoParserDataParticleKey(BaseEnum):
 DATA_REGEX = b'[\x00-\xFF]{8}([\x00-\xFF]{3}[\x16-\x40]{1})\x0d'
 DATA_MATCHER = re.compile(DATA_REGEX)
 
+SAMPLE_BYTES = 13
+# the 20 bit temperature and conductivity fields share 5 big endian bytes,
+# pressure and time are little endian
+SAMPLE_DTYPE = np.dtype([('inductive_id', 'u1'),
+                         ('temp_cond_high', '>u4'),
+                         ('temp_cond_low', 'u1'),
+                         ('pressure', '<u2'),
+                         ('ctd_time', '<u4'),
+                         ('end', 'u1')])
+SAMPLE_HEAD_STRUCT = struct.Struct('>BIB')
+SAMPLE_TAIL_STRUCT = struct.Struct('<HI')
+
+def decode_sample(sample):
+    """
+    Decode the values of one binary sample
+    @param sample The 13 byte sample
+    @retval tuple of inductive ID, temperature, conductivity, pressure and ctd time
+    """
+    (induct_id, temp_cond_high, temp_cond_low) = SAMPLE_HEAD_STRUCT.unpack(sample[0:6])
+    (press_num, internal_time) = SAMPLE_TAIL_STRUCT.unpack(sample[6:12])
+    return (induct_id, temp_cond_high >> 12, ((temp_cond_high & 0xFFF) << 8) | temp_cond_low,
+            press_num, internal_time)
+
+def decode_samples(samples):
+    """
+    Decode the values of an array of binary samples together
+    @param samples numpy array of SAMPLE_DTYPE samples
+    @retval list of inductive ID, temperature, conductivity, pressure and ctd time tuples
+    """
+    temp_cond_high = samples['temp_cond_high'].astype(np.int64)
+    return zip(samples['inductive_id'].tolist(),
+               (temp_cond_high >> 12).tolist(),
+               (((temp_cond_high & 0xFFF) << 8) | samples['temp_cond_low']).tolist(),
+               samples['pressure'].tolist(),
+               samples['ctd_time'].astype(np.int64).tolist())
+
 class CtdmoParserDataParticle(DataParticle):
     """
     Class for parsing data from the CTDMO instrument on a MSFM platform node
     """
     
     _data_particle_type = DataParticleType.SAMPLE
+
+    def __init__(self, raw_data, *args, **kwargs):
+        """
+        @param raw_data The binary sample
+        @param decoded_values The values already decoded by the parser,
+           otherwise the raw data is decoded
+        """
+        self._decoded_values = kwargs.pop('decoded_values', None)
+        super(CtdmoParserDataParticle, self).__init__(raw_data, *args, **kwargs)
     
     def _build_parsed_values(self):
         """
@@ -54,34 +101,19 @@ class CtdmoParserDataParticle(DataParticle):
         particle with the appropriate tag.
         @throws SampleException If there is a problem with sample creation
         """
-        
-        match = DATA_MATCHER.match(self.raw_data)
-        if not match:
-            raise SampleException("CtdmoParserDataParticle: No regex match of \
-                                  parsed sample data: [%s]", self.raw_data)
-
-        try:
-            # convert binary to hex ascii string
-            asciihex = binascii.b2a_hex(match.group(0))
-            log.debug('Converting data %s', asciihex)
-            induct_id = int(asciihex[0:2], 16)
-            # just convert directly from hex-ascii to int
-            temp_num = int(asciihex[2:7], 16)
-            cond_num = int(asciihex[7:12], 16)
-            # need to swap pressure bytes
-            press_byte_swap = asciihex[14:16] + asciihex[12:14]
-            press_num = int(press_byte_swap, 16)
-
-            asciihextime = binascii.b2a_hex(match.group(1))
-            # reverse byte order in time hex string
-            timehex_reverse = asciihextime[6:8] + asciihextime[4:6] + \
-            asciihextime[2:4] + asciihextime[0:2]
-            # time is in seconds since Jan 1 2000, convert to timestamp
-            internal_time = int(timehex_reverse, 16)
-
-        except (ValueError, TypeError, IndexError) as ex:
-            raise SampleException("Error (%s) while decoding parameters in data: [%s]"
-                                  % (ex, self.raw_data))
+        if self._decoded_values is not None:
+            (induct_id, temp_num, cond_num, press_num, internal_time) = self._decoded_values
+        else:
+            match = DATA_MATCHER.match(self.raw_data)
+            if not match:
+                raise SampleException("CtdmoParserDataParticle: No regex match of \
+                                      parsed sample data: [%s]", self.raw_data)
+
+            try:
+                (induct_id, temp_num, cond_num, press_num, internal_time) = decode_sample(match.group(0))
+            except (struct.error, TypeError) as ex:
+                raise SampleException("Error (%s) while decoding parameters in data: [%s]"
+                                      % (ex, self.raw_data))
 
         result = [{DataParticleKey.VALUE_ID: CtdmoParserDataParticleKey.INDUCTIVE_ID,
                    DataParticleKey.VALUE: induct_id},
@@ -157,6 +189,50 @@ class CtdmoParser(MflmParser):
         log.debug("seconds since 1970 %d, ntptime %s", sec_since_1970, ntptime)
         return ntptime
 
+    @staticmethod
+    def _convert_times_to_timestamps(secs_since_2000):
+        """
+        Converts an array of seconds since 2000 into NTP timestamps, the
+        same way as _convert_time_to_timestamp
+        @param secs_since_2000 numpy array of seconds since Jan 1 2000
+        @retval list of NTP4 timestamps
+        """
+        # get seconds since jan 1 2000 (gmt timezone)
+        gmt_dt_2000 = parser.parse("2000-01-01T00:00:00.00Z")
+        elapse_2000 = float(gmt_dt_2000.strftime("%s.%f"))
+
+        # convert from epoch in 2000 to epoch in 1970, GMT
+        sec_since_1970 = secs_since_2000 + elapse_2000 - time.timezone
+        return ntplib.system_to_ntp_time(sec_since_1970).tolist()
+
+    @staticmethod
+    def _find_samples(chunk):
+        """
+        Find the run of back to back samples in an unescaped SIO block.  The
+        run starts at the first sample match and ends at the first slot
+        that isn't a sample, any sample after that is left out.
+        @param chunk The unescaped SIO block
+        @retval tuple of a numpy array of SAMPLE_DTYPE samples, None if there
+           are no samples, and the index of the first sample in the block
+        """
+        match = DATA_MATCHER.search(chunk)
+        if not match:
+            return (None, 0)
+
+        sample_start = match.start(0)
+        count = (len(chunk) - sample_start) / SAMPLE_BYTES
+        samples = np.frombuffer(chunk, SAMPLE_DTYPE, count, sample_start)
+        # the same checks as DATA_MATCHER on the year byte and the end byte
+        year = samples['ctd_time'] >> 24
+        not_sample = np.flatnonzero((year < 0x16) | (year > 0x40) | (samples['end'] != 0x0d))
+        if len(not_sample):
+            count = not_sample[0]
+            samples = samples[:count]
+            # check if the end of the last sample connects to the start of the next sample
+            if DATA_MATCHER.search(chunk, sample_start + count * SAMPLE_BYTES):
+                log.error('extra data found between samples, leaving out the rest of this chunk')
+        return (samples, sample_start)
+
     def parse_chunks(self):
         """
         Parse out any pending data chunks in the chunker. If
@@ -177,13 +253,11 @@ class CtdmoParser(MflmParser):
             non_data_flag = True
 
         sample_count = 0
-        prev_sample = None
         new_seq = 0
 
         while (chunk != None):
             header_match = SIO_HEADER_MATCHER.match(chunk)
             sample_count = 0
-            prev_sample = None
             new_seq = 0
             if header_match.group(1) == self._instrument_id:
                 # Check for missing data between records
@@ -203,31 +277,20 @@ class CtdmoParser(MflmParser):
                 chunk = chunk.replace(b'\x1858', b'\x18')
                 log.debug("matched chunk header %s", chunk[1:32])
 
-                for data_match in DATA_MATCHER.finditer(chunk):
-                    # check if the end of the last sample connects to the start of the next sample
-                    if prev_sample is not None:
-                        if data_match.start(0) != prev_sample:
-                            log.error('extra data found between samples, leaving out the rest of this chunk')
-                            break
-                    prev_sample = data_match.end(0)
-                    # the timestamp is part of the data, pull out the time stamp
-                    # convert from binary to hex string
-                    asciihex_id = binascii.b2a_hex(data_match.group(0)[0:1])
-                    induct_id = int(asciihex_id, 16)
-                    if induct_id == self._config.get('inductive_id'):
-                        asciihextime = binascii.b2a_hex(data_match.group(1))
-                        # reverse byte order in time hex string
-                        timehex_reverse = asciihextime[6:8] + asciihextime[4:6] + \
-                        asciihextime[2:4] + asciihextime[0:2]
-                        # time is in seconds since Jan 1 2000, convert to timestamp
-                        log.trace("time in hex:%s, in seconds:%d", timehex_reverse,
-                                  int(timehex_reverse, 16))
-                        self._timestamp = self._convert_time_to_timestamp(int(timehex_reverse, 16))
+                (samples, sample_start) = self._find_samples(chunk)
+                if samples is not None:
+                    # only keep samples from the configured inductive ID
+                    keep = np.flatnonzero(samples['inductive_id'] == self._config.get('inductive_id'))
+                    samples = samples[keep]
+                    timestamps = self._convert_times_to_timestamps(samples['ctd_time'])
+                    for (index, values, timestamp) in zip(keep.tolist(), decode_samples(samples), timestamps):
+                        offset = sample_start + index * SAMPLE_BYTES
+                        self._timestamp = timestamp
                         # particle-ize the data block received, return the record
-                        sample = self._extract_sample(CtdmoParserDataParticle,
-                                                      DATA_MATCHER,
-                                                      data_match.group(0),
-                                                      self._timestamp)
+                        sample = self._extract_sample(CtdmoParserDataParticle, None,
+                                                      chunk[offset:offset + SAMPLE_BYTES],
+                                                      self._timestamp,
+                                                      decoded_values=values)
                         if sample:
                             # create particle
                             result_particles.append(sample)
@@ -91,25 +91,17 @@ class Flort_kn__stc_imodemParserDataParticle(DataParticle):
 
 class Flort_kn__stc_imodemParser(WfpEFileParser):
 
-    def parse_record(self, record):
+    def parse_record(self, record, timestamp):
         """
         parse a FLORT_KN data sample into data particle from the input record
         """
         result_particle = []
-        if len(record) >= SAMPLE_BYTES:
-            # pull out the timestamp for this record
-            
-            fields = struct.unpack('>I', record[:4])
-            timestamp = int(fields[0])
-            self._timestamp = float(ntplib.system_to_ntp_time(timestamp))
-            log.debug("Converting record timestamp %f to ntp timestamp %f", timestamp, self._timestamp)
-            sample = self._extract_sample(Flort_kn__stc_imodemParserDataParticle, None, record, self._timestamp)
-            if sample:
-                # create particle
-                log.trace("Extracting sample %s with read_state: %s", sample, self._read_state)
-                self._increment_state(SAMPLE_BYTES)
-                result_particle = (sample, copy.copy(self._read_state))
+        self._timestamp = timestamp
+        sample = self._extract_sample(Flort_kn__stc_imodemParserDataParticle, None, record, self._timestamp)
+        if sample:
+            # create particle
+            log.trace("Extracting sample %s with read_state: %s", sample, self._read_state)
+            self._increment_state(SAMPLE_BYTES)
+            result_particle = (sample, copy.copy(self._read_state))
 
         return result_particle
-
-
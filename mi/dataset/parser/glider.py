@@ -21,6 +21,7 @@ from functools import partial
 from mi.core.log import get_logger
 from mi.core.common import BaseEnum
 from mi.core.exceptions import SampleException, DatasetParserException
+from mi.core.exceptions import ConfigurationException
 from mi.core.instrument.chunker import StringChunker
 from mi.core.instrument.data_particle import DataParticle, DataParticleKey
 from mi.core.instrument.data_particle import DataParticleValue
@@ -29,6 +30,14 @@ from mi.dataset.dataset_parser import BufferLoadingParser
 # start the logger
 log = get_logger()
 
+# lat/lon values are [-]DDMM.MMMM or [-]DDDMM.MMMM
+LATLON_REGEX = re.compile(r'(-*\d{2,3})(\d{2}.\d+)')
+
+# Glider values have at most 16 significant digits so the minutes of a
+# DDMM.MMMM value have at most 12 decimal places and those of a DDDMM.MMMM
+# value at most 11
+LATLON_DIGITS = 16
+
 ###############################################################################
 # Define the Particle Classes for Global and Coastal Gliders, both the delayed
 # (delivered over Iridium network) and the recovered (downloaded from a glider
@@ -47,6 +56,12 @@ class StateKey(BaseEnum):
     POSITION = 'position'
 
 
+class GliderConfigKey(BaseEnum):
+    # list of particle class names in the particle module, used by the
+    # multi stream parser in place of the particle class
+    PARTICLE_CLASSES = 'particle_classes'
+
+
 class DataParticleType(BaseEnum):
     # Data particle types for the Open Ocean (aka Global) and Coastal gliders.
     # ADCPA data will parsed by a different parser (adcpa.py)
@@ -92,6 +107,54 @@ class GliderParticleKey(BaseEnum):
 
         return result
 
+class GliderRecord(object):
+    """
+    Read only view of one converted glider data record, keyed by column
+    label.  Indexing returns the {'Name', 'Data'} dictionary glider particles
+    have always been built from, without building one per column up front.
+    """
+    __slots__ = ('_column_index', '_values')
+
+    def __init__(self, column_index, values):
+        """
+        @param column_index dict of column label to column index
+        @param values list of converted values for this record
+        """
+        self._column_index = column_index
+        self._values = values
+
+    def __contains__(self, key):
+        return key in self._column_index
+
+    def __getitem__(self, key):
+        return {'Name': key, 'Data': self._values[self._column_index[key]]}
+
+    def __eq__(self, other):
+        return isinstance(other, GliderRecord) and self.as_dict() == other.as_dict()
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return repr(self.as_dict())
+
+    def keys(self):
+        return self._column_index.keys()
+
+    def get_value(self, key):
+        """
+        Return the converted value of a column
+        @param key column label
+        @raise KeyError if the column isn't in the record
+        """
+        return self._values[self._column_index[key]]
+
+    def as_dict(self):
+        """
+        @retval dict of column label to value
+        """
+        return dict((key, self._values[index]) for (key, index) in self._column_index.iteritems())
+
 class GliderParticle(DataParticle):
     """
     Base particle for glider data.  Glider files are
@@ -110,7 +173,11 @@ class GliderParticle(DataParticle):
 
     def _parsed_values(self, key_list):
         log.debug("Build a particle with keys: %s", key_list)
-        if not isinstance(self.raw_data, dict):
+        if isinstance(self.raw_data, GliderRecord):
+            get_value = self.raw_data.get_value
+        elif isinstance(self.raw_data, dict):
+            get_value = lambda key: self.raw_data[key]['Data']
+        else:
             raise SampleException(
                 "%s: Object Instance is not a Glider Parsed Data \
                 dictionary" % self._data_particle_type)
@@ -122,7 +189,7 @@ class GliderParticle(DataParticle):
         for key in key_list:
             if key in self.raw_data:
                 # read the value from the gpd dictionary
-                value = self.raw_data[key]['Data']
+                value = get_value(key)
 
                 # check to see that the value is not a 'NaN'
                 if np.isnan(value):
@@ -227,7 +294,7 @@ class GgldrFlordDelayedDataParticle(GliderParticle):
 
         @param result A returned list with sub dictionaries of the data
         @throws SampleException if the data is not a glider data dictionary
-            produced by GliderParser._read_data
+            produced by GliderParser.parse_chunks
         """
         return self._parsed_values(FlordParticleKey.list())
 
@@ -258,7 +325,7 @@ class CgldrFlortDelayedDataParticle(GliderParticle):
 
         @param result A returned list with sub dictionaries of the data
         @throws SampleException if the data is not a glider data dictionary
-            produced by GliderParser._read_data
+            produced by GliderParser.parse_chunks
         """
         return self._parsed_values(FlordParticleKey.KEY_LIST)
 
@@ -312,7 +379,7 @@ class GgldrEngDelayedDataParticle(GliderParticle):
 
         @param result A returned list with sub dictionaries of the data
         @throws SampleException if the data is not a glider data dictionary
-            produced by GliderParser._read_data
+            produced by GliderParser.parse_chunks
         """
         return self._parsed_values(EngineeringParticleKey.list())
 
@@ -327,7 +394,7 @@ class CgldrEngDelayedDataParticle(GliderParticle):
 
         @param result A returned list with sub dictionaries of the data
         @throws SampleException if the data is not a glider data dictionary
-            produced by GliderParser._read_data
+            produced by GliderParser.parse_chunks
         """
         return self._parsed_values(EngineeringParticleKey.KEY_LIST)
 
@@ -356,7 +423,7 @@ class CgldrParadDelayedDataParticle(GliderParticle):
 
         @param result A returned list with sub dictionaries of the data
         @throws SampleException if the data is not a glider data dictionary
-            produced by GliderParser._read_data
+            produced by GliderParser.parse_chunks
         """
         return self._parsed_values(ParadParticleKey.KEY_LIST)
 
@@ -385,8 +452,6 @@ class GliderParser(BufferLoadingParser):
         self._read_header()
 
         record_regex = re.compile(r'.*\n')
-        self._sample_regex = self._get_sample_pattern()
-        self._whitespace_regex = re.compile(r'\s*$')
 
         super(GliderParser, self).__init__(config,
                                            self._stream_handle,
@@ -398,6 +463,8 @@ class GliderParser(BufferLoadingParser):
                                            exception_callback,
                                            *args,
                                            **kwargs)
+        self._init_columns()
+
         if state:
             self.set_state(state)
 
@@ -420,10 +487,11 @@ class GliderParser(BufferLoadingParser):
         file_position = self._stream_handle.tell()
         self._read_state[StateKey.POSITION] = file_position
 
-    def _get_sample_pattern(self):
+    def _init_columns(self):
         """
-        Generate a sample regex based on the column header.
-        @return compiled regex matching data records.
+        Build the column lookups used to convert blocks of data records from
+        the column header.
+        @raise SampleException if the header doesn't define the columns.
         """
         column_count = self._header_dict.get('sensors_per_cycle')
         if column_count is None:
@@ -432,14 +500,27 @@ class GliderParser(BufferLoadingParser):
         if column_count == 0:
             raise SampleException("sensors_per_cycle is 0")
 
-        regex = r''
-        for i in range(0, column_count-1):
-            regex += r'([-\d\.e]+|NaN)\s'
+        labels = self._header_dict['labels']
+        num_bytes = self._header_dict['num_of_bytes']
+
+        self._column_count = column_count
+        self._column_index = dict((label, index) for (index, label) in enumerate(labels))
+
+        # 1 and 2 byte columns are integers, 4 and 8 byte columns are floats
+        self._int_columns = [index for (index, size) in enumerate(num_bytes) if size in (1, 2)]
+        self._latlon_columns = [index for (index, label) in enumerate(labels)
+                                if '_lat' in label or '_lon' in label]
 
-        regex += r'([-\d\.e]+|NaN)\s*$'
+        # m_present_time is the unix timestamp of the record
+        self._time_column = self._column_index.get('m_present_time')
 
-        log.debug("Sample Pattern: %s", regex)
-        return re.compile(regex, re.MULTILINE)
+        # the particle class isn't set if the config doesn't name one
+        particle_class = getattr(self, '_particle_class', None)
+        science_parameters = getattr(particle_class, 'science_parameters', [])
+        self._science_columns = [self._column_index[key] for key in science_parameters
+                                 if key in self._column_index]
+
+        log.debug("Column count: %d, science columns: %s", column_count, self._science_columns)
 
     def _read_file_definition(self):
         """
@@ -537,59 +618,95 @@ class GliderParser(BufferLoadingParser):
         self._read_state[StateKey.POSITION] += increment
         # Thomas, my monkey of a son, wanted this comment inserted in the code. -CW
 
-    def _read_data(self, data_record):
-        """
-        Read in the column labels, data type, number of bytes of each
-        data type, and the data from an ASCII glider data file.
-        """
-        log.debug("_read_data: Data Record: %s", data_record)
-
-        data_dict = {}
-        num_columns = self._header_dict['sensors_per_cycle']
-        data_labels = self._header_dict['labels']
-        #data_units = self._header_dict['data_units']
-        num_bytes = self._header_dict['num_of_bytes']
-        data = data_record.strip().split()
-        log.trace("Split data: %s", data)
-        if num_columns != len(data):
-            raise DatasetParserException('Glider data file does not have the ' +
-                                         'same number of columns as described ' +
-                                         'in the header.\n' +
-                                         'Described: %d, Actual: %d' %
-                                         (num_columns, len(data)))
-
-        # extract record to dictionary
-        for ii in range(num_columns):
-            log.trace("_read_data: index: %d label: %s, value: %s", ii, data_labels[ii], data[ii])
-
-            if (num_bytes[ii] == 1) or (num_bytes[ii] == 2):
-                    str2data = int
-            elif (num_bytes[ii] == 4) or (num_bytes[ii] == 8):
-                    str2data = float
-
-            # check to see if this is a latitude/longitude string
-            if ('_lat' in data_labels[ii]) or ('_lon' in data_labels[ii]):
-                # convert latitiude/longitude strings to decimal degrees
-
-                value = self._string_to_ddegrees(data[ii])
-            else:
-                value = str2data(data[ii])
-
-            data_dict[data_labels[ii]] = {
-                'Name': data_labels[ii],
-                #'Units': data_units[ii],
-                #'Number_of_Bytes': int(num_bytes[ii]),
-                'Data': value
-            }
-
-        log.trace("Data dict parsed: %s", data_dict)
-        return data_dict
-
-    def get_block(self, size=1024):
+    def _read_block(self, fields):
+        """
+        Convert a block of split data records into a 2-D array with one row
+        per record.  All values are converted to float so missing values can
+        be NaN.
+
+        @param fields list of field lists, one per data record
+        @retval (data, valid) where data is the float array and valid is a
+            boolean array, False for records with the wrong number of columns
+            or values that are not numbers.
+        """
+        column_count = self._column_count
+        data = np.empty((len(fields), column_count))
+        data.fill(np.nan)
+        valid = np.zeros(len(fields), dtype=bool)
+
+        rows = [index for (index, row) in enumerate(fields) if len(row) == column_count]
+        if rows:
+            try:
+                data[rows] = np.array([fields[index] for index in rows], dtype=float)
+                valid[rows] = True
+            except ValueError:
+                # Find the bad records one at a time
+                for index in rows:
+                    try:
+                        data[index] = np.array(fields[index], dtype=float)
+                        valid[index] = True
+                    except ValueError:
+                        pass
+
+        return (data, valid)
+
+    def _convert_latlon(self, data, fields, valid):
+        """
+        Convert the latitude/longitude columns of a block from [-]DDMM.MMMM or
+        [-]DDDMM.MMMM to decimal degrees in place.  Values not in this format
+        are converted by _string_to_ddegrees.
+
+        @param data block array from _read_block
+        @param fields list of field lists the block was converted from
+        @param valid boolean array of records converted
+        @retval dict of record index to the SampleException for the first
+            lat/lon value in that record that could not be parsed
+        """
+        errors = {}
+        if not self._latlon_columns:
+            return errors
+
+        values = data[:, self._latlon_columns]
+
+        # Splitting off the degrees leaves a rounding error in the last bits
+        # of the minutes.  Rounding to the precision of the written value
+        # gives the same minutes as parsing them from the string.
+        magnitude = np.abs(values)
+        degrees = np.floor(magnitude / 100)
+        with np.errstate(invalid='ignore'):
+            minutes = magnitude - degrees * 100
+            minutes = np.where(magnitude < 10000,
+                               np.round(minutes, LATLON_DIGITS - 4),
+                               np.round(minutes, LATLON_DIGITS - 5))
+        data[:, self._latlon_columns] = np.copysign(degrees + minutes / 60., values)
+
+        # Values without 4 or 5 integer digits, including 0 and infinity,
+        # aren't in degree minute format and are converted from the string one
+        # at a time.  NaN values stay NaN.
+        with np.errstate(invalid='ignore'):
+            regular = (magnitude >= 1000) & (magnitude < 100000)
+        irregular = ~(regular | np.isnan(magnitude)) & valid[:, np.newaxis]
+
+        for (row, column) in zip(*np.nonzero(irregular)):
+            if row in errors:
+                continue
+            index = self._latlon_columns[column]
+            try:
+                data[row, index] = self._string_to_ddegrees(fields[row][index])
+            except SampleException as e:
+                errors[row] = e
+
+        return errors
+
+    def get_block(self, size=None):
         """
         Need to overload the base class behavior so we can get the last
-        record if it doesn't end with a newline it would be ignored.
+        record if it doesn't end with a newline it would be ignored.  All
+        complete records in a block are converted to a numpy array together.
         """
+        if size is None:
+            size = self._block_size
+
         len = super(GliderParser, self).get_block(size)
         log.debug("Buffer read bytes: %d", len)
 
@@ -615,7 +732,8 @@ class GliderParser(BufferLoadingParser):
 
     def parse_chunks(self):
         """
-        Create particles out of chunks and raise an event
+        Create particles out of chunks and raise an event.  All complete
+        records in the chunker are converted together as one block.
         @retval a list of tuples with sample particles encountered in this
             parsing, plus the state. An empty list is returned if nothing was
             parsed.
@@ -623,74 +741,104 @@ class GliderParser(BufferLoadingParser):
         # set defaults
         result_particles = []
 
-        log.debug("BUFFER: %s", self._chunker.buffer)
-        # collect the data from the file
-        (timestamp, data_record, start, end) = self._chunker.get_next_data_with_index()
+        records = self._read_records()
+        if not records:
+            return result_particles
 
-        while data_record is not None:
-            log.debug("data record: %s", data_record)
-            if self._sample_regex.match(data_record):
-                exception_detected = False
-
-                # parse the data record into a data dictionary to pass to the
-                # particle class
-                try:
-                    data_dict = self._read_data(data_record)
-                except SampleException as e:
-                    exception_detected = True
-                    self._exception_callback(e)
-
-                # from the parsed data, m_present_time is the unix timestamp
-                try:
-                    if not exception_detected:
-                        record_time = data_dict['m_present_time']['Data']
-                        timestamp = ntplib.system_to_ntp_time(data_dict['m_present_time']['Data'])
-                        log.debug("Converting record timestamp %f to ntp timestamp %f", record_time, timestamp)
-                except KeyError:
-                    exception_detected = True
-                    self._exception_callback(SampleException("unable to find timestamp in data"))
-
-                if exception_detected:
-                    # We are done processing this record if we have detected an exception
-                    pass
-
-                elif self._has_science_data(data_dict):
-                    # create the particle
-                    particle = self._extract_sample(self._particle_class, None, data_dict, timestamp)
-                    self._increment_state(end)
-                    result_particles.append((particle, copy.copy(self._read_state)))
-                else:
-                    log.debug("No science data found in particle. %s", data_dict)
-                    self._increment_state(end)
-
-            elif self._whitespace_regex.match(data_record):
+        (fields, data, errors, timestamps) = self._convert_records(records)
+        has_science = self._has_science_data(data, self._science_columns)
+        rows = data.tolist()
+
+        for (index, (data_record, end)) in enumerate(records):
+            if not fields[index]:
                 log.debug("Only whitespace detected in record.  Ignoring.")
                 self._increment_state(end)
-            else:
-                log.error("Data record did not match data pattern.  Failed parsing: '%s'", data_record)
-                self._exception_callback(SampleException("data record does not match sample pattern: '%s'" % data_record))
 
-            (timestamp, data_record, start, end) = self._chunker.get_next_data_with_index()
+            elif index in errors:
+                # We are done processing this record if we have detected an exception
+                self._exception_callback(errors[index])
+
+            elif has_science[index]:
+                # create the particle
+                particle = self._extract_sample(self._particle_class, None,
+                                                GliderRecord(self._column_index, self._row_values(rows[index])),
+                                                timestamps[index])
+                self._increment_state(end)
+                result_particles.append((particle, copy.copy(self._read_state)))
+
+            else:
+                log.debug("No science data found in record. %s", data_record)
+                self._increment_state(end)
 
         # publish the results
         return result_particles
 
-    def _has_science_data(self, data_dict):
+    def _read_records(self):
+        """
+        Collect all complete data records from the chunker
+        @retval list of (data record, end index) tuples
+        """
+        records = []
+        (timestamp, data_record, start, end) = self._chunker.get_next_data_with_index()
+        while data_record is not None:
+            records.append((data_record, end))
+            (timestamp, data_record, start, end) = self._chunker.get_next_data_with_index()
+
+        log.debug("Read block of %d records", len(records))
+        return records
+
+    def _convert_records(self, records):
         """
-        Examine the data_dict to see if it contains science data.
+        Convert a block of data records.
+        @param records list of (data record, end index) tuples
+        @retval (fields, data, errors, timestamps) where fields is the list of
+            split records, data the converted block array, errors a dict of
+            record index to the SampleException for records that can't be
+            used and timestamps the list of NTP record timestamps.
         """
-        log.debug("Looking for data in science parameters: %s", self._particle_class.science_parameters)
-        for key in data_dict.keys():
-            if key in self._particle_class.science_parameters:
-                value = data_dict[key]['Data']
-                if not np.isnan(value):
-                    log.debug("Found science value for key: %s, value: %s", key, value)
-                    return True
-                else:
-                    log.debug("Science data value is nan: %s %s", key, value)
+        fields = [data_record.split() for (data_record, end) in records]
+        (data, valid) = self._read_block(fields)
+        errors = self._convert_latlon(data, fields, valid)
+
+        for (index, (data_record, end)) in enumerate(records):
+            if fields[index] and not valid[index]:
+                log.error("Data record did not match data pattern.  Failed parsing: '%s'", data_record)
+                errors[index] = SampleException("data record does not match sample pattern: '%s'" % data_record)
+
+            elif self._time_column is None and fields[index] and index not in errors:
+                errors[index] = SampleException("unable to find timestamp in data")
 
-        log.debug("No science data found!")
-        return False
+        # from the parsed data, m_present_time is the unix timestamp
+        if self._time_column is not None:
+            timestamps = ntplib.system_to_ntp_time(data[:, self._time_column]).tolist()
+        else:
+            timestamps = None
+
+        return (fields, data, errors, timestamps)
+
+    def _row_values(self, values):
+        """
+        Restore integer columns of a converted row
+        @param values list of converted values for one record
+        @retval values
+        """
+        for column in self._int_columns:
+            if not np.isnan(values[column]):
+                values[column] = int(values[column])
+        return values
+
+    def _has_science_data(self, data, science_columns):
+        """
+        Examine a block of records to see which contain science data.
+        @param data block array from _read_block
+        @param science_columns indexes of the science parameter columns
+        @retval boolean array, True for records with a science parameter
+            value that isn't NaN
+        """
+        if not science_columns:
+            return np.zeros(len(data), dtype=bool)
+
+        return ~np.isnan(data[:, science_columns]).all(axis=1)
 
     def _string_to_ddegrees(self, pos_str):
         """
@@ -721,9 +869,7 @@ class GliderParser(BufferLoadingParser):
         if not "." in pos_str:
             pos_str += ".0"
 
-        regex = r'(-*\d{2,3})(\d{2}.\d+)'
-        regex_matcher = re.compile(regex)
-        latlon_match = regex_matcher.match(pos_str)
+        latlon_match = LATLON_REGEX.match(pos_str)
 
         if latlon_match is None:
             raise SampleException("Failed to parse lat/lon value: '%s'" % pos_str)
@@ -734,4 +880,132 @@ class GliderParser(BufferLoadingParser):
 
         return ddegrees
 
+
+class GliderMultiStreamParser(GliderParser):
+    """
+    Parses a glider file once for several particle streams.  Each record is
+    offered to every configured particle class and produces a particle for
+    each class with science data in the record, so the file is only read and
+    converted once however many streams are ingested from it.
+
+    Every stream keeps its own position so streams resume independently.  The
+    parser state is a dict of stream name (particle type) to a position state:
+    {'ggldr_ctdgv_delayed': {'position': 1162}, ...}
+    """
+    def __init__(self,
+                 config,
+                 state,
+                 stream_handle,
+                 state_callback,
+                 publish_callback,
+                 exception_callback,
+                 *args, **kwargs):
+
+        class_names = config.get(GliderConfigKey.PARTICLE_CLASSES)
+        if not class_names:
+            raise ConfigurationException("%s not defined" % GliderConfigKey.PARTICLE_CLASSES)
+
+        module = __import__(config.get("particle_module"), fromlist=class_names)
+        self._particle_classes = [getattr(module, name) for name in class_names]
+
+        super(GliderMultiStreamParser, self).__init__(config,
+                                                      state,
+                                                      stream_handle,
+                                                      state_callback,
+                                                      publish_callback,
+                                                      exception_callback,
+                                                      *args,
+                                                      **kwargs)
+
+    def _init_columns(self):
+        """
+        Build the column lookups, including the science columns of each
+        stream, and start every stream at the first data record.
+        """
+        super(GliderMultiStreamParser, self)._init_columns()
+
+        self._stream_science_columns = []
+        for particle_class in self._particle_classes:
+            columns = [self._column_index[key] for key in particle_class.science_parameters
+                       if key in self._column_index]
+            self._stream_science_columns.append((particle_class.type(), particle_class, columns))
+
+        # absolute position of the end of the last record read
+        self._file_position = self._read_state[StateKey.POSITION]
+        self._stream_state = dict((particle_class.type(), {StateKey.POSITION: self._file_position})
+                                  for particle_class in self._particle_classes)
+
+    def set_state(self, state_obj):
+        """
+        Set the position of each stream and seek to the first record any of
+        the streams hasn't passed.  Streams missing from the state start at
+        the first data record.
+        @param state_obj dict of stream name to position state
+        @throws DatasetParserException if there is a bad state structure
+        """
+        log.trace("Attempting to set state to: %s", state_obj)
+        if not isinstance(state_obj, dict):
+            raise DatasetParserException("Invalid state structure")
+
+        for (stream, stream_state) in state_obj.iteritems():
+            if stream not in self._stream_state:
+                log.warn("Ignoring state for unconfigured stream: %s", stream)
+                continue
+            if not isinstance(stream_state, dict) or StateKey.POSITION not in stream_state:
+                raise DatasetParserException("Invalid state keys")
+            self._stream_state[stream] = copy.copy(stream_state)
+
+        self._record_buffer = []
+        self._state = state_obj
+
+        self._file_position = min(stream_state[StateKey.POSITION]
+                                  for stream_state in self._stream_state.values())
+        log.debug("seek to position: %d", self._file_position)
+        self._stream_handle.seek(self._file_position)
+
+    def parse_chunks(self):
+        """
+        Create particles for all streams out of chunks.  Records a stream has
+        already passed are skipped for that stream.
+        @retval a list of tuples with sample particles encountered in this
+            parsing, plus the state of all streams after the particle.
+        """
+        result_particles = []
+
+        records = self._read_records()
+        if not records:
+            return result_particles
+
+        (fields, data, errors, timestamps) = self._convert_records(records)
+        has_science = [(stream, particle_class, self._has_science_data(data, columns))
+                       for (stream, particle_class, columns) in self._stream_science_columns]
+        rows = data.tolist()
+
+        for (index, (data_record, end)) in enumerate(records):
+            self._file_position += end
+            position = self._file_position
+
+            pending = [(stream, particle_class, science)
+                       for (stream, particle_class, science) in has_science
+                       if self._stream_state[stream][StateKey.POSITION] < position]
+            if not pending:
+                continue
+
+            if index in errors:
+                self._exception_callback(errors[index])
+                continue
+
+            record = None
+            for (stream, particle_class, science) in pending:
+                self._stream_state[stream][StateKey.POSITION] = position
+
+                if science[index]:
+                    if record is None:
+                        record = GliderRecord(self._column_index, self._row_values(rows[index]))
+
+                    particle = self._extract_sample(particle_class, None, record, timestamps[index])
+                    result_particles.append((particle, copy.deepcopy(self._stream_state)))
+
+        return result_particles
+
 # End of glider.py
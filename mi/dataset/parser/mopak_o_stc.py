@@ -13,10 +13,12 @@ initial release
 __author__ = 'Emily Hahn'
 __license__ = 'Apache 2.0'
 
+import bisect
 import copy
 import re
 import ntplib
 import struct
+import numpy as np
 from datetime import datetime
 import time
 from functools import partial
@@ -34,6 +36,13 @@ RATE_ID = b'\xcf'
 ACCEL_BYTES = 43
 RATE_BYTES = 31
 
+ACCEL_ID_BYTE = ord(ACCEL_ID)
+RATE_ID_BYTE = ord(RATE_ID)
+CHECKSUM_STRUCT = struct.Struct('>H')
+TIMER_STRUCT = struct.Struct('>I')
+# offset of the timer in each record
+TIMER_OFFSET = {ACCEL_ID: 37, RATE_ID: 25}
+
 class StateKey(BaseEnum):
     POSITION='position'
 
@@ -159,56 +168,55 @@ class MopakOStcParser(BufferLoadingFilenameParser):
         """
         Sort through the raw data to identify new blocks of data that need processing.
         This is needed instead of a regex because blocks are identified by position
-        in this binary file.
+        in this binary file.  The checksums of every possible record start are
+        checked together from a running sum of the bytes, then the records are
+        walked in order, skipping a whole record when its checksum is good.
         """
-        data_index = 0
         return_list = []
         raw_data_len = len(raw_data)
+        raw = np.frombuffer(raw_data, np.uint8)
+
+        starts = np.flatnonzero((raw == ACCEL_ID_BYTE) | (raw == RATE_ID_BYTE))
+        ends = starts + np.where(raw[starts] == ACCEL_ID_BYTE, ACCEL_BYTES, RATE_BYTES)
+        full = ends <= raw_data_len
+        # running sum of the bytes, wrapping like the unsigned short checksum
+        sums = np.zeros(raw_data_len + 1, np.uint16)
+        np.cumsum(raw, dtype=np.uint16, out=sums[1:])
+        full_ends = ends[full]
+        valid = np.zeros(len(starts), bool)
+        valid[full] = (sums[full_ends - 2] - sums[starts[full]]) == \
+            ((raw[full_ends - 2].astype(np.uint16) << 8) | raw[full_ends - 1])
+
+        starts = starts.tolist()
+        ends = ends.tolist()
+        valid = valid.tolist()
+        index = 0
+        while index < len(starts):
+            data_index = starts[index]
+            # if the remaining bytes are less than the data rate bytes we're done,
+            # only the start of the data is checked regardless
+            if data_index > 0 and raw_data_len - data_index < RATE_BYTES:
+                break
 
-        while data_index < raw_data_len:
-            # check if this is a status or data sample message
-            if raw_data[data_index] == ACCEL_ID:
-                # start of accel record
-                if self.compare_checksum(raw_data[data_index:data_index+ACCEL_BYTES]):
-                    return_list.append((data_index, data_index + ACCEL_BYTES))
-                    data_index += ACCEL_BYTES
-                else:
-                    data_index += 1
-            elif raw_data[data_index] == RATE_ID:
-                # start of rate record
-                if self.compare_checksum(raw_data[data_index:data_index+RATE_BYTES]):
-                    return_list.append((data_index, data_index + RATE_BYTES))
-                    data_index += RATE_BYTES
-                else:
-                    data_index += 1
+            if valid[index] or (ends[index] > raw_data_len and
+                                self.compare_checksum(raw_data[data_index:ends[index]])):
+                return_list.append((data_index, ends[index]))
+                # skip any ID bytes inside the record
+                index = bisect.bisect_left(starts, ends[index], index + 1)
             else:
-                data_index += 1
-
-            remain_bytes = raw_data_len - data_index
-            # if the remaining bytes are less than the data rate bytes we're done
-            if remain_bytes < RATE_BYTES:
-                break
+                index += 1
         return return_list
     
     def compare_checksum(self, raw_bytes):
-        rcv_chksum = struct.unpack('>H', raw_bytes[-2:])
+        rcv_chksum = CHECKSUM_STRUCT.unpack(raw_bytes[-2:])
         calc_chksum = self.calc_checksum(raw_bytes[:-2])
         if rcv_chksum[0] == calc_chksum:
             return True
         return False
     
     def calc_checksum(self, raw_bytes):
-        n_bytes = len(raw_bytes)
-        # unpack raw bytes into unsigned chars
-        unpack_str = '>'
-        for i in range(0, n_bytes):
-            unpack_str = unpack_str + 'B'
-        fields = struct.unpack(unpack_str, raw_bytes)
-        sum_fields = sum(fields)
-        # since we are summing as unsigned short, limit range to 0 to 65535
-        while sum_fields > 65535:
-            sum_fields -= 65536
-        return sum_fields
+        # sum the raw bytes as unsigned chars, as an unsigned short limit range to 0 to 65535
+        return sum(bytearray(raw_bytes)) & 0xFFFF
 
     def set_state(self, state_obj):
         """
@@ -248,7 +256,7 @@ class MopakOStcParser(BufferLoadingFilenameParser):
             sample = None
             if chunk[0] == ACCEL_ID:
                 # particle-ize the data block received, return the record
-                fields = struct.unpack('>I', chunk[37:41])
+                fields = TIMER_STRUCT.unpack_from(chunk, TIMER_OFFSET[ACCEL_ID])
                 self._timestamp = self.timer_to_timestamp(int(fields[0]))
                 sample = self._extract_sample(MopakOStcAccelParserDataParticle, None, chunk, self._timestamp)
                 if sample:
@@ -256,7 +264,7 @@ class MopakOStcParser(BufferLoadingFilenameParser):
                     self._increment_state(ACCEL_BYTES)
             elif chunk[0] == RATE_ID:
                 # particle-ize the data block received, return the record
-                fields = struct.unpack('>I', chunk[25:29])
+                fields = TIMER_STRUCT.unpack_from(chunk, TIMER_OFFSET[RATE_ID])
                 self._timestamp = self.timer_to_timestamp(int(fields[0]))
                 sample = self._extract_sample(MopakOStcRateParserDataParticle, None, chunk, self._timestamp)
                 if sample:
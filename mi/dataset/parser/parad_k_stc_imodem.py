@@ -92,25 +92,19 @@ class Parad_k_stc_imodemParserDataParticle(DataParticle):
 
 class Parad_k_stc_imodemParser(WfpEFileParser):
 
-    def parse_record(self, record):
+    def parse_record(self, record, timestamp):
         """
         This is a PARAD_K particle type, and below we pull the proper value from the
         unpacked data
         """
         result_particle = []
-        if len(record) >= SAMPLE_BYTES:
-            # pull out the timestamp for this record
-            
-            fields = struct.unpack('>I', record[:4])
-            timestamp = int(fields[0])
-            self._timestamp = float(ntplib.system_to_ntp_time(timestamp))
-            # PARAD_K Data
-            sample = self._extract_sample(Parad_k_stc_imodemParserDataParticle, None, record, self._timestamp)
-            if sample:
-                # create particle
-                self._increment_state(SAMPLE_BYTES)
-                result_particle = (sample, copy.copy(self._read_state))
+        self._timestamp = timestamp
+        # PARAD_K Data
+        sample = self._extract_sample(Parad_k_stc_imodemParserDataParticle, None, record, self._timestamp)
+        if sample:
+            # create particle
+            self._increment_state(SAMPLE_BYTES)
+            result_particle = (sample, copy.copy(self._read_state))
 
         return result_particle
 
-
@@ -23,6 +23,7 @@ from mi.core.log import get_logger ; log = get_logger()
 from mi.core.common import BaseEnum
 from mi.core.instrument.data_particle import DataParticle, DataParticleKey
 from mi.core.exceptions import SampleException, DatasetParserException
+from mi.core.instrument.sami_record import decode_record, PH_SAMPLE_DTYPE
 from mi.dataset.parser.mflm import MflmParser, SIO_HEADER_MATCHER
 
 DATA_REGEX = b'\^0A\r\*([0-9A-Fa-f]{4})0A([0-9A-Fa-f]{458})\r'
@@ -63,36 +64,21 @@ class PhsenParserDataParticle(DataParticle):
 
         try:
             log.debug('Converting data %s', match.group(0))
-            # just convert directly from hex-ascii to int
-            unique_id = int(match.group(0)[5:7], 16)
-            rec_length = int(match.group(0)[7:9], 16)
-            rec_type = int(match.group(0)[9:11], 16)
-            rec_time = int(match.group(0)[11:19], 16)
-            therm_start = int(match.group(0)[19:23], 16)
-            ref_meas = []
-            for i in range(0, 16):
-                start_idx = 23 + i*4
-                end_idx = 23 + (i+1)*4
-                this_ref = int(match.group(0)[start_idx:end_idx], 16)
-                ref_meas.append(this_ref)
-
-            light_meas = []
-            for i in range(0, 23):
-                for s in range(0,4):
-                    start_idx = 87 + i*16 + s*4
-                    end_idx = 87 + i*16 + (s+1)*4
-                    this_meas = int(match.group(0)[start_idx:end_idx], 16)
-                    light_meas.append(this_meas)
-            # there are 2 non-used characters, skip from 455 to 459
-            volt_batt = int(match.group(0)[459:463], 16)
-            therm_end = int(match.group(0)[463:467], 16)
-            chksum = int(match.group(0)[467:469], 16)
-
-            # calculate the checksum and compare with the received checksum
-            sum_bytes = 0
-            for i in range(7, 467, 2):
-                sum_bytes += int(match.group(0)[i:i+2], 16)
-            calc_chksum = sum_bytes & 255
+            (values, calc_chksum) = decode_record(self.raw_data[match.start(1):match.end(2)],
+                                                  PH_SAMPLE_DTYPE)
+            unique_id = values['unique_id']
+            rec_length = values['record_length']
+            rec_type = values['record_type']
+            rec_time = values['record_time']
+            therm_start = values['thermistor_start']
+            ref_meas = values['reference_light_measurements']
+            light_meas = values['light_measurements']
+            # there are 2 non-used bytes
+            volt_batt = values['voltage_battery']
+            therm_end = values['thermistor_end']
+            chksum = values['checksum']
+
+            # compare the calculated checksum with the received checksum
             if calc_chksum != chksum:
                 raise ValueError('Calculated internal checksum %d does not match received %d', calc_chksum, chksum)
 
@@ -9,9 +9,9 @@ from mi.core.log import get_logger ; log = get_logger()
 
 from mi.dataset.test.test_parser import ParserUnitTestCase
 from mi.dataset.parser.mflm import StateKey
-from mi.dataset.parser.adcps import AdcpsParser, AdcpsParserDataParticle
+from mi.dataset.parser.adcps import AdcpsParser, AdcpsParserDataParticle, AdcpsParserDataParticleKey
 from mi.dataset.dataset_driver import DataSetDriverConfigKeys
-from mi.core.instrument.data_particle import DataParticleKey
+from mi.core.instrument.data_particle import DataParticleKey, DataParticleValue
 
 from mi.idk.config import Config
 RESOURCE_PATH = os.path.join(Config().base_dir(), 'mi',
@@ -363,3 +363,27 @@ class AdcpsParserUnitTestCase(ParserUnitTestCase):
 			   self.timestamp3, self.particle_c)
 	self.stream_handle.close()
 
+
+    def test_decode(self):
+        """
+        Decode an ensemble the parser has already matched, and flag an
+        ensemble with a bad checksum
+        """
+        matched = AdcpsParserDataParticle(self.particle_a.raw_data,
+                                          internal_timestamp=self.timestamp1, matched=True)
+        parsed = matched.generate_dict()[DataParticleKey.VALUES]
+        self.assertEqual(parsed, self.particle_a.generate_dict()[DataParticleKey.VALUES])
+        self.assertEqual(matched.contents[DataParticleKey.QUALITY_FLAG], DataParticleValue.OK)
+
+        values = dict((value[DataParticleKey.VALUE_ID], value[DataParticleKey.VALUE])
+                      for value in parsed)
+        self.assertEqual(values[AdcpsParserDataParticleKey.NUM_BINS], 28)
+        self.assertEqual(values[AdcpsParserDataParticleKey.WATER_VELOCITY_EAST][:3], [-13825, 7680, -1537])
+        self.assertEqual(len(values[AdcpsParserDataParticleKey.ERROR_VELOCITY]), 28)
+
+        # change a velocity bin without updating the checksum
+        raw_data = self.particle_a.raw_data[:40] + b'\x00' + self.particle_a.raw_data[41:]
+        bad_checksum = AdcpsParserDataParticle(raw_data, internal_timestamp=self.timestamp1)
+        bad_checksum.generate_dict()
+        self.assertEqual(bad_checksum.contents[DataParticleKey.QUALITY_FLAG],
+                         DataParticleValue.CHECKSUM_FAILED)
@@ -143,6 +143,27 @@ class CtdmoParserUnitTestCase(ParserUnitTestCase):
         self.assertEqual(self.publish_callback_value[1], self.particle_b)
 	self.assertEqual(self.publish_callback_value[2], self.particle_c)
 
+    def test_decoded_values(self):
+        """
+        Ensure the values the parser decodes for whole blocks match
+        decoding each sample on its own
+        """
+        self.state = {StateKey.UNPROCESSED_DATA:[[0, 8000]],
+            StateKey.IN_PROCESS_DATA:[], StateKey.TIMESTAMP:0.0}
+        self.stream_handle = open(os.path.join(RESOURCE_PATH,
+                                               'node59p1_shorter.dat'))
+        self.parser = CtdmoParser(self.config, self.state, self.stream_handle,
+                                  self.state_callback, self.pub_callback)
+
+        result = self.parser.get_records(4)
+        self.stream_handle.close()
+        self.assertEqual(len(result), 4)
+        for particle in result:
+            expected = CtdmoParserDataParticle(particle.raw_data,
+                                               internal_timestamp=particle.get_value(DataParticleKey.INTERNAL_TIMESTAMP))
+            self.assertEqual(particle.generate_dict()[DataParticleKey.VALUES],
+                             expected.generate_dict()[DataParticleKey.VALUES])
+
     def test_long_stream(self):
 	self.state = {StateKey.UNPROCESSED_DATA:[[0, 14000]],
 	    StateKey.IN_PROCESS_DATA:[], StateKey.TIMESTAMP:0.0}
@@ -23,6 +23,7 @@ from mi.core.exceptions import SampleException
 from mi.dataset.test.test_parser import ParserUnitTestCase
 from mi.dataset.dataset_driver import DataSetDriverConfigKeys
 from mi.dataset.parser.glider import GliderParser, StateKey
+from mi.dataset.parser.glider import GliderMultiStreamParser, GliderConfigKey
 from mi.dataset.parser.glider import GgldrCtdgvDelayedDataParticle, CtdgvParticleKey
 from mi.dataset.parser.glider import GgldrDostaDelayedDataParticle
 from mi.dataset.parser.glider import GgldrFlordDelayedDataParticle
@@ -316,6 +317,26 @@ class CTDGVGliderTest(GliderParserUnitTestCase):
         records = self.parser.get_records(1)
         self.assertEqual(len(records), 0)
 
+    def test_bad_record(self):
+        """
+        Verify a bad record in a block is reported without losing the
+        records around it, and the position skips past good records only.
+        """
+        self.error_callback_values = []
+        bad_record = "\nNaN foo NaN NaN NaN NaN NaN NaN NaN NaN NaN NaN NaN NaN NaN NaN NaN NaN NaN NaN NaN NaN NaN NaN NaN NaN NaN NaN NaN"
+        bad_latlon = "\nNaN 123.4 NaN NaN NaN NaN NaN NaN NaN NaN NaN NaN NaN NaN 121147 1378349241.82962 NaN NaN NaN NaN NaN NaN 121147 1378349241.82962 NaN NaN 4.03096 0.021 15.3683"
+        self.set_data(HEADER, CTDGR_RECORD.rstrip(), bad_record, bad_latlon, CTDGR_RECORD)
+        self.reset_parser()
+
+        records = self.parser.get_records(10)
+        self.assertEqual(len(records), 4)
+        self.assertEqual(len(self.error_callback_values), 2)
+        for error in self.error_callback_values:
+            self.assertIsInstance(error, SampleException)
+
+        self.assert_particle_values(records[1], {CtdgvParticleKey.SCI_WATER_TEMP: 15.3703})
+        self.assert_particle_values(records[3], {CtdgvParticleKey.SCI_WATER_TEMP: 15.3703})
+
 @attr('UNIT', group='mi')
 class DOSTAGliderTest(GliderParserUnitTestCase):
     """
@@ -408,3 +429,94 @@ class ENGGliderTest(GliderParserUnitTestCase):
         self.reset_parser({StateKey.POSITION: 1186})
         self.assert_generate_particle(GgldrEngDelayedDataParticle, record_2, 1335)
         self.assert_no_more_data()
+
+    def test_latlon(self):
+        """
+        Verify lat/lon values convert the same as from their strings, at full
+        precision, and that values not in degree minute format other than 0
+        are rejected.
+        """
+        self.error_callback_values = []
+        record = "\n0.273273 NaN NaN 0.335 149.608 0.114297 33.9352 -64.3506 NaN NaN NaN %s %s NaN 121546 1378349641.79871 NaN NaN NaN 0 NaN NaN NaN NaN NaN NaN NaN NaN NaN"
+        latlons = [('5011.381136780612', '-14433.58097175251'),
+                   ('-4413.999999999999', '12959.99999999999'),
+                   ('0', '0'),
+                   ('0.0', '-14433.5809717525'),
+                   ('inf', '-14433.5809717525')]
+        self.set_data(HEADER, *[record % latlon for latlon in latlons])
+        self.reset_parser()
+
+        records = self.parser.get_records(10)
+        self.assertEqual(len(records), 3)
+        self.assertEqual(len(self.error_callback_values), 2)
+        for error in self.error_callback_values:
+            self.assertIsInstance(error, SampleException)
+
+        for (particle, (lat, lon)) in zip(records[:2], latlons):
+            self.assert_particle_values(particle, {
+                EngineeringParticleKey.M_LAT: self.parser._string_to_ddegrees(lat),
+                EngineeringParticleKey.M_LON: self.parser._string_to_ddegrees(lon)})
+
+        # a lat/lon of 0 is NaN, published as None
+        self.assert_particle_values(records[2], {EngineeringParticleKey.M_LAT: None,
+                                                 EngineeringParticleKey.M_LON: None})
+
+@attr('UNIT', group='mi')
+class MultiStreamGliderTest(GliderParserUnitTestCase):
+    """
+    Test cases for parsing several streams from one pass over the file
+    """
+    config = {
+        DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.glider',
+        GliderConfigKey.PARTICLE_CLASSES: ['GgldrCtdgvDelayedDataParticle',
+                                           'GgldrDostaDelayedDataParticle'],
+    }
+
+    def reset_parser(self, state = {}):
+        self.state_callback_values = []
+        self.publish_callback_values = []
+        self.parser = GliderMultiStreamParser(self.config, state, self.test_data,
+                                              self.state_callback, self.pub_callback, self.error_callback)
+
+    def test_multi_stream(self):
+        """
+        Verify each record is fanned out to every stream with science data
+        and each stream resumes from its own position.
+        """
+        self.set_data(HEADER, CTDGR_RECORD, DOSTA_RECORD)
+        self.reset_parser()
+
+        particles = []
+        states = []
+        for i in range(4):
+            particles.extend(self.parser.get_records(1))
+            states.append(self.get_state_value())
+        self.assert_no_more_data()
+
+        self.assertEqual([particle.type() for particle in particles],
+                         [DataParticleType.GGLDR_CTDGV_DELAYED, DataParticleType.GGLDR_CTDGV_DELAYED,
+                          DataParticleType.GGLDR_DOSTA_DELAYED, DataParticleType.GGLDR_DOSTA_DELAYED])
+        self.assert_particle_values(particles[1], {CtdgvParticleKey.SCI_WATER_TEMP: 15.3703})
+        self.assert_particle_values(particles[3], {DostaParticleKey.SCI_OXY4_OXYGEN: 242.141})
+
+        # Each stream has its own position, ctdgv matches the single stream parser
+        self.assertEqual(states[1][DataParticleType.GGLDR_CTDGV_DELAYED][StateKey.POSITION], 1321)
+        self.assertLess(states[1][DataParticleType.GGLDR_CTDGV_DELAYED][StateKey.POSITION],
+                        states[2][DataParticleType.GGLDR_DOSTA_DELAYED][StateKey.POSITION])
+
+        # Resume after the first dosta particle
+        self.set_data(HEADER, CTDGR_RECORD, DOSTA_RECORD)
+        self.reset_parser(states[2])
+        records = self.parser.get_records(10)
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0].type(), DataParticleType.GGLDR_DOSTA_DELAYED)
+        self.assert_particle_values(records[0], {DostaParticleKey.SCI_OXY4_OXYGEN: 242.141})
+
+        # Resume with the streams at different positions
+        state = {DataParticleType.GGLDR_CTDGV_DELAYED: {StateKey.POSITION: 1162},
+                 DataParticleType.GGLDR_DOSTA_DELAYED: states[3][DataParticleType.GGLDR_DOSTA_DELAYED]}
+        self.set_data(HEADER, CTDGR_RECORD, DOSTA_RECORD)
+        self.reset_parser(state)
+        records = self.parser.get_records(10)
+        self.assertEqual(len(records), 1)
+        self.assert_particle_values(records[0], {CtdgvParticleKey.SCI_WATER_TEMP: 15.3703})
@@ -9,6 +9,7 @@
 import ntplib
 import struct
 import os
+import random
 from datetime import datetime
 import time
 from nose.plugins.attrib import attr
@@ -20,6 +21,7 @@ from mi.dataset.test.test_parser import ParserUnitTestCase
 from mi.dataset.dataset_driver import DataSetDriverConfigKeys
 from mi.core.instrument.data_particle import DataParticleKey
 from mi.dataset.parser.mopak_o_stc import MopakOStcParser, StateKey
+from mi.dataset.parser.mopak_o_stc import ACCEL_ID, RATE_ID, ACCEL_BYTES, RATE_BYTES
 from mi.dataset.parser.mopak_o_stc import MopakOStcAccelParserDataParticle, MopakOStcRateParserDataParticle
 
 from mi.idk.config import Config
@@ -384,6 +386,52 @@ class MopakOStcParserUnitTestCase(ParserUnitTestCase):
         self.assert_result(result, 210, self.particle_d_rate, True)
         self.assertEqual(self.exception_callback_value, None)
 
+    def sieve_byte_scan(self, parser, raw_data):
+        """
+        Reference sieve, checking each byte in turn for the start of a record
+        """
+        data_index = 0
+        return_list = []
+        while data_index < len(raw_data):
+            record_bytes = {ACCEL_ID: ACCEL_BYTES, RATE_ID: RATE_BYTES}.get(raw_data[data_index])
+            if record_bytes and parser.compare_checksum(raw_data[data_index:data_index + record_bytes]):
+                return_list.append((data_index, data_index + record_bytes))
+                data_index += record_bytes
+            else:
+                data_index += 1
+
+            if len(raw_data) - data_index < RATE_BYTES:
+                break
+        return return_list
+
+    def test_sieve(self):
+        """
+        Test the sieve finds the same records as a byte by byte scan, with
+        noise, ID bytes and broken records between the records
+        """
+        self.stream_handle = open(os.path.join(RESOURCE_PATH, '20140313_191853.3dmgx3.log'), 'rb')
+        file_data = self.stream_handle.read()
+        self.parser = MopakOStcParser(self.config, self.start_state, self.stream_handle,
+                                      '20140313_191853.3dmgx3.log', self.state_callback,
+                                      self.pub_callback, self.except_callback)
+
+        records = self.parser.sieve_function(file_data)
+        self.assertEqual(records, self.sieve_byte_scan(self.parser, file_data))
+        self.assertEqual(sum(end - start for (start, end) in records), len(file_data))
+
+        rand = random.Random(42)
+        noisy_data = ''
+        for (start, end) in records:
+            record = file_data[start:end]
+            if rand.random() < 0.2:
+                # corrupt the checksum
+                record = record[:-1] + chr(ord(record[-1]) ^ 0xFF)
+            noise = ''.join(rand.choice([ACCEL_ID, RATE_ID, 'x', '\x00']) for i in range(rand.randint(0, 4)))
+            noisy_data += noise + record
+        noisy_data += file_data[:ACCEL_BYTES - 1]
+
+        self.assertEqual(self.parser.sieve_function(noisy_data), self.sieve_byte_scan(self.parser, noisy_data))
+
     def test_non_data_exception(self):
         """
         Test that we get a sample exception from non data being found in the file
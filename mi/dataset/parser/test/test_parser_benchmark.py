@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+
+"""
+@package mi.dataset.parser.test.test_parser_benchmark
+@file mi/dataset/parser/test/test_parser_benchmark.py
+@brief Throughput benchmarks for the buffer loading dataset parsers
+
+The benchmarks aren't part of the unit suite, run them with
+    $ nosetests -a BENCHMARK mi/dataset/parser/test/test_parser_benchmark.py
+"""
+
+__license__ = 'Apache 2.0'
+
+import os
+import time
+
+from nose.plugins.attrib import attr
+
+from mi.core.log import get_logger ; log = get_logger()
+
+from mi.dataset.test.test_parser import ParserUnitTestCase
+from mi.dataset.dataset_driver import DataSetDriverConfigKeys
+from mi.dataset.parser import ctdpf
+from mi.dataset.parser import glider
+from mi.dataset.parser import mopak_o_stc
+from mi.dataset.parser import rte_o_stc
+from mi.dataset.parser import wfp_eng__stc_imodem
+from mi.dataset.parser.WFP_E_file_common import StateKey as WfpStateKey
+
+from mi.idk.config import Config
+DRIVER_PATH = os.path.join(Config().base_dir(), 'mi', 'dataset', 'driver')
+
+# Passes over each file, the fastest is reported
+BENCHMARK_PASSES = 3
+# Records requested per get_records call, like the dataset driver
+RECORDS_PER_CALL = 100
+# MOPAK records logged in a day, accel and rate records at 10 Hz
+MOPAK_DAY_RECORDS = 864000
+
+@attr('BENCHMARK', group='mi')
+class ParserBenchmarkTestCase(ParserUnitTestCase):
+    """
+    Parse whole resource files with each parser.  Timings are logged, not
+    asserted, only the record and state update counts are checked.
+    """
+    def setUp(self):
+        ParserUnitTestCase.setUp(self)
+        self.state_callbacks = 0
+
+    def state_callback(self, state, file_ingested, file_name=None):
+        self.state_callbacks += 1
+
+    def pub_callback(self, particles):
+        pass
+
+    def exception_callback(self, exception):
+        pass
+
+    def _benchmark(self, name, filename, build_parser):
+        """
+        Time parsing the file from the start until it is ingested
+        @param name Name to log the timings under
+        @param filename Resource file path relative to the driver directory
+        @param build_parser Function taking an open file handle and returning
+           a new parser
+        """
+        path = os.path.join(DRIVER_PATH, filename)
+        best = None
+        for i in xrange(BENCHMARK_PASSES):
+            stream_handle = open(path, 'rb')
+            self.state_callbacks = 0
+            start = time.time()
+            parser = build_parser(stream_handle)
+            count = 0
+            while True:
+                records = parser.get_records(RECORDS_PER_CALL)
+                if not records:
+                    break
+                count += len(records)
+            elapsed = time.time() - start
+            stream_handle.close()
+            if best is None or elapsed < best:
+                best = elapsed
+
+        size = os.path.getsize(path)
+        log.info("%s: %d records, %d bytes in %.3fs (%.0f records/s, %.1f KB/s)",
+                 name, count, size, best, count / best, size / best / 1024)
+
+        self.assertGreater(count, 0)
+        # One state update per get_records call that returned records
+        self.assertEqual(self.state_callbacks, (count + RECORDS_PER_CALL - 1) / RECORDS_PER_CALL)
+
+    def test_ctdpf(self):
+        config = {
+            DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.ctdpf',
+            DataSetDriverConfigKeys.PARTICLE_CLASS: 'CtdpfParserDataParticle'
+        }
+        self._benchmark('ctdpf', os.path.join('hypm', 'ctd', 'resource', 'DATA003.txt'),
+                        lambda stream_handle: ctdpf.CtdpfParser(
+                            config, {ctdpf.StateKey.POSITION: 0, ctdpf.StateKey.TIMESTAMP: 0.0},
+                            stream_handle, self.state_callback, self.pub_callback))
+
+    def test_glider(self):
+        config = {
+            DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.glider',
+            DataSetDriverConfigKeys.PARTICLE_CLASS: 'GgldrEngDelayedDataParticle'
+        }
+        self._benchmark('glider', os.path.join('moas', 'gl', 'ctdgv', 'resource', 'unit_363_2013_199_0_0.mrg'),
+                        lambda stream_handle: glider.GliderParser(
+                            config, {}, stream_handle, self.state_callback,
+                            self.pub_callback, self.exception_callback))
+
+    def test_mopak_o_stc(self):
+        config = {
+            DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.mopak_o_stc',
+            DataSetDriverConfigKeys.PARTICLE_CLASS: ['MopakOStcAccelParserDataParticle',
+                                                     'MopakOStcRateParserDataParticle']
+        }
+        self._benchmark('mopak_o_stc', os.path.join('MOPAK', 'STC', 'resource', '20140120_140004.mopak.log'),
+                        lambda stream_handle: mopak_o_stc.MopakOStcParser(
+                            config, {mopak_o_stc.StateKey.POSITION: 0}, stream_handle,
+                            '20140120_140004.mopak.log', self.state_callback,
+                            self.pub_callback, self.exception_callback))
+
+    def test_mopak_o_stc_sieve(self):
+        """
+        Time sieving a day of MOPAK records, built by repeating the records
+        of a resource file
+        """
+        path = os.path.join(DRIVER_PATH, 'MOPAK', 'STC', 'resource', '20140120_140004.mopak.log')
+        with open(path, 'rb') as stream_handle:
+            file_data = stream_handle.read()
+        parser = mopak_o_stc.MopakOStcParser.__new__(mopak_o_stc.MopakOStcParser)
+        file_records = len(parser.sieve_function(file_data))
+        repeats = (MOPAK_DAY_RECORDS + file_records - 1) / file_records
+        day_data = file_data * repeats
+
+        best = None
+        for i in xrange(BENCHMARK_PASSES):
+            start = time.time()
+            count = len(parser.sieve_function(day_data))
+            elapsed = time.time() - start
+            if best is None or elapsed < best:
+                best = elapsed
+
+        log.info("mopak_o_stc sieve: %d records, %d bytes in %.3fs (%.0f records/s, %.1f MB/s)",
+                 count, len(day_data), best, count / best, len(day_data) / best / 1048576)
+        self.assertEqual(count, file_records * repeats)
+
+    def test_rte_o_stc(self):
+        config = {
+            DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.rte_o_stc',
+            DataSetDriverConfigKeys.PARTICLE_CLASS: 'RteOStcParserDataParticle'
+        }
+        self._benchmark('rte_o_stc', os.path.join('RTE', 'STC', 'resource', 'lots_of_data_test1.data'),
+                        lambda stream_handle: rte_o_stc.RteOStcParser(
+                            config, {rte_o_stc.StateKey.POSITION: 0}, stream_handle,
+                            'lots_of_data_test1.data', self.state_callback,
+                            self.pub_callback, self.exception_callback))
+
+    def test_wfp_eng__stc_imodem(self):
+        config = {
+            DataSetDriverConfigKeys.PARTICLE_MODULE: 'mi.dataset.parser.wfp_eng__stc_imodem',
+            DataSetDriverConfigKeys.PARTICLE_CLASS: ['Wfp_eng__stc_imodem_statusParserDataParticle',
+                                                     'Wfp_eng__stc_imodem_startParserDataParticle',
+                                                     'Wfp_eng__stc_imodem_engineeringParserDataParticle']
+        }
+        self._benchmark('wfp_eng__stc_imodem', os.path.join('WFP_ENG', 'STC_IMODEM', 'resource', 'CP02PMUO.DAT'),
+                        lambda stream_handle: wfp_eng__stc_imodem.Wfp_eng__stc_imodemParser(
+                            config, {WfpStateKey.POSITION: 0}, stream_handle,
+                            self.state_callback, self.pub_callback))
@@ -8,6 +8,8 @@
 """
 
 import ntplib
+import numpy as np
+import struct
 
 from nose.plugins.attrib import attr
 from StringIO import StringIO
@@ -87,6 +89,17 @@ TEST_DATA_GOOD_BIG_FILE = \
   '\x00\x00\x00\x00\x00\x00\x00\x00' \
   '\x52\x48\x4E\x82\x52\x48\x4F\x9B'
 
+## Flag record, first and last velocity record, and time record,
+## without the end of velocity record.
+TEST_DATA_NO_END_RECORD = \
+  '\x01\x00\x01\x01\x01\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00' \
+  '\x01\x01\x01\x01\x01\x01\x01\x00\x00\x00' \
+  '\x71\x08\x1D\x10\x00\x11\xC3\x08\xC9\x0B\x60\x03\xF9\xFD\xFC\xE8' \
+  '\x52\x60\x53\x24\x53\x42\x40\x44' \
+  '\x71\x08\x1D\x10\x04\x25\xC4\x08\xBF\x0B\x5E\x03\xF0\xFD' \
+  '\xFC\x26\x51\xF6\x51\xFC\x50\x43\x40\x45' \
+  '\x52\x48\x4E\x82\x52\x48\x4F\x9B'
+
 VELOCITY_1_GROUPS = (113, 8, 29, 16, 0, 17, 2243, 3017, 864, 
   -519, -4, 21224, 21344, 21284, 66, 64, 68)
 
@@ -383,3 +396,31 @@ class Vel3dKWfpStcParserUnitTestCase(ParserUnitTestCase):
               self.state, self.state_callback, self.pub_callback, self.exception_callback)
         log.info("=================== END SHORT FLAG ======================")
 
+    def test_missing_end_record(self):
+        """
+        Ensure that a file without an end of velocity record raises
+        an exception indicating that end of file was reached while
+        reading the Velocity records.
+        """
+        input_file = StringIO(TEST_DATA_NO_END_RECORD)
+        self.parser = Vel3dKWfpStcParser(self.config, input_file, 
+          self.state, self.state_callback, self.pub_callback, self.exception_callback)
+        with self.assertRaises(SampleException):
+            self.parser.get_records(1)
+
+    def test_velocity_record_dtype(self):
+        """
+        Ensure that the record type built from the Flag record decodes
+        Velocity records the same as the unpack format.
+        """
+        input_file = StringIO(TEST_DATA_GOOD_2_REC)
+        self.parser = Vel3dKWfpStcParser(self.config, input_file, 
+          self.state, self.state_callback, self.pub_callback, self.exception_callback)
+        self.assertEqual(self.parser.velocity_dtype.itemsize, VELOCITY_RECORD_SIZE)
+
+        start = FLAG_RECORD_SIZE
+        end = start + 2 * VELOCITY_RECORD_SIZE
+        records = np.frombuffer(TEST_DATA_GOOD_2_REC[start:end], self.parser.velocity_dtype)
+        self.assertEqual(records.tolist(), [VELOCITY_1_GROUPS, VELOCITY_2_GROUPS])
+        self.assertEqual(records.tolist()[0],
+          struct.unpack(self.parser.velocity_format, TEST_DATA_GOOD_2_REC[start:start + VELOCITY_RECORD_SIZE]))
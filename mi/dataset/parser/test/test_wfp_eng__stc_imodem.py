@@ -8,6 +8,7 @@
 """
 import ntplib
 import struct
+import tempfile
 from StringIO import StringIO
 
 from nose.plugins.attrib import attr
@@ -252,6 +253,30 @@ class Wfp_eng__stc_imodemParserUnitTestCase(ParserUnitTestCase):
         result = self.parser.get_records(1)
         self.assert_result(result, 872, self.particle_a_stat, True)
 
+    def test_mapped_file(self):
+        """
+        Test parsing a file on disk, which is memory mapped instead of read
+        """
+        data_file = tempfile.TemporaryFile()
+        data_file.write(Wfp_eng__stc_imodemParserUnitTestCase.TEST_DATA)
+        data_file.seek(0)
+        self.parser = Wfp_eng__stc_imodemParser(self.config, self.start_state, data_file,
+                                                self.state_callback, self.pub_callback)
+
+        result = self.parser.get_records(34)
+        self.assertEqual(result[0], self.particle_a_time)
+        self.assertEqual(result[1], self.particle_a_eng)
+        self.assertEqual(result[-2], self.particle_last_eng)
+        self.assertEqual(result[-1], self.particle_a_stat)
+        self.assertEqual(self.parser._state[StateKey.POSITION], 872)
+        self.assertEqual(self.file_ingested, True)
+
+        # restart part way through the file
+        self.parser.set_state({StateKey.POSITION: 76})
+        result = self.parser.get_records(1)
+        self.assert_result(result, 102, self.particle_c_eng, False)
+        data_file.close()
+
     def test_after_header(self):
         """
         Test starting the parser in a state in the middle of processing
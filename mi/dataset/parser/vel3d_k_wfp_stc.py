@@ -25,8 +25,8 @@ __author__ = 'Steve Myerson (Raytheon)'
 __license__ = 'Apache 2.0'
 
 import copy
-import gevent
 import ntplib
+import numpy as np
 import re
 import struct
 
@@ -34,7 +34,7 @@ from mi.core.common import BaseEnum
 from mi.core.exceptions import SampleException, DatasetParserException
 from mi.core.instrument.data_particle import DataParticle, DataParticleKey
 from mi.core.log import get_logger; log = get_logger()
-from mi.dataset.dataset_parser import BufferLoadingParser
+from mi.dataset.dataset_parser import BufferLoadingParser, map_file, unmap_file
 
 FLAG_RECORD_SIZE = 26                   # bytes
 FLAG_RECORD_REGEX = b'(\x00|\x01){26}'  # 26 bytes of zeroes or ones
@@ -99,6 +99,26 @@ VEL3D_PARAMETERS = \
     [1,    'B',   'vel3d_k_cor2']
 ]
 
+#
+# numpy types for the struct format codes of the velocity record fields.
+#
+VELOCITY_DTYPES = {'b': 'i1', 'B': 'u1', 'h': '<i2', 'H': '<u2'}
+
+
+def velocity_record_dtype(velocity_format):
+    """
+    Build the numpy record type for Velocity records from the struct
+    format made from the Flag record.  There is one field per unpacked
+    value, so rows convert to the same tuples struct.unpack returns.
+    Arguments:
+      velocity_format - little endian struct format of a Velocity record
+    """
+    fields = []
+    for (count, code) in re.findall(r'(\d*)([a-zA-Z])', velocity_format):
+        for x in range(int(count or 1)):
+            fields.append(('f%d' % len(fields), VELOCITY_DTYPES[code]))
+    return np.dtype(fields)
+
 
 class StateKey(BaseEnum):
     FIRST_RECORD = 'first record'   # are we at the beginning of the file?
@@ -254,6 +274,12 @@ class Vel3dKWfpStcParser(BufferLoadingParser):
 
             self.time_on = int(time_fields[INDEX_TIME_ON])
 
+            #
+            # The Flag record fixes the layout of every Velocity record,
+            # so they can all be decoded with one record type.
+            #
+            self.velocity_dtype = velocity_record_dtype(self.velocity_format)
+
             #
             # This one will match any Velocity record.
             #
@@ -284,33 +310,16 @@ class Vel3dKWfpStcParser(BufferLoadingParser):
         return ((self.calculate_record_number() - 1) * SAMPLE_RATE) + \
           self.time_on
 
-    def get_block(self):
+    def _load_particle_buffer(self):
         """
-        This function overwrites the get_block function in dataset_parser.py
-        to  read the entire file rather than break it into chunks.
-        Returns:
-          The length of data retrieved.
+        This function overrides the one in dataset_parser.py to parse
+        the entire rest of the file at once rather than in blocks,
+        since the Flag record fixes the size of every record.
         An EOFError is raised when the end of the file is reached.
         """
-        # Read in data in blocks so as to not tie up the CPU.
-        BLOCK_SIZE = 1024
-        eof = False
-        data = ''
-        while not eof:
-            next_block = self._stream_handle.read(BLOCK_SIZE)
-            if next_block:
-                data = data + next_block
-                gevent.sleep(0)
-            else:
-                eof = True
-
-        if data != '':
-            self._chunker.add_chunk(data, self._timestamp)
-            self.file_complete = True
-            return len(data)
-        else:  # EOF
-            self.file_complete = True
-            raise EOFError
+        self._record_buffer.extend(self.parse_chunks())
+        self.file_complete = True
+        raise EOFError
 
     def get_file_parameters(self, input_file):
         """
@@ -399,113 +408,135 @@ class Vel3dKWfpStcParser(BufferLoadingParser):
 
     def parse_chunks(self):
         """
-        Parse out any pending data chunks in the chunker. If
-        it is a valid data piece, build a particle, update the position and
-        timestamp. Go until the chunker has no more valid data.
+        Parse the records after the current file position straight
+        from the file.  All the Velocity records up to the end of
+        velocity record are decoded together, followed by the Time record.
         @retval a list of tuples with sample particles encountered in this
             parsing, plus the state. An empty list of nothing was parsed.
         """            
         result_particles = []
-        (timestamp, chunk, start, end) = self._chunker.get_next_data_with_index()
-
-        while chunk is not None:
-            #
-            # Discard the Flag record since it has already been processed.
-            # We also need to check for this being the first record, 
-            # since an end of velocity record could result in a pattern match 
-            # with a Flag record if the size of the velocity records are 
-            # greater than or equal to the Flag record size.
-            #
-            if self._read_state[StateKey.FIRST_RECORD] and \
-              FLAG_RECORD_MATCHER.match(chunk):
-                self._increment_state(FLAG_RECORD_SIZE)
-
-            #
-            # If we haven't reached the end of the Velocity record,
-            # see if this next record is the last one (all zeroes).
-            #
-            elif not self._read_state[StateKey.VELOCITY_END]:
-                velocity_end = self.velocity_end_record_matcher.match(chunk)
-                self._increment_state(self.velocity_record_size)
-
+        data = map_file(self._stream_handle)
+        try:
+            if self._read_state[StateKey.POSITION] < len(data):
                 #
-                # A velocity data record of all zeroes does not generate
-                # a data particle.
+                # Discard the Flag record since it has already been processed.
+                # The first record might not be a Flag record
+                # if the parser is being restarted in the middle of the file.
                 #
-                if velocity_end:
-                    self._read_state[StateKey.VELOCITY_END] = True
-                else:
-                    #
-                    # If the file is missing an end of velocity record,
-                    # meaning we'll exhaust the file and run off the end,
-                    # this test will catch it.
-                    #
-                    velocity_fields = self.parse_velocity_record(chunk)
-                    if velocity_fields:
-                        #
-                        # Generate a data particle for this record and add
-                        # it to the end of the particles collected so far.
-                        #
-                        timestamp = self.calculate_timestamp()
-                        ntp_time = ntplib.system_to_ntp_time(timestamp)
-
-                        particle = self._extract_sample(
-                          Vel3dKWfpStcVelocityDataParticle,
-                          None, velocity_fields, ntp_time)
-
-                        result_particles.append((particle,
-                          copy.copy(self._read_state)))
+                if self._read_state[StateKey.FIRST_RECORD]:
+                    position = self._read_state[StateKey.POSITION]
+                    if FLAG_RECORD_MATCHER.match(data[position:position + FLAG_RECORD_SIZE]):
+                        self._increment_state(FLAG_RECORD_SIZE)
+                    self._read_state[StateKey.FIRST_RECORD] = False
 
-                    #
-                    # Ran off the end of the file.  Tell 'em the bad news.
-                    #
-                    else:
-                        log.warn("EOF reading velocity records")
-                        raise SampleException("EOF reading velocity records")
+                if not self._read_state[StateKey.VELOCITY_END]:
+                    result_particles.extend(self.parse_velocity_records(data))
 
-            #
-            # If we have read the end of velocity data records,
-            # the next record is the Time data record by definition.
-            # Generate the data particle and
-            # add it to the end of the particles collected so far.
-            #
-            else:
                 #
-                # Make sure there was enough data to comprise a Time record.
-                # We can't verify the validity of the data,
-                # only that we had enough data.
+                # If we have read the end of velocity data records,
+                # the next record is the Time data record by definition.
                 #
-                time_fields = self.parse_time_record(chunk)
-                if time_fields:
-                    #
-                    # Convert the tuple to a list, add the number of
-                    # Velocity record received (not counting the end of
-                    # Velocity record, and convert back to a tuple.
-                    #
-                    time_list = list(time_fields)
-                    time_list.append(self.calculate_record_number() - 1)
-                    time_fields = tuple(time_list)
-                    ntp_time = ntplib.system_to_ntp_time(self.time_on)
+                position = self._read_state[StateKey.POSITION]
+                if position < len(data):
+                    result_particles.append(
+                      self.parse_time_particle(data[position:position + TIME_RECORD_SIZE]))
+        finally:
+            unmap_file(data)
 
-                    particle = self._extract_sample(
-                      Vel3dKWfpStcTimeDataParticle, 
-                      None, time_fields, ntp_time)
+        return result_particles
 
-                    self._increment_state(TIME_RECORD_SIZE)
-                    result_particles.append((particle,
-                      copy.copy(self._read_state)))
+    def parse_velocity_records(self, data):
+        """
+        This function decodes the Velocity records from the current file
+        position through the end of velocity record (all zeroes), and
+        generates a data particle for each one except the end record.
+        Arguments:
+          data - the contents of the input file
+        Returns:
+          A list of (particle, state) tuples.
+        """
+        position = self._read_state[StateKey.POSITION]
+        record_size = self.velocity_record_size
 
-                else:
-                    log.warn("EOF reading time record")
-                    raise SampleException("EOF reading time record")
+        #
+        # Find the end of velocity record among the whole records that
+        # have more data after them.  If the file is missing an end of
+        # velocity record, we'll exhaust the file and run off the end.
+        #
+        count = 0
+        if record_size:
+            count = max(0, (len(data) - position - 1) / record_size)
+        if count:
+            raw = np.frombuffer(data, np.uint8, count * record_size, position)
+            end_records = np.flatnonzero(~raw.reshape(count, record_size).any(axis=1))
+        if not count or not len(end_records):
+            log.warn("EOF reading velocity records")
+            raise SampleException("EOF reading velocity records")
+
+        count = end_records[0]
+        velocity_records = np.frombuffer(data, self.velocity_dtype, count, position).tolist()
 
-            self._read_state[StateKey.FIRST_RECORD] = False
+        #
+        # Velocity records are SAMPLE_RATE seconds apart starting at
+        # the time on, the same as calculate_timestamp.
+        #
+        record_numbers = self.calculate_record_number() + np.arange(count)
+        timestamps = ntplib.system_to_ntp_time(
+          (record_numbers * SAMPLE_RATE) + self.time_on).tolist()
 
-            (timestamp, chunk, start, 
-              end) = self._chunker.get_next_data_with_index()
+        result_particles = []
+        for index in xrange(count):
+            self._increment_state(record_size)
+            particle = self._extract_sample(
+              Vel3dKWfpStcVelocityDataParticle,
+              None, velocity_records[index], timestamps[index])
+
+            result_particles.append((particle,
+              copy.copy(self._read_state)))
 
+        #
+        # A velocity data record of all zeroes does not generate
+        # a data particle.
+        #
+        self._increment_state(record_size)
+        self._read_state[StateKey.VELOCITY_END] = True
         return result_particles
 
+    def parse_time_particle(self, record):
+        """
+        This function generates the Time data particle.
+        Arguments:
+          record - a buffer of binary bytes
+        Returns:
+          A (particle, state) tuple.
+        """
+        #
+        # Make sure there was enough data to comprise a Time record.
+        # We can't verify the validity of the data,
+        # only that we had enough data.
+        #
+        time_fields = self.parse_time_record(record)
+        if not time_fields:
+            log.warn("EOF reading time record")
+            raise SampleException("EOF reading time record")
+
+        #
+        # Convert the tuple to a list, add the number of
+        # Velocity record received (not counting the end of
+        # Velocity record, and convert back to a tuple.
+        #
+        time_list = list(time_fields)
+        time_list.append(self.calculate_record_number() - 1)
+        time_fields = tuple(time_list)
+        ntp_time = ntplib.system_to_ntp_time(self.time_on)
+
+        particle = self._extract_sample(
+          Vel3dKWfpStcTimeDataParticle, 
+          None, time_fields, ntp_time)
+
+        self._increment_state(TIME_RECORD_SIZE)
+        return (particle, copy.copy(self._read_state))
+
     def parse_flag_record(self, record):
         """
         This function parses the Flag record.
@@ -17,13 +17,14 @@ import copy
 import re
 import ntplib
 import struct
+import numpy as np
 
 from mi.core.log import get_logger ; log = get_logger()
 from mi.core.common import BaseEnum
 from mi.core.instrument.data_particle import DataParticle, DataParticleKey
 from mi.core.exceptions import SampleException, DatasetParserException
 
-from mi.dataset.dataset_parser import BufferLoadingParser
+from mi.dataset.dataset_parser import BufferLoadingParser, map_file, unmap_file
 
 EOP_REGEX = b'\xFF{11}([\x00-\xFF]{8})'
 EOP_MATCHER = re.compile(EOP_REGEX)
@@ -57,6 +58,8 @@ class WfpCFileCommonParser(BufferLoadingParser):
         self._start_time = 0.0
         self._time_increment = 0.0
         self._filesize = filesize
+        # file position of the end of profile marker
+        self._data_end = 0
         if filesize < FOOTER_BYTES:
             raise SampleException('File must be at least %d bytes to read the timestamp' % FOOTER_BYTES)
         self._read_state = {StateKey.POSITION: 0,
@@ -146,6 +149,7 @@ class WfpCFileCommonParser(BufferLoadingParser):
             self._start_time = int(timefields[0])
             end_time = int(timefields[1])
             extra_end_bytes = pad_bytes - match.start(0)
+            self._data_end = self._filesize - FOOTER_BYTES - extra_end_bytes
             number_samples = float(self._filesize - FOOTER_BYTES - extra_end_bytes) / float(DATA_RECORD_BYTES)
             if number_samples > 0:
                 self._time_increment = float(end_time - self._start_time) / number_samples
@@ -207,11 +211,48 @@ class WfpCFileCommonParser(BufferLoadingParser):
         timestamp = self._start_time + (self._time_increment * record_number)
         return float(ntplib.system_to_ntp_time(timestamp))
 
+    def calc_timestamps(self, first_record, count):
+        """
+        calculate the timestamps for a run of records together
+        @param first_record The number of the first record
+        @param count The number of records
+        @retval A list of floating point NTP64 formatted timestamps
+        """
+        record_numbers = np.arange(first_record, first_record + count, dtype=np.float64)
+        timestamps = self._start_time + (self._time_increment * record_numbers)
+        return ntplib.system_to_ntp_time(timestamps).tolist()
+
+    def _load_particle_buffer(self):
+        """
+        Records are found by their position in the file, so parse the whole
+        rest of the file at once instead of reading it in blocks
+        """
+        self._record_buffer.extend(self.parse_chunks())
+        self.file_complete = True
+        raise EOFError
+
+    def _count_records(self, data, position):
+        """
+        Count the data records from a position up to the end of profile
+        marker, which also ends the data if it is found early
+        @param data The file data
+        @param position The file position to start from
+        @retval The number of data records
+        """
+        count = max(0, (min(self._data_end, len(data)) - position) / DATA_RECORD_BYTES)
+        if count:
+            records = np.frombuffer(data, np.uint8, count * DATA_RECORD_BYTES, position)
+            marker = np.flatnonzero((records.reshape(count, DATA_RECORD_BYTES) == 0xFF).all(axis=1))
+            if len(marker):
+                count = marker[0]
+        return count
+
     def parse_chunks(self):
         """
-        Parse out any pending data chunks in the chunker. If
-        it is a valid data piece, build a particle, update the position and
-        timestamp. Go until the chunker has no more valid data.
+        Parse the data records after the read position straight from the
+        file.  The records are a fixed size, so they are counted from the
+        position of the end of profile marker and their timestamps are
+        calculated together.
         @retval a list of tuples with sample particles encountered in this
             parsing, plus the state. An empty list of nothing was parsed.
         """     
@@ -221,17 +262,23 @@ class WfpCFileCommonParser(BufferLoadingParser):
             self._read_state[StateKey.METADATA_SENT] = True
             result_particles.append((self._saved_metadata, copy.copy(self._read_state)))
 
-        (timestamp, chunk) = self._chunker.get_next_data()
+        data = map_file(self._stream_handle)
+        try:
+            position = self._read_state[StateKey.POSITION]
+            count = self._count_records(data, position)
+            first_record = self._read_state[StateKey.RECORDS_READ]
+            timestamps = self.calc_timestamps(first_record, count)
 
-        while (chunk != None):
-            # particle-ize the data block received, return the record
-            timestamp = self.calc_timestamp(self._read_state[StateKey.RECORDS_READ])
-            sample = self.extract_data_particle(chunk, timestamp)
-            if sample:
-                # create particle
-                self._increment_state(DATA_RECORD_BYTES, timestamp, 1)
-                result_particles.append((sample, copy.copy(self._read_state)))
-
-            (timestamp, chunk) = self._chunker.get_next_data()
+            for index in xrange(count):
+                offset = position + index * DATA_RECORD_BYTES
+                # the record count only moves on when a particle is made
+                timestamp = timestamps[self._read_state[StateKey.RECORDS_READ] - first_record]
+                sample = self.extract_data_particle(data[offset:offset + DATA_RECORD_BYTES], timestamp)
+                if sample:
+                    # create particle
+                    self._increment_state(DATA_RECORD_BYTES, timestamp, 1)
+                    result_particles.append((sample, copy.copy(self._read_state)))
+        finally:
+            unmap_file(data)
 
-        return result_particles
\ No newline at end of file
+        return result_particles
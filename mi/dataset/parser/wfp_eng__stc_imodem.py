@@ -278,65 +278,54 @@ class Wfp_eng__stc_imodemParser(WfpEFileParser):
         else:
             raise SampleException("File header does not match header regex")
 
-    def parse_record(self, record):
+    def parse_record(self, record, timestamp):
         """
-        determine if this is a engineering or data record and parse
+        Parse an engineering data sample record
+        """
+        self._timestamp = timestamp
+        sample = self._extract_sample(Wfp_eng__stc_imodem_engineeringParserDataParticle, None,
+                                      record, self._timestamp)
+        self._increment_state(SAMPLE_BYTES)
+        if sample:
+            # create particle
+            log.trace("Extracting sample %s with read_state: %s", sample, self._read_state)
+            return (sample, copy.copy(self._read_state))
+        return []
+
+    def parse_status(self, record):
+        """
+        Parse a status record, timestamped with the profile stop time
         """
-        sample = None
         result_particle = []
-        if PROFILE_MATCHER.match(record):
-            # send to WFP_eng_profiler if WFP
-            match = PROFILE_MATCHER.match(record)
-            fields = struct.unpack('>ihhII', match.group(0))
-            # use the profile stop time
-            timestamp = int(fields[3])
-            self._timestamp = float(ntplib.system_to_ntp_time(timestamp))
-            sample = self._extract_sample(Wfp_eng__stc_imodem_statusParserDataParticle, PROFILE_MATCHER,
-                                          record, self._timestamp)
-            self._increment_state(STATUS_BYTES)
-        else:
-            # pull out the timestamp for this record
-            fields = struct.unpack('>I', record[:4])
-            timestamp = int(fields[0])
-            self._timestamp = float(ntplib.system_to_ntp_time(timestamp))
-            log.trace("Converting record timestamp %f to ntp timestamp %f", timestamp, self._timestamp)
-            sample = self._extract_sample(Wfp_eng__stc_imodem_engineeringParserDataParticle, None,
-                                          record, self._timestamp)
-            self._increment_state(SAMPLE_BYTES)
+        match = PROFILE_MATCHER.match(record)
+        fields = struct.unpack('>ihhII', match.group(0))
+        # use the profile stop time
+        timestamp = int(fields[3])
+        self._timestamp = float(ntplib.system_to_ntp_time(timestamp))
+        sample = self._extract_sample(Wfp_eng__stc_imodem_statusParserDataParticle, PROFILE_MATCHER,
+                                      record, self._timestamp)
+        self._increment_state(STATUS_BYTES)
         if sample:
             # create particle
             log.trace("Extracting sample %s with read_state: %s", sample, self._read_state)
             result_particle = (sample, copy.copy(self._read_state))
-                    
+
         return result_particle
 
     def parse_chunks(self):
         """
-        Parse out any pending data chunks in the chunker. If
-        it is a valid data piece, build a particle, update the position and
-        timestamp. Go until the chunker has no more valid data.
+        Parse the records after the read position, starting with the
+        header particle if it hasn't been returned yet.
         @retval a list of tuples with sample particles encountered in this
             parsing, plus the state. An empty list of nothing was parsed.
         """
         result_particles = []
 
-	# header gets read in initialization, but need to send it back from parse_chunks
-	if self._saved_header:
-	    result_particles.append(self._saved_header)
-	    self._saved_header = None
-
-        (timestamp, chunk, start, end) = self._chunker.get_next_data_with_index()
-        non_data = None
-
-        while (chunk != None):
-            result_particle = self.parse_record(chunk)
-            if result_particle:
-                result_particles.append(result_particle)
-
-            (timestamp, chunk, start, end) = self._chunker.get_next_data_with_index()
-            (nd_timestamp, non_data) = self._chunker.get_next_non_data(clean=True)
+        # header gets read in initialization, but need to send it back from parse_chunks
+        if self._saved_header:
+            result_particles.append(self._saved_header)
+            self._saved_header = None
 
+        result_particles.extend(super(Wfp_eng__stc_imodemParser, self).parse_chunks())
         return result_particles
 
-
-
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+
+"""
+@package mi.dataset.test.test_dataset_parser
+@file mi/dataset/test/test_dataset_parser.py
+@brief Unit tests for the buffer loading parser base class
+"""
+
+__license__ = 'Apache 2.0'
+
+import re
+from collections import deque
+from StringIO import StringIO
+
+from nose.plugins.attrib import attr
+
+from mi.dataset.test.test_parser import ParserUnitTestCase
+from mi.dataset.dataset_parser import BufferLoadingParser
+from mi.dataset.dataset_parser import MIN_BLOCK_SIZE
+from mi.dataset.dataset_parser import MAX_BLOCK_SIZE
+from mi.dataset.dataset_parser import RECORDS_PER_BLOCK
+
+LINE_REGEX = re.compile(r'[^\n]*\n')
+
+class LineParser(BufferLoadingParser):
+    """
+    Parser returning each line of the file with the position after it
+    """
+    def __init__(self, stream_handle, state_callback, publish_callback):
+        self._position = 0
+        super(LineParser, self).__init__({}, stream_handle, None, self.sieve_function,
+                                         state_callback, publish_callback)
+
+    def sieve_function(self, raw_data):
+        return [(match.start(), match.end()) for match in LINE_REGEX.finditer(raw_data)]
+
+    def set_state(self, state):
+        self._record_buffer = []
+        self._chunker.clean_all_chunks()
+        self._position = state
+        self._stream_handle.seek(state)
+
+    def parse_chunks(self):
+        result = []
+        (timestamp, chunk) = self._chunker.get_next_data()
+        while chunk is not None:
+            self._position += len(chunk)
+            result.append((chunk.strip(), self._position))
+            (timestamp, chunk) = self._chunker.get_next_data()
+        return result
+
+@attr('UNIT', group='mi')
+class BufferLoadingParserUnitTestCase(ParserUnitTestCase):
+    def state_callback(self, state, file_ingested):
+        self.state_callback_values.append((state, file_ingested))
+
+    def pub_callback(self, particles):
+        self.publish_callback_values.append(particles)
+
+    def setUp(self):
+        ParserUnitTestCase.setUp(self)
+        self.state_callback_values = []
+        self.publish_callback_values = []
+
+    def test_get_records(self):
+        """
+        Records come out in order with one publish and state update per call
+        """
+        lines = ['line %d' % i for i in range(1000)]
+        parser = LineParser(StringIO('\n'.join(lines) + '\n'),
+                            self.state_callback, self.pub_callback)
+
+        self.assertEqual(parser.get_records(600), lines[:600])
+        self.assertEqual(self.publish_callback_values, [lines[:600]])
+        position = sum(len(line) + 1 for line in lines[:600])
+        self.assertEqual(self.state_callback_values, [(position, False)])
+
+        self.assertEqual(parser.get_records(600), lines[600:])
+        self.assertEqual(self.state_callback_values[-1], (parser._position, True))
+        self.assertEqual(parser.get_records(1), [])
+        self.assertEqual(len(self.state_callback_values), 2)
+
+    def test_reset_record_buffer(self):
+        """
+        Parsers reset the record buffer with a list, it stays a deque
+        """
+        parser = LineParser(StringIO('a\nb\nc\n'), self.state_callback, self.pub_callback)
+        self.assertEqual(parser.get_records(1), ['a'])
+
+        parser.set_state(2)
+        self.assertIsInstance(parser._record_buffer, deque)
+        self.assertEqual(parser.get_records(2), ['b', 'c'])
+
+    def test_block_size(self):
+        """
+        Blocks are sized to the typical record and grow when a block doesn't
+        hold a whole record
+        """
+        record = 'x' * 999
+        parser = LineParser(StringIO(''), self.state_callback, self.pub_callback)
+        self.assertEqual(parser._block_size, MIN_BLOCK_SIZE)
+
+        parser._adapt_block_size(MIN_BLOCK_SIZE, 0)
+        self.assertEqual(parser._block_size, MIN_BLOCK_SIZE * 2)
+        parser._adapt_block_size(MIN_BLOCK_SIZE * 2, 3)
+        self.assertEqual(parser._block_size, MIN_BLOCK_SIZE * RECORDS_PER_BLOCK)
+
+        for i in range(10):
+            parser._adapt_block_size(MAX_BLOCK_SIZE, 0)
+        self.assertEqual(parser._block_size, MAX_BLOCK_SIZE)
+
+        parser = LineParser(StringIO((record + '\n') * 100), self.state_callback, self.pub_callback)
+        self.assertEqual(parser.get_records(100), [record] * 100)
+        self.assertEqual(parser._block_size, len(record + '\n') * RECORDS_PER_BLOCK)
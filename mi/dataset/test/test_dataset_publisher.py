@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+
+"""
+@package mi.dataset.test.test_dataset_publisher
+@file mi/dataset/test/test_dataset_publisher.py
+@brief Unit tests for the rate limited particle publisher
+"""
+
+__license__ = 'Apache 2.0'
+
+import time
+import gevent
+
+from nose.plugins.attrib import attr
+
+from mi.core.unit_test import MiUnitTest
+from mi.dataset.dataset_publisher import TokenBucket
+from mi.dataset.dataset_publisher import ParticlePublisher
+from mi.dataset.dataset_publisher import PublisherMetric
+from mi.dataset.dataset_publisher import MIN_RATE
+
+@attr('UNIT', group='mi')
+class TestTokenBucket(MiUnitTest):
+    def test_consume(self):
+        bucket = TokenBucket(10, 5)
+        self.assertEqual(bucket.consume(5), 0)
+        # in debt for 5 tokens, half a second at 10 tokens per second
+        self.assertAlmostEqual(bucket.consume(5), 0.5, places=2)
+
+        bucket.set_rate(100)
+        self.assertAlmostEqual(bucket.consume(5), 0.1, places=2)
+
+@attr('UNIT', group='mi')
+class TestParticlePublisher(MiUnitTest):
+    def setUp(self):
+        self.published = []
+        self.publisher = None
+
+    def tearDown(self):
+        if self.publisher:
+            self.publisher.stop()
+
+    def data_callback(self, particles):
+        self.published.append(particles)
+
+    def slow_data_callback(self, particles):
+        time.sleep(0.01 * len(particles))
+        self.published.append(particles)
+
+    def test_back_pressure(self):
+        """
+        Publishing blocks once the queue is full, batches and calls stay in order
+        """
+        self.publisher = ParticlePublisher(self.data_callback, 1000, 2, queue_size=3)
+        for i in range(2):
+            self.publisher.publish([i, i])
+        self.publisher.call(self.published.append, 'state')
+
+        # the queue is full and nothing has published yet
+        self.assertEqual(self.publisher.get_metrics()[PublisherMetric.QUEUE_DEPTH], 3)
+        self.assertEqual(self.published, [])
+
+        self.publisher.start()
+        self.publisher.publish([2, 2])
+        self.publisher.flush()
+        self.assertEqual(self.published, [[0, 0], [1, 1], 'state', [2, 2]])
+
+        metrics = self.publisher.get_metrics()
+        self.assertEqual(metrics[PublisherMetric.QUEUE_DEPTH], 0)
+        self.assertEqual(metrics[PublisherMetric.MAX_QUEUE_DEPTH], 3)
+        self.assertEqual(metrics[PublisherMetric.RECORDS_PUBLISHED], 6)
+
+        # nothing queued, calls run now
+        self.publisher.call(self.published.append, 'now')
+        self.assertEqual(self.published[-1], 'now')
+
+    def test_rate(self):
+        """
+        The rate rises while there is a backlog the consumer keeps up with
+        and never goes above the maximum
+        """
+        self.publisher = ParticlePublisher(self.data_callback, 100, 10, max_rate=400)
+        self.publisher.start()
+        for i in range(20):
+            self.publisher.publish(range(10))
+        self.publisher.flush()
+
+        rate = self.publisher.get_metrics()[PublisherMetric.TARGET_RATE]
+        self.assertGreater(rate, 100)
+        self.assertLessEqual(rate, 400)
+
+    def test_slow_consumer(self):
+        """
+        The rate backs off to what a slow consumer sustains
+        """
+        self.publisher = ParticlePublisher(self.slow_data_callback, 1000, 5)
+        self.publisher.start()
+        for i in range(5):
+            self.publisher.publish(range(5))
+        self.publisher.flush()
+
+        rate = self.publisher.get_metrics()[PublisherMetric.TARGET_RATE]
+        # consumer takes 10 ms a record
+        self.assertLess(rate, 100)
+        self.assertGreaterEqual(rate, MIN_RATE)
+
+    def test_exception(self):
+        """
+        Publishing continues after the consumer raises
+        """
+        exceptions = []
+        def bad_callback(particles):
+            if particles == ['bad']:
+                raise ValueError('bad particle')
+            self.published.append(particles)
+
+        self.publisher = ParticlePublisher(bad_callback, 1000, 1, exception_callback=exceptions.append)
+        self.publisher.start()
+        self.publisher.publish(['bad'])
+        self.publisher.publish(['good'])
+        self.publisher.flush()
+        self.assertEqual(self.published, [['good']])
+        self.assertEqual(len(exceptions), 1)
+
+    def test_failed_key(self):
+        """
+        Callbacks with the key of particles that failed to publish are
+        dropped until the key is restarted, other keys are unaffected
+        """
+        def bad_callback(particles):
+            if particles == ['bad']:
+                raise ValueError('bad particle')
+            self.published.append(particles)
+
+        self.publisher = ParticlePublisher(bad_callback, 1000, 1, exception_callback=lambda e: None)
+        self.publisher.publish(['a'], 'file_a')
+        self.publisher.call_for('file_a', self.published.append, 'state a')
+        self.publisher.publish(['bad'], 'file_a')
+        self.publisher.publish(['b'], 'file_b')
+        self.publisher.call_for('file_a', self.published.append, 'state bad')
+        self.publisher.call_for('file_b', self.published.append, 'state b')
+        self.publisher.start()
+        self.publisher.flush()
+        self.assertEqual(self.published, [['a'], 'state a', ['b'], 'state b'])
+
+        # nothing queued, the callback is still dropped
+        self.publisher.call_for('file_a', self.published.append, 'state bad')
+        self.assertEqual(self.published[-1], 'state b')
+
+        self.publisher.restart('file_a')
+        self.publisher.publish(['a'], 'file_a')
+        self.publisher.call_for('file_a', self.published.append, 'state a')
+        self.publisher.flush()
+        self.assertEqual(self.published[-2:], [['a'], 'state a'])
+
+    def test_stop(self):
+        """
+        Stopping drops what is still queued
+        """
+        self.publisher = ParticlePublisher(self.data_callback, 1, 1)
+        self.publisher.start()
+        for i in range(3):
+            self.publisher.publish([i])
+        gevent.sleep(0.01)
+        self.publisher.stop()
+        self.assertFalse(self.publisher.is_running())
+        self.assertEqual(self.publisher.get_metrics()[PublisherMetric.QUEUE_DEPTH], 0)
+        self.assertEqual(self.published, [[0]])
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+
+"""
+@package mi.dataset.test.test_dataset_state
+@file mi/dataset/test/test_dataset_state.py
+@brief Unit tests for debounced driver state persistence
+"""
+
+__license__ = 'Apache 2.0'
+
+import os
+import copy
+import shutil
+import gevent
+import tempfile
+
+from nose.plugins.attrib import attr
+
+from mi.core.unit_test import MiUnitTest
+from mi.dataset.dataset_state import StatePersister
+from mi.dataset.dataset_state import apply_state_delta
+from mi.dataset.dataset_state import DELETED_KEYS
+from mi.dataset.file_index import IngestedFileIndex
+from mi.dataset.file_index import IndexedDriverState
+
+@attr('UNIT', group='mi')
+class TestStatePersister(MiUnitTest):
+    def setUp(self):
+        self.state = {'version': 0.1, 'a.txt': {'ingested': False}, 'b.txt': {'ingested': False}}
+        self.writes = []
+        self.persister = StatePersister(lambda state: self.writes.append(copy.deepcopy(state)),
+                                        lambda: self.state, flush_interval=0.05, flush_count=3)
+
+    def tearDown(self):
+        self.persister.stop()
+
+    def test_coalesce(self):
+        """
+        The first update is written, later ones wait for the count, a
+        flush or the interval
+        """
+        self.persister.update('a.txt')
+        self.assertEqual(len(self.writes), 1)
+
+        self.persister.update('a.txt')
+        self.persister.update('b.txt')
+        self.assertEqual(len(self.writes), 1)
+        self.persister.update('b.txt')
+        self.assertEqual(len(self.writes), 2)
+
+        self.state['a.txt']['ingested'] = True
+        self.persister.update('a.txt', flush=True)
+        self.assertEqual(len(self.writes), 3)
+        self.assertTrue(self.writes[-1]['a.txt']['ingested'])
+
+        # written by the timer
+        self.persister.update('b.txt')
+        self.assertEqual(len(self.writes), 3)
+        gevent.sleep(0.1)
+        self.assertEqual(len(self.writes), 4)
+
+        # nothing pending
+        self.persister.flush()
+        self.assertEqual(len(self.writes), 4)
+
+    def test_delta(self):
+        """
+        Deltas hold the changed entries and rebuild the whole state
+        """
+        deltas = []
+        self.persister.set_delta_callback(lambda delta: deltas.append(copy.deepcopy(delta)))
+        memento = copy.deepcopy(self.state)
+
+        self.state['a.txt']['ingested'] = True
+        self.persister.update('a.txt', flush=True)
+        self.assertEqual(deltas, [{'a.txt': {'ingested': True}}])
+
+        self.state['c.txt'] = {'ingested': False}
+        self.persister.update('c.txt')
+        self.persister.update()
+        self.persister.stop()
+        self.assertEqual(deltas[-1], self.state)
+        self.assertEqual(self.writes, [])
+
+        for delta in deltas:
+            apply_state_delta(memento, delta)
+        self.assertEqual(memento, self.state)
+
+    def test_delta_prune(self):
+        """
+        Files pruned to the file index are sent as deleted and removed from
+        the memento the deltas are applied to
+        """
+        directory = tempfile.mkdtemp()
+        try:
+            self.state = IndexedDriverState(self.state, IngestedFileIndex(os.path.join(directory, 'index.db')))
+            deltas = []
+            self.persister.set_delta_callback(lambda delta: deltas.append(copy.deepcopy(delta)))
+            memento = copy.deepcopy(self.state)
+
+            self.state['a.txt']['ingested'] = True
+            self.persister.update('a.txt', flush=True)
+            self.state.prune('a.txt')
+            self.persister.update('a.txt', flush=True)
+            self.assertEqual(deltas[-1], {DELETED_KEYS: ['a.txt']})
+
+            for delta in deltas:
+                apply_state_delta(memento, delta)
+            self.assertEqual(memento, {'version': 0.1, 'b.txt': {'ingested': False}})
+            self.assertEqual(memento, copy.deepcopy(self.state))
+        finally:
+            shutil.rmtree(directory)
@@ -7,11 +7,57 @@
 @brief Test code for the dataset driver base classes
 """
 
+import os
+import copy
+import shutil
+import tempfile
+
 from nose.plugins.attrib import attr
 
 from mi.core.unit_test import MiUnitTestCase
+from mi.core.exceptions import SampleException
+from mi.core.exceptions import ConfigurationException
 from mi.core.exceptions import DataSourceLocationException
+from mi.core.exceptions import InstrumentParameterException
 from mi.dataset.dataset_driver import DataSourceLocation
+from mi.dataset.dataset_driver import DataSourceConfigKey
+from mi.dataset.dataset_driver import DataSetDriverConfigKeys
+from mi.dataset.dataset_driver import DriverParameter
+from mi.dataset.dataset_driver import DriverStateKey
+from mi.dataset.dataset_driver import SimpleDataSetDriver
+from mi.dataset.dataset_driver import MultipleHarvesterDataSetDriver
+from mi.dataset.file_index import IndexedDriverState
+from mi.dataset.dataset_state import apply_state_delta
+from mi.dataset.test.test_dataset_parser import LineParser
+
+class CheckedLineParser(LineParser):
+    """
+    Line parser raising a SampleException on a line reading 'bad', built the
+    way the drivers build their parsers
+    """
+    def __init__(self, config, state, stream_handle, state_callback, publish_callback, exception_callback):
+        super(CheckedLineParser, self).__init__(stream_handle, state_callback, publish_callback)
+        if state:
+            self.set_state(state)
+
+    def parse_chunks(self):
+        result = super(CheckedLineParser, self).parse_chunks()
+        if 'bad' in [line for (line, state) in result]:
+            raise SampleException("bad line")
+        return result
+
+class LineDataSetDriver(SimpleDataSetDriver):
+    def _build_parser(self, parser_state, infile):
+        return CheckedLineParser(self._parser_config, parser_state, infile, self._save_parser_state,
+                                 self._data_callback, self._sample_exception_callback)
+
+    def _ingest_parser(self, file_name, path, data_key):
+        return (CheckedLineParser, self._parser_config, ())
+
+class InProcessLineDataSetDriver(SimpleDataSetDriver):
+    def _build_parser(self, parser_state, infile):
+        return CheckedLineParser(self._parser_config, parser_state, infile, self._save_parser_state,
+                                 self._data_callback, self._sample_exception_callback)
 
 @attr('UNIT', group='mi')
 class DataSourceLocationUnitTestCase(MiUnitTestCase):
@@ -57,4 +103,328 @@ class DataSourceLocationUnitTestCase(MiUnitTestCase):
         self.assertEqual(dsl.parser_position, parser_pos1)
         
         
-                
\ No newline at end of file
+                
+@attr('UNIT', group='mi')
+class IngestWorkersUnitTestCase(MiUnitTestCase):
+    """
+    Test parsing files in ingest worker processes
+    """
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.published = []
+        self.states = []
+        self.events = []
+        self.driver_state = {DriverStateKey.VERSION: 0.1}
+        self.files = []
+
+        self.driver = LineDataSetDriver(
+            {DataSourceConfigKey.HARVESTER: {DataSetDriverConfigKeys.DIRECTORY: self.directory,
+                                             DataSetDriverConfigKeys.PATTERN: '*.txt'},
+             DataSourceConfigKey.PARSER: {},
+             DataSourceConfigKey.DRIVER: {DriverParameter.INGEST_WORKERS: 3,
+                                          DriverParameter.BATCHED_PARTICLE_COUNT: 4,
+                                          DriverParameter.RECORDS_PER_SECOND: 100000}},
+            self.driver_state,
+            self.published.extend,
+            lambda state: self.states.append(copy.deepcopy(state)),
+            lambda **kwargs: self.events.append(kwargs),
+            self.fail)
+
+    def tearDown(self):
+        self.driver._stop_ingest_pool()
+        shutil.rmtree(self.directory)
+
+    def add_file(self, file_name, lines, parser_state=None):
+        with open(os.path.join(self.directory, file_name), 'w') as data_file:
+            data_file.write(''.join(line + '\n' for line in lines))
+        self.driver_state[file_name] = {DriverStateKey.PARSER_STATE: parser_state,
+                                        DriverStateKey.INGESTED: False}
+        self.files.append(file_name)
+
+    def test_ingest_queue(self):
+        """
+        Files are published in queue order with one state update per parser
+        call, starting from the file's parser state
+        """
+        expected = []
+        for index in range(10):
+            lines = ['%d.%d' % (index, line) for line in range(index * 50)]
+            self.add_file('file_%d.txt' % index, lines)
+            expected.extend(lines)
+        self.add_file('resumed.txt', ['a', 'b', 'c'], parser_state=2)
+        expected.extend(['b', 'c'])
+
+        self.driver._poll()
+        self.assertEqual(self.driver._new_file_queue, [])
+        self.driver._new_file_queue.extend(self.files)
+        self.driver._poll()
+
+        self.assertEqual(self.driver._new_file_queue, [])
+        self.assertEqual(self.published, expected)
+        self.assertEqual(len(self.events), len(self.files))
+        # a file with no records has no state update
+        self.assertEqual(len(self.states), len(self.files) - 1)
+        self.assertTrue(self.driver_state['file_9.txt'][DriverStateKey.INGESTED])
+        self.assertTrue(self.driver_state['resumed.txt'][DriverStateKey.INGESTED])
+        self.assertEqual(self.driver_state['resumed.txt'][DriverStateKey.PARSER_STATE], 6)
+        # a file with no records keeps its state
+        self.assertFalse(self.driver_state['file_0.txt'][DriverStateKey.INGESTED])
+
+    def test_sample_exception(self):
+        """
+        A file with a sample exception is marked ingested and reported
+        """
+        exceptions = []
+        self.driver._sample_exception_callback = exceptions.append
+        self.add_file('bad.txt', ['good', 'bad'])
+        self.add_file('good.txt', ['good'])
+
+        self.driver._new_file_queue.extend(self.files)
+        self.driver._poll()
+
+        self.assertEqual(self.published, ['good'])
+        self.assertEqual(len(exceptions), 1)
+        self.assertIsInstance(exceptions[0], SampleException)
+        self.assertTrue(self.driver_state['bad.txt'][DriverStateKey.INGESTED])
+        self.assertTrue(self.driver_state['good.txt'][DriverStateKey.INGESTED])
+
+    def test_shutdown(self):
+        """
+        Files are not published once the driver is stopped, files that have
+        had nothing published go back on the queue
+        """
+        def publish(particles):
+            self.published.extend(particles)
+            self.driver._publisher_shutdown = True
+        self.driver._agent_data_callback = publish
+        for index in range(4):
+            self.add_file('file_%d.txt' % index, ['%d' % index])
+
+        self.driver._new_file_queue.extend(self.files)
+        self.driver._poll()
+
+        self.assertEqual(self.published, ['0'])
+        self.assertEqual(self.driver._new_file_queue, self.files[1:])
+        self.assertIsNone(self.driver._ingest_pool)
+        self.assertTrue(self.driver_state['file_0.txt'][DriverStateKey.INGESTED])
+        self.assertFalse(self.driver_state['file_1.txt'][DriverStateKey.INGESTED])
+
+    def test_partial_publish(self):
+        """
+        Parser states are saved as the particles parsed before them are
+        published, so a file stopped part way resumes after what was published
+        """
+        lines = ['%04d' % index for index in range(2500)]
+        self.add_file('big.txt', lines)
+
+        def publish(particles):
+            if len(self.published) >= 1500:
+                raise ValueError("stopped")
+            self.published.extend(particles)
+        self.driver._agent_data_callback = publish
+
+        self.driver._new_file_queue.extend(self.files)
+        with self.assertRaises(ValueError):
+            self.driver._poll()
+
+        # the parser returned the first 1000 lines in one call
+        self.assertEqual(self.driver_state['big.txt'][DriverStateKey.PARSER_STATE], 1000 * 5)
+        self.assertFalse(self.driver_state['big.txt'][DriverStateKey.INGESTED])
+        self.assertEqual(self.driver._new_file_queue, [])
+
+    def test_unsupported_driver(self):
+        """
+        Ingest workers are rejected for drivers that don't build parsers for
+        them, a single worker parses in the driver
+        """
+        config = {DataSourceConfigKey.HARVESTER: {DataSetDriverConfigKeys.DIRECTORY: self.directory,
+                                                  DataSetDriverConfigKeys.PATTERN: '*.txt'},
+                  DataSourceConfigKey.PARSER: {},
+                  DataSourceConfigKey.DRIVER: {DriverParameter.INGEST_WORKERS: 2}}
+        with self.assertRaises(InstrumentParameterException):
+            InProcessLineDataSetDriver(config, {DriverStateKey.VERSION: 0.1}, self.published.extend,
+                                       self.states.append, self.events.append, self.fail)
+
+        config[DataSourceConfigKey.DRIVER][DriverParameter.INGEST_WORKERS] = 1
+        driver = InProcessLineDataSetDriver(config, {DriverStateKey.VERSION: 0.1}, self.published.extend,
+                                            self.states.append, self.events.append, self.fail)
+        with self.assertRaises(InstrumentParameterException):
+            driver.set_resource({DriverParameter.INGEST_WORKERS: 2})
+
+@attr('UNIT', group='mi')
+class ParticlePublisherDriverUnitTestCase(MiUnitTestCase):
+    """
+    Test publishing parsed files through the driver's particle publisher
+    """
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.published = []
+        self.states = []
+        self.driver_state = {DriverStateKey.VERSION: 0.1}
+
+        self.driver = LineDataSetDriver(
+            {DataSourceConfigKey.HARVESTER: {DataSetDriverConfigKeys.DIRECTORY: self.directory,
+                                             DataSetDriverConfigKeys.PATTERN: '*.txt'},
+             DataSourceConfigKey.PARSER: {},
+             DataSourceConfigKey.DRIVER: {DriverParameter.BATCHED_PARTICLE_COUNT: 10,
+                                          DriverParameter.RECORDS_PER_SECOND: 100000}},
+            self.driver_state,
+            self.published.extend,
+            self.state_callback,
+            lambda **kwargs: None,
+            self.fail)
+
+    def tearDown(self):
+        self.driver._stop_particle_publisher()
+        shutil.rmtree(self.directory)
+
+    def state_callback(self, state):
+        self.states.append((copy.deepcopy(state['data.txt']), len(self.published)))
+
+    def test_state_after_publish(self):
+        """
+        Parser state is saved once the particles parsed before it are published
+        """
+        lines = ['line %d' % i for i in range(1000)]
+        with open(os.path.join(self.directory, 'data.txt'), 'w') as data_file:
+            data_file.write(''.join(line + '\n' for line in lines))
+        self.driver_state['data.txt'] = {DriverStateKey.PARSER_STATE: None,
+                                         DriverStateKey.INGESTED: False}
+
+        self.driver._start_particle_publisher()
+        self.driver._got_file('data.txt')
+        self.driver._particle_publisher.flush()
+
+        self.assertEqual(self.published, lines)
+        # 100 batches, updates are coalesced
+        self.assertLess(len(self.states), 100)
+        for (state, published) in self.states:
+            self.assertEqual(state[DriverStateKey.PARSER_STATE],
+                             sum(len(line) + 1 for line in lines[:published]))
+        self.assertTrue(self.states[-1][0][DriverStateKey.INGESTED])
+        self.assertEqual(self.states[-1][1], len(lines))
+
+    def test_publish_failure(self):
+        """
+        A file's parser state isn't saved past particles that failed to
+        publish, and is saved again once the file is parsed again
+        """
+        lines = ['line %d' % i for i in range(1000)]
+        with open(os.path.join(self.directory, 'data.txt'), 'w') as data_file:
+            data_file.write(''.join(line + '\n' for line in lines))
+        self.driver_state['data.txt'] = {DriverStateKey.PARSER_STATE: None,
+                                         DriverStateKey.INGESTED: False}
+
+        failures = ['line 500']
+        def publish(particles):
+            if failures and failures[0] in particles:
+                raise ValueError("publish failed")
+            self.published.extend(particles)
+        exceptions = []
+        self.driver._agent_data_callback = publish
+        self.driver._exception_callback = exceptions.append
+
+        self.driver._start_particle_publisher()
+        self.driver._got_file('data.txt')
+        self.driver._particle_publisher.flush()
+
+        self.assertEqual(len(exceptions), 1)
+        # particles after the failed batch are published, the state stops before it
+        self.assertEqual(len(self.published), 990)
+        self.assertEqual(self.driver_state['data.txt'][DriverStateKey.PARSER_STATE],
+                         sum(len(line) + 1 for line in lines[:500]))
+        self.assertFalse(self.driver_state['data.txt'][DriverStateKey.INGESTED])
+
+        # parsing the file again resumes at the failed batch
+        self.published[:] = []
+        failures[:] = []
+        self.driver._got_file('data.txt')
+        self.driver._particle_publisher.flush()
+
+        self.assertEqual(self.published, lines[500:])
+        self.assertEqual(self.driver_state['data.txt'][DriverStateKey.PARSER_STATE],
+                         sum(len(line) + 1 for line in lines))
+        self.assertTrue(self.driver_state['data.txt'][DriverStateKey.INGESTED])
+
+    def test_file_index(self):
+        """
+        Ingested files are moved to the file index once their state is written
+        """
+        self.driver_state['old.txt'] = {DriverStateKey.PARSER_STATE: 4,
+                                        DriverStateKey.INGESTED: True}
+        config = copy.deepcopy(self.driver._config)
+        config[DataSourceConfigKey.HARVESTER][DataSetDriverConfigKeys.FILE_INDEX] = \
+            os.path.join(self.directory, 'index.db')
+        self.driver = LineDataSetDriver(config, self.driver_state, self.published.extend,
+                                        self.state_callback, lambda **kwargs: None, self.fail)
+        self.assertIn('old.txt', self.driver._driver_state)
+        self.assertNotIn('old.txt', self.driver._driver_state.keys())
+
+        with open(os.path.join(self.directory, 'data.txt'), 'w') as data_file:
+            data_file.write('a\nb\n')
+        self.driver._driver_state['data.txt'] = {DriverStateKey.PARSER_STATE: None,
+                                                 DriverStateKey.INGESTED: False}
+        self.driver._got_file('data.txt')
+
+        self.assertEqual(self.published, ['a', 'b'])
+        self.assertTrue(self.states[-1][0][DriverStateKey.INGESTED])
+        self.assertNotIn('data.txt', copy.deepcopy(self.driver._driver_state))
+        self.assertEqual(self.driver._driver_state['data.txt'][DriverStateKey.PARSER_STATE], 4)
+
+    def test_file_index_delta(self):
+        """
+        State deltas remove files moved to the file index from the memento
+        """
+        config = copy.deepcopy(self.driver._config)
+        config[DataSourceConfigKey.HARVESTER][DataSetDriverConfigKeys.FILE_INDEX] = \
+            os.path.join(self.directory, 'index.db')
+        self.driver = LineDataSetDriver(config, self.driver_state, self.published.extend,
+                                        self.state_callback, lambda **kwargs: None, self.fail)
+        deltas = []
+        self.driver.set_state_delta_callback(deltas.append)
+
+        with open(os.path.join(self.directory, 'data.txt'), 'w') as data_file:
+            data_file.write('a\nb\n')
+        self.driver._driver_state['data.txt'] = {DriverStateKey.PARSER_STATE: None,
+                                                 DriverStateKey.INGESTED: False}
+        memento = copy.deepcopy(self.driver._driver_state)
+        self.driver._got_file('data.txt')
+        self.driver._state_persister.flush()
+
+        for delta in deltas:
+            apply_state_delta(memento, copy.deepcopy(delta))
+        self.assertNotIn('data.txt', memento)
+        self.assertEqual(memento, copy.deepcopy(self.driver._driver_state))
+
+    def test_multiple_harvester_file_index(self):
+        """
+        A multiple harvester driver reads the file index from the data key configs
+        """
+        def build_driver(harvester_config):
+            return MultipleHarvesterDataSetDriver(
+                {DataSourceConfigKey.HARVESTER: harvester_config,
+                 DataSourceConfigKey.PARSER: {},
+                 DataSourceConfigKey.DRIVER: {}},
+                {DriverStateKey.VERSION: 0.1}, self.published.extend,
+                self.state_callback, lambda **kwargs: None, self.fail, ['a', 'b'])
+
+        def key_config(file_index=None):
+            config = {DataSetDriverConfigKeys.DIRECTORY: self.directory,
+                      DataSetDriverConfigKeys.PATTERN: '*.txt'}
+            if file_index:
+                config[DataSetDriverConfigKeys.FILE_INDEX] = os.path.join(self.directory, file_index)
+            return config
+
+        driver = build_driver({'a': key_config(), 'b': key_config()})
+        self.assertNotIsInstance(driver._driver_state, IndexedDriverState)
+
+        driver = build_driver({'a': key_config('index.db'), 'b': key_config()})
+        self.assertIsInstance(driver._driver_state, IndexedDriverState)
+
+        with self.assertRaises(ConfigurationException):
+            build_driver({'a': key_config('index.db'), 'b': key_config('other.db')})
+
+        harvester_config = {'a': key_config(), 'b': key_config()}
+        harvester_config[DataSetDriverConfigKeys.FILE_INDEX] = os.path.join(self.directory, 'index.db')
+        with self.assertRaises(ConfigurationException):
+            build_driver(harvester_config)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+
+"""
+@package mi.dataset.test.test_file_index
+@file mi/dataset/test/test_file_index.py
+@brief Unit tests for the ingested file index
+"""
+
+__license__ = 'Apache 2.0'
+
+import os
+import copy
+import shutil
+import tempfile
+
+from nose.plugins.attrib import attr
+
+from mi.core.unit_test import MiUnitTest
+from mi.dataset.dataset_driver import DriverStateKey
+from mi.dataset.dataset_driver import DataSetDriverConfigKeys
+from mi.dataset.harvester import SingleDirectoryPoller
+from mi.dataset.file_index import IngestedFileIndex
+from mi.dataset.file_index import IndexedDriverState
+
+def file_entry(size, mod_date, ingested, parser_state=None):
+    return {DriverStateKey.FILE_SIZE: size,
+            DriverStateKey.FILE_MOD_DATE: mod_date,
+            DriverStateKey.FILE_CHECKSUM: 'checksum',
+            DriverStateKey.INGESTED: ingested,
+            DriverStateKey.PARSER_STATE: parser_state}
+
+@attr('UNIT', group='mi')
+class TestIngestedFileIndex(MiUnitTest):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.index_path = os.path.join(self.directory, 'index.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_migrate(self):
+        """
+        Ingested files in a dict memento move to the index and are still found
+        """
+        memento = {DriverStateKey.VERSION: 0.1,
+                   'a.txt': file_entry(10, 1.5, True, {'position': 10}),
+                   'b.txt': file_entry(20, 2.5, False)}
+        state = IndexedDriverState(memento, IngestedFileIndex(self.index_path))
+
+        self.assertEqual(sorted(state.keys()), sorted([DriverStateKey.VERSION, 'b.txt']))
+        self.assertIn('a.txt', state)
+        self.assertNotIn('c.txt', state)
+        self.assertEqual(state.get('c.txt'), None)
+        self.assertTrue(state['a.txt'][DriverStateKey.INGESTED])
+        self.assertEqual(state['a.txt'][DriverStateKey.FILE_SIZE], 10)
+        self.assertEqual(state['a.txt'][DriverStateKey.PARSER_STATE], {'position': 10})
+        self.assertNotIn(DriverStateKey.MODIFIED_STATE, state['a.txt'])
+
+        # the memento is persisted as a plain dict without indexed files
+        memento = copy.deepcopy(state)
+        self.assertEqual(type(memento), dict)
+        self.assertEqual(sorted(memento.keys()), sorted([DriverStateKey.VERSION, 'b.txt']))
+
+        # ingested files are pruned and the index persists
+        state['b.txt'][DriverStateKey.INGESTED] = True
+        state.prune('b.txt')
+        self.assertEqual(state.keys(), [DriverStateKey.VERSION])
+
+        state = IndexedDriverState({DriverStateKey.VERSION: 0.1}, IngestedFileIndex(self.index_path))
+        self.assertIn('a.txt', state)
+        self.assertEqual(state['b.txt'][DriverStateKey.FILE_SIZE], 20)
+
+    def test_modified(self):
+        """
+        The harvester finds modified indexed files and keeps them in the memento
+        """
+        path = os.path.join(self.directory, 'a.txt')
+        with open(path, 'w') as data_file:
+            data_file.write('data\n')
+        entry = file_entry(os.path.getsize(path), os.path.getmtime(path), True)
+        state = IndexedDriverState({'a.txt': entry}, IngestedFileIndex(self.index_path))
+
+        poller = SingleDirectoryPoller({DataSetDriverConfigKeys.DIRECTORY: self.directory,
+                                        DataSetDriverConfigKeys.PATTERN: '*.txt'},
+                                       state, None, file_mod_wait=0)
+        self.assertEqual(poller._check_for_files(), ([], []))
+        self.assertNotIn('a.txt', state.keys())
+
+        with open(path, 'a') as data_file:
+            data_file.write('more data\n')
+        os.utime(path, (0, 0))
+        self.assertEqual(poller._check_for_files(), ([], ['a.txt']))
+
+        self.assertIn('a.txt', state.keys())
+        self.assertEqual(type(state['a.txt']), dict)
+        self.assertEqual(state['a.txt'][DriverStateKey.MODIFIED_STATE][DriverStateKey.FILE_SIZE],
+                         os.path.getsize(path))
+        # modified files stay in the memento
+        state.prune()
+        self.assertIn('a.txt', state.keys())
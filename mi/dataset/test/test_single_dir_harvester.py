@@ -422,12 +422,12 @@ class TestSingleDirHarvester(MiUnitTest):
         """
         self.found_file_count += 1
 
-    def modified_files_found_callback(self):
+    def modified_files_found_callback(self, file_names):
         """
         Callback when a new file is found by the harvester.  This should pass the file
         to the parser, but from this test we don't have the parser, so just close the file. 
         """
-        self.found_modified_count += 1
+        self.found_modified_count += len(file_names)
         log.info("Found modified file")
 
     def file_exception_callback(self, exception):
@@ -485,3 +485,26 @@ class TestSingleDirHarvester(MiUnitTest):
     
 
 
+
+@attr('UNIT', group='mi')
+class TestSortFiles(MiUnitTest):
+    def setUp(self):
+        if(not os.path.exists(TESTDIR)):
+            os.makedirs(TESTDIR)
+        self.poller = SingleDirectoryHarvester(CONFIG, {}, None, None, None)
+
+    def test_sort_files(self):
+        """
+        Files are sorted by their underscore separated indices, keeping the sort
+        between polls as files are added and removed
+        """
+        expected = [TESTDIR + '/unit_' + index + '.txt' for index in INDICIES]
+        self.assertEqual(self.poller.sort_files(sorted(expected)), expected)
+
+        # one file is gone and one is new
+        removed = expected.pop(3)
+        added = TESTDIR + '/unit_363_2013_0245_6_12.txt'
+        expected.insert(3, added)
+        filenames = [name for name in expected if name != removed]
+        self.assertEqual(self.poller.sort_files(sorted(filenames)), expected)
+        self.assertNotIn(removed, self.poller._sort_keys)
@@ -579,7 +579,8 @@ class DataSetIntegrationTestCase(DataSetTestCase):
         """
         expected_params = [DriverParameter.BATCHED_PARTICLE_COUNT,
                            DriverParameter.PUBLISHER_POLLING_INTERVAL,
-                           DriverParameter.RECORDS_PER_SECOND]
+                           DriverParameter.RECORDS_PER_SECOND,
+                           DriverParameter.INGEST_WORKERS]
         (res_cmds, res_params) = self.driver.get_resource_capabilities()
 
         # Ensure capabilities are as expected
@@ -593,6 +594,7 @@ class DataSetIntegrationTestCase(DataSetTestCase):
         self.assertEqual(params[DriverParameter.BATCHED_PARTICLE_COUNT], 1)
         self.assertEqual(params[DriverParameter.PUBLISHER_POLLING_INTERVAL], 1)
         self.assertEqual(params[DriverParameter.RECORDS_PER_SECOND], 60)
+        self.assertEqual(params[DriverParameter.INGEST_WORKERS], 1)
 
         # Try set resource individually
         self.driver.set_resource({DriverParameter.BATCHED_PARTICLE_COUNT: 2})
@@ -1037,7 +1039,8 @@ class DataSetQualificationTestCase(DataSetAgentTestCase):
         log.debug("Initialize the agent")
         expected_params = [DriverParameter.BATCHED_PARTICLE_COUNT,
                            DriverParameter.PUBLISHER_POLLING_INTERVAL,
-                           DriverParameter.RECORDS_PER_SECOND]
+                           DriverParameter.RECORDS_PER_SECOND,
+                           DriverParameter.INGEST_WORKERS]
         self.assert_initialize(final_state=ResourceAgentState.COMMAND)
 
         log.debug("Call get capabilities")
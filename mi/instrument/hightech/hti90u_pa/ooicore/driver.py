@@ -22,9 +22,11 @@ https://github.com/ooici/port-agent-antelope
 __author__ = 'Jeff Laughlin'
 __license__ = 'Apache 2.0'
 
-# TODO: Use a safer serialization format than Pickle. Even though we take what
-# precautions we can, it's not impossible that somebody could attack this
-# program via a malicious pickle. -JML
+# Orb packets framed with ORB_PACKET_SYNC are decoded with struct and numpy.
+# Anything else is taken to be a pickled packet from an older
+# port_agent_antelope.  Even though we take what precautions we can, it's not
+# impossible that somebody could attack this program via a malicious pickle,
+# so drop the pickle path once the port agents send framed packets. -JML
 #
 # DO NOT switch to plain pickle without using a safe-unpickler class.
 # see http://docs.python.org/2/library/pickle.html#subclassing-unpicklers
@@ -32,8 +34,11 @@ from cPickle import Unpickler
 from cStringIO import StringIO
 
 import string
+import base64
+from struct import Struct
 
 import ntplib
+import numpy as np
 
 from mi.core.log import get_logger ; log = get_logger()
 
@@ -52,6 +57,8 @@ from mi.core.instrument.data_particle import CommonDataParticleType
 from mi.core.instrument.chunker import StringChunker
 from mi.core.instrument.driver_dict import DriverDictKey
 
+from mi.core.exceptions import SampleException
+
 
 # newline.
 NEWLINE = '\r\n'
@@ -59,6 +66,24 @@ NEWLINE = '\r\n'
 # default timeout.
 TIMEOUT = 10
 
+# Framed orb packet, all values big endian.  The packet header is followed
+# by each channel: a channel header, then nsamp int32 samples.
+ORB_PACKET_SYNC = 'ORBP'
+ORB_PACKET_VERSION = 1
+ORB_PACKET_HEADER_STRUCT = Struct('>4sBH')  # sync, version, channel count
+ORB_CHANNEL_HEADER_STRUCT = Struct('>dddd8s8s8s8scI')
+ORB_CHANNEL_HEADER_FIELDS = ('time',        # time of the first sample
+                             'samprate',
+                             'calib',
+                             'calper',
+                             'net',         # names are NUL padded
+                             'sta',
+                             'chan',
+                             'loc',
+                             'segtype',
+                             'nsamp')
+ORB_SAMPLE_DTYPE = np.dtype('>i4')
+
 ###
 #    Driver Constant Definitions
 ###
@@ -70,6 +95,7 @@ class DataParticleType(BaseEnum):
     RAW = CommonDataParticleType.RAW
 
     HYDLF_SAMPLE = 'hydlf_sample'
+    HYDLF_SAMPLE_BLOCK = 'hydlf_sample_block'
 #    HYDLF_STATUS = 'hydlf_status'
 
 class ProtocolState(BaseEnum):
@@ -166,6 +192,8 @@ class HYDLF_SampleDataParticleKey(BaseEnum):
     TIME = 'time'
     SAMPLE = 'sample'
     SAMPLE_IDX = 'sample_idx'
+    # Block of samples, base64 of the big endian int32 samples
+    SAMPLES = 'samples'
 
 
 class HYDLF_SampleDataParticle(DataParticle):
@@ -204,6 +232,33 @@ class HYDLF_SampleDataParticle(DataParticle):
         return result
 
 
+class HYDLF_SampleBlockDataParticle(DataParticle):
+    """
+    All the samples of one channel of a framed orb packet.  raw_data is a
+    channel dict from decode_orb_packet.
+    """
+    _data_particle_type = DataParticleType.HYDLF_SAMPLE_BLOCK
+
+    def _build_parsed_values(self):
+
+        chan = self.raw_data
+
+        # the block is timestamped by its first sample
+        self.set_internal_timestamp(unix_time=chan['time'])
+
+        pk = HYDLF_SampleDataParticleKey
+        vid = DataParticleKey.VALUE_ID
+        v = DataParticleKey.VALUE
+
+        result = [{vid: key, v: chan[key]} for key in (pk.CALIB, pk.CALPER, pk.CHAN, pk.LOC, pk.NET,
+                                                      pk.NSAMP, pk.SAMPRATE, pk.SEGTYPE, pk.STA, pk.TIME)]
+
+        # encoded straight from the packet, the samples are never converted
+        result.append({vid: pk.SAMPLES, v: base64.b64encode(chan['data'].data),
+                       DataParticleKey.BINARY: True})
+        return result
+
+
 # Status would go here I guess
 # port_agent_antelope happily sends along parameter file (antelope's proprietary
 # JSON-like serialization format) and string packets, if there are any. They
@@ -211,6 +266,62 @@ class HYDLF_SampleDataParticle(DataParticle):
 # all. If there are status packets I'm guessing we would use a sieve function
 # to split the two streams and then add the appropirate particle classes here.
 
+###############################################################################
+# Orb packet framing
+###############################################################################
+
+def decode_orb_packet(data):
+    """
+    Decode a framed orb packet
+    @param data Framed packet
+    @retval list of channel dicts keyed by ORB_CHANNEL_HEADER_FIELDS, with the
+        samples in 'data' as a numpy array sharing the packet's memory
+    @throws SampleException if the packet is malformed
+    """
+    if len(data) < ORB_PACKET_HEADER_STRUCT.size:
+        raise SampleException("Orb packet too short: %d bytes" % len(data))
+
+    (sync, version, channel_count) = ORB_PACKET_HEADER_STRUCT.unpack_from(data)
+    if sync != ORB_PACKET_SYNC or version != ORB_PACKET_VERSION:
+        raise SampleException("Unknown orb packet framing: %r version %d" % (sync, version))
+
+    channels = []
+    offset = ORB_PACKET_HEADER_STRUCT.size
+    for index in xrange(channel_count):
+        samples_start = offset + ORB_CHANNEL_HEADER_STRUCT.size
+        if samples_start > len(data):
+            raise SampleException("Orb packet truncated in channel %d header" % index)
+
+        chan = dict(zip(ORB_CHANNEL_HEADER_FIELDS, ORB_CHANNEL_HEADER_STRUCT.unpack_from(data, offset)))
+        for name in ('net', 'sta', 'chan', 'loc', 'segtype'):
+            chan[name] = chan[name].rstrip('\0')
+
+        offset = samples_start + chan['nsamp'] * ORB_SAMPLE_DTYPE.itemsize
+        if offset > len(data):
+            raise SampleException("Orb packet truncated in channel %d samples" % index)
+        chan['data'] = np.frombuffer(data, ORB_SAMPLE_DTYPE, chan['nsamp'], samples_start)
+        channels.append(chan)
+
+    if offset != len(data):
+        raise SampleException("Orb packet has %d bytes after its last channel" % (len(data) - offset))
+
+    return channels
+
+def encode_orb_packet(channels):
+    """
+    Frame orb packet channels, the inverse of decode_orb_packet
+    @param channels list of channel dicts with the ORB_CHANNEL_HEADER_FIELDS
+        other than nsamp, and the samples in 'data'
+    @retval Framed packet
+    """
+    parts = [ORB_PACKET_HEADER_STRUCT.pack(ORB_PACKET_SYNC, ORB_PACKET_VERSION, len(channels))]
+    for chan in channels:
+        samples = np.asarray(chan['data'], ORB_SAMPLE_DTYPE)
+        header = dict(chan, nsamp=len(samples))
+        parts.append(ORB_CHANNEL_HEADER_STRUCT.pack(*[header[name] for name in ORB_CHANNEL_HEADER_FIELDS]))
+        parts.append(samples.tostring())
+    return ''.join(parts)
+
 ###############################################################################
 # Driver
 ###############################################################################
@@ -345,16 +456,20 @@ class Protocol(CommandResponseInstrumentProtocol):
         """
         Called by the instrument connection when data is available.
 
-        Also add data to the chunker and when received call got_chunk
-        to publish results.
+        Framed orb packets publish a sample block particle per channel,
+        pickled packets from older port agents a particle per sample.
         """
 
         data_length = port_agent_packet.get_data_length()
         data = port_agent_packet.get_data()
         timestamp = port_agent_packet.get_timestamp()
 
-        log.debug("Got Data: %s" % data)
-        log.debug("Add Port Agent Timestamp: %s" % timestamp)
+        log.debug("Got Data: %r", data)
+        log.debug("Add Port Agent Timestamp: %s", timestamp)
+
+        if data.startswith(ORB_PACKET_SYNC):
+            self._got_framed_packet(data, timestamp)
+            return
 
         unpickler = Unpickler(StringIO(data))
         # Disable class unpickling, for security; record should be all
@@ -367,8 +482,25 @@ class Protocol(CommandResponseInstrumentProtocol):
 
         pkt = unpickler.load()
 
-        for particle in self._particle_factory(pkt, timestamp):
-            self._publish_particle(particle)
+        # one batch per packet, sharing a driver timestamp and sequence
+        self._publish_samples(list(self._particle_factory(pkt, timestamp)))
+
+    def _got_framed_packet(self, data, port_timestamp):
+        """
+        Publish a sample block particle for each channel of a framed orb
+        packet.  A malformed packet is logged and dropped.
+        """
+        try:
+            channels = decode_orb_packet(data)
+        except SampleException as e:
+            log.error("Dropping orb packet: %s", e)
+            return
+
+        self._publish_samples([HYDLF_SampleBlockDataParticle(
+                                   chan,
+                                   port_timestamp = port_timestamp,
+                                   preferred_timestamp = DataParticleKey.INTERNAL_TIMESTAMP
+                               ) for chan in channels])
 
     def _particle_factory(self, orb_packet, port_timestamp):
         """Generate a sequence of particles from orb_packet
@@ -390,12 +522,6 @@ class Protocol(CommandResponseInstrumentProtocol):
                 )
                 yield particle
 
-    def _publish_particle(self, particle):
-        """publish parsed particle"""
-        parsed_sample = particle.generate()
-        if self._driver_event:
-            self._driver_event(DriverAsyncEvent.SAMPLE, parsed_sample)
-
     def _build_param_dict(self):
         """
         Populate the parameter dictionary with parameters.
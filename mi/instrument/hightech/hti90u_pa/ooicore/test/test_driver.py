@@ -58,7 +58,12 @@ from mi.instrument.hightech.hti90u_pa.ooicore.driver import Protocol
 from mi.instrument.hightech.hti90u_pa.ooicore.driver import Prompt
 from mi.instrument.hightech.hti90u_pa.ooicore.driver import NEWLINE
 from mi.instrument.hightech.hti90u_pa.ooicore.driver import HYDLF_SampleDataParticleKey
+from mi.instrument.hightech.hti90u_pa.ooicore.driver import decode_orb_packet
+from mi.instrument.hightech.hti90u_pa.ooicore.driver import encode_orb_packet
 
+from mi.core.exceptions import SampleException
+
+import base64
 import pickle
 
 # Pickled Packet object with single sample in data channel
@@ -104,6 +109,10 @@ SHORT_SAMPLE_DICT =  {
 
 SHORT_SAMPLE = pickle.dumps(SHORT_SAMPLE_DICT)
 
+# Framed packet with the same channel and a few more samples
+FRAMED_SAMPLE_DATA = [-15294, 0, 15294, 2147483647, -2147483648]
+FRAMED_SAMPLE = encode_orb_packet([dict(SHORT_SAMPLE_DICT['channels'][0], data=FRAMED_SAMPLE_DATA)])
+
 ###
 #   Driver parameters for the tests
 ###
@@ -163,6 +172,21 @@ class DataParticleMixin(DriverTestMixin):
         HYDLF_SampleDataParticleKey.SAMPLE: {'type': int, 'value': SHORT_SAMPLE_DICT['channels'][0]['data'][0]},
     }
 
+    _sample_block_parameters = {
+        HYDLF_SampleDataParticleKey.CALIB: {'type': float, 'value': SHORT_SAMPLE_DICT['channels'][0]['calib']},
+        HYDLF_SampleDataParticleKey.CALPER: {'type': float, 'value': SHORT_SAMPLE_DICT['channels'][0]['calper']},
+        HYDLF_SampleDataParticleKey.CHAN: {'type': unicode, 'value': SHORT_SAMPLE_DICT['channels'][0]['chan']},
+        HYDLF_SampleDataParticleKey.LOC: {'type': unicode, 'value': SHORT_SAMPLE_DICT['channels'][0]['loc']},
+        HYDLF_SampleDataParticleKey.NET: {'type': unicode, 'value': SHORT_SAMPLE_DICT['channels'][0]['net']},
+        HYDLF_SampleDataParticleKey.NSAMP: {'type': int, 'value': len(FRAMED_SAMPLE_DATA)},
+        HYDLF_SampleDataParticleKey.SAMPRATE: {'type': float, 'value': SHORT_SAMPLE_DICT['channels'][0]['samprate']},
+        HYDLF_SampleDataParticleKey.SEGTYPE: {'type': unicode, 'value': SHORT_SAMPLE_DICT['channels'][0]['segtype']},
+        HYDLF_SampleDataParticleKey.STA: {'type': unicode, 'value': SHORT_SAMPLE_DICT['channels'][0]['sta']},
+        HYDLF_SampleDataParticleKey.TIME: {'type': float, 'value': SHORT_SAMPLE_DICT['channels'][0]['time']},
+        HYDLF_SampleDataParticleKey.SAMPLES: {'type': unicode,
+                                              'value': base64.b64encode(FRAMED_SAMPLE[-4 * len(FRAMED_SAMPLE_DATA):])},
+    }
+
     def assert_sample_data_particle(self, data_particle):
         '''
         Verify a particle is a known particle to this driver and verify the particle is
@@ -185,6 +209,15 @@ class DataParticleMixin(DriverTestMixin):
         self.assert_data_particle_header(data_particle, DataParticleType.HYDLF_SAMPLE)
         self.assert_data_particle_parameters(data_particle, self._sample_parameters, verify_values)
 
+    def assert_data_particle_sample_block(self, data_particle, verify_values = False):
+        '''
+        Verify a sample block data particle
+        @param data_particle: HYDLF_SampleBlockDataParticle data particle
+        @param verify_values: bool, should we verify parameter values
+        '''
+        self.assert_data_particle_header(data_particle, DataParticleType.HYDLF_SAMPLE_BLOCK)
+        self.assert_data_particle_parameters(data_particle, self._sample_block_parameters, verify_values)
+
 ###############################################################################
 #                                UNIT TESTS                                   #
 #         Unit tests test the method calls and parameters using Mock.         #
@@ -230,6 +263,34 @@ class DriverUnitTest(InstrumentDriverUnitTestCase, DataParticleMixin):
 
         self.assert_particle_published(driver, SHORT_SAMPLE, self.assert_data_particle_sample, True)
 
+    def test_got_framed_data(self):
+        """
+        Verify a framed packet passed through the got data method produces a sample block particle
+        """
+        driver = InstrumentDriver(self._got_data_event_callback)
+        self.assert_initialize_driver(driver)
+
+        self.assert_particle_published(driver, FRAMED_SAMPLE, self.assert_data_particle_sample_block, True)
+
+    def test_decode_orb_packet(self):
+        """
+        Verify framed packets decode to the samples they were framed with, and malformed packets raise
+        """
+        chan = dict(SHORT_SAMPLE_DICT['channels'][0], data=FRAMED_SAMPLE_DATA)
+        channels = decode_orb_packet(encode_orb_packet([chan, dict(chan, chan='HNN', data=[])]))
+        self.assertEqual(len(channels), 2)
+        self.assertEqual(channels[0]['chan'], 'HNE')
+        self.assertEqual(channels[0]['loc'], '')
+        self.assertEqual(channels[0]['nsamp'], len(FRAMED_SAMPLE_DATA))
+        self.assertEqual(channels[0]['data'].tolist(), FRAMED_SAMPLE_DATA)
+        self.assertEqual(channels[1]['chan'], 'HNN')
+        self.assertEqual(channels[1]['data'].tolist(), [])
+
+        self.assertRaises(SampleException, decode_orb_packet, FRAMED_SAMPLE[:-1])
+        self.assertRaises(SampleException, decode_orb_packet, FRAMED_SAMPLE + '\0')
+        self.assertRaises(SampleException, decode_orb_packet, FRAMED_SAMPLE[:20])
+        self.assertRaises(SampleException, decode_orb_packet, FRAMED_SAMPLE[:4])
+
     def test_protocol_filter_capabilities(self):
         """
         This tests driver filter_capabilities.
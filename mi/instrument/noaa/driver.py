@@ -0,0 +1,162 @@
+"""
+@package mi.instrument.noaa.driver
+@file marine-integrations/mi/instrument/noaa/driver.py
+@brief Shared pieces of the RSN-BOTPT drivers
+Release notes:
+
+The BOTPT sensors (LILY, IRIS, HEAT, NANO and SYST) share one serial
+stream.  Every line of the stream starts with the name of the sensor that
+sent it, so the stream is split into lines and each line is classified
+once by that prefix and routed only to the sensor it belongs to.
+
+"""
+
+__license__ = 'Apache 2.0'
+
+from mi.core.log import get_logger ; log = get_logger()
+
+from mi.core.common import BaseEnum
+from mi.core.instrument.chunker import StringChunker
+
+# newline.
+NEWLINE = '\x0a'
+
+# Longest partial line kept while waiting for its newline
+MAX_LINE_LENGTH = 4096
+
+class BotptSensor(BaseEnum):
+    """
+    Line prefixes of the BOTPT sensors
+    """
+    LILY = 'LILY,'
+    IRIS = 'IRIS,'
+    HEAT = 'HEAT,'
+    NANO = 'NANO,'
+    SYST = 'SYST,'
+
+# all the sensor prefixes are the same length
+SENSOR_PREFIX_LENGTH = len(BotptSensor.LILY)
+
+class BotptDemux(object):
+    """
+    Demultiplex the BOTPT stream.  Complete lines are routed by their sensor
+    prefix to the consumers registered for the sensor; lines for sensors
+    nobody registered for are dropped without being looked at again.  The
+    lines a consumer gets from one block of data are passed in a single
+    call.  The demux doesn't care where the stream comes from, so it can
+    feed the protocols of one driver process or split the stream in front
+    of the drivers.
+    """
+    def __init__(self):
+        self._consumers = {}
+        self._partial = ''
+        self._partial_timestamp = None
+
+    def register(self, prefix, consumer):
+        """
+        Route the lines of a sensor to a consumer
+        @param prefix Sensor line prefix, a BotptSensor value
+        @param consumer Callable taking (data, timestamp), where data is
+            one or more complete lines including their newlines
+        """
+        self._consumers.setdefault(prefix, []).append(consumer)
+
+    def unregister(self, prefix, consumer):
+        """
+        Stop routing the lines of a sensor to a consumer
+        @param prefix Sensor line prefix
+        @param consumer A registered consumer
+        """
+        consumers = self._consumers.get(prefix, [])
+        if consumer in consumers:
+            consumers.remove(consumer)
+        if not consumers:
+            self._consumers.pop(prefix, None)
+
+    def add_data(self, data, timestamp):
+        """
+        Add a block of the stream and route the lines it completes.  A line
+        gets the timestamp of the block it started in.
+        @param data Block of BOTPT stream
+        @param timestamp The time (in NTP4 float format) that the data was
+            collected at the port agent
+        """
+        lines = data.split(NEWLINE)
+        if len(lines) == 1:
+            self._hold(lines[0], timestamp)
+            return
+
+        if self._partial:
+            self._route([self._partial + lines[0]], self._partial_timestamp)
+        else:
+            self._route(lines[:1], timestamp)
+        self._partial = ''
+
+        self._route(lines[1:-1], timestamp)
+        self._hold(lines[-1], timestamp)
+
+    def clear(self):
+        """
+        Drop the partial line being held
+        """
+        self._partial = ''
+        self._partial_timestamp = None
+
+    def _route(self, lines, timestamp):
+        """
+        Pass each sensor's lines to its consumers
+        @param lines Complete lines without their newlines
+        @param timestamp Timestamp of the lines
+        """
+        routed = {}
+        consumers = self._consumers
+        for line in lines:
+            prefix = line[:SENSOR_PREFIX_LENGTH]
+            if prefix in consumers:
+                routed.setdefault(prefix, []).append(line)
+
+        for (prefix, sensor_lines) in routed.iteritems():
+            sensor_data = NEWLINE.join(sensor_lines) + NEWLINE
+            for consumer in consumers[prefix]:
+                consumer(sensor_data, timestamp)
+
+    def _hold(self, fragment, timestamp):
+        """
+        Keep the start of a line until its newline arrives
+        @param fragment Data after the last newline
+        @param timestamp Timestamp of the block the fragment is in
+        """
+        if not self._partial:
+            self._partial_timestamp = timestamp
+        self._partial += fragment
+
+        if len(self._partial) > MAX_LINE_LENGTH:
+            log.warn("Dropping %d bytes of BOTPT data without a newline", len(self._partial))
+            self.clear()
+
+class BotptChunker(StringChunker):
+    """
+    A string chunker that only buffers and sieves the lines of one BOTPT
+    sensor.  The sieve function doesn't change, it just no longer sees the
+    other sensors' data.
+    """
+    def __init__(self, prefix, data_sieve_fn):
+        """
+        @param prefix Sensor line prefix, a BotptSensor value
+        @param data_sieve_fn Sieve function of the sensor's data
+        """
+        StringChunker.__init__(self, data_sieve_fn)
+        self._demux = BotptDemux()
+        self._demux.register(prefix, self._add_sensor_data)
+
+    def add_chunk(self, raw_data, timestamp):
+        """
+        Add a block of the BOTPT stream, keeping only this sensor's lines
+        @param raw_data Block of BOTPT stream
+        @param timestamp The time (in NTP4 float format) that the data was
+            collected at the port agent
+        """
+        self._demux.add_data(raw_data, timestamp)
+
+    def _add_sensor_data(self, data, timestamp):
+        StringChunker.add_chunk(self, data, timestamp)
@@ -35,7 +35,8 @@ from mi.core.instrument.protocol_param_dict import ParameterDictType
 from mi.core.instrument.data_particle import DataParticle
 from mi.core.instrument.data_particle import DataParticleKey
 from mi.core.instrument.data_particle import CommonDataParticleType
-from mi.core.instrument.chunker import StringChunker
+from mi.instrument.noaa.driver import BotptSensor
+from mi.instrument.noaa.driver import BotptChunker
 
 from mi.core.exceptions import InstrumentProtocolException
 from mi.core.exceptions import InstrumentTimeoutException
@@ -372,7 +373,7 @@ class Protocol(CommandResponseInstrumentProtocol):
         self._sent_cmds = []
 
         #
-        self._chunker = StringChunker(Protocol.sieve_function)
+        self._chunker = BotptChunker(BotptSensor.HEAT, Protocol.sieve_function)
 
         self._heat_duration = DEFAULT_HEAT_DURATION
 
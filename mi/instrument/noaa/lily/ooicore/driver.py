@@ -40,6 +40,7 @@ from mi.core.instrument.data_particle import DataParticle
 from mi.core.instrument.data_particle import DataParticleKey
 from mi.core.instrument.data_particle import CommonDataParticleType
 from mi.core.instrument.chunker import StringChunker
+from mi.instrument.noaa.driver import BotptChunker
 from mi.core.driver_scheduler import DriverScheduler
 from mi.core.instrument.instrument_driver import DriverConfigKey
 from mi.core.driver_scheduler import DriverSchedulerConfigKey
@@ -780,7 +781,7 @@ class Protocol(CommandResponseInstrumentProtocol):
         # Set up the chunkers: this driver uses the chunker in a hierarchical way.  The coarse
         # chunker filters the LILY messages from the BOTPT firehose, and the other chunkers
         # work with what the coarse chunker matches.
-        self._coarse_chunker = StringChunker(Protocol.coarse_sieve_function)
+        self._coarse_chunker = BotptChunker(LILY_STRING, Protocol.coarse_sieve_function)
         self._command_autosample_chunker = StringChunker(Protocol.command_autosample_sieve_function)
         self._leveling_chunker = StringChunker(Protocol.leveling_sieve_function)
 
@@ -35,7 +35,7 @@ from mi.core.instrument.protocol_param_dict import ParameterDictType
 from mi.core.instrument.data_particle import DataParticle
 from mi.core.instrument.data_particle import DataParticleKey
 from mi.core.instrument.data_particle import CommonDataParticleType
-from mi.core.instrument.chunker import StringChunker
+from mi.instrument.noaa.driver import BotptChunker
 
 # DHE: Might need this if we use multiline regex
 #from mi.instrument.noaa.driver import BOTPTParticle
@@ -472,7 +472,7 @@ class Protocol(CommandResponseInstrumentProtocol):
         self._sent_cmds = []
 
         #
-        self._chunker = StringChunker(Protocol.sieve_function)
+        self._chunker = BotptChunker(NANO_STRING, Protocol.sieve_function)
 
         # set up the regexes now so we don't have to do it repeatedly
         self.data_regex = NANODataParticle.regex_compiled()
@@ -27,7 +27,8 @@ from mi.core.instrument.instrument_driver import ResourceAgentState
 from mi.core.instrument.data_particle import DataParticle
 from mi.core.instrument.data_particle import DataParticleKey
 from mi.core.instrument.data_particle import CommonDataParticleType
-from mi.core.instrument.chunker import StringChunker
+from mi.instrument.noaa.driver import BotptSensor
+from mi.instrument.noaa.driver import BotptChunker
 
 
 # newline.
@@ -186,7 +187,7 @@ class Protocol(CommandResponseInstrumentProtocol):
         self._sent_cmds = []
 
         #
-        self._chunker = StringChunker(Protocol.sieve_function)
+        self._chunker = BotptChunker(BotptSensor.SYST, Protocol.sieve_function)
 
 
     @staticmethod
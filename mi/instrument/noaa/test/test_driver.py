@@ -0,0 +1,65 @@
+"""
+@package mi.instrument.noaa.test.test_driver
+@file marine-integrations/mi/instrument/noaa/test/test_driver.py
+@brief Test cases for the shared BOTPT stream demultiplexer
+"""
+
+__license__ = 'Apache 2.0'
+
+import re
+from functools import partial
+
+from nose.plugins.attrib import attr
+from mi.core.unit_test import MiUnitTestCase
+
+from mi.instrument.noaa.driver import NEWLINE
+from mi.instrument.noaa.driver import BotptSensor
+from mi.instrument.noaa.driver import BotptDemux
+from mi.instrument.noaa.driver import BotptChunker
+
+LILY_SAMPLE = "LILY,2013/05/16 17:03:22,-202.490,-330.000,149.88, 25.72,11.88,N9656" + NEWLINE
+IRIS_SAMPLE = "IRIS,2013/05/29 00:25:34, -0.0882, -0.7524,28.45,N8642" + NEWLINE
+HEAT_SAMPLE = "HEAT,2013/04/19 22:54:11,-001,0001,0025" + NEWLINE
+NANO_SAMPLE = "NANO,P,2013/05/16 17:03:22.000,14.858126,25.243003840" + NEWLINE
+
+BOTPT_FIREHOSE = NANO_SAMPLE + LILY_SAMPLE + HEAT_SAMPLE + IRIS_SAMPLE + \
+                 NANO_SAMPLE + LILY_SAMPLE + HEAT_SAMPLE
+
+@attr('UNIT', group='mi')
+class UnitTestBotptDemux(MiUnitTestCase):
+    def setUp(self):
+        self.routed = []
+        self.demux = BotptDemux()
+
+    def consumer(self, data, timestamp):
+        self.routed.append((data, timestamp))
+
+    def test_route(self):
+        self.demux.register(BotptSensor.LILY, self.consumer)
+        self.demux.add_data(BOTPT_FIREHOSE, 1.0)
+        self.assertEqual(self.routed, [(LILY_SAMPLE + LILY_SAMPLE, 1.0)])
+
+        self.routed = []
+        self.demux.unregister(BotptSensor.LILY, self.consumer)
+        self.demux.add_data(BOTPT_FIREHOSE, 2.0)
+        self.assertEqual(self.routed, [])
+
+    def test_partial_line(self):
+        # a line is routed when its newline arrives, with the timestamp
+        # of the data it started in
+        self.demux.register(BotptSensor.IRIS, self.consumer)
+        self.demux.add_data(HEAT_SAMPLE + IRIS_SAMPLE[:10], 1.0)
+        self.demux.add_data(IRIS_SAMPLE[10:20], 2.0)
+        self.assertEqual(self.routed, [])
+        self.demux.add_data(IRIS_SAMPLE[20:] + IRIS_SAMPLE, 3.0)
+        self.assertEqual(self.routed, [(IRIS_SAMPLE, 1.0), (IRIS_SAMPLE, 3.0)])
+
+    def test_chunker(self):
+        sieve = partial(BotptChunker.regex_sieve_function, regex_list=[re.compile(r'HEAT,.*' + NEWLINE)])
+        chunker = BotptChunker(BotptSensor.HEAT, sieve)
+        for i in range(0, len(BOTPT_FIREHOSE), 16):
+            chunker.add_chunk(BOTPT_FIREHOSE[i:i + 16], 1.0)
+        self.assertEqual(chunker.buffer, HEAT_SAMPLE + HEAT_SAMPLE)
+        self.assertEqual(chunker.get_next_data(), (1.0, HEAT_SAMPLE))
+        self.assertEqual(chunker.get_next_data(), (1.0, HEAT_SAMPLE))
+        self.assertEqual(chunker.get_next_data(), (None, None))
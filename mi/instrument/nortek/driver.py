@@ -13,6 +13,7 @@ import re
 import time
 import copy
 import base64
+import numpy as np
 
 from mi.core.log import get_logger ; log = get_logger()
 
@@ -57,6 +58,10 @@ HW_CONFIG_LEN = 48
 HW_CONFIG_SYNC_BYTES   = '\xa5\x05\x18\x00'
 HEAD_CONFIG_LEN = 224
 HEAD_CONFIG_SYNC_BYTES = '\xa5\x04\x70\x00'
+# first byte of every structure
+NORTEK_SYNC_BYTE = '\xa5'
+# data shorter than this is sieved without numpy
+SIEVE_SCAN_LEN = 256
 CHECK_SUM_SEED = 0xb58c
 
 HARDWARE_CONFIG_DATA_PATTERN = r'%s(.{14})(.{2})(.{2})(.{2})(.{2})(.{2})(.{2})(.{12})(.{4})(.{2})' % HW_CONFIG_SYNC_BYTES
@@ -1184,15 +1189,21 @@ class NortekProtocolParameterDict(ProtocolParameterDict):
 
     @staticmethod
     def calculate_checksum(input, length=None):
-        #log.debug("calculate_checksum: input=%s, length=%d", input.encode('hex'), length)
-        calculated_checksum = CHECK_SUM_SEED
+        """
+        Calculate a Nortek checksum, the seeded sum of the little endian
+        words before the checksum word
+        @param input The structure
+        @param length Structure length, the length of the input if None
+        @retval The checksum
+        """
         if length == None:
             length = len(input)
-        for word_index in range(0, length-2, 2):
-            word_value = NortekProtocolParameterDict.convert_word_to_int(input[word_index:word_index+2])
-            calculated_checksum = (calculated_checksum + word_value) % 0x10000
-            #log.trace('w_i=%d, c_c=%d', word_index, calculated_checksum)
-        return calculated_checksum
+        word_count = max(0, (length - 1) // 2)
+        if word_count * 2 > len(input):
+            raise SampleException("Invalid number of bytes in input! Found %d, expected %d" %
+                                  (len(input), word_count * 2))
+        words = np.frombuffer(input, '<u2', word_count)
+        return (CHECK_SUM_SEED + int(words.sum())) % 0x10000
 
     @staticmethod
     def convert_bytes_to_string(bytes_in):
@@ -1266,6 +1277,177 @@ class NortekInstrumentDriver(SingleConnectionInstrumentDriver):
         self.set_resource(vals, NotUserRequested=True)
 
 
+###############################################################################
+# Sieve
+###############################################################################
+
+class NortekSieve(object):
+    """
+    Chunker sieve for Nortek data structures, shared by the Nortek drivers.
+    Every occurrence of each sync pattern is found, and the checksums of all
+    the complete structures are calculated together from running word sums.
+    Structures are taken in order, skipping sync patterns inside a structure
+    already found.
+
+    The chunker sieves from the end of the last structure found, so the
+    data a call ends with is usually the start of the next call.  Sync
+    patterns already rejected in that data aren't checked again.
+    """
+    def __init__(self, structs):
+        """
+        @param structs The structures to search for, in the format
+           [[structure_sync_bytes, structure_len]*].  Structures are a whole
+           number of words.
+        """
+        self._structs = structs
+        self._max_sync_len = max(len(sync) for (sync, length) in structs)
+        # data after the last structure found by the previous call
+        self._pending = None
+        # bytes at the start of the pending data with every sync pattern rejected
+        self._checked = 0
+        # data length the first incomplete structure in the pending data needs
+        self._next_end = 0
+        # index in the pending data new sync patterns may start from
+        self._scan_from = 0
+
+    def __call__(self, raw_data):
+        """
+        @param raw_data The data to sieve
+        @retval list of (start, end) tuples of the structures found
+        """
+        start = 0
+        if self._pending and raw_data.startswith(self._pending):
+            start = self._checked
+            if len(raw_data) < self._next_end and \
+               raw_data.find(NORTEK_SYNC_BYTE, self._scan_from) == -1:
+                # nothing has completed and no new sync pattern has arrived
+                self._pending = raw_data
+                return []
+
+        (return_list, checked, next_end) = self.sieve(raw_data, start)
+
+        end = return_list[-1][1] if return_list else 0
+        self._pending = raw_data[end:]
+        self._checked = max(0, checked - end)
+        self._next_end = next_end - end
+        self._scan_from = max(0, len(raw_data) - self._max_sync_len + 1 - end)
+        return return_list
+
+    def sieve(self, raw_data, start=0):
+        """
+        Find the structures in the data
+        @param raw_data The data to sieve
+        @param start Index to start looking for sync patterns from, every
+           sync pattern before it has been rejected already
+        @retval (list of (start, end) tuples of the structures found, index
+           before which every sync pattern has been rejected or found, data
+           length the first incomplete structure needs)
+        """
+        data_len = len(raw_data)
+        if data_len - start < SIEVE_SCAN_LEN:
+            structures = self._scan_structures(raw_data, start)
+        else:
+            structures = self._find_structures(raw_data, start)
+
+        return_list = []
+        # sync patterns from here on may still be completed by more data
+        checked = max(start, data_len - self._max_sync_len + 1, 0)
+        next_end = float('inf')
+        last_end = 0
+        for (struct_start, struct_end, struct_valid) in structures:
+            if struct_start < last_end:
+                # sync bytes inside a structure already found
+                continue
+            if struct_end > data_len:
+                # only check the checksum once all of the structure has arrived
+                checked = min(checked, struct_start)
+                next_end = min(next_end, struct_end)
+            elif struct_valid:
+                return_list.append((struct_start, struct_end))
+                last_end = struct_end
+
+        return (return_list, max(checked, last_end), next_end)
+
+    def _scan_structures(self, raw_data, start):
+        """
+        Find the sync patterns in a short piece of data one at a time
+        @retval list of (start, end, valid) tuples of the sync patterns
+           found, in order
+        """
+        data_len = len(raw_data)
+        structures = []
+        index = raw_data.find(NORTEK_SYNC_BYTE, start)
+        while index != -1:
+            for structure_sync, structure_len in self._structs:
+                if raw_data.startswith(structure_sync, index):
+                    end = index + structure_len
+                    valid = end <= data_len and \
+                        NortekProtocolParameterDict.calculate_checksum(raw_data[index:end]) == \
+                        NortekProtocolParameterDict.convert_word_to_int(raw_data[end-2:end])
+                    structures.append((index, end, valid))
+            index = raw_data.find(NORTEK_SYNC_BYTE, index + 1)
+        return structures
+
+    def _find_structures(self, raw_data, start):
+        """
+        Find the sync patterns in the data with numpy, checking the
+        checksums together
+        @retval list of (start, end, valid) tuples of the sync patterns
+           found, in order
+        """
+        data_len = len(raw_data)
+        data = np.frombuffer(raw_data, np.uint8)
+
+        # sync patterns all start with the same byte
+        sync_starts = np.flatnonzero(data[start:] == ord(NORTEK_SYNC_BYTE)) + start
+        struct_starts = []
+        struct_lens = []
+        for structure_sync, structure_len in self._structs:
+            sync_bytes = bytearray(structure_sync)
+            candidates = sync_starts[sync_starts + len(sync_bytes) <= data_len]
+            for offset in xrange(1, len(sync_bytes)):
+                candidates = candidates[data[candidates + offset] == sync_bytes[offset]]
+            struct_starts.append(candidates)
+            struct_lens.append(np.full(len(candidates), structure_len, np.int64))
+
+        struct_starts = np.concatenate(struct_starts)
+        # stable, so structures at the same index stay in search order
+        order = np.argsort(struct_starts, kind='mergesort')
+        struct_starts = struct_starts[order]
+        struct_ends = struct_starts + np.concatenate(struct_lens)[order]
+        valid = self.valid_checksums(raw_data, struct_starts, struct_ends)
+        return zip(struct_starts.tolist(), struct_ends.tolist(), valid.tolist())
+
+    @staticmethod
+    def valid_checksums(raw_data, starts, ends):
+        """
+        Check the checksums of structures, from word sums of the data at
+        both word alignments
+        @param raw_data The data holding the structures
+        @param starts numpy array of structure start indexes
+        @param ends numpy array of structure end indexes
+        @retval numpy bool array, True for complete structures with a good checksum
+        """
+        data_len = len(raw_data)
+        valid = np.zeros(len(starts), bool)
+        complete = ends <= data_len
+        if not complete.any():
+            return valid
+
+        for alignment in (0, 1):
+            words = np.frombuffer(raw_data, '<u2', (data_len - alignment) // 2, alignment)
+            # running sum of the words, wrapping like the checksum
+            sums = np.zeros(len(words) + 1, np.uint16)
+            np.cumsum(words, dtype=np.uint16, out=sums[1:])
+
+            aligned = complete & (starts % 2 == alignment)
+            first_word = starts[aligned] // 2
+            checksum_word = (ends[aligned] - 2) // 2
+            calculated = (sums[checksum_word] - sums[first_word] + CHECK_SUM_SEED) & 0xFFFF
+            valid[aligned] = calculated == words[checksum_word]
+        return valid
+
+
 ###############################################################################
 # Protocol
 ###############################################################################
@@ -1351,20 +1533,7 @@ class NortekInstrumentProtocol(CommandResponseInstrumentProtocol):
         @param structs Additional structures to include in the structure search.
         Should be in the format [[structure_sync_bytes, structure_len]*]
         """
-        return_list = []
-        structs = add_structs + NORTEK_COMMON_SAMPLE_STRUCTS
-        for structure_sync, structure_len in structs:
-            start = raw_data.find(structure_sync)
-            if start != -1:    # found a sync pattern
-                if start+structure_len <= len(raw_data):    # only check the CRC if all of the structure has arrived
-                    calculated_checksum = NortekProtocolParameterDict.calculate_checksum(raw_data[start:start+structure_len], structure_len)
-                    log.debug('chunker_sieve_function: calculated checksum = %s' % calculated_checksum)
-                    sent_checksum = NortekProtocolParameterDict.convert_word_to_int(raw_data[start+structure_len-2:start+structure_len])
-                    if sent_checksum == calculated_checksum:
-                        return_list.append((start, start+structure_len))        
-                        log.debug("chunker_sieve_function: found %s", raw_data[start:start+structure_len].encode('hex'))
-                
-        return return_list
+        return NortekSieve(add_structs + NORTEK_COMMON_SAMPLE_STRUCTS).sieve(raw_data)[0]
 
     ########################################################################
     # overridden superclass methods
@@ -27,6 +27,8 @@ from mi.instrument.nortek.driver import NortekUserConfigDataParticle
 from mi.instrument.nortek.driver import NortekInstrumentDriver
 from mi.instrument.nortek.driver import NortekInstrumentProtocol
 from mi.instrument.nortek.driver import NortekProtocolParameterDict
+from mi.instrument.nortek.driver import NortekSieve
+from mi.instrument.nortek.driver import NORTEK_COMMON_SAMPLE_STRUCTS
 from mi.instrument.nortek.driver import Parameter, InstrumentCmds, InstrumentPrompts
 from mi.instrument.nortek.driver import NEWLINE
 from mi.instrument.nortek.driver import HARDWARE_CONFIG_DATA_REGEX
@@ -446,8 +448,10 @@ class Protocol(NortekInstrumentProtocol):
     def __init__(self, prompts, newline, driver_event):
         NortekInstrumentProtocol.__init__(self, prompts, newline, driver_event)
         
-        # create chunker for processing instrument samples.
-        self._chunker = StringChunker(Protocol.chunker_sieve_function)
+        # create chunker for processing instrument samples, the sieve
+        # remembers the sync patterns it has rejected between calls
+        self._chunker = StringChunker(NortekSieve(VECTOR_SAMPLE_STRUCTURES +
+                                                  NORTEK_COMMON_SAMPLE_STRUCTS))
         
     @staticmethod
     def chunker_sieve_function(raw_data):
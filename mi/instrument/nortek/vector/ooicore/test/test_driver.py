@@ -32,6 +32,7 @@ from nose.plugins.attrib import attr
 from mi.core.log import get_logger ; log = get_logger()
 
 # MI imports.
+from mi.core.unit_test import MiUnitTest
 from mi.idk.unit_test import InstrumentDriverTestCase
 
 from mi.instrument.nortek.test.test_driver import head_config_sample
@@ -53,8 +54,11 @@ from mi.core.exceptions import SampleException
 from mi.instrument.nortek.driver import ProtocolState
 from mi.instrument.nortek.driver import ProtocolEvent
 from mi.instrument.nortek.driver import Parameter
+from mi.instrument.nortek.driver import NortekSieve
+from mi.instrument.nortek.driver import NORTEK_COMMON_SAMPLE_STRUCTS
 from mi.instrument.nortek.vector.ooicore.driver import DataParticleType
 from mi.instrument.nortek.vector.ooicore.driver import Protocol
+from mi.instrument.nortek.vector.ooicore.driver import VECTOR_SAMPLE_STRUCTURES
 from mi.instrument.nortek.vector.ooicore.driver import VectorVelocityHeaderDataParticle
 from mi.instrument.nortek.vector.ooicore.driver import VectorVelocityHeaderDataParticleKey
 from mi.instrument.nortek.vector.ooicore.driver import VectorVelocityDataParticle
@@ -376,6 +380,25 @@ class UnitFromIDK(NortekUnitTest):
         self.assert_chunker_sample_with_noise(chunker, system_sample())
         self.assert_chunker_sample_with_noise(chunker, velocity_header_sample())
         
+    def test_chunker_burst(self):
+        """
+        Tests the chunker finds every structure of a burst, arriving in
+        fragments with corrupt structures among them
+        """
+        chunker = StringChunker(NortekSieve(VECTOR_SAMPLE_STRUCTURES + NORTEK_COMMON_SAMPLE_STRUCTS))
+        corrupt = velocity_sample().replace(chr(0xdb), chr(0xdc), 1)
+        burst = [velocity_header_sample()] + [velocity_sample()] * 64 + [system_sample()]
+        raw_data = ''.join(burst[:10]) + corrupt + ''.join(burst[10:])
+
+        results = []
+        for index in range(0, len(raw_data), 7):
+            chunker.add_chunk(raw_data[index:index+7], self.get_ntp_timestamp())
+            (timestamp, result) = chunker.get_next_data()
+            while result:
+                results.append(result)
+                (timestamp, result) = chunker.get_next_data()
+
+        self.assertEqual(results, burst)
 
     def test_corrupt_data_structures(self):
         # garbage is not okay
@@ -395,6 +418,26 @@ class UnitFromIDK(NortekUnitTest):
             particle.generate()
 
  
+@attr('BENCHMARK', group='mi')
+class SieveBenchmark(MiUnitTest):
+    """
+    Vector sieve throughput.  Timings are logged, not asserted.  They aren't
+    part of the unit suite, run them with
+        $ nosetests -a BENCHMARK mi/instrument/nortek/vector/ooicore/test/test_driver.py
+    """
+    def test_sieve_velocity_hour(self):
+        """
+        Time sieving an hour of 64 Hz velocity data in one piece
+        """
+        raw_data = velocity_sample() * 64 * 3600
+        sieve = NortekSieve(VECTOR_SAMPLE_STRUCTURES + NORTEK_COMMON_SAMPLE_STRUCTS)
+        start_time = time.time()
+        result = sieve(raw_data)
+        log.info("Sieved %d velocity structures in %.2f s", len(result), time.time() - start_time)
+        self.assertEqual(len(result), 64 * 3600)
+        self.assertEqual(result[-1], (len(raw_data) - 24, len(raw_data)))
+
+
 ###############################################################################
 #                            INTEGRATION TESTS                                #
 #     Integration test test the direct driver / instrument interaction        #
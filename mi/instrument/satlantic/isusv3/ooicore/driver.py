@@ -63,50 +63,35 @@ AUTOSAMPLE_MODE = 'AUTOSAMPLE'
 
 
 SAMPLE_PATTERN_ASCII = r'^SAT(.{3}).{4},(.{4,7}),(.{,9})'
-#SAMPLE_PATTERN = r'SAT(.{3})(.{4})(.{4})(.{8})'
-SAMPLE_PATTERN = r'SAT'         #      Sentinal
-SAMPLE_PATTERN += r'(.{3})'     #   1: Frame Type
-SAMPLE_PATTERN += r'(.{4})'     #   2: Serial Number
-SAMPLE_PATTERN += r'(.{4})'     #   3: Date
-SAMPLE_PATTERN += r'(.{8})'     #   4: Time
-SAMPLE_PATTERN += r'(.{4})'     #   5: Nitrate Concentration
-SAMPLE_PATTERN += r'(.{4})'     #   6: AUX1
-SAMPLE_PATTERN += r'(.{4})'     #   7: AUX2
-SAMPLE_PATTERN += r'(.{4})'     #   8: AUX3
-SAMPLE_PATTERN += r'(.{4})'     #   9: RMS ERROR
-SAMPLE_PATTERN += r'(.{4})'     #  10: t_int Interior Temp
-SAMPLE_PATTERN += r'(.{4})'     #  11: t_spec Spectrometer Temp
-SAMPLE_PATTERN += r'(.{4})'     #  12: t_lamp Lamp Temp
-SAMPLE_PATTERN += r'(.{4})'     #  13: lamp_time Lamp Time
-SAMPLE_PATTERN += r'(.{4})'     #  14: humidity Interior Humidity
-SAMPLE_PATTERN += r'(.{4})'     #  15: volt_12 Lamp Power Supply Voltage
-SAMPLE_PATTERN += r'(.{4})'     #  16: volt_5 Internal Analog Power Supply Voltage
-SAMPLE_PATTERN += r'(.{4})'     #  17: volt_main Main Internal Power Supply Voltage
-SAMPLE_PATTERN += r'(.{4})'     #  18: ref_avg Reference Channel Average
-SAMPLE_PATTERN += r'(.{4})'     #  19: ref_std Reference Channel Variance
-SAMPLE_PATTERN += r'(.{4})'     #  20: sw_dark Sea-Water Dark
-SAMPLE_PATTERN += r'(.{4})'     #  21: spec_avg All Channels Average
-SAMPLE_PATTERN += r'(.{2})'     #  22: Channel 1
-SAMPLE_PATTERN += r'(.{2})'     #  23: Channel 2
-SAMPLE_PATTERN += r'(.{2})'     #  24: Channel 3
-SAMPLE_PATTERN += r'(.{2})'     #  25: Channel 4
-SAMPLE_PATTERN += r'(.{2})'     #  26: Channel 5
-SAMPLE_PATTERN += r'(.{2})'     #  27: Channel 6
-SAMPLE_PATTERN += r'(.{2})'     #  28: Channel 7
-SAMPLE_PATTERN += r'(.{2})'     #  29: Channel 8
-SAMPLE_PATTERN += r'(.{2})'     #  30: Channel 9
-SAMPLE_PATTERN += r'(.{2})'     #  31: Channel 10
-SAMPLE_PATTERN += r'(.{2})'     #  32: Channel 11
-SAMPLE_PATTERN += r'(.{2})'     #  33: Channel 12
-SAMPLE_PATTERN += r'(.{2})'     #  34: Channel 13
-SAMPLE_PATTERN += r'(.{2})'     #  35: Channel 14
-SAMPLE_PATTERN += r'(.{2})'     #  36: Channel 15
-SAMPLE_PATTERN += r'(.{2})'     #  37: Channel 16
-SAMPLE_PATTERN += r'(.{2})'     #  38: Channel 17
-SAMPLE_PATTERN += r'(.{2})'     #  39: Channel 18
-SAMPLE_PATTERN += r'(.{2})'     #  40: Channel 19
-SAMPLE_PATTERN += r'(.{2})'     #  41: Channel 20
-SAMPLE_REGEX = re.compile(SAMPLE_PATTERN)
+SAMPLE_SYNC = 'SAT'              # Frame sync
+SAMPLE_CHANNELS = 20
+SAMPLE_STRUCT = struct.Struct('>' +
+                              '3s' +     # Frame Type
+                              '4s' +     # Serial Number
+                              'i' +      # Date
+                              'd' +      # Time
+                              'f' +      # Nitrate Concentration
+                              'f' +      # AUX1
+                              'f' +      # AUX2
+                              'f' +      # AUX3
+                              'f' +      # RMS ERROR
+                              'f' +      # t_int Interior Temp
+                              'f' +      # t_spec Spectrometer Temp
+                              'f' +      # t_lamp Lamp Temp
+                              'f' +      # lamp_time Lamp Time
+                              'f' +      # humidity Interior Humidity
+                              'f' +      # volt_12 Lamp Power Supply Voltage
+                              'f' +      # volt_5 Internal Analog Power Supply Voltage
+                              'f' +      # volt_main Main Internal Power Supply Voltage
+                              'f' +      # ref_avg Reference Channel Average
+                              'f' +      # ref_std Reference Channel Variance
+                              'f' +      # sw_dark Sea-Water Dark
+                              'f' +      # spec_avg All Channels Average
+                              '%dH' % SAMPLE_CHANNELS)  # Channels 1 to 20
+
+# the regex only finds the frames, the fields are unpacked with SAMPLE_STRUCT
+SAMPLE_PATTERN = r'%s.{%d}' % (SAMPLE_SYNC, SAMPLE_STRUCT.size)
+SAMPLE_REGEX = re.compile(SAMPLE_PATTERN, re.DOTALL)
 
 # Packet config for ISUSV3 data granules.
 STREAM_NAME_PARSED = 'parsed'
@@ -476,6 +461,29 @@ class ISUSDataParticleKey(BaseEnum):
     CH019 = "ch019"
     CH020 = "ch020"
 
+# keys of the numeric values in a sample frame, in frame order
+ISUS_SAMPLE_VALUE_KEYS = [ISUSDataParticleKey.DATE,
+                          ISUSDataParticleKey.TIME,
+                          ISUSDataParticleKey.NTR_CONC,
+                          ISUSDataParticleKey.AUX1,
+                          ISUSDataParticleKey.AUX2,
+                          ISUSDataParticleKey.AUX3,
+                          ISUSDataParticleKey.RMS_ERROR,
+                          ISUSDataParticleKey.T_INT,
+                          ISUSDataParticleKey.T_SPEC,
+                          ISUSDataParticleKey.T_LAMP,
+                          ISUSDataParticleKey.LAMP_TIME,
+                          ISUSDataParticleKey.HUMIDITY,
+                          ISUSDataParticleKey.VOLT_12,
+                          ISUSDataParticleKey.VOLT_5,
+                          ISUSDataParticleKey.VOLT_MAIN,
+                          ISUSDataParticleKey.REF_AVG,
+                          ISUSDataParticleKey.REF_STD,
+                          ISUSDataParticleKey.SW_DARK,
+                          ISUSDataParticleKey.SPEC_AVG] + \
+                         [getattr(ISUSDataParticleKey, 'CH%03d' % channel)
+                          for channel in range(1, SAMPLE_CHANNELS + 1)]
+
 class ISUSDataParticle(DataParticle):
     """
     Routines for parsing raw data into a data particle structure. Override
@@ -495,135 +503,18 @@ class ISUSDataParticle(DataParticle):
         if not match:
             raise SampleException("No regex match of parsed sample data: [%s]" %
                                   self.raw_data)
-            
-        try:
-            frame_type = str(match.group(1))
-            serial_num = str(match.group(2))
-            date = struct.unpack_from('>i', match.group(3))
-            time = struct.unpack_from('>d', match.group(4))
-            ntr_conc = struct.unpack_from('>f', match.group(5))
-            aux1 = struct.unpack_from('>f', match.group(6))
-            aux2 = struct.unpack_from('>f', match.group(7))
-            aux3 = struct.unpack_from('>f', match.group(8))
-            rms_error = struct.unpack_from('>f', match.group(9))
-            t_int = struct.unpack_from('>f', match.group(10))
-            t_spec = struct.unpack_from('>f', match.group(11))
-            t_lamp = struct.unpack_from('>f', match.group(12))
-            lamp_time = struct.unpack_from('>f', match.group(13))
-            humidity = struct.unpack_from('>f', match.group(14))
-            volt_12 = struct.unpack_from('>f', match.group(15))
-            volt_5 = struct.unpack_from('>f', match.group(16))
-            volt_main = struct.unpack_from('>f', match.group(17))
-            ref_avg = struct.unpack_from('>f', match.group(18))
-            ref_std = struct.unpack_from('>f', match.group(19))
-            sw_dark = struct.unpack_from('>f', match.group(20))
-            spec_avg = struct.unpack_from('>f', match.group(21))
-            ch001 = struct.unpack_from('>H', match.group(22))
-            ch002 = struct.unpack_from('>H', match.group(23))
-            ch003 = struct.unpack_from('>H', match.group(24))
-            ch004 = struct.unpack_from('>H', match.group(25))
-            ch005 = struct.unpack_from('>H', match.group(26))
-            ch006 = struct.unpack_from('>H', match.group(27))
-            ch007 = struct.unpack_from('>H', match.group(28))
-            ch008 = struct.unpack_from('>H', match.group(29))
-            ch009 = struct.unpack_from('>H', match.group(30))
-            ch010 = struct.unpack_from('>H', match.group(31))
-            ch011 = struct.unpack_from('>H', match.group(32))
-            ch012 = struct.unpack_from('>H', match.group(33))
-            ch013 = struct.unpack_from('>H', match.group(34))
-            ch014 = struct.unpack_from('>H', match.group(35))
-            ch015 = struct.unpack_from('>H', match.group(36))
-            ch016 = struct.unpack_from('>H', match.group(37))
-            ch017 = struct.unpack_from('>H', match.group(38))
-            ch018 = struct.unpack_from('>H', match.group(39))
-            ch019 = struct.unpack_from('>H', match.group(40))
-            ch020 = struct.unpack_from('>H', match.group(41))
-        except ValueError:
-            raise SampleException("ValueError while parsing data: [%s]" %
-                                  self.raw_data)
-        
+
+        values = SAMPLE_STRUCT.unpack_from(self.raw_data, len(SAMPLE_SYNC))
+
+        # frame type and serial number are strings, the rest of the values
+        # are published as one element lists
         result = [{DataParticleKey.VALUE_ID: ISUSDataParticleKey.FRAME_TYPE,
-                   DataParticleKey.VALUE: frame_type},
+                   DataParticleKey.VALUE: values[0]},
                   {DataParticleKey.VALUE_ID: ISUSDataParticleKey.SERIAL_NUM,
-                   DataParticleKey.VALUE: serial_num},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.DATE,
-                    DataParticleKey.VALUE: date},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.TIME,
-                    DataParticleKey.VALUE: time},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.NTR_CONC,
-                    DataParticleKey.VALUE: ntr_conc},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.AUX1,
-                    DataParticleKey.VALUE: aux1},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.AUX2,
-                    DataParticleKey.VALUE: aux2},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.AUX3,
-                    DataParticleKey.VALUE: aux3},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.RMS_ERROR,
-                    DataParticleKey.VALUE: rms_error},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.T_INT,
-                    DataParticleKey.VALUE: t_int},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.T_SPEC,
-                    DataParticleKey.VALUE: t_spec},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.T_LAMP,
-                    DataParticleKey.VALUE: t_lamp},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.LAMP_TIME,
-                    DataParticleKey.VALUE: lamp_time},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.HUMIDITY,
-                    DataParticleKey.VALUE: humidity},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.VOLT_12,
-                    DataParticleKey.VALUE: volt_12},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.VOLT_5,
-                    DataParticleKey.VALUE: volt_5},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.VOLT_MAIN,
-                    DataParticleKey.VALUE: volt_main},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.REF_AVG,
-                    DataParticleKey.VALUE: ref_avg},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.REF_STD,
-                    DataParticleKey.VALUE: ref_std},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.SW_DARK,
-                    DataParticleKey.VALUE: sw_dark},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.SPEC_AVG,
-                    DataParticleKey.VALUE: spec_avg},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.CH001,
-                    DataParticleKey.VALUE: ch001},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.CH002,
-                    DataParticleKey.VALUE: ch002},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.CH003,
-                    DataParticleKey.VALUE: ch003},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.CH004,
-                    DataParticleKey.VALUE: ch004},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.CH005,
-                    DataParticleKey.VALUE: ch005},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.CH006,
-                    DataParticleKey.VALUE: ch006},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.CH007,
-                    DataParticleKey.VALUE: ch007},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.CH008,
-                    DataParticleKey.VALUE: ch008},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.CH009,
-                    DataParticleKey.VALUE: ch009},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.CH010,
-                    DataParticleKey.VALUE: ch010},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.CH011,
-                    DataParticleKey.VALUE: ch011},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.CH012,
-                    DataParticleKey.VALUE: ch012},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.CH013,
-                    DataParticleKey.VALUE: ch013},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.CH014,
-                    DataParticleKey.VALUE: ch014},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.CH015,
-                    DataParticleKey.VALUE: ch015},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.CH016,
-                    DataParticleKey.VALUE: ch016},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.CH017,
-                    DataParticleKey.VALUE: ch017},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.CH018,
-                    DataParticleKey.VALUE: ch018},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.CH019,
-                    DataParticleKey.VALUE: ch019},
-                  {DataParticleKey.VALUE_ID: ISUSDataParticleKey.CH020,
-                    DataParticleKey.VALUE: ch020}]
+                   DataParticleKey.VALUE: values[1]}]
+        for (key, value) in zip(ISUS_SAMPLE_VALUE_KEYS, values[2:]):
+            result.append({DataParticleKey.VALUE_ID: key,
+                           DataParticleKey.VALUE: (value,)})
         return result
 
 """
@@ -770,18 +661,10 @@ class Protocol(MenuInstrumentProtocol):
     def sieve_function(raw_data):
         """ The method that splits samples
         """
-        patterns = []
-        matchers = []
         return_list = []
 
-        patterns.append((SAMPLE_PATTERN)) 
-
-        for pattern in patterns:
-            matchers.append(re.compile(pattern))
-
-        for matcher in matchers:
-            for match in matcher.finditer(raw_data):
-                return_list.append((match.start(), match.end()))
+        for match in SAMPLE_REGEX.finditer(raw_data):
+            return_list.append((match.start(), match.end()))
 
         return return_list
 
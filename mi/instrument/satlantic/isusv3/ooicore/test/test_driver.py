@@ -332,6 +332,27 @@ class ISUS3UnitTestCase(InstrumentDriverUnitTestCase):
         #self.assertTrue(self.parsed_stream_received)
 
         
+    def test_sample_particle(self):
+        """
+        Decode a full binary frame, with a newline byte in the spectrum
+        """
+        test_sample = "SAT" + "NDF" + "0196"
+        test_sample += "\x00\x1e\xb4\xa6"                  # Date
+        test_sample += "\x40\x34\x85\x83\x98\xe9\x70\x71"  # Time
+        test_sample += "\x42\xed\x9a\x37"                  # ntr_conc
+        test_sample += "\x00\x00\x00\x00" * 16             # aux1 to spec_avg
+        test_sample += "\x03\x8b" * 19 + "\x0a\x0a"         # channels
+
+        particle = ISUSDataParticle(test_sample, port_timestamp = 3558720820.531179)
+        values = dict((value[DataParticleKey.VALUE_ID], value[DataParticleKey.VALUE])
+                      for value in particle._build_parsed_values())
+        self.assertEqual(values['frame_type'], 'NDF')
+        self.assertEqual(values['serial_num'], '0196')
+        self.assertEqual(values['date'], (0x1eb4a6,))
+        self.assertAlmostEqual(values['ntr_conc'][0], 118.80, places=2)
+        self.assertEqual(values['ch001'], (0x038b,))
+        self.assertEqual(values['ch020'], (0x0a0a,))
+
     def test_packet_invalid_sample(self):
         # instantiate a mock object for port agent client
         # not sure doing that here is that helpful...
@@ -14,6 +14,9 @@ __license__ = 'Apache 2.0'
 import re
 import time
 import string
+from array import array
+from collections import deque
+from functools import partial
 
 from mi.core.log import get_logger ; log = get_logger()
 
@@ -50,6 +53,13 @@ TIDE_REGEX_MATCHER = re.compile(TIDE_REGEX)
 WAVE_REGEX = r'(wave: start time =.*?wave: end burst\r\n)'
 WAVE_REGEX_MATCHER = re.compile(WAVE_REGEX, re.DOTALL)
 
+# wave burst lines, parsed one at a time as the burst arrives
+WAVE_START = 'wave: start time ='
+WAVE_END = 'wave: end burst'
+WAVE_START_TIME_MATCHER = re.compile(r'wave: start time = +(\d+ [A-Za-z]{3} \d{4} \d+:\d+:\d+)')
+WAVE_PTFREQ_MATCHER = re.compile(r'wave: ptfreq = ([\d\.]+)')
+WAVE_PTRAW_MATCHER = re.compile(r' *(-?\d+\.\d+)')
+
 STATS_REGEX = r'(deMeanTrend.*?H1/100 = [\d\.e+]+\r\n)'
 STATS_REGEX_MATCHER = re.compile(STATS_REGEX, re.DOTALL)
 
@@ -289,6 +299,46 @@ class SBE26plusWaveBurstDataParticleKey(BaseEnum):
     PTFREQ = "ptemp_frequency"         # ptfreq = pressure temperature frequency (Hz);
     PTRAW = "absolute_pressure_burst"  # calculated pressure temperature number
 
+class SBE26plusWaveBurst(object):
+    """
+    Wave burst values, parsed a line at a time
+    """
+    def __init__(self):
+        self.text_timestamp = None
+        self.ptfreq = None
+        self.ptraw = array('d')
+        # the end of burst line has been parsed
+        self.complete = False
+        # the first line that isn't part of a burst
+        self.bad_line = None
+
+    def add_line(self, line):
+        """
+        Parse the next line of the burst
+        @param line The line, without the newline
+        """
+        if WAVE_END in line:
+            self.complete = True
+
+        match = WAVE_PTRAW_MATCHER.match(line)
+        if match:
+            self.ptraw.append(float(match.group(1)))
+            return
+
+        match = WAVE_START_TIME_MATCHER.match(line)
+        if match:
+            self.text_timestamp = match.group(1)
+            return
+
+        match = WAVE_PTFREQ_MATCHER.match(line)
+        if match:
+            self.ptfreq = float(match.group(1))
+            return
+
+        # skip blank lines
+        if len(line) and not self.complete and self.bad_line is None:
+            self.bad_line = line
+
 class SBE26plusWaveBurstDataParticle(DataParticle):
     """
     Routines for parsing raw data into a data particle structure. Override
@@ -296,6 +346,14 @@ class SBE26plusWaveBurstDataParticle(DataParticle):
     """
     _data_particle_type = DataParticleType.WAVE_BURST
 
+    def __init__(self, raw_data, burst=None, **kwargs):
+        """
+        @param burst SBE26plusWaveBurst already parsed from the raw data by
+           the sieve, None to parse the raw data
+        """
+        DataParticle.__init__(self, raw_data, **kwargs)
+        self._burst = burst
+
     def _build_parsed_values(self):
         """
         Take something in the autosample format and split it into
@@ -303,71 +361,30 @@ class SBE26plusWaveBurstDataParticle(DataParticle):
 
         @throws SampleException If there is a problem with sample creation
         """
+        burst = self._burst
+        if burst is None:
+            burst = SBE26plusWaveBurst()
+            for line in self.raw_data.split(NEWLINE):
+                burst.add_line(line)
 
-        start_time_pat = r'wave: start time = +(\d+ [A-Za-z]{3} \d{4} \d+:\d+:\d+)'
-        start_time_matcher = re.compile(start_time_pat)
+        if burst.bad_line is not None:
+            raise SampleException("No regex match of parsed sample data: ROW: [%s]" % burst.bad_line)
+        if burst.text_timestamp is None:
+            raise SampleException("No start time in wave burst: [%s]" % self.raw_data)
 
-        ptfreq_pat = r'wave: ptfreq = ([\d\.]+)'
-        ptfreq_matcher = re.compile(ptfreq_pat)
-
-        ptraw_pat = r' *(-?\d+\.\d+)'
-        ptraw_matcher = re.compile(ptraw_pat)
-
-        # initialize
-        timestamp = None
-        ptfreq = None
-        ptraw = []
-
-        for line in self.raw_data.split(NEWLINE):
-            log.debug("SBE26plusWaveBurstDataParticle._build_parsed_values LINE = " + repr(line))
-            matched = False
-
-            # skip blank lines
-            if len(line) == 0:
-                matched = True
-
-            match = start_time_matcher.match(line)
-            if match:
-                matched = True
-                try:
-                    text_timestamp = match.group(1)
-                    py_timestamp = time.strptime(text_timestamp, "%d %b %Y %H:%M:%S")
-                    self.set_internal_timestamp(unix_time=time.mktime(py_timestamp))
-                except ValueError:
-                    raise SampleException("ValueError while decoding floats in data: [%s]" %
-                                      self.raw_data)
-
-            match = ptfreq_matcher.match(line)
-            if match:
-                matched = True
-                try:
-                    ptfreq = float(match.group(1))
-                except ValueError:
-                    raise SampleException("ValueError while decoding floats in data: [%s]" %
-                                          self.raw_data)
-
-            match = ptraw_matcher.match(line)
-            if match:
-                matched = True
-                try:
-                    ptraw.append(float(match.group(1)))
-                except ValueError:
-                    raise SampleException("ValueError while decoding floats in data: [%s]" %
-                                          self.raw_data)
-
-            if 'wave: end burst' in line:
-                matched = True
-                log.debug("End of record detected")
-
-            if False == matched:
-                raise SampleException("No regex match of parsed sample data: ROW: [%s]" % line)
+        try:
+            py_timestamp = time.strptime(burst.text_timestamp, "%d %b %Y %H:%M:%S")
+            self.set_internal_timestamp(unix_time=time.mktime(py_timestamp))
+        except ValueError:
+            raise SampleException("ValueError while decoding floats in data: [%s]" %
+                                  self.raw_data)
 
         result = [{DataParticleKey.VALUE_ID: SBE26plusWaveBurstDataParticleKey.TIMESTAMP,
-                   DataParticleKey.VALUE: text_timestamp},
+                   DataParticleKey.VALUE: burst.text_timestamp},
                   {DataParticleKey.VALUE_ID: SBE26plusWaveBurstDataParticleKey.PTFREQ,
-                   DataParticleKey.VALUE: ptfreq},
+                   DataParticleKey.VALUE: burst.ptfreq},
                   {DataParticleKey.VALUE_ID: SBE26plusWaveBurstDataParticleKey.PTRAW,
-                   DataParticleKey.VALUE: ptraw}]
+                   DataParticleKey.VALUE: burst.ptraw.tolist()}]
 
         return result
 
@@ -1007,6 +1024,101 @@ class SBE26plusDeviceStatusDataParticle(DataParticle):
         return result
 
 
+###############################################################################
+# Sieve
+###############################################################################
+
+class SBE26plusSieve(object):
+    """
+    Chunker sieve that assembles wave bursts as they stream in.  The lines
+    of a burst are parsed once, as they arrive, instead of matching the
+    whole burst again with every packet until its end arrives.  The
+    other structures are found with their regexes, outside of a burst
+    still being assembled.
+    """
+    sieve_matchers = [TS_REGEX_MATCHER,
+                      TIDE_REGEX_MATCHER,
+                      STATS_REGEX_MATCHER,
+                      DS_REGEX_MATCHER,
+                      DC_REGEX_MATCHER]
+
+    def __init__(self):
+        # data after the last chunk found by the previous call
+        self._pending = None
+        # index in the pending data of the first line not parsed yet
+        self._scanned = 0
+        # index in the pending data of the burst being assembled
+        self._burst_start = None
+        self._burst = None
+        # (chunk length, burst) of the bursts found and not yet used
+        self._bursts = deque()
+
+    def __call__(self, raw_data):
+        """
+        @param raw_data The data to sieve
+        @retval list of (start, end) tuples of the chunks found
+        """
+        if self._pending is None or not raw_data.startswith(self._pending):
+            self._scanned = 0
+            self._burst_start = None
+            self._burst = None
+
+        return_list = self._assemble_bursts(raw_data)
+        bursts = list(return_list)
+
+        search_end = len(raw_data) if self._burst is None else self._burst_start
+        for matcher in self.sieve_matchers:
+            for match in matcher.finditer(raw_data, 0, search_end):
+                if not [burst for burst in bursts
+                        if match.start() < burst[1] and burst[0] < match.end()]:
+                    return_list.append((match.start(), match.end()))
+
+        end = max([chunk_end for (chunk_start, chunk_end) in return_list] or [0])
+        self._pending = raw_data[end:]
+        self._scanned = max(0, self._scanned - end)
+        if self._burst is not None:
+            self._burst_start -= end
+        return return_list
+
+    def _assemble_bursts(self, raw_data):
+        """
+        Parse the new lines of the data into wave bursts
+        @retval list of (start, end) tuples of the bursts completed
+        """
+        return_list = []
+        while True:
+            if self._burst is None:
+                start = raw_data.find(WAVE_START, self._scanned)
+                if start == -1:
+                    self._scanned = max(self._scanned, len(raw_data) - len(WAVE_START) + 1)
+                    return return_list
+                self._burst_start = self._scanned = start
+                self._burst = SBE26plusWaveBurst()
+
+            line_end = raw_data.find(NEWLINE, self._scanned)
+            if line_end == -1:
+                return return_list
+
+            self._burst.add_line(raw_data[self._scanned:line_end])
+            self._scanned = line_end + len(NEWLINE)
+
+            if self._burst.complete:
+                return_list.append((self._burst_start, self._scanned))
+                self._bursts.append((self._scanned - self._burst_start, self._burst))
+                self._burst = None
+
+    def pop_burst(self, chunk):
+        """
+        Get the burst assembled from a wave burst chunk
+        @param chunk The wave burst chunk, the next burst found
+        @retval SBE26plusWaveBurst, None if the chunk wasn't assembled here
+        """
+        while self._bursts:
+            (length, burst) = self._bursts.popleft()
+            if length == len(chunk):
+                return burst
+        return None
+
 ###############################################################################
 # Driver
 ###############################################################################
@@ -1131,7 +1243,8 @@ class Protocol(SeaBirdProtocol):
         # commands sent sent to device to be filtered in responses for telnet DA
         self._sent_cmds = []
 
-        self._chunker = StringChunker(Protocol.sieve_function)
+        self._sieve = SBE26plusSieve()
+        self._chunker = StringChunker(self._sieve)
 
         self._add_scheduler_event(ScheduledJob.ACQUIRE_STATUS, ProtocolEvent.ACQUIRE_STATUS)
         self._add_scheduler_event(ScheduledJob.CALIBRATION_COEFFICIENTS, ProtocolEvent.ACQUIRE_CONFIGURATION)
@@ -1143,20 +1256,7 @@ class Protocol(SeaBirdProtocol):
         Chunker sieve method to help the chunker identify chunks.
         @returns a list of chunks identified, if any.  The chunks are all the same type.
         """
-        sieve_matchers = [TS_REGEX_MATCHER,
-                          TIDE_REGEX_MATCHER,
-                          WAVE_REGEX_MATCHER,
-                          STATS_REGEX_MATCHER,
-                          DS_REGEX_MATCHER,
-                          DC_REGEX_MATCHER]
-
-        return_list = []
-
-        for matcher in sieve_matchers:
-            for match in matcher.finditer(raw_data):
-                return_list.append((match.start(), match.end()))
-
-        return return_list
+        return SBE26plusSieve()(raw_data)
 
     def _filter_capabilities(self, events):
         """
@@ -2627,7 +2727,9 @@ class Protocol(SeaBirdProtocol):
         """
         if(self._extract_sample(SBE26plusTideSampleDataParticle, TS_REGEX_MATCHER, chunk, timestamp)): return
         if(self._extract_sample(SBE26plusTideSampleDataParticle, TIDE_REGEX_MATCHER, chunk, timestamp)): return
-        if(self._extract_sample(SBE26plusWaveBurstDataParticle, WAVE_REGEX_MATCHER, chunk, timestamp)): return
+        if chunk.startswith(WAVE_START):
+            particle_class = partial(SBE26plusWaveBurstDataParticle, burst=self._sieve.pop_burst(chunk))
+            if(self._extract_sample(particle_class, WAVE_REGEX_MATCHER, chunk, timestamp)): return
         if(self._extract_sample(SBE26plusStatisticsDataParticle, STATS_REGEX_MATCHER, chunk, timestamp)): return
         if(self._extract_sample(SBE26plusDeviceCalibrationDataParticle, DC_REGEX_MATCHER, chunk, timestamp)): return
         if(self._extract_sample(SBE26plusDeviceStatusDataParticle, DS_REGEX_MATCHER, chunk, timestamp)): return
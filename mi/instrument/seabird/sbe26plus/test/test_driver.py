@@ -60,6 +60,7 @@ from mi.instrument.seabird.sbe26plus.driver import ProtocolEvent
 from mi.instrument.seabird.sbe26plus.driver import Capability
 from mi.instrument.seabird.sbe26plus.driver import Prompt
 from mi.instrument.seabird.sbe26plus.driver import Protocol
+from mi.instrument.seabird.sbe26plus.driver import SBE26plusSieve
 from mi.instrument.seabird.sbe26plus.driver import InstrumentCmds
 from mi.instrument.seabird.sbe26plus.driver import NEWLINE
 from mi.instrument.seabird.sbe26plus.driver import SBE26plusTideSampleDataParticle
@@ -433,6 +434,33 @@ class SeaBird26PlusUnitTest(SeaBirdUnitTest, SeaBird26PlusMixin):
         self.assert_chunker_fragmented_sample(chunker, SAMPLE_DEVICE_STATUS, 512)
         self.assert_chunker_combined_sample(chunker, SAMPLE_DEVICE_STATUS)
 
+    def test_wave_burst_sieve(self):
+        """
+        Verify a wave burst is assembled as it streams in, and the particle
+        from the assembled burst matches the particle parsed from the chunk
+        """
+        sieve = SBE26plusSieve()
+        chunker = StringChunker(sieve)
+
+        self.assert_chunker_sample_with_noise(chunker, SAMPLE_TIDE_DATA)
+        for index in range(0, len(SAMPLE_WAVE_BURST), 16):
+            chunker.add_chunk(SAMPLE_WAVE_BURST[index:index+16], self.get_ntp_timestamp())
+            if index + 16 < len(SAMPLE_WAVE_BURST):
+                self.assertEqual(chunker.get_next_data(), (None, None))
+
+        (timestamp, result) = chunker.get_next_data()
+        self.assertEqual(result, SAMPLE_WAVE_BURST)
+
+        burst = sieve.pop_burst(result)
+        self.assertEqual(burst.text_timestamp, '05 Oct 2012 01:10:54')
+        self.assertEqual(burst.ptfreq, 171791.359)
+        self.assertEqual(burst.ptraw[:3].tolist(), [-157.6064, 114.5064, -14.5165])
+        self.assertEqual(sieve.pop_burst(result), None)
+
+        particle = SBE26plusWaveBurstDataParticle(result, burst=burst, port_timestamp=3558720820.531179)
+        parsed_particle = SBE26plusWaveBurstDataParticle(result, port_timestamp=3558720820.531179)
+        self.assertEqual(particle._build_parsed_values(), parsed_particle._build_parsed_values())
+
     def test_got_data(self):
         """
         Verify sample data passed through the got data method produces the correct data particles
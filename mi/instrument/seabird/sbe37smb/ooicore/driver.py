@@ -175,6 +175,12 @@ NEWLINE = '\r\n'
 # SBE37 default timeout.
 SBE37_TIMEOUT = 60
 
+# Seconds a cached sample number is fresh, it counts up while logging
+SAMPLENUM_EXPIRATION = 60
+# Seconds past expiration a cached sample number is served while waiting to
+# be refreshed when the protocol next enters command state
+SAMPLENUM_STALE_WINDOW = 600
+
 # Sample looks something like:
 # '#87.9140,5.42747, 556.864,   37.1829, 1506.961, 02 Jan 2001, 15:34:51'
 # Where C, T, and D are first 3 number fields respectively
@@ -886,6 +892,9 @@ class SBE37Protocol(CommandResponseInstrumentProtocol):
         # Command device to initialize parameters and send a config change event.
         self._protocol_fsm.on_event(SBE37ProtocolEvent.INIT_PARAMS)
 
+        # Refresh the parameters served stale while we were busy
+        self._revalidate_params()
+
         # Tell driver superclass to send a state change event.
         # Superclass will query the state.
         self._driver_event(DriverAsyncEvent.STATE_CHANGE)
@@ -1540,22 +1549,28 @@ class SBE37Protocol(CommandResponseInstrumentProtocol):
                              r'(do not )?output salinity with each sample',
                              lambda match : False if match.group(1) else True,
                              self._true_false_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_STATUS,
                              type=ParameterDictType.BOOL)
         self._param_dict.add(SBE37Parameter.OUTPUTSV,
                              r'(do not )?output sound velocity with each sample',
                              lambda match : False if match.group(1) else True,
                              self._true_false_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_STATUS,
                              type=ParameterDictType.BOOL)
         self._param_dict.add(SBE37Parameter.NAVG,
                              r'number of samples to average = (\d+)',
                              lambda match : int(match.group(1)),
                              self._int_to_string,
                              direct_access=True,
+                             refresh_command=InstrumentCmds.DISPLAY_STATUS,
                              type=ParameterDictType.INT)
         self._param_dict.add(SBE37Parameter.SAMPLENUM,
                              r'samplenumber = (\d+), free = \d+',
                              lambda match : int(match.group(1)),
                              self._int_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_STATUS,
+                             expiration=SAMPLENUM_EXPIRATION,
+                             stale_window=SAMPLENUM_STALE_WINDOW,
                              type=ParameterDictType.INT)
         self._param_dict.add(SBE37Parameter.INTERVAL,
                              r'sample interval = (\d+) seconds',
@@ -1564,169 +1579,202 @@ class SBE37Protocol(CommandResponseInstrumentProtocol):
                              default_value=1,
                              startup_param=True,
                              direct_access = True,
+                             refresh_command=InstrumentCmds.DISPLAY_STATUS,
                              type=ParameterDictType.INT)
         self._param_dict.add(SBE37Parameter.STORETIME,
                              r'(do not )?store time with each sample',
                              lambda match : False if match.group(1) else True,
                              self._true_false_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_STATUS,
                              type=ParameterDictType.BOOL)
         self._param_dict.add(SBE37Parameter.TXREALTIME,
                              r'(do not )?transmit real-time data',
                              lambda match : False if match.group(1) else True,
                              self._true_false_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_STATUS,
                              type=ParameterDictType.BOOL)
         self._param_dict.add(SBE37Parameter.SYNCMODE,
                              r'serial sync mode (enabled|disabled)',
                              lambda match : False if (match.group(1)=='disabled') else True,
                              self._true_false_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_STATUS,
                              type=ParameterDictType.BOOL)
         self._param_dict.add(SBE37Parameter.SYNCWAIT,
                              r'wait time after serial sync sampling = (\d+) seconds',
                              lambda match : int(match.group(1)),
                              self._int_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_STATUS,
                              type=ParameterDictType.INT)
         self._param_dict.add(SBE37Parameter.TCALDATE,
                              r'temperature: +((\d+)-([a-zA-Z]+)-(\d+))',
                              lambda match : self._string_to_date(match.group(1), '%d-%b-%y'),
                              self._date_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.LIST,
                              visibility=ParameterDictVisibility.READ_ONLY)
         self._param_dict.add(SBE37Parameter.TA0,
                              r' +TA0 = (-?\d.\d\d\d\d\d\de[-+]\d\d)',
                              lambda match : float(match.group(1)),
                              self._float_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.FLOAT)
         self._param_dict.add(SBE37Parameter.TA1,
                              r' +TA1 = (-?\d.\d\d\d\d\d\de[-+]\d\d)',
                              lambda match : float(match.group(1)),
                              self._float_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.FLOAT)
         self._param_dict.add(SBE37Parameter.TA2,
                              r' +TA2 = (-?\d.\d\d\d\d\d\de[-+]\d\d)',
                              lambda match : float(match.group(1)),
                              self._float_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.FLOAT)
         self._param_dict.add(SBE37Parameter.TA3,
                              r' +TA3 = (-?\d.\d\d\d\d\d\de[-+]\d\d)',
                              lambda match : float(match.group(1)),
                              self._float_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.FLOAT)
         self._param_dict.add(SBE37Parameter.CCALDATE,
                              r'conductivity: +((\d+)-([a-zA-Z]+)-(\d+))',
                              lambda match : self._string_to_date(match.group(1), '%d-%b-%y'),
                              self._date_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.LIST,
                              visibility=ParameterDictVisibility.READ_ONLY)
         self._param_dict.add(SBE37Parameter.CG,
                              r' +G = (-?\d.\d\d\d\d\d\de[-+]\d\d)',
                              lambda match : float(match.group(1)),
                              self._float_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.FLOAT)
         self._param_dict.add(SBE37Parameter.CH,
                              r' +H = (-?\d.\d\d\d\d\d\de[-+]\d\d)',
                              lambda match : float(match.group(1)),
                              self._float_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.FLOAT)
         self._param_dict.add(SBE37Parameter.CI,
                              r' +I = (-?\d.\d\d\d\d\d\de[-+]\d\d)',
                              lambda match : float(match.group(1)),
                              self._float_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.FLOAT)
         self._param_dict.add(SBE37Parameter.CJ,
                              r' +J = (-?\d.\d\d\d\d\d\de[-+]\d\d)',
                              lambda match : float(match.group(1)),
                              self._float_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.FLOAT)
         self._param_dict.add(SBE37Parameter.WBOTC,
                              r' +WBOTC = (-?\d.\d\d\d\d\d\de[-+]\d\d)',
                              lambda match : float(match.group(1)),
                              self._float_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.FLOAT)
         self._param_dict.add(SBE37Parameter.CTCOR,
                              r' +CTCOR = (-?\d.\d\d\d\d\d\de[-+]\d\d)',
                              lambda match : float(match.group(1)),
                              self._float_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.FLOAT)
         self._param_dict.add(SBE37Parameter.CPCOR,
                              r' +CPCOR = (-?\d.\d\d\d\d\d\de[-+]\d\d)',
                              lambda match : float(match.group(1)),
                              self._float_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.FLOAT)
         self._param_dict.add(SBE37Parameter.PCALDATE,
                              r'pressure .+ ((\d+)-([a-zA-Z]+)-(\d+))',
                              lambda match : self._string_to_date(match.group(1), '%d-%b-%y'),
                              self._date_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.LIST,
                              visibility=ParameterDictVisibility.READ_ONLY)
         self._param_dict.add(SBE37Parameter.PA0,
                              r' +PA0 = (-?\d.\d\d\d\d\d\de[-+]\d\d)',
                              lambda match : float(match.group(1)),
                              self._float_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.FLOAT)
         self._param_dict.add(SBE37Parameter.PA1,
                              r' +PA1 = (-?\d.\d\d\d\d\d\de[-+]\d\d)',
                              lambda match : float(match.group(1)),
                              self._float_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.FLOAT)
         self._param_dict.add(SBE37Parameter.PA2,
                              r' +PA2 = (-?\d.\d\d\d\d\d\de[-+]\d\d)',
                              lambda match : float(match.group(1)),
                              self._float_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.FLOAT)
         self._param_dict.add(SBE37Parameter.PTCA0,
                              r' +PTCA0 = (-?\d.\d\d\d\d\d\de[-+]\d\d)',
                              lambda match : float(match.group(1)),
                              self._float_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.FLOAT)
         self._param_dict.add(SBE37Parameter.PTCA1,
                              r' +PTCA1 = (-?\d.\d\d\d\d\d\de[-+]\d\d)',
                              lambda match : float(match.group(1)),
                              self._float_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.FLOAT)
         self._param_dict.add(SBE37Parameter.PTCA2,
                              r' +PTCA2 = (-?\d.\d\d\d\d\d\de[-+]\d\d)',
                              lambda match : float(match.group(1)),
                              self._float_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.FLOAT)
         self._param_dict.add(SBE37Parameter.PTCB0,
                              r' +PTCSB0 = (-?\d.\d\d\d\d\d\de[-+]\d\d)',
                              lambda match : float(match.group(1)),
                              self._float_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.FLOAT)
         self._param_dict.add(SBE37Parameter.PTCB1,
                              r' +PTCSB1 = (-?\d.\d\d\d\d\d\de[-+]\d\d)',
                              lambda match : float(match.group(1)),
                              self._float_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.FLOAT)
         self._param_dict.add(SBE37Parameter.PTCB2,
                              r' +PTCSB2 = (-?\d.\d\d\d\d\d\de[-+]\d\d)',
                              lambda match : float(match.group(1)),
                              self._float_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.FLOAT)
         self._param_dict.add(SBE37Parameter.POFFSET,
                              r' +POFFSET = (-?\d.\d\d\d\d\d\de[-+]\d\d)',
                              lambda match : float(match.group(1)),
                              self._float_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.FLOAT)
         self._param_dict.add(SBE37Parameter.RCALDATE,
                              r'rtc: +((\d+)-([a-zA-Z]+)-(\d+))',
                              lambda match : self._string_to_date(match.group(1), '%d-%b-%y'),
                              self._date_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.LIST)
         self._param_dict.add(SBE37Parameter.RTCA0,
                              r' +RTCA0 = (-?\d.\d\d\d\d\d\de[-+]\d\d)',
                              lambda match : float(match.group(1)),
                              self._float_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.FLOAT)
         self._param_dict.add(SBE37Parameter.RTCA1,
                              r' +RTCA1 = (-?\d.\d\d\d\d\d\de[-+]\d\d)',
                              lambda match : float(match.group(1)),
                              self._float_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.FLOAT)
         self._param_dict.add(SBE37Parameter.RTCA2,
                              r' +RTCA2 = (-?\d.\d\d\d\d\d\de[-+]\d\d)',
                              lambda match : float(match.group(1)),
                              self._float_to_string,
+                             refresh_command=InstrumentCmds.DISPLAY_CALIBRATION,
                              type=ParameterDictType.FLOAT)
 
 
@@ -30,6 +30,8 @@ from mi.core.exceptions import InstrumentParameterException
 
 from mi.core.common import BaseEnum
 from mi.core.instrument.chunker import StringChunker
+from mi.core.instrument.sami_record import unhexlify
+from mi.core.instrument.sami_record import calc_checksum
 from mi.core.instrument.data_particle import DataParticle
 from mi.core.instrument.data_particle import DataParticleKey
 from mi.core.instrument.data_particle import CommonDataParticleType
@@ -1174,11 +1176,4 @@ class SamiProtocol(CommandResponseInstrumentProtocol):
         @param s: string for check-sum analysis.
         @param num_points: number of bytes (each byte is 2-chars).
         """
-        cs = 0
-        k = 0
-        for i in range(num_points):
-            value = int(s[k:k+2], 16)  # 2-chars per data point
-            cs = cs + value
-            k = k + 2
-        cs = cs & 0xFF
-        return(cs)
+        return calc_checksum(unhexlify(s[:num_points*2]))
@@ -25,6 +25,8 @@ from mi.core.common import BaseEnum
 from mi.core.instrument.data_particle import DataParticle
 from mi.core.instrument.data_particle import DataParticleKey
 from mi.core.instrument.chunker import StringChunker
+from mi.core.instrument.sami_record import decode_record
+from mi.core.instrument.sami_record import PCO2_SAMPLE_DTYPE
 from mi.core.instrument.protocol_param_dict import ProtocolParameterDict
 from mi.core.instrument.protocol_param_dict import ParameterDictType
 from mi.core.instrument.protocol_param_dict import ParameterDictVisibility
@@ -219,21 +221,16 @@ class Pco2wSamiSampleDataParticle(DataParticle):
                          Pco2wSamiSampleDataParticleKey.THERMISTER_RAW,
                          Pco2wSamiSampleDataParticleKey.CHECKSUM]
 
-        result = []
-        grp_index = 1
+        # decode the whole record, from the unique id to the checksum.  The
+        # record fields are in the same order as the particle keys, the 14
+        # light measurements are a list.
+        (values, _) = decode_record(
+            self.raw_data[matched.start(1):matched.end(len(particle_keys))], PCO2_SAMPLE_DTYPE)
 
-        for key in particle_keys:
-            if key in [Pco2wSamiSampleDataParticleKey.LIGHT_MEASUREMENTS]:
-                # parse group 5 into 14, 2 byte (4 character) values stored in
-                # an array.
-                light = matched.group(grp_index)
-                light = [int(light[i:i+4], 16) for i in range(0, len(light), 4)]
-                result.append({DataParticleKey.VALUE_ID: key,
-                               DataParticleKey.VALUE: light})
-            else:
-                result.append({DataParticleKey.VALUE_ID: key,
-                               DataParticleKey.VALUE: int(matched.group(grp_index), 16)})
-            grp_index += 1
+        result = []
+        for (key, name) in zip(particle_keys, PCO2_SAMPLE_DTYPE.names):
+            result.append({DataParticleKey.VALUE_ID: key,
+                           DataParticleKey.VALUE: values[name]})
 
         return result
 
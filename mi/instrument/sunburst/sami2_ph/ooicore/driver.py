@@ -29,6 +29,8 @@ from mi.core.common import BaseEnum
 from mi.core.instrument.chunker import StringChunker
 from mi.core.instrument.data_particle import DataParticle
 from mi.core.instrument.data_particle import DataParticleKey
+from mi.core.instrument.sami_record import decode_record
+from mi.core.instrument.sami_record import PH_SAMPLE_DTYPE
 #from mi.core.instrument.data_particle import CommonDataParticleType
 #from mi.core.instrument.instrument_driver import DriverEvent
 #from mi.core.instrument.instrument_driver import DriverAsyncEvent
@@ -226,44 +228,18 @@ class PhsenSamiSampleDataParticle(DataParticle):
                          PhsenSamiSampleDataParticleKey.END_THERMISTOR,
                          PhsenSamiSampleDataParticleKey.CHECKSUM]
 
+        # decode the whole record, from the unique id to the checksum.  The
+        # record fields are in the same order as the particle keys.
+        (values, _) = decode_record(
+            self.raw_data[matched.start(1):matched.end(len(particle_keys))], PH_SAMPLE_DTYPE)
+
+        # fill out the data particle with values, the 16 reference light
+        # measurements and 92 light measurements from which pH is determined
+        # are lists
         result = []
-        grp_index = 1  # regex group index counter
-        unhex = lambda x: int(x, 16)
-
-        # Create secondary regexes to read the ref set and ph set into
-        # lists before putting into the data particle.
-
-        # From the regex data sample match, group 5 is a set of 16
-        # reference light measurements, and group 6 is a set of 92 light
-        # measurements from which determines pH
-        ref_measurements_string = matched.groups()[5]
-        ph_measurements_string = matched.groups()[6]
-
-        # 16 reference light measurements each 2 bytes (4 hex digits)
-        ref_regex = r'([0-9A-Fa-f]{4})' * 16
-        ref_regex_matcher = re.compile(ref_regex)
-        ref_match = ref_regex_matcher.match(ref_measurements_string)
-        ref_measurements = map(unhex, list(ref_match.groups()))
-
-        # 92 ph measurements (23 sets of 4 measurement types)
-        # each 2 bytes (4 hex digits)
-        ph_regex = r'([0-9A-Fa-f]{4})' * 92
-        ph_regex_matcher = re.compile(ph_regex)
-        ph_match = ph_regex_matcher.match(ph_measurements_string)
-        ph_measurements = map(unhex, list(ph_match.groups()))
-
-        # fill out the data particle with values
-        for key in particle_keys:
-            if key is PhsenSamiSampleDataParticleKey.REF_MEASUREMENTS:
-                result.append({DataParticleKey.VALUE_ID: key,
-                               DataParticleKey.VALUE: ref_measurements})
-            elif key is PhsenSamiSampleDataParticleKey.PH_MEASUREMENTS:
-                result.append({DataParticleKey.VALUE_ID: key,
-                               DataParticleKey.VALUE: ph_measurements})
-            else:
-                result.append({DataParticleKey.VALUE_ID: key,
-                               DataParticleKey.VALUE: unhex(matched.group(grp_index))})
-            grp_index += 1
+        for (key, name) in zip(particle_keys, PH_SAMPLE_DTYPE.names):
+            result.append({DataParticleKey.VALUE_ID: key,
+                           DataParticleKey.VALUE: values[name]})
 
         return result
 
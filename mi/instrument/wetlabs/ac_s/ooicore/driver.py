@@ -14,6 +14,7 @@ __license__ = 'Apache 2.0'
 import re
 import time
 import string
+import numpy as np
 
 from mi.core.log import get_logger ; log = get_logger()
 
@@ -34,7 +35,7 @@ from mi.core.instrument.data_particle import CommonDataParticleType
 from mi.core.instrument.chunker import StringChunker
 from mi.core.instrument.driver_dict import DriverDictKey
 
-from struct import pack
+from struct import pack, Struct
 
 # newline.
 NEWLINE = '\n'
@@ -51,24 +52,29 @@ SIZEOF_CHECKSUM_PLUS_PAD = 3   # three bytes for 2 byte checksum and 1 byte pad
 PACKET_REGISTRATION_PATTERN = '\xff\x00\xff\x00'
 PACKET_REGISTRATION_REGEX = re.compile(PACKET_REGISTRATION_PATTERN)
 
-SAMPLE_RECORD_HEADER = (r'^%s' %PACKET_REGISTRATION_PATTERN +
-                        '(.{2})' +  # group 1  - record length 
-                        '(.{1})' +  # group 2  - packet type
-                        '\x01' +    # reserved
-                        '(.{1})' +  # group 3  - meter type
-                        '(.{3})' +  # group 4  - serial number
-                        '(.{2})' +  # group 5  - A reference dark counts
-                        '(.{2})' +  # group 6  - pressure counts
-                        '(.{2})' +  # group 7  - A signal dark counts
-                        '(.{2})' +  # group 8  - raw external temp counts
-                        '(.{2})' +  # group 9  - raw internal temp counts
-                        '(.{2})' +  # group 10 - C reference dark counts
-                        '(.{2})' +  # group 11 - C signal dark counts
-                        '(.{4})' +  # group 12 - time in milliseconds since power up
-                        '\x01' +    # reserved
-                        '(.{1})')   # group 13 - number of output wavelengths
-
-SAMPLE_RECORD_HEADER_REGEX = re.compile(SAMPLE_RECORD_HEADER, re.DOTALL)
+SAMPLE_RECORD_HEADER_STRUCT = Struct('>' +
+                                     '4s' +  # packet registration
+                                     'H' +   # record length
+                                     'B' +   # packet type
+                                     'B' +   # reserved, 0x01
+                                     'B' +   # meter type
+                                     'B' +   # serial number high byte
+                                     'H' +   # serial number low word
+                                     'H' +   # A reference dark counts
+                                     'H' +   # pressure counts
+                                     'H' +   # A signal dark counts
+                                     'H' +   # raw external temp counts
+                                     'H' +   # raw internal temp counts
+                                     'H' +   # C reference dark counts
+                                     'H' +   # C signal dark counts
+                                     'I' +   # time in milliseconds since power up
+                                     'B' +   # reserved, 0x01
+                                     'B')    # number of output wavelengths
+RESERVED_BYTE = 1
+
+# wavelength counts are c reference, a reference, c signal and a signal
+SCAN_DATA_CHANNELS = 4
+SCAN_DATA_DTYPE = np.dtype('>u2')
 
 STATUS_PATTERN = r'AC-Spectra .+? quit\.'
 STATUS_REGEX = re.compile(STATUS_PATTERN, re.DOTALL)
@@ -171,19 +177,29 @@ class OPTAA_SampleDataParticle(DataParticle):
     def _build_parsed_values(self):
         
         record = self.raw_data
-        
-        match = SAMPLE_RECORD_HEADER_REGEX.match(record)
-        
-        if not match:
-            raise SampleException("OPTAA_SampleDataParticle: No regex match of parsed sample data: [%s]", record)
 
-        record_length = get_two_byte_value(match.group(1), 0)
-        
+        if len(record) < SAMPLE_RECORD_HEADER_STRUCT.size:
+            raise SampleException("OPTAA_SampleDataParticle: Invalid sample record header: [%s]", record)
+        (registration, record_length, packet_type, reserved_1, meter_type, serial_number_high,
+         serial_number_low, a_reference_dark_counts, pressure_counts, a_signal_dark_counts,
+         external_temp_raw, internal_temp_raw, c_reference_dark_counts, c_signal_dark_counts,
+         elapsed_run_time, reserved_2, num_wavelengths) = SAMPLE_RECORD_HEADER_STRUCT.unpack_from(record)
+
+        if registration != PACKET_REGISTRATION_PATTERN or \
+           reserved_1 != RESERVED_BYTE or reserved_2 != RESERVED_BYTE:
+            raise SampleException("OPTAA_SampleDataParticle: Invalid sample record header: [%s]", record)
+
+        # the wavelength counts come in groups of the four channels
+        scan_groups = max(0, -(-(record_length - INDEX_OF_START_OF_SCAN_DATA) //
+                               (SCAN_DATA_CHANNELS * SIZEOF_SCAN_DATA_SIGNAL_COUNTS)))
+        scan_data_end = INDEX_OF_START_OF_SCAN_DATA + \
+                        scan_groups * SCAN_DATA_CHANNELS * SIZEOF_SCAN_DATA_SIGNAL_COUNTS
+        if len(record) < max(record_length + SIZEOF_PACKET_RECORD_LENGTH, scan_data_end):
+            raise SampleException("OPTAA_SampleDataParticle: Data packet is %d bytes, record length is %d"
+                                  %(len(record), record_length))
+
         packet_checksum = get_two_byte_value(record, record_length)
-        checksum = 0
-        for i in range(0, record_length):
-            checksum += ord(record[i])
-            checksum &= 0xffff
+        checksum = int(np.frombuffer(record, np.uint8, record_length).sum()) & 0xffff
         if checksum != packet_checksum:
             log.debug('OPTAA_SampleDataParticle: Checksum mismatch in data packet, rcvd=%d, calc=%d.'
                       %(packet_checksum, checksum))
@@ -195,46 +211,35 @@ class OPTAA_SampleDataParticle(DataParticle):
         result.append({DataParticleKey.VALUE_ID: OPTAA_SampleDataParticleKey.RECORD_LENGTH,
                        DataParticleKey.VALUE: record_length})
         result.append({DataParticleKey.VALUE_ID: OPTAA_SampleDataParticleKey.PACKET_TYPE,
-                       DataParticleKey.VALUE: ord(match.group(2))})
+                       DataParticleKey.VALUE: packet_type})
         result.append({DataParticleKey.VALUE_ID: OPTAA_SampleDataParticleKey.METER_TYPE,
-                       DataParticleKey.VALUE: ord(match.group(3))})
+                       DataParticleKey.VALUE: meter_type})
         result.append({DataParticleKey.VALUE_ID: OPTAA_SampleDataParticleKey.SERIAL_NUMBER,
-                       DataParticleKey.VALUE: get_three_byte_value(match.group(4), 0)})
+                       DataParticleKey.VALUE: serial_number_high*2**16 + serial_number_low})
         result.append({DataParticleKey.VALUE_ID: OPTAA_SampleDataParticleKey.A_REFERENCE_DARK_COUNTS,
-                       DataParticleKey.VALUE: get_two_byte_value(match.group(5), 0)})
+                       DataParticleKey.VALUE: a_reference_dark_counts})
         result.append({DataParticleKey.VALUE_ID: OPTAA_SampleDataParticleKey.PRESSURE_COUNTS,
-                       DataParticleKey.VALUE: get_two_byte_value(match.group(6), 0)})
+                       DataParticleKey.VALUE: pressure_counts})
         result.append({DataParticleKey.VALUE_ID: OPTAA_SampleDataParticleKey.A_SIGNAL_DARK_COUNTS,
-                       DataParticleKey.VALUE: get_two_byte_value(match.group(7), 0)})
+                       DataParticleKey.VALUE: a_signal_dark_counts})
         result.append({DataParticleKey.VALUE_ID: OPTAA_SampleDataParticleKey.EXTERNAL_TEMP_RAW,
-                       DataParticleKey.VALUE: get_two_byte_value(match.group(8), 0)})
+                       DataParticleKey.VALUE: external_temp_raw})
         result.append({DataParticleKey.VALUE_ID: OPTAA_SampleDataParticleKey.INTERNAL_TEMP_RAW,
-                       DataParticleKey.VALUE: get_two_byte_value(match.group(9), 0)})
+                       DataParticleKey.VALUE: internal_temp_raw})
         result.append({DataParticleKey.VALUE_ID: OPTAA_SampleDataParticleKey.C_REFERENCE_DARK_COUNTS,
-                       DataParticleKey.VALUE: get_two_byte_value(match.group(10), 0)})
+                       DataParticleKey.VALUE: c_reference_dark_counts})
         result.append({DataParticleKey.VALUE_ID: OPTAA_SampleDataParticleKey.C_SIGNAL_DARK_COUNTS,
-                       DataParticleKey.VALUE: get_two_byte_value(match.group(11), 0)})
+                       DataParticleKey.VALUE: c_signal_dark_counts})
         result.append({DataParticleKey.VALUE_ID: OPTAA_SampleDataParticleKey.ELAPSED_RUN_TIME,
-                       DataParticleKey.VALUE: get_four_byte_value(match.group(12), 0)})
+                       DataParticleKey.VALUE: elapsed_run_time})
         result.append({DataParticleKey.VALUE_ID: OPTAA_SampleDataParticleKey.NUM_WAVELENGTHS,
-                       DataParticleKey.VALUE: ord(match.group(13))})
-
-        ### Now build four vectors out of the wavelength data
-        index = INDEX_OF_START_OF_SCAN_DATA
-        C_REFERENCE_COUNTS_VECTOR = []
-        A_REFERENCE_COUNTS_VECTOR = []
-        C_SIGNAL_COUNTS_VECTOR = []
-        A_SIGNAL_COUNTS_VECTOR = []
-        
-        while index < record_length:
-            C_REFERENCE_COUNTS_VECTOR.append(get_two_byte_value(record, index))
-            index += SIZEOF_SCAN_DATA_SIGNAL_COUNTS
-            A_REFERENCE_COUNTS_VECTOR.append(get_two_byte_value(record, index))
-            index += SIZEOF_SCAN_DATA_SIGNAL_COUNTS
-            C_SIGNAL_COUNTS_VECTOR.append(get_two_byte_value(record, index))
-            index += SIZEOF_SCAN_DATA_SIGNAL_COUNTS
-            A_SIGNAL_COUNTS_VECTOR.append(get_two_byte_value(record, index))
-            index += SIZEOF_SCAN_DATA_SIGNAL_COUNTS
+                       DataParticleKey.VALUE: num_wavelengths})
+
+        ### Now build four vectors out of the wavelength data, one row per wavelength
+        scan_data = np.frombuffer(record, SCAN_DATA_DTYPE, scan_groups * SCAN_DATA_CHANNELS,
+                                  INDEX_OF_START_OF_SCAN_DATA).reshape(scan_groups, SCAN_DATA_CHANNELS)
+        (C_REFERENCE_COUNTS_VECTOR, A_REFERENCE_COUNTS_VECTOR,
+         C_SIGNAL_COUNTS_VECTOR, A_SIGNAL_COUNTS_VECTOR) = scan_data.T.tolist()
 
         result.append({DataParticleKey.VALUE_ID: OPTAA_SampleDataParticleKey.C_REFERENCE_COUNTS,
                        DataParticleKey.VALUE: C_REFERENCE_COUNTS_VECTOR})
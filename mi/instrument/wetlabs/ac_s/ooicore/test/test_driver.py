@@ -468,7 +468,13 @@ class TestUNIT(InstrumentDriverUnitTestCase, UtilMixin):
                                             port_timestamp = 3558720820.531179)
         with self.assertRaises(SampleException):
             particle.generate()
-         
+
+        # so is a sample cut short of its record length
+        particle = OPTAA_SampleDataParticle(ShortSample()[:-100],
+                                            port_timestamp = 3558720820.531179)
+        with self.assertRaises(SampleException):
+            particle.generate()
+
     def test_got_data(self):
         """
         Verify sample data passed through the got data method produces the correct data particles